@@ -1,18 +1,50 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, Response
 import os
 import random
-from binance.client import Client
+
+from janvi_bot.rest_client import get_client
+from janvi_bot.price_stream import get_quote, get_price_stream, start_price_stream, cache_snapshot
+from janvi_bot.ttl_cache import TTLCache
+from janvi_bot.rate_limiter import get_rate_limiter
+from janvi_bot import metrics
 
 app = Flask(__name__)
 
 # Detect Render deployment (demo mode)
 IS_PRODUCTION = os.getenv("RENDER") == "true"
 
-# ✅ Create Binance client only for local testing
-def get_client():
-    API_KEY = os.getenv("BINANCE_API_KEY")
-    API_SECRET = os.getenv("BINANCE_API_SECRET")
-    return Client(API_KEY, API_SECRET, testnet=True)
+# Local mode: stream prices for these symbols instead of polling the REST ticker
+STREAM_SYMBOLS = [s for s in os.getenv("PRICE_STREAM_SYMBOLS", "BTCUSDT,ETHUSDT").split(",") if s]
+
+# Response caches per endpoint: (max entries, TTL seconds)
+CACHE_CONFIG = {
+    "price": (int(os.getenv("CACHE_SIZE_PRICE", "1024")), float(os.getenv("CACHE_TTL_PRICE", "1.0"))),
+    "account": (int(os.getenv("CACHE_SIZE_ACCOUNT", "16")), float(os.getenv("CACHE_TTL_ACCOUNT", "5.0"))),
+}
+CACHES = {name: TTLCache(size, ttl, name) for name, (size, ttl) in CACHE_CONFIG.items()}
+
+# Exported on /metrics next to the order-lifecycle spans
+def collect_runtime():
+    families = [
+        ("bot_cache_hits_total", "counter", "Response cache hits", [({"cache": n}, c.hits) for n, c in CACHES.items()]),
+        ("bot_cache_misses_total", "counter", "Response cache misses", [({"cache": n}, c.misses) for n, c in CACHES.items()]),
+        ("bot_rate_headroom", "gauge", "Remaining rate-limit budget per bucket",
+         [({"bucket": k}, v) for k, v in get_rate_limiter().headroom().items()]),
+        ("bot_http_connections", "gauge", "Shared REST client requests vs. new connections",
+         [({"kind": k}, v) for k, v in get_client().connection_stats().items()]),
+    ]
+    stream = get_price_stream()
+    if stream is not None:
+        families.append(("bot_price_stream_messages_total", "counter", "Websocket messages received", [({}, stream.messages)]))
+    return families
+
+metrics.registry.add_collector(collect_runtime)
+
+@app.before_request
+def ensure_price_stream():
+    # Started lazily so each gunicorn worker owns its own stream thread
+    if not IS_PRODUCTION and get_price_stream() is None:
+        start_price_stream(STREAM_SYMBOLS)
 
 # ----------------- ROUTES -----------------
 
@@ -41,17 +73,23 @@ def get_price(symbol):
                 "note": "Live trading disabled in deployed demo"
             })
         else:
-            # Local testing: real API call
-            client = get_client()
-            ticker = client.get_symbol_ticker(symbol=symbol.upper())
+            # Local testing: streamed price, REST ticker only when stale
+            quote = CACHES["price"].get_or_load(symbol.upper(), lambda: get_quote(symbol))
             return jsonify({
                 "symbol": symbol.upper(),
-                "price": ticker["price"],
+                "price": str(quote.price),
+                "bid": quote.bid,
+                "ask": quote.ask,
                 "source": "Binance Testnet"
             })
     except Exception as e:
         return jsonify({"error": str(e)})
 
+def load_account():
+    response = get_client().get("/api/v3/account", signed=True)
+    response.raise_for_status()
+    return response.json()
+
 @app.route("/account")
 def account_info():
     if IS_PRODUCTION:
@@ -65,9 +103,8 @@ def account_info():
             ]
         })
     try:
-        # Local real Binance API call
-        client = get_client()
-        info = client.get_account()
+        # Local real Binance API call, cached and coalesced across requests
+        info = CACHES["account"].get_or_load("account", load_account)
         return jsonify({
             "account_status": "connected",
             "balances": info["balances"]
@@ -93,6 +130,57 @@ def simulate():
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.route("/connections")
+def connections():
+    # Keep-alive reuse vs. new TCP+TLS handshakes on the shared client
+    return jsonify(get_client().connection_stats())
+
+@app.route("/prices")
+def prices():
+    # Streamed price cache with per-symbol staleness
+    return jsonify(cache_snapshot())
+
+@app.route("/metrics/cache")
+def cache_metrics():
+    # Hit/miss/eviction counters for the response caches
+    return jsonify({name: cache.stats() for name, cache in CACHES.items()})
+
+@app.route("/metrics")
+def prometheus_metrics():
+    # Prometheus scrape: span latency summaries, cache / rate-limit / connection gauges
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/metrics/latency")
+def latency_metrics():
+    # Same span histograms as JSON (count, p50/p90/p99/p99.9, max)
+    return jsonify(metrics.registry.snapshot())
+
+def positive_arg(args, name, default, cast):
+    """Query parameter `name` as a positive int/float; ValueError when it is malformed"""
+    try:
+        value = cast(args.get(name, default))
+    except ValueError:
+        value = None
+    if value is None or not 0 < value < float("inf"):
+        raise ValueError(f"{name} must be a positive {cast.__name__}")
+    return value
+
+@app.route("/debug/profile/<action>")
+def profile(action):
+    # Runtime sampling profiler: /debug/profile/start?interval=0.005, then /debug/profile/stop
+    if IS_PRODUCTION:
+        return jsonify({"error": "profiling disabled in deployed demo"}), 403
+    try:
+        if action == "start":
+            interval = positive_arg(request.args, "interval", metrics.PROFILE_INTERVAL, float)
+            return jsonify({"started": metrics.start_profiling(interval)})
+        if action == "stop":
+            report = metrics.stop_profiling(positive_arg(request.args, "top", 25, int))
+            return jsonify(report or {"error": "profiler not running"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"running": metrics.profiling_active()})
+
 # ----------------- MAIN -----------------
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,378 @@
+from aiohttp import web
+import os
+import json
+import random
+import asyncio
+
+from janvi_bot.price_stream import get_fresh_quote, get_cached_quote, get_price_stream, start_price_stream, cache_snapshot, update_price
+from janvi_bot.price_hub import PriceHub
+from janvi_bot.order_router import Account
+from janvi_bot.ttl_cache import TTLCache
+from janvi_bot.rate_limiter import get_rate_limiter
+from janvi_bot.validation import validate_symbol
+from janvi_bot import metrics
+
+# Async serving mode: the routes of app.py on aiohttp, so a request waiting on
+# Binance holds a coroutine instead of a worker thread. Upstream calls share
+# one keep-alive aiohttp session (order_router.Account) and the process-wide
+# rate limiter; dashboards get pushed prices from one upstream subscription:
+#   /stream/prices?symbols=BTCUSDT,ETHUSDT   server-sent events
+#   /ws/prices?symbols=BTCUSDT               websocket; send {"subscribe": [...]} / {"unsubscribe": [...]}
+# Run with `python app_async.py`, or
+#   gunicorn app_async:app -k aiohttp.GunicornWebWorker -w 2
+
+# Detect Render deployment (demo mode)
+IS_PRODUCTION = os.getenv("RENDER") == "true"
+
+# Local mode: stream prices for these symbols instead of polling the REST ticker
+STREAM_SYMBOLS = [s for s in os.getenv("PRICE_STREAM_SYMBOLS", "BTCUSDT,ETHUSDT").split(",") if s]
+
+# Response caches per endpoint: (max entries, TTL seconds)
+CACHE_CONFIG = {
+    "price": (int(os.getenv("CACHE_SIZE_PRICE", "1024")), float(os.getenv("CACHE_TTL_PRICE", "1.0"))),
+    "account": (int(os.getenv("CACHE_SIZE_ACCOUNT", "16")), float(os.getenv("CACHE_TTL_ACCOUNT", "5.0"))),
+}
+CACHES = {name: TTLCache(size, ttl, name) for name, (size, ttl) in CACHE_CONFIG.items()}
+
+# Keep-alive connections to Binance shared by every request of a worker
+WEB_POOL_SIZE = int(os.getenv("WEB_POOL_SIZE", "50"))
+# Symbols one streaming client may watch, and idle seconds between keep-alives
+STREAM_MAX_SYMBOLS = int(os.getenv("STREAM_MAX_SYMBOLS", "20"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+STRATEGY = "web"
+
+upstream_key = web.AppKey("upstream", Account)
+hub_key = web.AppKey("hub", PriceHub)
+demo_feed_key = web.AppKey("demo_feed", asyncio.Task)
+
+
+# Exported on /metrics next to the order-lifecycle spans
+def collect_runtime(app):
+    upstream, hub = app.get(upstream_key), app.get(hub_key)
+    families = [
+        ("bot_cache_hits_total", "counter", "Response cache hits", [({"cache": n}, c.hits) for n, c in CACHES.items()]),
+        ("bot_cache_misses_total", "counter", "Response cache misses", [({"cache": n}, c.misses) for n, c in CACHES.items()]),
+        ("bot_rate_headroom", "gauge", "Remaining rate-limit budget per bucket",
+         [({"bucket": k}, v) for k, v in get_rate_limiter().headroom().items()]),
+    ]
+    if upstream is not None:
+        families.append(("bot_upstream_requests_total", "counter", "Requests sent on the shared async session",
+                         [({"kind": "requests"}, upstream.requests), ({"kind": "errors"}, upstream.errors)]))
+    if hub is not None:
+        stats = hub.stats()
+        families += [
+            ("bot_stream_clients", "gauge", "Connected price stream clients", [({}, stats["subscribers"])]),
+            ("bot_stream_batches_total", "counter", "Price batches pushed to stream clients", [({}, stats["batches"])]),
+            ("bot_stream_dropped", "gauge", "Quotes superseded before a slow client read them", [({}, stats["dropped"])]),
+        ]
+    stream = get_price_stream()
+    if stream is not None:
+        families.append(("bot_price_stream_messages_total", "counter", "Websocket messages received", [({}, stream.messages)]))
+    return families
+
+
+async def on_startup(app):
+    # Per worker, on its own loop: the session, the hub and the stream thread are not fork-safe
+    app[upstream_key] = await Account(STRATEGY, os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_API_SECRET"),
+                                      pool_size=WEB_POOL_SIZE, limiter=get_rate_limiter()).open()
+    app[hub_key] = PriceHub(upstream=None if IS_PRODUCTION else start_price_stream).start()
+    if IS_PRODUCTION:
+        app[demo_feed_key] = asyncio.create_task(demo_feed(app[hub_key]))
+    else:
+        start_price_stream(STREAM_SYMBOLS)
+    metrics.registry.add_collector(lambda: collect_runtime(app))
+
+
+async def on_shutdown(app):
+    # Ends the open streams so their handlers return
+    await app[hub_key].stop()
+    if demo_feed_key in app:
+        app[demo_feed_key].cancel()
+
+
+async def on_cleanup(app):
+    await app[upstream_key].close()
+
+
+async def demo_feed(hub):
+    # Deployed demo: simulated prices for the symbols someone is watching
+    while True:
+        for symbol in hub.watched():
+            update_price(symbol, round(random.uniform(40000, 70000), 2))
+        await asyncio.sleep(1.0)
+
+
+# ----------------- ROUTES -----------------
+
+routes = web.RouteTableDef()
+
+
+@routes.get("/")
+async def home(request):
+    return web.json_response({
+        "project": "Janvi Binance Bot",
+        "status": "running",
+        "mode": "testnet" if IS_PRODUCTION else "local",
+        "server": "async"
+    })
+
+
+@routes.get("/status")
+async def status(request):
+    return web.json_response({"status": "Bot is live"})
+
+
+async def load_quote(upstream, symbol):
+    # Streamed price when fresh, else one ticker call on the shared session
+    quote = get_fresh_quote(symbol)
+    if quote is not None:
+        return quote
+    response = await upstream.request("GET", "/api/v3/ticker/price", {"symbol": symbol}, strategy=STRATEGY)
+    if response.status_code != 200:
+        raise RuntimeError(f"price for {symbol}: {response.status_code} {response.json().get('msg')}")
+    update_price(symbol, float(response.json()["price"]))
+    return get_cached_quote(symbol)
+
+
+@routes.get("/price/{symbol}")
+async def get_price(request):
+    symbol = request.match_info["symbol"].upper()
+    try:
+        if IS_PRODUCTION:
+            # Simulated price for recruiters
+            fake_price = round(random.uniform(40000, 70000), 2)
+            return web.json_response({
+                "symbol": symbol,
+                "price": str(fake_price),
+                "source": "simulation",
+                "note": "Live trading disabled in deployed demo"
+            })
+        upstream = request.app[upstream_key]
+        quote = await CACHES["price"].get_or_load_async(symbol, lambda: load_quote(upstream, symbol))
+        return web.json_response({
+            "symbol": symbol,
+            "price": str(quote.price),
+            "bid": quote.bid,
+            "ask": quote.ask,
+            "source": "Binance Testnet"
+        })
+    except Exception as e:
+        return web.json_response({"error": str(e)})
+
+
+async def load_account(upstream):
+    response = await upstream.request("GET", "/api/v3/account", signed=True, strategy=STRATEGY)
+    if response.status_code != 200:
+        raise RuntimeError(f"account: {response.status_code} {response.json().get('msg')}")
+    return response.json()
+
+
+@routes.get("/account")
+async def account_info(request):
+    if IS_PRODUCTION:
+        # Demo account data for Render
+        return web.json_response({
+            "account_status": "connected (demo mode)",
+            "balances": [
+                {"asset": "BTC", "free": "0.5", "locked": "0.0"},
+                {"asset": "USDT", "free": "1500", "locked": "0.0"},
+                {"asset": "ETH", "free": "2.0", "locked": "0.0"}
+            ]
+        })
+    try:
+        # Local real Binance API call, cached and coalesced across requests
+        upstream = request.app[upstream_key]
+        info = await CACHES["account"].get_or_load_async("account", lambda: load_account(upstream))
+        return web.json_response({
+            "account_status": "connected",
+            "balances": info["balances"]
+        })
+    except Exception as e:
+        return web.json_response({"error": str(e)})
+
+
+@routes.get("/simulate")
+async def simulate(request):
+    return web.json_response({
+        "strategy": "Market Order",
+        "mode": "simulation" if IS_PRODUCTION else "local test",
+        "message": "Simulation executed successfully" if IS_PRODUCTION else "Simulation executed successfully (local)"
+    })
+
+
+@routes.get("/connections")
+async def connections(request):
+    # Requests on the shared async session and its rate budget
+    return web.json_response(request.app[upstream_key].stats())
+
+
+@routes.get("/prices")
+async def prices(request):
+    # Streamed price cache with per-symbol staleness
+    return web.json_response(cache_snapshot())
+
+
+@routes.get("/metrics/cache")
+async def cache_metrics(request):
+    # Hit/miss/eviction counters for the response caches
+    return web.json_response({name: cache.stats() for name, cache in CACHES.items()})
+
+
+@routes.get("/metrics/stream")
+async def stream_metrics(request):
+    # Connected stream clients, batches pushed and quotes skipped for slow clients
+    return web.json_response(request.app[hub_key].stats())
+
+
+@routes.get("/metrics")
+async def prometheus_metrics(request):
+    # Prometheus scrape: span latency summaries, cache / rate-limit / stream gauges
+    return web.Response(body=metrics.render_prometheus().encode(),
+                        headers={"Content-Type": "text/plain; version=0.0.4"})
+
+
+@routes.get("/metrics/latency")
+async def latency_metrics(request):
+    # Same span histograms as JSON (count, p50/p90/p99/p99.9, max)
+    return web.json_response(metrics.registry.snapshot())
+
+
+def positive_arg(query, name, default, cast):
+    """Query parameter `name` as a positive int/float; ValueError when it is malformed"""
+    try:
+        value = cast(query.get(name, default))
+    except ValueError:
+        value = None
+    if value is None or not 0 < value < float("inf"):
+        raise ValueError(f"{name} must be a positive {cast.__name__}")
+    return value
+
+
+@routes.get("/debug/profile/{action}")
+async def profile(request):
+    # Runtime sampling profiler: /debug/profile/start?interval=0.005, then /debug/profile/stop
+    if IS_PRODUCTION:
+        return web.json_response({"error": "profiling disabled in deployed demo"}, status=403)
+    action = request.match_info["action"]
+    try:
+        if action == "start":
+            interval = positive_arg(request.query, "interval", metrics.PROFILE_INTERVAL, float)
+            return web.json_response({"started": metrics.start_profiling(interval)})
+        if action == "stop":
+            report = metrics.stop_profiling(positive_arg(request.query, "top", 25, int))
+            return web.json_response(report or {"error": "profiler not running"})
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response({"running": metrics.profiling_active()})
+
+
+# ----------------- STREAMING -----------------
+
+def stream_symbols(values):
+    """Upper-cased symbols from "A,B" strings or lists; ValueError when one is malformed or there are too many"""
+    if isinstance(values, str):
+        values = values.split(",")
+    symbols = {str(s).strip().upper() for s in values if str(s).strip()}
+    bad = sorted(s for s in symbols if not validate_symbol(s))
+    if bad:
+        raise ValueError(f"invalid symbol(s): {', '.join(bad)}")
+    if len(symbols) > STREAM_MAX_SYMBOLS:
+        raise ValueError(f"at most {STREAM_MAX_SYMBOLS} symbols per stream")
+    return symbols
+
+
+def requested_symbols(request):
+    return stream_symbols(request.query.get("symbols") or STREAM_SYMBOLS)
+
+
+@routes.get("/stream/prices")
+async def stream_prices(request):
+    # Server-sent events: one "data:" line of {symbol: {price, bid, ask}} per batch
+    try:
+        symbols = requested_symbols(request)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                           "X-Accel-Buffering": "no"})
+    await response.prepare(request)
+    hub = request.app[hub_key]
+    subscriber = hub.subscribe(symbols)
+    try:
+        while True:
+            try:
+                batch = await subscriber.next(STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                await response.write(b": keep-alive\n\n")
+                continue
+            if batch is None:
+                break
+            await response.write(f"data: {json.dumps(batch)}\n\n".encode())
+    except ConnectionResetError:
+        pass  # client went away
+    finally:
+        hub.unsubscribe(subscriber)
+    return response
+
+
+async def read_commands(ws, hub, subscriber):
+    # {"subscribe": [...]} / {"unsubscribe": [...]}; ends the subscription when the client closes
+    try:
+        async for msg in ws:
+            if msg.type != web.WSMsgType.TEXT:
+                continue
+            try:
+                command = json.loads(msg.data)
+                if "subscribe" in command:
+                    symbols = stream_symbols(command["subscribe"])
+                    if len(subscriber.symbols | symbols) > STREAM_MAX_SYMBOLS:
+                        raise ValueError(f"at most {STREAM_MAX_SYMBOLS} symbols per stream")
+                    hub.add_symbols(subscriber, symbols)
+                if "unsubscribe" in command:
+                    hub.remove_symbols(subscriber, stream_symbols(command["unsubscribe"]))
+            except (ValueError, TypeError, AttributeError) as e:
+                await ws.send_json({"error": str(e)})
+    finally:
+        subscriber.close()
+
+
+@routes.get("/ws/prices")
+async def ws_prices(request):
+    # Websocket: the same batches as /stream/prices, one JSON message each
+    try:
+        symbols = requested_symbols(request)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    ws = web.WebSocketResponse(heartbeat=STREAM_HEARTBEAT)
+    await ws.prepare(request)
+    hub = request.app[hub_key]
+    subscriber = hub.subscribe(symbols)
+    reader = asyncio.create_task(read_commands(ws, hub, subscriber))
+    try:
+        while True:
+            batch = await subscriber.next()
+            if batch is None:
+                break
+            await ws.send_json(batch)
+    except ConnectionResetError:
+        pass
+    finally:
+        reader.cancel()
+        hub.unsubscribe(subscriber)
+        await ws.close()
+    return ws
+
+
+def create_app():
+    app = web.Application()
+    app.add_routes(routes)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+app = create_app()
+
+# ----------------- MAIN -----------------
+if __name__ == "__main__":
+    web.run_app(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+from janvi_bot import backtest
+
+# Backtest sweep throughput on synthetic 1m klines (geometric random walk):
+#   python benchmarks/bench_backtest.py --candles 1000000 --processes 8
+
+
+def synthetic_klines(path, candles, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.0008, candles)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0005, candles)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.gamma(2.0, 5.0, candles)
+    open_time = 1_600_000_000_000 + np.arange(candles, dtype=np.int64) * 60_000
+    np.savetxt(path, np.column_stack([open_time, open_, high, low, close, volume]), delimiter=",",
+               fmt=["%d", "%.2f", "%.2f", "%.2f", "%.2f", "%.4f"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candles", type=int, default=1_000_000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    specs = {
+        "grid": {"steps": [5, 10, 20, 40], "lower_pct": [0.9, 0.95, 0.97, 0.98, 0.99],
+                 "upper_pct": [1.01, 1.02, 1.03, 1.05, 1.1], "horizon": [240, 1440]},
+        "oco": {"tp_pct": [0.002, 0.005, 0.01, 0.02, 0.03], "stop_pct": [0.002, 0.005, 0.01, 0.02, 0.03],
+                "horizon": [60, 240], "every": [10]},
+        "twap": {"chunks": [2, 5, 10, 20, 50], "interval": [60, 300, 900], "side": ["BUY", "SELL"]},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BACKTEST_CACHE_DIR"] = tmp
+        backtest.CACHE_DIR = tmp
+        path = os.path.join(tmp, "klines.csv")
+        synthetic_klines(path, args.candles)
+        start = time.perf_counter()
+        backtest.load_klines(path)
+        report = {"candles": args.candles, "csv_load_s": round(time.perf_counter() - start, 3), "sweeps": {}}
+
+        for strategy, spec in specs.items():
+            start = time.perf_counter()
+            results = backtest.sweep(path, strategy, spec, processes=args.processes)
+            elapsed = time.perf_counter() - start
+            report["sweeps"][strategy] = {
+                "param_sets": len(results),
+                "elapsed_s": round(elapsed, 3),
+                "candle_param_evals_per_s": round(len(results) * args.candles / elapsed),
+                "best": results[0],
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+from janvi_bot.sim_exchange import start_sim_server
+
+# Grid placement time against the local simulated exchange:
+#   python benchmarks/bench_grid.py --levels 100 --latency 0.02
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated exchange latency per request (s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    server, base_url = start_sim_server(latency=args.latency, weight_limit=0, order_limit=0)
+    os.environ["BINANCE_BASE_URL"] = base_url
+    os.environ.setdefault("BINANCE_API_KEY", "bench")
+    os.environ.setdefault("BINANCE_API_SECRET", "bench")
+    os.environ["BINANCE_ORDER_LIMIT_10S"] = str(max(args.levels, 100))
+
+    from janvi_bot.advanced import grid_order
+    from janvi_bot.rate_limiter import get_rate_limiter
+    from janvi_bot.rest_client import get_client
+
+    report = {"levels": args.levels, "latency_s": args.latency, "runs": []}
+    for workers in args.workers:
+        # Fresh order budget per run so runs don't throttle each other
+        get_rate_limiter().reset()
+        start = time.perf_counter()
+        rows = grid_order.place_grid_orders("BTCUSDT", "BUY", 0.001, steps=args.levels, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        latencies = [r["latency_ms"] for r in rows]
+        report["runs"].append({
+            "workers": workers,
+            "elapsed_s": round(elapsed, 4),
+            "placed": sum(1 for r in rows if r["order_id"] is not None),
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+        })
+    report["connections"] = get_client().connection_stats()
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+os.environ.setdefault("BOT_LOG_CONSOLE", "0")
+from janvi_bot.sim_exchange import MatchingEngine, SimError
+from janvi_bot.user_stream import OrderTracker
+from janvi_bot.advanced.grid_engine import GridEngine, GridManager, BUY, SELL
+
+# Fills processed per second by the self-replenishing grid:
+#   python benchmarks/bench_grid_engine.py --symbols 50 --levels 200
+# "core": engine bookkeeping only (no-op order entry, price walks level by level)
+# "matching": in-process simulated exchange -> executionReports -> tracker -> grid refills
+
+
+def _noop(*args):
+    pass
+
+
+def bench_core(symbols, levels, fills):
+    engines = [GridEngine(f"SYM{i}USDT", 1.0, levels, 0.1, place_fn=_noop, cancel_fn=_noop).start(100.0)
+               for i in range(symbols)]
+    # Each symbol's price sits on a level; stepping onto a neighbour fills the order resting there
+    cursor = [e.sides.index(0) for e in engines]
+    rng = random.Random(1)
+    processed = 0
+    start = time.perf_counter()
+    while processed < fills:
+        k = rng.randrange(symbols)
+        engine = engines[k]
+        step = rng.choice((-1, 1))
+        target = cursor[k] + step
+        if not 0 <= target < levels:
+            continue
+        cid = engine.order_ids[target]
+        if cid is not None and engine.sides[target] == (BUY if step < 0 else SELL):
+            engine.on_fill(cid)
+            processed += 1
+        cursor[k] = target
+    elapsed = time.perf_counter() - start
+    return {"symbols": symbols, "levels_per_symbol": levels, "fills": processed,
+            "fills_per_s": round(processed / elapsed), "round_trips": sum(e.round_trips for e in engines)}
+
+
+def bench_matching(levels, ticks, vol_bps):
+    exchange = MatchingEngine()
+    tracker = OrderTracker()
+    exchange.listeners.append(tracker.apply_execution)
+
+    def place(symbol, side, quantity, price, client_order_id, meta=None):
+        exchange.new_order(symbol, side, "LIMIT", f"{quantity:.5f}", f"{price:.2f}", client_order_id=client_order_id)
+
+    def cancel(symbol, client_order_id):
+        try:
+            exchange.cancel_order(symbol, client_order_id=client_order_id)
+        except SimError:
+            pass
+
+    manager = GridManager(tracker)
+    tracker.on_fill(manager.on_fill)
+    engine = manager.add(GridEngine("BTCUSDT", 0.001, levels, 0.02, place_fn=place, cancel_fn=cancel), 50000.0)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        price = float(exchange.random_walk("BTCUSDT", vol_bps))
+        engine.check_band(price)
+    deadline = time.monotonic() + 10
+    while not tracker._dispatch.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    return {**engine.stats(), "ticks": ticks, "exchange_trades": exchange.trades, "elapsed_s": round(elapsed, 3),
+            "fills_per_s": round(engine.fills / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--levels", type=int, default=200)
+    parser.add_argument("--fills", type=int, default=500000)
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--vol-bps", type=float, default=15.0)
+    args = parser.parse_args()
+
+    report = {
+        "core": bench_core(args.symbols, args.levels, args.fills),
+        "matching": bench_matching(min(args.levels, 100), args.ticks, args.vol_bps),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+os.environ.setdefault("BOT_LOG_CONSOLE", "0")
+from janvi_bot.order_journal import OrderJournal
+from janvi_bot.user_stream import OrderState
+from janvi_bot.exchange_backend import OrderResult
+
+# Order-journal cost and recovery time:
+#   python benchmarks/bench_journal.py --jobs 20 --orders 50 --history 200000
+# "write": time the order path spends journaling one request + ack (enqueue only), and
+#          how many records each fsynced batch carried
+# "recover": rebuild the unfinished jobs from a journal with `history` finished-job events in it
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20, help="unfinished jobs to recover")
+    parser.add_argument("--orders", type=int, default=50, help="orders per job")
+    parser.add_argument("--history", type=int, default=200000, help="orders of already finished jobs")
+    args = parser.parse_args()
+
+    journal = OrderJournal(os.path.join(tempfile.mkdtemp(), "journal.db"))
+    ack = OrderResult(200, {"orderId": 1, "status": "NEW", "executedQty": "0"})
+
+    def write_job(orders, finish):
+        job = journal.intent("twap", {"symbol": "BTCUSDT", "side": "BUY", "total": "1", "chunks": orders, "interval": 1})
+        timings = []
+        for i in range(orders):
+            state = OrderState(f"twap-{job}-{i}", "BTCUSDT", "BUY", "MARKET", None, "0.01", "twap", {"job": job})
+            start = time.perf_counter()
+            journal.progress(job, slice=i)
+            journal.request(state)
+            journal.ack(state.client_order_id, ack, "BTCUSDT")
+            timings.append(time.perf_counter() - start)
+        if finish:
+            journal.done(job)
+        return timings
+
+    start = time.perf_counter()
+    for i in range(max(1, args.history // args.orders)):
+        write_job(args.orders, finish=True)
+        # Keep transactions the size a live bot produces, so checkpoints keep up as they would
+        if i % 20 == 19:
+            journal.flush(timeout=60)
+    timings = []
+    for _ in range(args.jobs):
+        timings += write_job(args.orders, finish=False)
+    journal.flush(timeout=600)
+    write_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    jobs = journal.recover()
+    recover_ms = (time.perf_counter() - start) * 1000
+
+    report = {
+        "write": {"records": journal.records, "records_per_s": round(journal.records / write_elapsed),
+                  "order_path_p50_us": _percentile(timings, 50), "order_path_p99_us": _percentile(timings, 99),
+                  "records_per_batch": journal.stats()["records_per_batch"]},
+        "recover": {"jobs": len(jobs), "orders": sum(len(r.orders) for r in jobs.values()),
+                    "elapsed_ms": round(recover_ms, 1)},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import gc
+import time
+import argparse
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+os.environ.setdefault("BOT_LOG_CONSOLE", "0")
+from janvi_bot.user_stream import OrderTracker, make_client_order_id
+
+# Memory held per tracked order (user_stream.OrderTracker), measured with tracemalloc:
+#   python benchmarks/bench_memory.py --orders 100000
+# "open": registered and acknowledged (NEW), as resting grid levels are
+# "filled": the same orders after their final executionReport; the tracker keeps
+#           the last MAX_CLOSED closed orders, so this is what a busy process plateaus at
+
+
+def execution_report(cid, status, executed="0", last="0"):
+    now = int(time.time() * 1000)
+    return {"e": "executionReport", "E": now, "s": "BTCUSDT", "c": cid, "S": "BUY", "o": "LIMIT", "q": "0.00100",
+            "p": "49000.00", "X": status, "x": "TRADE" if last != "0" else status, "i": 1, "z": executed,
+            "Z": str(float(executed) * 49000), "l": last, "L": "49000.00", "t": 1, "T": now, "g": -1}
+
+
+def settle(tracker):
+    # Events are handed to the dispatch thread; count memory once it has drained them
+    while not tracker._dispatch.empty():
+        time.sleep(0.01)
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100000)
+    args = parser.parse_args()
+
+    tracker = OrderTracker()
+    cids = [make_client_order_id("grid", "bench", i) for i in range(args.orders)]
+
+    def track_open():
+        for i, cid in enumerate(cids):
+            tracker.track(cid, "BTCUSDT", "BUY", "LIMIT", "49000.00", "0.00100", strategy="grid",
+                          meta={"job": "grid-bench", "level": i % 100})
+            tracker.apply_execution(execution_report(cid, "NEW"))
+
+    def fill_all():
+        for cid in cids:
+            tracker.apply_execution(execution_report(cid, "FILLED", "0.00100", "0.00100"))
+
+    tracemalloc.start()
+    baseline = settle(tracker)
+    track_open()
+    open_bytes = settle(tracker) - baseline
+    fill_all()
+    filled_bytes = settle(tracker) - baseline
+    tracemalloc.stop()
+
+    kept = len(tracker.orders)
+    report = {
+        "orders": args.orders,
+        "open": {"bytes_per_order": round(open_bytes / args.orders), "total_mb": round(open_bytes / 2 ** 20, 2)},
+        "filled": {"kept": kept, "bytes_per_order": round(filled_bytes / max(kept, 1)),
+                   "total_mb": round(filled_bytes / 2 ** 20, 2)},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
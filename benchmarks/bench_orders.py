@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+os.environ.setdefault("BOT_LOG_CONSOLE", "0")
+from janvi_bot.sim_exchange import start_sim_server
+from bench_grid import percentile
+
+# Order placement through the order commands' own functions (validation,
+# tracking, journaling, signing, retries) against the simulated exchange:
+#   python benchmarks/bench_orders.py --orders 200 --threads 16 --latency 0.02
+# "latency": one order at a time, p50/p99 per order type
+# "throughput": the same orders from `threads` threads at once on the shared client
+
+TYPES = ("limit", "market", "oco", "futures_limit", "futures_market")
+
+
+def placers():
+    from janvi_bot.limit_order import place_limit_order
+    from janvi_bot.market_order import place_live_market_order
+    from janvi_bot.advanced.oco import place_oco_order
+    # Alternate market sides so positions and the book stay put
+    flips = itertools.count()
+    side = lambda: "SELL" if next(flips) % 2 else "BUY"
+    return {
+        "limit": lambda: place_limit_order("BTCUSDT", "BUY", 0.001, 45000, backend="spot"),
+        "market": lambda: place_live_market_order("BTCUSDT", side(), 0.001, "spot"),
+        "oco": lambda: place_oco_order("BTCUSDT", "SELL", 0.001, 500, 500, backend="spot"),
+        "futures_limit": lambda: place_limit_order("BTCUSDT", "BUY", 0.001, 45000, backend="futures"),
+        "futures_market": lambda: place_live_market_order("BTCUSDT", side(), 0.001, "futures"),
+    }
+
+
+def _ms(samples):
+    return {"p50_ms": round(percentile(samples, 50) * 1000, 3), "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200, help="orders per type and phase")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated exchange latency per request (s)")
+    parser.add_argument("--types", default=",".join(TYPES))
+    args = parser.parse_args()
+
+    server, base_url = start_sim_server(latency=args.latency, weight_limit=0, order_limit=0)
+    received = {"n": 0}
+    lock = threading.Lock()
+    new_order = server.engine.new_order
+
+    def counted_new_order(*a, **kw):
+        with lock:
+            received["n"] += 1
+        return new_order(*a, **kw)
+
+    server.engine.new_order = counted_new_order
+    workdir = os.path.join(BASE_DIR, '..', '.cache', 'bench')
+    os.makedirs(workdir, exist_ok=True)
+    os.environ.update(BINANCE_BASE_URL=base_url, BINANCE_FUTURES_BASE_URL=base_url,
+                      EXCHANGE_INFO_PATH=os.path.join(workdir, "exchange_info.json"),
+                      BOT_JOURNAL_PATH=os.path.join(workdir, "order_journal.db"),
+                      BINANCE_ORDER_LIMIT_10S="10000000", BINANCE_WEIGHT_LIMIT_1M="10000000",
+                      BINANCE_FUTURES_ORDER_LIMIT_10S="10000000", BINANCE_FUTURES_WEIGHT_LIMIT_1M="10000000",
+                      RISK_MAX_OPEN_ORDERS="0")
+    os.environ.setdefault("BINANCE_API_KEY", "bench")
+    os.environ.setdefault("BINANCE_API_SECRET", "bench")
+
+    from janvi_bot.rest_client import get_client
+    place = placers()
+    report = {"orders": args.orders, "threads": args.threads, "latency_s": args.latency, "types": {}}
+    for name in args.types.split(","):
+        fn = place[name]
+        fn()  # warm-up: exchangeInfo, connections, lazy imports
+
+        before = received["n"]
+        samples = []
+        for _ in range(args.orders):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        sequential = {**_ms(samples), "exchange_orders": received["n"] - before}
+
+        before = received["n"]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            for _ in pool.map(lambda _: fn(), range(args.orders)):
+                pass
+        elapsed = time.perf_counter() - start
+        report["types"][name] = {
+            "latency": sequential,
+            "throughput": {"elapsed_s": round(elapsed, 4), "orders_per_s": round(args.orders / elapsed, 1),
+                           "exchange_orders": received["n"] - before},
+        }
+    report["connections"] = get_client().connection_stats()
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
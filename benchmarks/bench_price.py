@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+from janvi_bot.sim_exchange import start_sim_server
+from ws_replay import start_ws_replay
+
+# Price lookup latency: streamed cache vs. REST ticker, against local
+# stand-ins for the REST API and the websocket stream:
+#   python benchmarks/bench_price.py --calls 1000 --latency 0.02
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    pick = lambda p: round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1e6, 2)
+    return {"calls": len(ordered), "p50_us": pick(50), "p99_us": pick(99)}
+
+
+def timed_calls(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated REST latency per request (s)")
+    args = parser.parse_args()
+
+    rest_server, base_url = start_sim_server(latency=args.latency, weight_limit=0, order_limit=0)
+    replay, ws_url = start_ws_replay()
+    os.environ["BINANCE_BASE_URL"] = base_url
+
+    from janvi_bot import price_stream
+    stream = price_stream.start_price_stream(["BTCUSDT"], url=ws_url)
+    deadline = time.monotonic() + 5
+    while price_stream._cache.fresh("BTCUSDT") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    report = {
+        "rest_latency_s": args.latency,
+        "stream": summarize(timed_calls(lambda: price_stream.get_price("BTCUSDT"), args.calls)),
+        "rest": summarize(timed_calls(lambda: price_stream.get_price("BTCUSDT", max_age=0), max(1, args.calls // 20))),
+        "stream_messages": stream.messages,
+    }
+    stream.stop()
+    replay.stop()
+    rest_server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
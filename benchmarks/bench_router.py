@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+os.environ.setdefault("BOT_LOG_CONSOLE", "0")
+from janvi_bot.sim_exchange import start_sim_server
+
+# Order-router throughput against the simulated exchange (with network latency):
+#   python benchmarks/bench_router.py --intents 3000 --accounts 3 --latency 0.02
+# "sequential": one limit order at a time on the shared sync client (the CLI scripts' path)
+# "router": mixed limit/market/OCO/grid intents across accounts and symbols, all in flight at once
+
+PRICES = {"BTCUSDT": 60000.0, "ETHUSDT": 3000.0, "BNBUSDT": 500.0}
+QUANTITIES = {"BTCUSDT": 0.001, "ETHUSDT": 0.02, "BNBUSDT": 0.2}
+
+
+def make_intents(count, accounts, rng):
+    intents = []
+    for i in range(count):
+        symbol = rng.choice(list(PRICES))
+        side = rng.choice(("BUY", "SELL"))
+        account = accounts[i % len(accounts)]
+        roll = rng.random()
+        if roll < 0.6:
+            intent = {"type": "limit", "price": round(PRICES[symbol] * (0.99 if side == "BUY" else 1.01), 2)}
+        elif roll < 0.85:
+            intent = {"type": "market"}
+        elif roll < 0.95:
+            intent = {"type": "oco"}
+        else:
+            intent = {"type": "grid", "steps": 5}
+        intent.update(id=i, account=account, symbol=symbol, side=side, quantity=QUANTITIES[symbol])
+        intents.append(intent)
+    return intents
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--intents", type=int, default=3000)
+    parser.add_argument("--sequential", type=int, default=200)
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server, base_url = start_sim_server(latency=args.latency, weight_limit=0, order_limit=0)
+    engine = server.engine
+    for symbol, price in PRICES.items():
+        engine.set_price(symbol, price)
+
+    names = ["main"] + [f"sub{i}" for i in range(1, args.accounts)]
+    os.environ.update({
+        "BINANCE_BASE_URL": base_url, "BINANCE_ACCOUNTS": ",".join(names),
+        "EXCHANGE_INFO_PATH": os.path.join(tempfile.mkdtemp(), "exchange_info.json"),
+        # Simulator runs without limits; keep the client budgets out of the measurement
+        "BINANCE_ORDER_LIMIT_10S": "1000000", "BINANCE_WEIGHT_LIMIT_1M": "10000000",
+    })
+    for name in names:
+        prefix = "BINANCE" if name == "main" else f"BINANCE_{name.upper()}"
+        os.environ.setdefault(f"{prefix}_API_KEY", f"key-{name}")
+        os.environ.setdefault(f"{prefix}_API_SECRET", f"secret-{name}")
+
+    from janvi_bot.rest_client import get_client
+    from janvi_bot.order_router import OrderRouter, load_accounts
+
+    rng = random.Random(1)
+    client = get_client()
+    start = time.perf_counter()
+    for _ in range(args.sequential):
+        client.post("/api/v3/order", {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "timeInForce": "GTC",
+                                      "quantity": "0.001", "price": "59000"}, signed=True)
+    sequential_rate = args.sequential / (time.perf_counter() - start)
+
+    intents = make_intents(args.intents, names, rng)
+
+    async def run():
+        router = await OrderRouter(load_accounts()).open()
+        start = time.perf_counter()
+        results = await router.route_many(intents)
+        elapsed = time.perf_counter() - start
+        await router.close()
+        return router, results, elapsed
+
+    router, results, elapsed = asyncio.run(run())
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    latencies = sorted(r["latency_ms"] for r in results)
+
+    report = {
+        "latency_s": args.latency,
+        "sequential": {"orders": args.sequential, "orders_per_min": round(sequential_rate * 60)},
+        "router": {
+            "intents": len(intents), "accounts": len(names), "elapsed_s": round(elapsed, 3),
+            "intents_per_min": round(len(intents) / elapsed * 60), "statuses": statuses,
+            "p50_ms": latencies[len(latencies) // 2], "p99_ms": latencies[int(len(latencies) * 0.99)],
+            "requests": {name: a["requests"] for name, a in router.stats()["accounts"].items()},
+        },
+    }
+    print(json.dumps(report, indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
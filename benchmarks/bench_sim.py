@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import http.client
+from multiprocessing import Pool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, '..', 'src'))
+from janvi_bot.sim_exchange import MatchingEngine, start_sim_server
+
+# Simulator throughput: orders/s through the matching engine directly and
+# over HTTP (client processes, so the GIL is not shared with the server):
+#   python benchmarks/bench_sim.py --orders 50000 --clients 4
+
+
+def random_order(rng):
+    side = rng.choice(("BUY", "SELL"))
+    price = f"{50000 + rng.randint(-200, 200) * 0.01:.2f}"
+    return side, price
+
+
+def bench_engine(orders):
+    engine = MatchingEngine()
+    rng = random.Random(1)
+    batch = [random_order(rng) for _ in range(orders)]
+    start = time.perf_counter()
+    for side, price in batch:
+        engine.new_order("BTCUSDT", side, "LIMIT", "0.00100", price)
+    elapsed = time.perf_counter() - start
+    return {"orders": orders, "orders_per_s": round(orders / elapsed), "trades": engine.trades}
+
+
+def _http_client(args):
+    port, count, seed = args
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    for _ in range(count):
+        side, price = random_order(rng)
+        conn.request("POST", f"/api/v3/order?symbol=BTCUSDT&side={side}&type=LIMIT&timeInForce=GTC"
+                             f"&quantity=0.00100&price={price}")
+        conn.getresponse().read()
+    return count
+
+
+def bench_http(orders, clients):
+    server, _ = start_sim_server(weight_limit=0, order_limit=0)
+    per_client = orders // clients
+    start = time.perf_counter()
+    with Pool(clients) as pool:
+        sent = sum(pool.map(_http_client, [(server.server_port, per_client, i) for i in range(clients)]))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return {"orders": sent, "clients": clients, "orders_per_s": round(sent / elapsed), "trades": server.engine.trades}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--http-orders", type=int, default=8000)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+
+    report = {
+        "engine": bench_engine(args.orders),
+        "http": bench_http(args.http_orders, args.clients),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
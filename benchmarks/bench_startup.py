@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(BASE_DIR, '..', 'src')
+sys.path.insert(0, SRC)
+os.environ.setdefault("BOT_LOG_CONSOLE", "0")
+from janvi_bot.sim_exchange import start_sim_server
+
+# CLI startup cost: wall time from spawning a one-shot order command to its
+# first order reaching the exchange (a local simulator), and to the process
+# exiting. The same order goes through the per-script CLI and `bot`:
+#   python benchmarks/bench_startup.py --runs 10
+#   python benchmarks/bench_startup.py --entry bot --commands limit,market
+
+ORDERS = {
+    "limit": ["BTCUSDT", "BUY", "0.001", "59000"],
+    "market": ["BTCUSDT", "BUY", "0.001", "--backend", "spot"],
+    "oco": ["BTCUSDT", "SELL", "0.001", "500", "500"],
+}
+SCRIPTS = {"limit": "janvi_bot.limit_order", "market": "janvi_bot.market_order", "oco": "janvi_bot.advanced.oco"}
+
+
+def command(entry, name):
+    if entry == "bot":
+        return [sys.executable, "-m", "janvi_bot.cli", name] + ORDERS[name]
+    return [sys.executable, "-m", SCRIPTS[name]] + ORDERS[name]
+
+
+def _ms(samples):
+    return {"p50_ms": round(statistics.median(samples) * 1000, 1), "min_ms": round(min(samples) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--entry", default="script,bot", help="comma-separated: script, bot")
+    parser.add_argument("--commands", default="limit,market,oco")
+    args = parser.parse_args()
+
+    server, url = start_sim_server(weight_limit=0, order_limit=0, user_stream=True)
+    arrivals = []
+    new_order = server.engine.new_order
+
+    def timed_new_order(*a, **kw):
+        arrivals.append(time.time())
+        return new_order(*a, **kw)
+
+    server.engine.new_order = timed_new_order
+
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, BINANCE_API_KEY="bench", BINANCE_API_SECRET="bench", BINANCE_BASE_URL=url,
+               BINANCE_FUTURES_BASE_URL=url, BINANCE_WS_URL=server.ws_url, BINANCE_FUTURES_WS_URL=server.ws_url,
+               EXCHANGE_INFO_PATH=os.path.join(workdir, "exchange_info.json"),
+               BOT_JOURNAL_PATH=os.path.join(workdir, "journal.db"), BOT_LOG_PATH=os.path.join(workdir, "bot.log"),
+               BOT_LOG_CONSOLE="0", BINANCE_ORDER_LIMIT_10S="100000",
+               PYTHONPATH=os.pathsep.join(filter(None, [os.path.abspath(SRC), os.getenv("PYTHONPATH")])))
+
+    report = {}
+    for name in args.commands.split(","):
+        for entry in args.entry.split(","):
+            # One untimed run warms the exchangeInfo cache and the OS page cache
+            subprocess.run(command(entry, name), env=env, cwd=workdir, capture_output=True, timeout=60)
+            first_order, exit_ = [], []
+            for _ in range(args.runs):
+                arrivals.clear()
+                start = time.time()
+                subprocess.run(command(entry, name), env=env, cwd=workdir, capture_output=True, timeout=60)
+                exit_.append(time.time() - start)
+                if arrivals:
+                    first_order.append(arrivals[0] - start)
+            if not first_order:
+                report[f"{entry}:{name}"] = {"error": "no order reached the exchange"}
+                continue
+            report[f"{entry}:{name}"] = {"first_order": _ms(first_order), "exit": _ms(exit_)}
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import tempfile
+import argparse
+import subprocess
+import http.client
+import multiprocessing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BASE_DIR, '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+from janvi_bot.sim_exchange import start_sim_server
+from bench_grid import percentile
+
+# Flask /price requests per second, served by gunicorn (app:app) in front of the
+# simulated exchange, loaded by client processes over keep-alive connections:
+#   python benchmarks/bench_web.py --workers 2 --threads 8 --clients 4 --duration 10
+# --server flask runs Flask's threaded dev server instead, where gunicorn is not installed;
+# --server aiohttp runs the async app (app_async.py) in one process.
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, proc, log, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"server exited with {proc.returncode}: {log.read()[-2000:].decode(errors='replace')}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/status")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not come up")
+
+
+def _client(job):
+    port, duration, seed = job
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    latencies, errors, i = [], 0, seed
+    begin = time.perf_counter()
+    end = begin + duration
+    while time.perf_counter() < end:
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", f"/price/{SYMBOLS[i % len(SYMBOLS)]}")
+            response = conn.getresponse()
+            body = response.read()
+            ok = response.status == 200 and b'"error"' not in body
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+    return latencies, errors, time.perf_counter() - begin
+
+
+def server_command(server, port, workers, threads):
+    if server == "gunicorn":
+        return [shutil.which("gunicorn") or "gunicorn", "-w", str(workers), "-k", "gthread", "--threads", str(threads),
+                "-b", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"]
+    if server == "aiohttp":
+        return [sys.executable, "-c", "from aiohttp import web; from app_async import app; "
+                f"web.run_app(app, host='127.0.0.1', port={port}, print=None)"]
+    return [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", choices=("gunicorn", "flask", "aiohttp"), default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated exchange latency per request (s)")
+    args = parser.parse_args()
+
+    report = {"server": args.server, "workers": args.workers, "threads": args.threads, "clients": args.clients,
+              "latency_s": args.latency}
+    if args.server == "gunicorn" and shutil.which("gunicorn") is None:
+        print(json.dumps({**report, "skipped": "gunicorn not installed (pip install gunicorn, or --server flask)"},
+                         indent=2))
+        return
+
+    server, base_url = start_sim_server(latency=args.latency, weight_limit=0, order_limit=0, user_stream=True)
+    port = free_port()
+    env = dict(os.environ, BINANCE_BASE_URL=base_url, BINANCE_WS_URL=server.ws_url, BOT_LOG_CONSOLE="0",
+               BINANCE_API_KEY=os.getenv("BINANCE_API_KEY", "bench"),
+               BINANCE_API_SECRET=os.getenv("BINANCE_API_SECRET", "bench"),
+               PRICE_STREAM_SYMBOLS=",".join(SYMBOLS), BINANCE_WEIGHT_LIMIT_1M="10000000")
+    # The web apps import janvi_bot as installed; a checkout that is not installed serves it from src
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (os.path.join(ROOT, "src"), env.get("PYTHONPATH"))))
+    env.pop("RENDER", None)
+    # Server output goes to a file: an unread pipe fills up and stalls the server
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen(server_command(args.server, port, args.workers, args.threads), cwd=ROOT, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    try:
+        wait_ready(port, proc, log)
+        # Warm-up: every worker's price stream, caches and client pool
+        _client((port, 1.0, 0))
+        # Spawned: forking a process that runs the simulator's threads is not safe
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            results = pool.map(_client, [(port, args.duration, i) for i in range(args.clients)])
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        server.shutdown()
+
+    latencies = [x for samples, _, _ in results for x in samples]
+    report.update({
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors, _ in results),
+        "requests_per_s": round(sum(len(samples) / elapsed for samples, _, elapsed in results), 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BASE_DIR, '..')
+
+# Benchmark suite: runs each benchmark below in its own process against the
+# local simulated exchange (fully offline) and writes one JSON report with
+# the environment it ran in. --compare checks it against an earlier report
+# and exits 1 when a metric got worse by more than --tolerance, so two
+# versions can be compared on the same machine (--repeat N reports each
+# metric's median over N runs, which steadies that on a noisy machine):
+#   python benchmarks/run_suite.py --repeat 3 --out bench-0.2.json
+#   python benchmarks/run_suite.py --repeat 3 --compare bench-0.2.json
+
+# name -> (script, args, --quick args); --latency is passed to those that take it
+SUITE = {
+    "orders": ("bench_orders.py", ["--orders", "200", "--threads", "16"], ["--orders", "30"]),
+    "grid": ("bench_grid.py", ["--levels", "100", "--workers", "1", "16"], ["--levels", "20"]),
+    "twap_jitter": ("bench_scheduler.py", ["--jobs", "500", "--slices", "20", "--interval", "0.05"],
+                    ["--jobs", "100", "--slices", "10"]),
+    "web": ("bench_web.py", ["--duration", "10"], ["--duration", "3"]),
+    "memory": ("bench_memory.py", ["--orders", "100000"], ["--orders", "20000"]),
+}
+LATENCY_FLAG = {"orders": "--latency", "grid": "--latency", "web": "--latency"}
+
+# Metric direction by key suffix; anything else (counts, settings) is not compared,
+# nor are single worst samples (max_ms), which one scheduling hiccup decides
+HIGHER_IS_BETTER = ("per_s", "per_request")
+LOWER_IS_BETTER = ("_ms", "elapsed_s", "bytes_per_order", "total_mb")
+UNCOMPARED = ("max_ms", "min_ms")
+
+
+def _version():
+    try:
+        import tomllib
+        with open(os.path.join(ROOT, "pyproject.toml"), "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+    except (ImportError, OSError, KeyError):
+        return None
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True,
+                             timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment(args):
+    return {"version": _version(), "git": _git_revision(), "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "quick": args.quick, "repeat": args.repeat,
+            "latency_s": args.latency,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+
+def run_one(name, args):
+    script, full, quick = SUITE[name]
+    cmd = [sys.executable, os.path.join(BASE_DIR, script)] + (quick if args.quick else full)
+    if name in LATENCY_FLAG:
+        cmd += [LATENCY_FLAG[name], str(args.latency)]
+    if name == "web":
+        cmd += ["--server", args.web_server]
+    env = dict(os.environ, BOT_LOG_CONSOLE="0")
+    print(f"[{name}] {' '.join(cmd[1:])}", file=sys.stderr)
+    start = time.perf_counter()
+    try:
+        out = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=args.timeout,
+                             stdin=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {args.timeout}s"}
+    if out.returncode != 0:
+        return {"error": f"exit {out.returncode}: {out.stderr.strip()[-2000:]}"}
+    try:
+        report = json.loads(out.stdout)
+    except ValueError:
+        return {"error": f"no JSON report: {out.stdout.strip()[-500:]}"}
+    report["wall_s"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def median_report(reports):
+    """Reports of repeated runs merged leaf by leaf: numbers become their median"""
+    first = reports[0]
+    if isinstance(first, dict):
+        return {key: median_report([r[key] for r in reports if key in r]) for key in first}
+    if isinstance(first, list) and all(isinstance(r, list) and len(r) == len(first) for r in reports):
+        return [median_report(list(items)) for items in zip(*reports)]
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        return statistics.median(reports)
+    return first
+
+
+def flatten(value, prefix=""):
+    """{"a": {"b": [1]}} -> {"a.b.0": 1}, numbers only"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def direction(key):
+    leaf = key.rsplit(".", 1)[-1]
+    if leaf in UNCOMPARED:
+        return 0
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(baseline, current, tolerance):
+    """Metrics that moved by more than `tolerance` (relative) between two reports"""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    regressions, improvements = [], []
+    for key in sorted(old.keys() & new.keys()):
+        sign = direction(key)
+        if not sign or not old[key]:
+            continue
+        change = (new[key] - old[key]) / abs(old[key])
+        row = {"metric": key, "baseline": old[key], "current": new[key], "change_pct": round(change * 100, 1)}
+        if change * sign < -tolerance:
+            regressions.append(row)
+        elif change * sign > tolerance:
+            improvements.append(row)
+    return {"baseline": baseline.get("environment"), "tolerance": tolerance, "regressions": regressions,
+            "improvements": improvements}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", default=",".join(SUITE), help=f"comma-separated subset of: {', '.join(SUITE)}")
+    parser.add_argument("--quick", action="store_true", help="smaller runs, for a fast smoke check")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated exchange latency per request (s)")
+    parser.add_argument("--web-server", choices=("gunicorn", "flask", "aiohttp"), default="gunicorn")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark; each metric reports the median")
+    parser.add_argument("--timeout", type=float, default=600.0, help="per benchmark (s)")
+    parser.add_argument("--out", help="write the report here (default: stdout)")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change flagged by --compare")
+    args = parser.parse_args()
+
+    names = [n for n in args.only.split(",") if n]
+    unknown = [n for n in names if n not in SUITE]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        runs = [run_one(name, args) for _ in range(args.repeat)]
+        ok = [run for run in runs if "error" not in run]
+        results[name] = median_report(ok) if ok else runs[0]
+    report = {"environment": environment(args), "results": results}
+    failed = [name for name, result in report["results"].items() if "error" in result]
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(baseline, report, args.tolerance)
+        for row in report["comparison"]["regressions"]:
+            print(f"REGRESSION {row['metric']}: {row['baseline']} -> {row['current']} ({row['change_pct']:+}%)",
+                  file=sys.stderr)
+        if (baseline["environment"].get("quick"), baseline["environment"].get("latency_s")) != (args.quick, args.latency):
+            print("warning: baseline ran with different --quick/--latency settings", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for name in failed:
+        print(f"[{name}] failed: {report['results'][name]['error']}", file=sys.stderr)
+    sys.exit(1 if failed or report.get("comparison", {}).get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import json
+import asyncio
+import threading
+from urllib.parse import urlsplit, parse_qs
+import websockets
+
+# Local websocket stand-in for the Binance combined stream endpoint.
+# Replays recorded {"stream": ..., "data": ...} lines from a JSONL file,
+# filtered to the streams the client asked for, in a loop.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_PATH = os.path.join(BASE_DIR, "data", "price_stream_sample.jsonl")
+
+
+def load_recording(path=SAMPLE_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+    def __init__(self, messages, interval=0.001, loop_forever=True):
+        self.messages = messages
+        self.interval = interval
+        self.loop_forever = loop_forever
+        self.sent = 0
+
+    async def _handler(self, ws):
+        query = parse_qs(urlsplit(ws.request.path).query)
+        streams = set("/".join(query.get("streams", [])).split("/")) - {""}
+
+        async def listen():
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("method") == "SUBSCRIBE":
+                    streams.update(msg.get("params", []))
+                await ws.send(json.dumps({"result": None, "id": msg.get("id")}))
+
+        listener = asyncio.ensure_future(listen())
+        try:
+            while True:
+                for msg in self.messages:
+                    if msg["stream"] in streams:
+                        await ws.send(json.dumps(msg))
+                        self.sent += 1
+                        await asyncio.sleep(self.interval)
+                if not self.loop_forever:
+                    break
+                await asyncio.sleep(self.interval)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            listener.cancel()
+
+    def start(self, port=0):
+        """Serve on a background thread; returns the ws:// base URL"""
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+
+            async def main():
+                self.server = await websockets.serve(self._handler, "127.0.0.1", port)
+                self.port = self.server.sockets[0].getsockname()[1]
+                ready.set()
+                await self.server.wait_closed()
+
+            self.loop.run_until_complete(main())
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait(5)
+        return f"ws://127.0.0.1:{self.port}"
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+
+
+def start_ws_replay(path=SAMPLE_PATH, interval=0.001, port=0):
+    """Start a replay server for a recording; returns (server, url)"""
+    server = ReplayServer(load_recording(path), interval=interval)
+    return server, server.start(port)
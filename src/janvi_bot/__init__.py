@@ -0,0 +1,3 @@
+# Binance spot/futures trading bot: order scripts, strategies (advanced/) and the shared core
+
+__version__ = "0.2.0"
@@ -0,0 +1,4 @@
+from janvi_bot.cli import main
+
+# python -m janvi_bot COMMAND ARGS...  (same as the `bot` script)
+main()
@@ -0,0 +1 @@
+# TWAP/VWAP/POV, grid and OCO strategies built on the janvi_bot core
@@ -0,0 +1,372 @@
+import os
+import sys
+import time
+import uuid
+import itertools
+import threading
+from array import array
+from functools import partial
+
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.price_stream import get_cached_price, start_price_stream
+from janvi_bot.scheduler import PeriodicJob, get_scheduler
+from janvi_bot.user_stream import get_order_tracker, start_user_stream, make_client_order_id
+from janvi_bot.exchange_backend import get_backend, backend_from_argv
+from janvi_bot.order_journal import get_journal
+
+# Long-running, self-replenishing grid. Levels are evenly spaced around the
+# mid: BUYs below, SELLs above, one empty gap at the mid. When a BUY at level
+# i fills, a SELL goes up at i+1; when a SELL at i fills, a BUY goes down at
+# i-1 — so every round trip earns one level spacing. If price leaves the band
+# the grid cancels and re-lays itself around the new price.
+#
+# Level state lives in flat arrays (prices, side per level) plus a
+# clientOrderId -> level dict, so a fill is an O(1) update however many
+# levels and symbols one process runs.
+#
+# This is the bot's only refilling grid (grid_order lays one-shot ladders).
+# A live grid is a journaled job: its orders carry their level, and every
+# layout records its mid, so --resume rebuilds the levels after a crash and
+# refills the ones that filled while the bot was down.
+
+EMPTY, BUY, SELL = 0, 1, 2
+SIDES = {BUY: "BUY", SELL: "SELL"}
+SIDE_CODES = {"BUY": BUY, "SELL": SELL}
+RELEASED_STATUSES = ("CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH")
+BAND_CHECK_INTERVAL = float(os.getenv("GRID_BAND_CHECK_INTERVAL", "1.0"))
+STRATEGY = "grid_engine"
+# Per-process tag in every clientOrderId, so a restarted engine never reuses a live order's id
+RUN_ID = uuid.uuid4().hex[:8]
+
+
+# Default exchange hooks: REST order entry on a backend (default BINANCE_BACKEND),
+# tracked for user-data stream fills (meta: the order's level and job)
+def rest_place(symbol, side, quantity, price, client_order_id, meta=None, backend=None):
+    backend = get_backend(backend)
+    quantity, price = backend.prepare_order(symbol, quantity, price)
+    get_order_tracker().track(client_order_id, symbol, side, "LIMIT", price, quantity, strategy=STRATEGY,
+                              meta={**(meta or {}), "backend": backend.name})
+    response = backend.new_order({
+        "symbol": symbol, "side": side, "type": "LIMIT", "timeInForce": "GTC",
+        "quantity": quantity, "price": price, "newClientOrderId": client_order_id,
+    }, strategy=STRATEGY)
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} {response.json().get('msg')}")
+
+
+def rest_cancel(symbol, client_order_id, backend=None):
+    response = get_backend(backend).cancel_order(symbol, client_order_id, strategy=STRATEGY)
+    # -2011: already filled or cancelled, nothing left to do
+    if response.status_code != 200 and response.json().get("code") != -2011:
+        raise RuntimeError(f"{response.status_code} {response.json().get('msg')}")
+
+
+class GridEngine:
+    _ids = itertools.count(1)
+
+    def __init__(self, symbol, quantity, levels=20, width_pct=0.02, place_fn=rest_place, cancel_fn=rest_cancel, snap=None,
+                 job=None, price_url=None):
+        if levels < 3:
+            raise ValueError("a grid needs at least 3 levels")
+        self.id = next(GridEngine._ids)
+        self.symbol = symbol.upper()
+        self.quantity = quantity
+        self.levels = levels
+        self.width_pct = width_pct
+        self.place_fn = place_fn
+        self.cancel_fn = cancel_fn
+        self.snap = snap or (lambda p: round(p, 2))
+        self.job = job  # journal job id: orders and layouts are journaled under it
+        self.price_url = price_url  # price stream of the grid's market, for the band check (None: spot)
+
+        self.prices = array("d", bytes(8 * levels))
+        self.sides = bytearray(levels)
+        self.order_ids = [None] * levels
+        self.level_of = {}
+        self.spacing = 0.0
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self.fills = 0
+        self.round_trips = 0
+        self.realized = 0.0
+        self.recenters = 0
+        self.errors = 0
+
+    def _layout(self, mid):
+        lower = mid * (1 - self.width_pct / 2)
+        self.spacing = mid * self.width_pct / (self.levels - 1)
+        for i in range(self.levels):
+            self.prices[i] = self.snap(lower + i * self.spacing)
+
+    def _reserve(self, level, side):
+        # Called with the lock held: claim the level before the order is sent so
+        # an immediate fill event can already be routed back to it
+        if self.job is not None:
+            cid = make_client_order_id(self.job, RUN_ID, level, next(self._seq))
+        else:
+            cid = f"ge{RUN_ID}{self.id}-{level}-{next(self._seq)}"
+        self.sides[level] = side
+        self.order_ids[level] = cid
+        self.level_of[cid] = level
+        return (level, side, cid)
+
+    def _send(self, actions):
+        for level, side, cid in actions:
+            try:
+                self.place_fn(self.symbol, SIDES[side], self.quantity, self.prices[level], cid,
+                              {"level": level, "job": self.job})
+            except Exception as e:
+                self.errors += 1
+                log_error(f"Grid {self.symbol} level {level} {SIDES[side]} failed: {e}")
+                with self._lock:
+                    if self.order_ids[level] == cid:
+                        self.sides[level] = EMPTY
+                        self.order_ids[level] = None
+                        self.level_of.pop(cid, None)
+
+    def start(self, mid):
+        """Lay the grid around `mid`: BUYs below, SELLs above, the level nearest mid left empty"""
+        with self._lock:
+            self._layout(mid)
+            gap = min(range(self.levels), key=lambda i: abs(self.prices[i] - mid))
+            actions = [self._reserve(i, BUY if i < gap else SELL) for i in range(self.levels) if i != gap]
+        if self.job is not None:
+            get_journal().progress(self.job, mid=mid)
+        self._send(actions)
+        log_info(f"Grid {self.symbol} laid: {self.levels} levels {self.prices[0]}..{self.prices[-1]}, spacing {self.spacing:.2f}")
+        return self
+
+    def resume(self, mid, orders):
+        """Rebuild the levels of a grid laid around `mid` from its open orders (journal order records)"""
+        with self._lock:
+            self._layout(mid)
+            for order in orders:
+                level = (order.get("meta") or {}).get("level")
+                if level is None or not 0 <= level < self.levels or order.get("side") not in SIDE_CODES:
+                    continue
+                cid = order["clientOrderId"]
+                self.sides[level] = SIDE_CODES[order["side"]]
+                self.order_ids[level] = cid
+                self.level_of[cid] = level
+        log_info(f"Grid {self.symbol} resumed around {mid}: {len(self.level_of)} open levels", job=self.job)
+        return self
+
+    def on_fill(self, client_order_id):
+        """Refill one level away from a fully filled level; returns False for orders that aren't ours"""
+        with self._lock:
+            level = self.level_of.pop(client_order_id, None)
+            if level is None:
+                return False
+            side = self.sides[level]
+            self.sides[level] = EMPTY
+            self.order_ids[level] = None
+            self.fills += 1
+            target = level + 1 if side == BUY else level - 1
+            if side == SELL:
+                self.round_trips += 1
+                self.realized += (self.prices[level] - self.prices[level - 1]) * self.quantity if level else 0.0
+            action = None
+            if 0 <= target < self.levels and self.sides[target] == EMPTY:
+                action = self._reserve(target, SELL if side == BUY else BUY)
+        if action is not None:
+            self._send([action])
+        return True
+
+    def release(self, client_order_id):
+        """Free the level of an order that ended without filling (cancelled elsewhere, expired, never arrived)"""
+        with self._lock:
+            level = self.level_of.pop(client_order_id, None)
+            if level is None:
+                return False
+            if self.order_ids[level] == client_order_id:
+                self.sides[level] = EMPTY
+                self.order_ids[level] = None
+        return True
+
+    def check_band(self, price):
+        """Re-center when price has left the laid band; True if it did"""
+        if price is None or self.prices[0] <= price <= self.prices[-1]:
+            return False
+        self.recenter(price)
+        return True
+
+    def recenter(self, mid):
+        with self._lock:
+            open_ids = [cid for cid in self.order_ids if cid is not None]
+            self.sides[:] = bytes(self.levels)
+            self.order_ids = [None] * self.levels
+            self.level_of.clear()
+            self.recenters += 1
+        log_info(f"Grid {self.symbol} re-centering on {mid} (cancelling {len(open_ids)} orders)")
+        for cid in open_ids:
+            try:
+                self.cancel_fn(self.symbol, cid)
+            except Exception as e:
+                self.errors += 1
+                log_error(f"Grid {self.symbol} cancel {cid} failed: {e}")
+        self.start(mid)
+
+    def stop(self):
+        with self._lock:
+            open_ids = [cid for cid in self.order_ids if cid is not None]
+            self.sides[:] = bytes(self.levels)
+            self.order_ids = [None] * self.levels
+            self.level_of.clear()
+        for cid in open_ids:
+            try:
+                self.cancel_fn(self.symbol, cid)
+            except Exception as e:
+                log_error(f"Grid {self.symbol} cancel {cid} failed: {e}")
+        if self.job is not None:
+            get_journal().done(self.job, "STOPPED")
+
+    def stats(self):
+        return {
+            "symbol": self.symbol, "levels": self.levels, "band": [self.prices[0], self.prices[-1]],
+            "open_buys": self.sides.count(BUY), "open_sells": self.sides.count(SELL), "fills": self.fills,
+            "round_trips": self.round_trips, "realized": round(self.realized, 8), "recenters": self.recenters,
+            "errors": self.errors,
+        }
+
+
+class GridManager:
+    """Routes fill events to per-symbol grids and watches their bands on the shared scheduler"""
+
+    def __init__(self, tracker=None, price_fn=get_cached_price):
+        self.engines = {}
+        self.tracker = tracker
+        self.price_fn = price_fn
+        self._band_job = None
+
+    def add(self, engine, mid):
+        self.engines[engine.symbol] = engine
+        engine.start(mid)
+        return engine
+
+    def adopt(self, engine):
+        """Manage an engine that is already laid (a resumed grid)"""
+        self.engines[engine.symbol] = engine
+        return engine
+
+    def on_fill(self, fill):
+        state = fill.order
+        if state.status != "FILLED":
+            return  # refill only once the level is complete
+        engine = self.engines.get(state.symbol)
+        if engine is not None:
+            engine.on_fill(state.client_order_id)
+
+    def on_update(self, state, exec_type=None):
+        if state.status not in RELEASED_STATUSES:
+            return
+        engine = self.engines.get(state.symbol)
+        if engine is not None:
+            engine.release(state.client_order_id)
+
+    def attach(self, tracker=None):
+        """Consume fills and cancellations from the order tracker and start the band watcher"""
+        self.tracker = tracker or self.tracker or get_order_tracker()
+        self.tracker.on_fill(self.on_fill)
+        self.tracker.on_update(self.on_update)
+        self._band_job = get_scheduler().submit(PeriodicJob(self.check_bands, BAND_CHECK_INTERVAL, name="grid-bands"))
+        return self
+
+    def check_bands(self, price_fn=None):
+        price_fn = price_fn or self.price_fn
+        for engine in list(self.engines.values()):
+            engine.check_band(price_fn(engine.symbol, engine.price_url))
+
+    def stop(self):
+        if self._band_job is not None:
+            self._band_job.cancel()
+        for engine in self.engines.values():
+            engine.stop()
+
+    def stats(self):
+        return [engine.stats() for engine in self.engines.values()]
+
+
+def _live_engine(symbol, quantity, levels, width_pct, backend, job):
+    # An engine placing through REST on `backend`, with its band fed by the price stream
+    filters = backend.get_filters(symbol)
+    snap = (lambda p: float(filters.round_price(p))) if filters else None
+    start_price_stream([symbol], backend.stream_url)
+    start_user_stream(wait=10, backend=backend)
+    return GridEngine(symbol, quantity, levels, width_pct, place_fn=partial(rest_place, backend=backend),
+                      cancel_fn=partial(rest_cancel, backend=backend), snap=snap, job=job, price_url=backend.stream_url)
+
+
+def run_grid(symbol, quantity, levels=20, width_pct=0.02, backend=None):
+    """Start a live grid on the exchange (REST + user-data stream) and return its manager"""
+    backend = get_backend(backend)
+    backend.check("LIMIT")
+    symbol = symbol.upper()
+    job = get_journal().intent("grid", {"symbol": symbol, "quantity": quantity, "levels": levels,
+                                        "width_pct": width_pct, "backend": backend.name})
+    engine = _live_engine(symbol, quantity, levels, width_pct, backend, job)
+    manager = GridManager().attach()
+    manager.add(engine, backend.price(symbol))
+    return manager
+
+
+def resume_grids():
+    """Re-attach the grids that were running when the process died; returns their manager (None if there were none).
+
+    Each grid's open levels come back from the journal around its last mid; the
+    orders are then looked up once, so levels that filled meanwhile are refilled
+    and ones that are gone are freed. The stream keeps it going from there.
+    """
+    journal = get_journal()
+    manager = None
+    for record in journal.recover("grid").values():
+        params = record.params
+        if "width_pct" not in params:
+            log_error(f"Journal job {record.job} is not a grid engine run; not resumed", job=record.job)
+            continue
+        backend = get_backend(params.get("backend"))
+        engine = _live_engine(params["symbol"], params["quantity"], params["levels"], params["width_pct"], backend,
+                              record.job)
+        if manager is None:
+            manager = GridManager().attach()
+        manager.adopt(engine.resume(record.progress.get("mid") or backend.price(engine.symbol), record.open_orders()))
+        journal.reconcile(record, backend, get_order_tracker())
+    return manager
+
+
+# CLI
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    backend = backend_from_argv(argv)
+    if argv[1:] == ["--resume"]:
+        manager = resume_grids()
+        if manager is None:
+            log_info("No grid to resume")
+            return
+    elif len(argv) < 3:
+        print("Usage: python -m janvi_bot.advanced.grid_engine "
+              "SYMBOL QUANTITY [LEVELS WIDTH_PCT] [--backend spot|futures]")
+        print("       python -m janvi_bot.advanced.grid_engine --resume")
+        sys.exit(1)
+    else:
+        symbol = argv[1].upper()
+        quantity = float(argv[2])
+        levels = int(argv[3]) if len(argv) > 3 else 20
+        width_pct = float(argv[4]) if len(argv) > 4 else 0.02
+        try:
+            manager = run_grid(symbol, quantity, levels, width_pct, backend)
+        except ValueError as e:
+            log_error(str(e))
+            sys.exit(1)
+    try:
+        while True:
+            time.sleep(60)
+            for stats in manager.stats():
+                log_info("Grid status", **stats)
+    except KeyboardInterrupt:
+        manager.stop()
+        get_journal().flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import sys
+import time
+from functools import partial
+
+from janvi_bot.batch_placer import place_batch, format_table, DEFAULT_WORKERS
+from janvi_bot.bot_logging import log_info, log_error, log_payload, elapsed_ms
+from janvi_bot.symbol_filters import FilterError
+from janvi_bot.metrics import span
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id
+from janvi_bot.exchange_backend import get_backend, backend_from_argv
+from janvi_bot.order_journal import get_journal
+from janvi_bot.order_book import get_order_book, SYNC_WAIT
+
+# Upper bound on waiting workers when levels go through the batcher
+BATCH_WORKER_CAP = 100
+
+# Get current market price (spot: streamed cache, REST only when stale)
+def get_current_price(symbol, backend=None):
+    return get_backend(backend).price(symbol)
+
+# Place limit order (meta: grid level / job, carried on the tracked order;
+# batcher: send through futures batchOrders instead of one request per order)
+def place_limit_order(symbol, side, quantity, price, meta=None, batcher=None, backend=None, client_order_id=None):
+    side = side.upper()
+    symbol = symbol.upper()
+    backend = get_backend(backend)
+    backend.check("LIMIT")
+    log_info(f"Placing grid LIMIT order: {side} {quantity} {symbol} at {price}", backend=backend.name)
+    tags = {"endpoint": backend.order_path, "symbol": symbol, "strategy": "grid"}
+    with span("validate", **tags):
+        quantity, price = backend.prepare_order(symbol, quantity, price)
+
+    params = {
+        "symbol": symbol,
+        "side": side,
+        "type": "LIMIT",
+        "quantity": quantity,
+        "price": price,
+        "timeInForce": "GTC",
+        "newClientOrderId": client_order_id or make_client_order_id("grid")
+    }
+    get_order_tracker().track(params["newClientOrderId"], symbol, side, "LIMIT", price, quantity, strategy="grid", meta=meta)
+
+    try:
+        start = time.perf_counter()
+        if batcher is not None:
+            response = batcher.submit(params).result()
+        else:
+            response = backend.new_order(params, strategy="grid")
+        with span("parse", **tags):
+            body = response.json()
+        log_info(f"Response: {response.status_code}", symbol=symbol, price=price, order_id=body.get("orderId"),
+                 latency_ms=elapsed_ms(start), error=body.get("msg"))
+        log_payload("Grid order response", body, symbol=symbol)
+        return response
+    except Exception as e:
+        log_error(f"Error placing order: {e}", symbol=symbol, price=price)
+        raise
+
+# Level prices and the gap between them, snapped to the tick size
+def grid_levels(current_price, steps, lower_pct, upper_pct, snap):
+    lower_price = snap(current_price * lower_pct)
+    upper_price = snap(current_price * upper_pct)
+    price_gap = (upper_price - lower_price) / max(steps - 1, 1)
+    return [snap(lower_price + i * price_gap) for i in range(steps)], snap(price_gap)
+
+# Depth-aware levels (mirrored order book): over the grid's side of the range
+# (below the market for BUY, above for SELL) each level sits behind an equal
+# share of the resting size, so levels bunch where liquidity is thick and
+# spread out where it is thin. None when the book has nothing in the range.
+def depth_grid_levels(book, side, current_price, steps, lower_pct, upper_pct, snap):
+    book_side = "bids" if side == "BUY" else "asks"
+    mid = book.mid()
+    if mid is None:
+        return None
+    far = current_price * (lower_pct if side == "BUY" else upper_pct)
+    total = book.size_within(book_side, abs(far / mid - 1) * 10000)
+    if total <= 0:
+        return None
+    prices = sorted(snap(book.price_for_size(book_side, min(total * (i + 1) / steps, total))) for i in range(steps))
+    return prices, snap((prices[-1] - prices[0]) / max(steps - 1, 1))
+
+# Place grid orders automatically around current price
+def place_grid_orders(symbol, side, quantity, steps=5, lower_pct=0.98, upper_pct=1.02, max_workers=DEFAULT_WORKERS,
+                      batch=False, backend=None, depth=False):
+    # Batching is a futures endpoint: --batch alone targets futures
+    try:
+        backend = get_backend(backend or ("futures" if batch else None))
+        backend.check("LIMIT")
+    except ValueError as e:
+        log_error(f"Grid rejected locally: {e}")
+        return []
+    if batch and not backend.supports_batch:
+        log_error(f"Grid rejected locally: {backend.name} backend has no batch order endpoint")
+        return []
+
+    current_price = get_current_price(symbol, backend)
+    log_info(f"Current price of {symbol}: {current_price}", backend=backend.name)
+
+    # Level prices snap to the symbol's tick size (2 decimals without exchangeInfo)
+    try:
+        filters = backend.get_filters(symbol)
+    except FilterError as e:
+        log_error(str(e))
+        return []
+    snap = filters.round_price if filters else (lambda p: round(p, 2))
+
+    levels = None
+    if depth:
+        book = get_order_book(symbol, backend, wait=SYNC_WAIT)
+        levels = depth_grid_levels(book, side.upper(), current_price, steps, lower_pct, upper_pct, snap) if book else None
+        if levels is None:
+            log_info("Order book unavailable or empty in range; spacing grid levels evenly", symbol=symbol.upper())
+    prices, price_gap = levels or grid_levels(current_price, steps, lower_pct, upper_pct, snap)
+
+    log_info(f"Placing {steps} {side.upper()} grid orders from {prices[0]} to {prices[-1]}")
+
+    journal = get_journal()
+    job = journal.intent("grid", {"symbol": symbol.upper(), "side": side.upper(), "quantity": quantity, "steps": steps,
+                                  "backend": backend.name, "prices": prices, "gap": price_gap})
+    orders = [
+        {"symbol": symbol, "side": side, "quantity": quantity, "price": price, "client_order_id": make_client_order_id(job, i),
+         "meta": {"level": i, "backend": backend.name, "job": job}}
+        for i, price in enumerate(prices)
+    ]
+
+    headroom = backend.client.limiter.headroom()
+    if steps > headroom["orders_10s"]:
+        log_info(f"Grid of {steps} levels exceeds order headroom ({headroom['orders_10s']}); remaining levels will queue on the rate limiter")
+
+    # All levels go out concurrently, throttled by the shared order-rate budget.
+    # Batched, workers only wait on batch results, so run one per level
+    place_fn = partial(place_limit_order, backend=backend)
+    if batch:
+        from janvi_bot.order_batcher import get_batcher
+        place_fn = partial(place_limit_order, batcher=get_batcher(), backend=backend)
+        max_workers = max(max_workers, min(steps, BATCH_WORKER_CAP))
+    start = time.perf_counter()
+    results = place_batch(orders, place_fn, max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+
+    placed = sum(1 for r in results if r["order_id"] is not None)
+    journal.done(job, "PLACED")
+    log_info(f"Grid placed {placed}/{steps} levels in {elapsed:.3f}s\n{format_table(results)}", job=job)
+    return results
+
+# CLI
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    if "--refill" in argv or "--resume" in argv:
+        # One refilling grid: the grid engine (two-sided, re-centred, resumable)
+        print("Refilling grids run on the grid engine: python -m janvi_bot.advanced.grid_engine "
+              "SYMBOL QUANTITY [LEVELS WIDTH_PCT] (or --resume)")
+        sys.exit(1)
+    batch = "--batch" in argv
+    depth = "--depth" in argv
+    argv = [a for a in argv if a not in ("--batch", "--depth")]
+    backend = backend_from_argv(argv)
+    if len(argv) < 4:
+        print("Usage: python -m janvi_bot.advanced.grid_order SYMBOL BUY/SELL QUANTITY [STEPS LOWER_PCT UPPER_PCT] [--batch] "
+              "[--depth] [--backend spot|futures]")
+        sys.exit(1)
+
+    symbol = argv[1]
+    side = argv[2].upper()
+    quantity = float(argv[3])
+    steps = int(argv[4]) if len(argv) > 4 else 5
+    lower_pct = float(argv[5]) if len(argv) > 5 else 0.98
+    upper_pct = float(argv[6]) if len(argv) > 6 else 1.02
+
+    place_grid_orders(symbol, side, quantity, steps, lower_pct, upper_pct, batch=batch, backend=backend, depth=depth)
+
+if __name__ == "__main__":
+    main()
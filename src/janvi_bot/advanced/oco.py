@@ -0,0 +1,232 @@
+import sys
+import time
+import threading
+
+from janvi_bot.bot_logging import log_info, log_error, log_payload, elapsed_ms
+from janvi_bot.validation import validate_symbol, validate_side, validate_quantity, validate_offset
+from janvi_bot.symbol_filters import format_decimal, FilterError
+from janvi_bot.metrics import span
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id, start_user_stream
+from janvi_bot.exchange_backend import OrderResult, get_backend, backend_from_argv
+from janvi_bot.risk_engine import SIM_ACCOUNT, get_risk_engine
+
+# Binance API 
+def get_current_price(symbol, backend=None):
+    try:
+        return get_backend(backend).price(symbol)
+    except Exception as e:
+        log_error(f"Failed to fetch price: {e}")
+        return None
+
+# OCO follow-ups: the exchange cancels the sibling once a leg fills (futures
+# OCOs are emulated, so there we cancel it); the user-data stream tells us
+# which leg closed the position
+_followups = []
+
+def on_oco_done(handler):
+    """handler(state) when an OCO leg fills; state.meta["leg"] is take_profit or stop"""
+    _followups.append(handler)
+    return handler
+
+def _on_oco_fill(fill):
+    state = fill.order
+    if state.strategy != "oco" or state.status != "FILLED":
+        return
+    log_info(f"OCO {state.meta.get('leg')} leg filled", symbol=state.symbol, side=state.side,
+             qty=str(state.executed_qty), avg_price=str(state.avg_price), order_list_id=state.list_id)
+    sibling = state.meta.get("sibling")
+    if sibling:
+        try:
+            response = get_backend(state.meta["backend"]).cancel_order(state.symbol, sibling, strategy="oco")
+            log_info("OCO sibling leg cancelled", symbol=state.symbol, client_order_id=sibling, status=response.status_code)
+        except Exception as e:
+            log_error(f"Could not cancel OCO sibling leg {sibling}: {e}", symbol=state.symbol)
+    for handler in list(_followups):
+        handler(state)
+
+get_order_tracker().on_fill(_on_oco_fill)
+
+# OCO request body: TP/stop around the current price, legs typed for the side
+def build_oco_params(symbol, side, qty, current_price, tp_offset, stop_offset, snap):
+    if side == "BUY":
+        tp_price = snap(current_price - tp_offset)
+        stop_price = snap(current_price + stop_offset)
+        if tp_price >= current_price or stop_price <= current_price:
+            raise ValueError("For BUY OCO: TP must be below current price, Stop above current price.")
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "quantity": qty,
+            "aboveType": "STOP_LOSS_LIMIT",
+            "abovePrice": format_decimal(stop_price),
+            "aboveStopPrice": format_decimal(stop_price),
+            "aboveTimeInForce": "GTC",
+            "belowType": "LIMIT_MAKER",
+            "belowPrice": format_decimal(tp_price)
+        }
+    else:  # SELL
+        tp_price = snap(current_price + tp_offset)
+        stop_price = snap(current_price - stop_offset)
+        if tp_price <= current_price or stop_price >= current_price:
+            raise ValueError("For SELL OCO: TP must be above current price, Stop below current price.")
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "quantity": qty,
+            "aboveType": "LIMIT_MAKER",
+            "abovePrice": format_decimal(tp_price),
+            "belowType": "STOP_LOSS_LIMIT",
+            "belowPrice": format_decimal(stop_price),
+            "belowStopPrice": format_decimal(stop_price),
+            "belowTimeInForce": "GTC"
+        }
+    return params, tp_price, stop_price
+
+# Which OCO leg is the take-profit and which the stop, by side
+def oco_legs(side):
+    return {"above": "stop", "below": "take_profit"} if side == "BUY" else {"above": "take_profit", "below": "stop"}
+
+#  OCO Order 
+def place_oco_order(symbol, side, qty, tp_offset=None, stop_offset=None, follow=False, backend=None):
+    """True once the OCO is resting (on the exchange or the local engine), False if it was not placed"""
+    side = side.upper()
+    try:
+        backend = get_backend(backend)
+        backend.check("OCO")
+    except ValueError as e:
+        log_error(f"OCO rejected locally: {e}", symbol=symbol)
+        return False
+    current_price = get_current_price(symbol, backend)
+    if current_price is None:
+        return False
+
+    # Default offsets
+    tp_offset = float(tp_offset) if tp_offset else current_price * 0.01
+    stop_offset = float(stop_offset) if stop_offset else current_price * 0.01
+
+    # TP/stop snap to the symbol's tick size (2 decimals without exchangeInfo)
+    try:
+        filters = backend.get_filters(symbol)
+    except FilterError as e:
+        log_error(str(e))
+        return False
+    snap = filters.round_price if filters else (lambda p: round(p, 2))
+
+    try:
+        params, tp_price, stop_price = build_oco_params(symbol, side, qty, current_price, tp_offset, stop_offset, snap)
+    except ValueError as e:
+        log_error(str(e))
+        return False
+
+    # Both legs must pass LOT_SIZE / PRICE_FILTER / MIN_NOTIONAL
+    tags = {"endpoint": f"{backend.api}/orderList/oco" if not backend.emulated_oco else f"{backend.api}/batchOrders",
+            "symbol": symbol.upper(), "strategy": "oco"}
+    try:
+        with span("validate", **tags):
+            params["quantity"], _ = backend.prepare_order(symbol, qty, tp_price)
+            backend.prepare_order(symbol, qty, stop_price)
+    except FilterError as e:
+        log_error(f"OCO rejected locally: {e}", symbol=symbol)
+        return False
+
+    # Leg ids let fill events say which leg executed
+    # (emulated OCOs also record the sibling, which is cancelled once this leg fills)
+    if follow:
+        start_user_stream(wait=10, backend=backend)
+    tracker = get_order_tracker()
+    legs = oco_legs(side)
+    # One list id, legs derived from it: every resend of this OCO carries the same ids
+    params["listClientOrderId"] = make_client_order_id("oco")
+    for prefix, leg in legs.items():
+        params[f"{prefix}ClientOrderId"] = make_client_order_id(params["listClientOrderId"], "tp" if leg == "take_profit" else "sl")
+    for prefix, leg in legs.items():
+        meta = {"leg": leg, "backend": backend.name}
+        if backend.emulated_oco:
+            meta["sibling"] = params["belowClientOrderId" if prefix == "above" else "aboveClientOrderId"]
+        tracker.track(params[f"{prefix}ClientOrderId"], symbol, side, params[f"{prefix}Type"], params[f"{prefix}Price"],
+                      params["quantity"], strategy="oco", meta=meta)
+
+    log_info(f"OCO order called for {symbol}, side={side}, qty={qty}, TP={tp_price}, Stop={stop_price}", backend=backend.name)
+    start = time.perf_counter()
+    response = backend.place_oco(params, strategy="oco")
+    latency_ms = elapsed_ms(start)
+    with span("parse", **tags):
+        body = response.json()
+
+    if response.status_code == 200:
+        log_info("OCO order placed successfully", symbol=symbol, order_list_id=body.get("orderListId"), latency_ms=latency_ms)
+        log_payload("OCO order response", body, symbol=symbol)
+        return True
+    else:
+        # If the spot account balance is insufficient, run the order on the local matching engine
+        if response.status_code == 400 and body.get("code") == -2010 and backend.name == "spot":
+            log_info("[SIMULATION] Account balance insufficient, simulating OCO order...")
+            return simulate_oco(symbol, current_price, params) is not None
+        log_error(f"Failed to place OCO order: {response.status_code} {body}", symbol=symbol, latency_ms=latency_ms)
+        return False
+
+# Simulated OCO
+def simulate_oco(symbol, current_price, params):
+    from janvi_bot.sim_exchange import get_engine, SimError  # the local engine only loads for simulated orders
+    engine = get_engine()
+    engine.ensure_symbol(symbol.upper(), current_price)
+    # Local engine events feed the same order tracker as the real user-data stream
+    tracker = get_order_tracker()
+    if tracker.apply_execution not in engine.listeners:
+        engine.listeners.append(tracker.apply_execution)
+    leg = lambda prefix: {"type": params.get(f"{prefix}Type"), "price": params.get(f"{prefix}Price"),
+                          "stopPrice": params.get(f"{prefix}StopPrice"),
+                          "timeInForce": params.get(f"{prefix}TimeInForce", "GTC"),
+                          "clientOrderId": params.get(f"{prefix}ClientOrderId")}
+    # Checked again on the simulated account: the exchange's refusal released the legs from the live one
+    risk = get_risk_engine()
+    rejected = risk.check_oco(params, SIM_ACCOUNT)
+    if rejected is not None:
+        log_error(f"[SIMULATION] OCO order rejected: {rejected}", symbol=symbol)
+        return None
+    try:
+        body = engine.new_oco(symbol.upper(), params["side"], params["quantity"], leg("above"), leg("below"))
+    except SimError as e:
+        risk.on_oco_ack(params, OrderResult(e.status, {"code": e.code, "msg": e.msg}))
+        log_error(f"[SIMULATION] OCO order rejected: {e.code} {e.msg}", symbol=symbol)
+        return None
+    risk.on_oco_ack(params, OrderResult(200, body))
+    log_info("[SIMULATION] OCO order placed", symbol=symbol, order_list_id=body["orderListId"],
+             orders=[r["status"] for r in body["orderReports"]])
+    log_payload("[SIMULATION] OCO order response", body, symbol=symbol)
+    return body
+
+# CLI 
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    follow = "--follow" in argv
+    if follow:
+        argv.remove("--follow")
+    backend = backend_from_argv(argv)
+    if len(argv) not in [4, 6]:
+        print("Usage: python -m janvi_bot.advanced.oco "
+              "SYMBOL SIDE QUANTITY [TP_OFFSET STOP_OFFSET] [--follow] [--backend spot|futures]")
+        sys.exit(1)
+
+    symbol = argv[1]
+    side = argv[2]
+    qty = argv[3]
+    tp_offset = argv[4] if len(argv) > 4 else None
+    stop_offset = argv[5] if len(argv) > 5 else None
+
+    if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(qty)):
+        sys.exit(1)
+    if tp_offset and not validate_offset(tp_offset, "TP"):
+        sys.exit(1)
+    if stop_offset and not validate_offset(stop_offset, "Stop"):
+        sys.exit(1)
+
+    # With --follow stay connected until one leg fills (if the OCO was placed at all)
+    done = threading.Event()
+    on_oco_done(lambda state: done.set())
+    placed = place_oco_order(symbol, side, float(qty), tp_offset, stop_offset, follow=follow, backend=backend)
+    if follow and placed:
+        done.wait()
+
+if __name__ == "__main__":
+    main()
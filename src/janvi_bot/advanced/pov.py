@@ -0,0 +1,111 @@
+import sys
+import math
+from decimal import Decimal, ROUND_DOWN
+
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.validation import validate_symbol, validate_positive_number
+from janvi_bot.symbol_filters import round_to_step
+from janvi_bot.price_stream import get_cached_price
+from janvi_bot.scheduler import get_scheduler
+from janvi_bot.exchange_backend import backend_from_argv
+from janvi_bot.advanced.twap import TwapJob
+
+# Percentage of volume (POV): every INTERVAL seconds, send enough that our
+# fills stay RATE of all volume traded since the run started, as counted off
+# the live trade stream (price_stream). The run ends when the total is done
+# or after MAX_DURATION, whichever comes first; with no trade stream nothing
+# is sent, since the market's volume is unknown.
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_MAX_DURATION = 3600.0
+
+
+class PovJob(TwapJob):
+    kind = "pov"
+
+    def __init__(self, symbol, side, total_quantity, rate, interval=DEFAULT_INTERVAL, max_duration=DEFAULT_MAX_DURATION,
+                 **kwargs):
+        rate = Decimal(str(rate))
+        if not 0 < rate < 1:
+            raise ValueError(f"Participation rate must be between 0 and 1: {rate}")
+        self.rate = rate
+        self.max_duration = max_duration
+        super().__init__(symbol, side, total_quantity, max(1, math.ceil(max_duration / interval)), interval, **kwargs)
+        filters = self.backend.get_filters(self.symbol)
+        self.min_qty = filters.min_qty if filters else Decimal(0)
+        self.min_notional = filters.min_notional if filters and filters.notional_applies_to_market else Decimal(0)
+
+    def intent_params(self):
+        return {**super().intent_params(), "rate": str(self.rate), "max_duration": self.max_duration}
+
+    def slice_quantity(self, index):
+        volume = self.execution.market_volume()
+        if volume is None:
+            log_info("No trade stream for the symbol yet; nothing to participate in", job=self.name)
+            return Decimal(0)
+        # The stream counts our own fills too: the rest of the market is what we trail
+        others = max(Decimal(str(volume)) - self.executed(), Decimal(0))
+        target = min(others * self.rate / (1 - self.rate), self.total)
+        qty = round_to_step(target - self.sent, self.step, ROUND_DOWN)
+        price = get_cached_price(self.symbol, self.backend.stream_url)
+        # Below the exchange minimums the slice would only be rejected: wait for more volume
+        if qty < self.min_qty or (price and qty * Decimal(str(price)) < self.min_notional):
+            return Decimal(0)
+        return qty
+
+    def run_slice(self, index):
+        super().run_slice(index)
+        if self.sent >= self.total:
+            self.finish()
+
+    def stats(self):
+        return {**super().stats(), "rate": str(self.rate)}
+
+
+def submit_pov(symbol, side, total_quantity, rate, interval=DEFAULT_INTERVAL, max_duration=DEFAULT_MAX_DURATION,
+               backend=None):
+    """Start a POV on the shared scheduler and return its job"""
+    job = PovJob(symbol, side, total_quantity, rate, interval, max_duration, backend=backend)
+    log_info(f"POV order: {total_quantity} {symbol.upper()} at {float(rate):.1%} of volume, checked every {interval}s "
+             f"for up to {max_duration}s")
+    return get_scheduler().submit(job)
+
+
+def pov_order(symbol, side, total_quantity, rate, interval=DEFAULT_INTERVAL, max_duration=DEFAULT_MAX_DURATION,
+              backend=None):
+    try:
+        job = submit_pov(symbol, side, total_quantity, rate, interval, max_duration, backend)
+    except ValueError as e:
+        log_error(str(e))
+        return None
+    job.wait()
+    return job
+
+# CLI
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    backend = backend_from_argv(argv)
+    if len(argv) not in (5, 6, 7):
+        print("Usage: python -m janvi_bot.advanced.pov "
+              "SYMBOL SIDE TOTAL_QTY RATE [INTERVAL [MAX_DURATION]] [--backend spot|futures]")
+        print("       RATE is the share of market volume, e.g. 0.1 for 10%")
+        sys.exit(1)
+
+    symbol = argv[1]
+    side = argv[2].upper()
+    total_quantity = validate_positive_number("Total quantity", argv[3])
+    rate = validate_positive_number("Rate", argv[4])
+    interval = validate_positive_number("Interval", argv[5]) if len(argv) > 5 else DEFAULT_INTERVAL
+    max_duration = validate_positive_number("Max duration", argv[6]) if len(argv) > 6 else DEFAULT_MAX_DURATION
+
+    if not validate_symbol(symbol) or side not in ["BUY", "SELL"]:
+        log_error("Invalid symbol or side (must be BUY or SELL)")
+        sys.exit(1)
+
+    if None in [total_quantity, rate, interval, max_duration]:
+        sys.exit(1)
+
+    pov_order(symbol, side, total_quantity, rate, interval, max_duration, backend)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import time
+import os
+from decimal import Decimal, ROUND_DOWN
+import sys
+
+from janvi_bot.bot_logging import log_info, log_error, log_payload, elapsed_ms
+from janvi_bot.validation import validate_symbol, validate_positive_number
+from janvi_bot.symbol_filters import round_to_step
+from janvi_bot.price_stream import get_cached_price, get_fresh_quote, get_traded, start_price_stream
+from janvi_bot.scheduler import FAILED, Job, get_scheduler
+from janvi_bot.metrics import span
+from janvi_bot.user_stream import FINAL_STATUSES, get_order_tracker, make_client_order_id
+from janvi_bot.exchange_backend import get_backend, backend_from_argv
+from janvi_bot.order_journal import get_journal
+from janvi_bot.order_book import get_order_book, SYNC_WAIT
+from janvi_bot.execution_metrics import ExecutionStats
+from janvi_bot.risk_engine import get_risk_engine, is_risk_rejection
+
+# Step used for chunk rounding when exchangeInfo is unavailable
+DEFAULT_STEP = Decimal("0.000001")
+# Depth-aware slicing (--depth): a slice takes at most DEPTH_SHARE of the size
+# resting within DEPTH_BPS of mid on the side it trades against
+DEPTH_BPS = float(os.getenv("TWAP_DEPTH_BPS", "10"))
+DEPTH_SHARE = Decimal(os.getenv("TWAP_DEPTH_SHARE", "0.2"))
+
+# Binance Market Order
+def place_market_order(symbol, side, quantity, backend=None, meta=None, client_order_id=None, strategy="twap"):
+    side = side.upper()
+    backend = get_backend(backend)
+    tags = {"endpoint": backend.order_path, "symbol": symbol.upper(), "strategy": strategy}
+    try:
+        with span("validate", **tags):
+            backend.check("MARKET")
+            quantity, _ = backend.prepare_order(symbol, quantity, market=True, ref_price=get_cached_price(symbol, backend.stream_url))
+    except ValueError as e:
+        log_error(f"Order rejected locally: {e}", symbol=symbol.upper())
+        return None
+    params = {
+        "symbol": symbol.upper(),
+        "side": side,
+        "type": "MARKET",
+        "quantity": quantity,
+        "newClientOrderId": client_order_id or make_client_order_id(strategy)
+    }
+    get_order_tracker().track(params["newClientOrderId"], symbol, side, "MARKET", None, quantity, strategy=strategy, meta=meta)
+    start = time.perf_counter()
+    response = backend.new_order(params, strategy=strategy)
+    latency_ms = elapsed_ms(start)
+    try:
+        with span("parse", **tags):
+            body = response.json()
+        log_info(f"Market order response (chunk): {response.status_code}", symbol=params["symbol"],
+                 order_id=body.get("orderId"), latency_ms=latency_ms, error=body.get("msg"))
+        log_payload("Market order response", body, symbol=params["symbol"])
+    except Exception as e:
+        log_error(f"Failed to parse response JSON: {e}", status=response.status_code, latency_ms=latency_ms)
+    return response
+
+# TWAP job: one market order per slice on the shared scheduler.
+# With the default place_fn the run is journaled (order_journal) so a crashed
+# TWAP can be resumed at the right slice; job/fired/sent restore one. Slice
+# orders are then named job-slice, so a resend or a resume never doubles one.
+# With depth=True slices are capped by the mirrored order book (order_book);
+# what a capped slice holds back carries over like rounding dust.
+# Every filled slice is scored by execution_metrics (slippage, participation).
+# `sent` is what the slices executed (an ack's executedQty); a slice acked before
+# it settled counts in full until the order tracker reports its final quantity.
+# Slices refused by the risk checks carry over; the kill switch cancels the run.
+# VWAP (vwap.py) and POV (pov.py) are TwapJobs that size slices differently:
+# they override schedule_fraction / slice_quantity and `kind`.
+class TwapJob(Job):
+    kind = "twap"
+
+    def __init__(self, symbol, side, total_quantity, chunks, interval, place_fn=None, start_delay=0.0, backend=None,
+                 job=None, fired=0, sent=0, depth=False):
+        super().__init__(interval, chunks, name=f"{self.kind.upper()}-{symbol.upper()}-{side.upper()}",
+                         start_delay=start_delay)
+        self.symbol = symbol.upper()
+        self.side = side.upper()
+        self.total = Decimal(str(total_quantity))
+        self.chunks = chunks
+        self.fired = fired
+        self.sent = Decimal(str(sent))
+        self.unsettled = {}  # clientOrderId -> quantity counted for a slice whose order is still open
+        self.backend = get_backend(backend)
+        self.depth = depth
+        self.journal = get_journal()
+        self.job = job
+        if place_fn is None and job is None:
+            self.job = self.journal.intent(self.kind, self.intent_params())
+        self.place_fn = place_fn
+        if depth:
+            # Mirror the book now, so the first slice is already capped by it
+            get_order_book(self.symbol, self.backend, wait=SYNC_WAIT)
+        if place_fn is None:
+            # Trade stream for the participation figures (and a streamed reference price)
+            start_price_stream([self.symbol], url=self.backend.stream_url)
+        self.execution = ExecutionStats(f"{self.name}-{self.id}", self.kind, self.symbol, self.side,
+                                        url=self.backend.stream_url)
+
+        # Chunks round down to the market step size (6 decimals without exchangeInfo)
+        filters = self.backend.get_filters(symbol)
+        self.step = (filters.market_step_size or filters.step_size) if filters else DEFAULT_STEP
+
+    def intent_params(self):
+        return {"symbol": self.symbol, "side": self.side, "total": str(self.total), "chunks": self.chunks,
+                "interval": self.interval, "backend": self.backend.name, "depth": self.depth}
+
+    def schedule_fraction(self, index):
+        """Share of the total due by the end of slice `index`"""
+        return Decimal(index + 1) / self.chunks
+
+    def slice_quantity(self, index):
+        # Cumulative target minus what actually went out, so rounding dust and
+        # rejected slices carry over into the next slice
+        target = self.total if index >= self.chunks - 1 else min(self.total * self.schedule_fraction(index), self.total)
+        return round_to_step(target - self.sent, self.step, ROUND_DOWN)
+
+    def reference_price(self):
+        # Price a slice is judged against: the streamed quote when it is this market's, else a ticker
+        # call (a custom placer gets the last cached price instead, keeping its slices network-free)
+        if get_traded(self.symbol, self.backend.stream_url) is not None:
+            quote = get_fresh_quote(self.symbol, url=self.backend.stream_url)
+            if quote is not None:
+                return quote.price
+        if self.place_fn is not None:
+            return get_cached_price(self.symbol, self.backend.stream_url)
+        try:
+            return self.backend.price(self.symbol)
+        except (OSError, ValueError, KeyError) as e:
+            log_error(f"Reference price unavailable: {e}", job=self.name)
+            return None
+
+    def depth_cap(self, qty):
+        book = get_order_book(self.symbol, self.backend)
+        if book is None:
+            log_info("Order book not synced; slice not depth-capped", job=self.name)
+            return qty
+        side = "asks" if self.side == "BUY" else "bids"
+        available = Decimal(str(book.size_within(side, DEPTH_BPS)))
+        cap = round_to_step(available * DEPTH_SHARE, self.step, ROUND_DOWN)
+        if cap < qty:
+            log_info(f"Slice capped by book depth: {qty} -> {cap}", job=self.name, depth_bps=DEPTH_BPS,
+                     available=str(available))
+            return cap
+        return qty
+
+    def settle(self):
+        """Replace the full quantity counted for acked-but-open slices with what they executed, once final"""
+        tracker = get_order_tracker()
+        for cid, counted in list(self.unsettled.items()):
+            state = tracker.get(cid)
+            if state is not None and state.status in FINAL_STATUSES:
+                self.sent += state.executed_qty - counted
+                del self.unsettled[cid]
+
+    def executed(self):
+        """Quantity our slices have actually filled so far (settled slices plus the fills of open ones)"""
+        tracker = get_order_tracker()
+        pending = sum(counted for counted in self.unsettled.values())
+        fills = sum((state.executed_qty for state in map(tracker.get, self.unsettled) if state is not None), Decimal(0))
+        return self.sent - pending + fills
+
+    def run_slice(self, index):
+        if self.job is not None:
+            self.journal.progress(self.job, slice=index)
+        self.settle()
+        if self.execution.arrival is None:
+            self.execution.begin(self.reference_price())
+        qty = self.slice_quantity(index)
+        if self.depth and qty > 0:
+            qty = self.depth_cap(qty)
+        if qty <= 0:
+            log_info(f"Chunk {index+1}/{self.chunks} below step size, carrying over", job=self.name)
+            return
+
+        limiter = self.backend.client.limiter
+        delay = limiter.time_until("POST", self.backend.order_path)
+        if delay > 0:
+            log_info(f"Rate budget exhausted, chunk {index+1} delayed {delay:.2f}s (headroom: {limiter.headroom()})")
+        log_info(f"Placing chunk {index+1}/{self.chunks}", job=self.name, quantity=qty)
+        reference = self.reference_price() if index else self.execution.arrival
+        cid = None
+        if self.place_fn is not None:
+            response = self.place_fn(self.symbol, self.side, qty)
+        else:
+            cid = make_client_order_id(self.job, index)
+            response = place_market_order(self.symbol, self.side, qty, backend=self.backend, meta={"job": self.job},
+                                          client_order_id=cid, strategy=self.kind)
+        if response is not None and response.status_code == 200:
+            try:
+                body = response.json()
+            except (ValueError, AttributeError):
+                body = {}  # unparseable (logged by place_market_order) or a placer's bare ack
+            if not isinstance(body, dict):
+                body = {}
+            if body.get("status") in FINAL_STATUSES and body.get("executedQty") is not None:
+                self.sent += Decimal(body["executedQty"])  # an expired slice's remainder carries over
+            else:
+                # Acked before it settled (futures ACK responses) or a bare ack: counted in full until final
+                self.sent += qty
+                if cid is not None:
+                    self.unsettled[cid] = qty
+            if body:
+                self.execution.record(index, reference, body)
+        elif response is not None and is_risk_rejection(response) and get_risk_engine().killed():
+            # Refused slices would only carry over into the next: stop the run
+            log_error(f"Kill switch on; {self.kind.upper()} cancelled after chunk {index+1}/{self.chunks}", job=self.name)
+            self.cancel()
+
+    @property
+    def residual(self):
+        return self.total - self.sent
+
+    def on_finish(self):
+        self.execution.end()
+        if self.job is not None and self.status != FAILED:
+            # A failed run stays open in the journal, so --resume can continue it
+            self.journal.done(self.job, self.status)
+        log_info(f"{self.kind.upper()} {self.status}: sent {self.sent}/{self.total} {self.symbol}", job=self.name,
+                 residual=str(self.residual), jitter=self.stats()["jitter"], execution=self.execution.summary())
+
+    def stats(self):
+        return {**super().stats(), "sent": str(self.sent), "residual": str(self.residual),
+                "execution": self.execution.summary()}
+
+# TWAP Order
+def submit_twap(symbol, side, total_quantity, chunks, interval, backend=None, depth=False):
+    """Start a TWAP on the shared scheduler and return its job (pause/resume/cancel/wait)"""
+    job = TwapJob(symbol, side, total_quantity, chunks, interval, backend=backend, depth=depth)
+    log_info(f"TWAP order: {total_quantity} {symbol.upper()} as {chunks} chunks every {interval}s (~{job.slice_quantity(0)} per chunk)")
+    return get_scheduler().submit(job)
+
+# Resume: TWAPs that never finished, reconciled against the exchange, continue
+# from the slice after the last one started with what actually executed
+def resume_twaps():
+    journal = get_journal()
+    jobs = []
+    for record in journal.recover("twap").values():
+        p = record.params
+        backend = get_backend(p.get("backend"))
+        journal.reconcile(record, backend, get_order_tracker())
+        fired = record.progress.get("slice", -1) + 1
+        # A crash can cost the journal its last batch; slice ids are deterministic, so
+        # ask the exchange about the slices from the last one journaled onwards
+        index = max(fired - 1, 0)
+        while index < p["chunks"]:
+            cid = make_client_order_id(record.job, index)
+            if cid not in record.orders:
+                response = backend.get_order(p["symbol"], cid, strategy="recover")
+                if response.status_code != 200:
+                    break
+                order = response.json()
+                record.orders[cid] = {"clientOrderId": cid, "status": order["status"], "executedQty": order["executedQty"]}
+            fired = max(fired, index + 1)
+            index += 1
+        job = TwapJob(p["symbol"], p["side"], p["total"], p["chunks"], p["interval"], backend=backend,
+                      job=record.job, fired=fired, sent=record.executed_qty(), depth=p.get("depth", False))
+        log_info(f"Resuming TWAP {record.job} at chunk {fired + 1}/{p['chunks']}: sent {job.sent}/{job.total} {job.symbol}")
+        jobs.append(get_scheduler().submit(job))
+    return jobs
+
+def twap_order(symbol, side, total_quantity, chunks, interval, backend=None, depth=False):
+    try:
+        job = submit_twap(symbol, side, total_quantity, chunks, interval, backend, depth)
+    except ValueError as e:
+        log_error(str(e))
+        return None
+    job.wait()
+    return job
+
+# CLI
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    depth = "--depth" in argv
+    argv = [a for a in argv if a != "--depth"]
+    backend = backend_from_argv(argv)
+    if argv[1:] == ["--resume"]:
+        for job in resume_twaps():
+            job.wait()
+        sys.exit(0)
+    if len(argv) != 6:
+        print("Usage: python -m janvi_bot.advanced.twap "
+              "SYMBOL SIDE TOTAL_QTY CHUNKS INTERVAL [--depth] [--backend spot|futures]")
+        print("       python -m janvi_bot.advanced.twap --resume")
+        sys.exit(1)
+
+    symbol = argv[1]
+    side = argv[2].upper()
+    total_quantity = validate_positive_number("Total quantity", argv[3])
+    chunks = validate_positive_number("Chunks", argv[4])
+    interval = validate_positive_number("Interval", argv[5])
+
+    if not validate_symbol(symbol) or side not in ["BUY", "SELL"]:
+        log_error("Invalid symbol or side (must be BUY or SELL)")
+        sys.exit(1)
+
+    if None in [total_quantity, chunks, interval]:
+        sys.exit(1)
+
+    twap_order(symbol, side, total_quantity, int(chunks), interval, backend, depth)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+from decimal import Decimal
+
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.validation import validate_symbol, validate_positive_number
+from janvi_bot.scheduler import get_scheduler
+from janvi_bot.exchange_backend import backend_from_argv
+from janvi_bot.backtest import load_klines, intraday_volume_profile, DAY_SECONDS
+from janvi_bot.advanced.twap import TwapJob
+
+# VWAP: TWAP's slices and scheduler, but each slice's size follows the
+# historical intraday volume profile (backtest.intraday_volume_profile over a
+# local kline file) for the time of day it covers, so more goes out when the
+# market usually trades more. Slices are still cumulative targets, so dust
+# and rejects carry over exactly as in TWAP.
+
+# Profile resolution (seconds of the UTC day per bucket)
+PROFILE_BUCKET = int(os.getenv("VWAP_PROFILE_BUCKET", "60"))
+
+
+class VwapJob(TwapJob):
+    kind = "vwap"
+
+    def __init__(self, symbol, side, total_quantity, chunks, interval, profile, klines_path=None, start_delay=0.0,
+                 **kwargs):
+        self.profile = profile
+        self.klines_path = klines_path
+        self.start_time = time.time() + start_delay
+        super().__init__(symbol, side, total_quantity, chunks, interval, start_delay=start_delay, **kwargs)
+        self.fractions = self._fractions()
+
+    def intent_params(self):
+        return {**super().intent_params(), "klines": self.klines_path}
+
+    def _cumulative(self, t):
+        # Profile volume from the start of t's day to t, plus a whole day per day before it
+        bucket = DAY_SECONDS / len(self.profile)
+        day, offset = divmod(t, DAY_SECONDS)
+        position = offset / bucket
+        i = min(int(position), len(self.profile) - 1)
+        return day + self._cum[i] + (position - i) * self.profile[i]
+
+    def _fractions(self):
+        self._cum = [0.0]
+        for share in self.profile:
+            self._cum.append(self._cum[-1] + float(share))
+        ends = [self._cumulative(self.start_time + (i + 1) * self.interval) for i in range(self.chunks)]
+        begin = self._cumulative(self.start_time)
+        expected = ends[-1] - begin
+        if expected <= 0:
+            log_info("No historical volume over the run; slicing evenly", job=self.name)
+            return [Decimal(i + 1) / self.chunks for i in range(self.chunks)]
+        return [Decimal(str(max((end - begin) / expected, 0.0))) for end in ends]
+
+    def schedule_fraction(self, index):
+        return self.fractions[min(index, self.chunks - 1)]
+
+
+def submit_vwap(symbol, side, total_quantity, chunks, interval, klines_path, backend=None, depth=False):
+    """Start a VWAP on the shared scheduler and return its job"""
+    profile = intraday_volume_profile(load_klines(klines_path), PROFILE_BUCKET)
+    job = VwapJob(symbol, side, total_quantity, chunks, interval, profile, klines_path=klines_path, backend=backend,
+                  depth=depth)
+    shares = [float(b - a) for a, b in zip([Decimal(0)] + job.fractions, job.fractions)]
+    log_info(f"VWAP order: {total_quantity} {symbol.upper()} as {chunks} chunks every {interval}s",
+             first_chunk=str(job.slice_quantity(0)), min_share=round(min(shares), 4), max_share=round(max(shares), 4))
+    return get_scheduler().submit(job)
+
+
+def vwap_order(symbol, side, total_quantity, chunks, interval, klines_path, backend=None, depth=False):
+    try:
+        job = submit_vwap(symbol, side, total_quantity, chunks, interval, klines_path, backend, depth)
+    except (ValueError, OSError) as e:
+        log_error(str(e))
+        return None
+    job.wait()
+    return job
+
+# CLI
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    depth = "--depth" in argv
+    argv = [a for a in argv if a != "--depth"]
+    backend = backend_from_argv(argv)
+    if len(argv) != 7:
+        print("Usage: python -m janvi_bot.advanced.vwap "
+              "SYMBOL SIDE TOTAL_QTY CHUNKS INTERVAL KLINES_FILE [--depth] [--backend spot|futures]")
+        sys.exit(1)
+
+    symbol = argv[1]
+    side = argv[2].upper()
+    total_quantity = validate_positive_number("Total quantity", argv[3])
+    chunks = validate_positive_number("Chunks", argv[4])
+    interval = validate_positive_number("Interval", argv[5])
+
+    if not validate_symbol(symbol) or side not in ["BUY", "SELL"]:
+        log_error("Invalid symbol or side (must be BUY or SELL)")
+        sys.exit(1)
+
+    if None in [total_quantity, chunks, interval]:
+        sys.exit(1)
+
+    vwap_order(symbol, side, total_quantity, int(chunks), interval, argv[6], backend, depth)
+
+if __name__ == "__main__":
+    main()
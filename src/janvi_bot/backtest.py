@@ -0,0 +1,337 @@
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# Vectorized backtester for the grid / TWAP / OCO strategies. Klines are
+# loaded once into NumPy arrays (CSV/Parquet, cached as .npz), each strategy
+# is evaluated from many start points at once with array ops instead of a
+# per-candle loop, and parameter grids are swept across worker processes.
+#
+#   python -m janvi_bot.backtest grid BTCUSDT-1m.csv --param steps=5,10,20 \
+#       --param lower_pct=0.95,0.98 --param upper_pct=1.02,1.05 --param horizon=1440
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("BACKTEST_CACHE_DIR", os.path.join(BASE_DIR, '..', '..', '.cache', 'klines'))
+# Spot taker fee (0.1%)
+DEFAULT_FEE_BPS = 10.0
+# Bound on start points x horizon materialized per chunk
+WINDOW_CELLS = 4_000_000
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume")
+DAY_SECONDS = 86400
+
+Klines = namedtuple("Klines", COLUMNS)
+
+
+# ----- loading -----
+
+def _read_csv(path):
+    with open(path) as f:
+        first = f.readline().split(",")[0].strip()
+    skip = 0 if first.replace(".", "", 1).isdigit() else 1
+    return np.loadtxt(path, delimiter=",", usecols=range(6), skiprows=skip, dtype=np.float64, ndmin=2)
+
+
+def _read_parquet(path):
+    if pq is None:
+        raise RuntimeError("Reading Parquet klines requires pyarrow (pip install pyarrow)")
+    table = pq.read_table(path)
+    names = [c for c in COLUMNS if c in table.column_names] or table.column_names[:6]
+    return np.column_stack([table.column(c).to_numpy().astype(np.float64) for c in names[:6]])
+
+
+def _cache_path(path):
+    stat = os.stat(path)
+    name = f"{os.path.basename(path)}-{stat.st_size}-{int(stat.st_mtime)}.npz"
+    return os.path.join(CACHE_DIR, name)
+
+
+def load_klines(path, use_cache=True):
+    """Load klines (open_time, open, high, low, close, volume) from CSV or Parquet.
+
+    Binance kline dumps with or without a header row are accepted; open_time
+    in microseconds is normalized to ms. Parsed arrays are cached as .npz so
+    later runs (and sweep workers) skip the text parsing.
+    """
+    cache = _cache_path(path) if use_cache else None
+    if cache and os.path.exists(cache):
+        with np.load(cache) as data:
+            return Klines(*(data[c] for c in COLUMNS))
+
+    raw = _read_parquet(path) if path.endswith(".parquet") else _read_csv(path)
+    raw = raw[np.argsort(raw[:, 0], kind="stable")]
+    times = raw[:, 0].astype(np.int64)
+    if len(times) and times[0] > 10 ** 14:
+        times //= 1000
+    klines = Klines(times, *(np.ascontiguousarray(raw[:, i]) for i in range(1, 6)))
+
+    if cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez(cache, **klines._asdict())
+    return klines
+
+
+def candle_seconds(klines):
+    if len(klines.open_time) < 2:
+        return 60.0
+    return float(np.median(np.diff(klines.open_time[:1000]))) / 1000
+
+
+def intraday_volume_profile(klines, bucket_seconds=60):
+    """Share of the day's volume traded in each `bucket_seconds` bucket of the UTC day (sums to 1; all zeros without volume).
+
+    Each candle's volume is spread evenly over the buckets it spans, so hourly
+    klines still give a (stepped) minute profile. Used by the VWAP executor.
+    """
+    buckets = int(DAY_SECONDS // bucket_seconds)
+    duration = candle_seconds(klines)
+    parts = max(1, int(round(duration / bucket_seconds)))
+    start = (klines.open_time // 1000) % DAY_SECONDS
+    profile = np.zeros(buckets)
+    for j in range(parts):
+        index = ((start + j * duration / parts) // bucket_seconds).astype(np.int64) % buckets
+        profile += np.bincount(index, weights=klines.volume / parts, minlength=buckets)
+    total = profile.sum()
+    return profile / total if total > 0 else profile
+
+
+# ----- window helpers -----
+
+def _starts(n, horizon, every):
+    """Decision candles: each run decides at close[s] and trades over s+1 .. s+horizon"""
+    return np.arange(0, max(0, n - horizon), max(1, int(every)))
+
+
+def _chunks(starts, horizon):
+    size = max(1, WINDOW_CELLS // max(1, horizon))
+    for i in range(0, len(starts), size):
+        yield starts[i:i + size]
+
+
+def _window_extreme(values, starts, horizon, reducer):
+    """reducer (np.min / np.max) of values[s+1 : s+1+horizon] for every start"""
+    view = sliding_window_view(values, horizon)
+    return np.concatenate([reducer(view[chunk + 1], axis=1) for chunk in _chunks(starts, horizon)] or [np.empty(0)])
+
+
+def _first_hit(mask):
+    """Index of the first True per row, horizon when never hit"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def _summary(pnl, notional):
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if not len(pnl):
+        return {"runs": 0}
+    ret_bps = np.divide(pnl, notional, out=np.zeros_like(pnl), where=notional > 0) * 10000
+    return {
+        "runs": int(len(pnl)),
+        "mean_pnl": float(pnl.mean()),
+        "total_pnl": float(pnl.sum()),
+        "mean_return_bps": float(ret_bps.mean()),
+        "std_return_bps": float(ret_bps.std()),
+        "win_rate": float((pnl > 0).mean()),
+    }
+
+
+# ----- strategies -----
+
+def backtest_grid(klines, side="BUY", steps=5, lower_pct=0.98, upper_pct=1.02, quantity=1.0,
+                  horizon=1440, every=None, fee_bps=DEFAULT_FEE_BPS):
+    """One-shot grid as place_grid_orders lays it out, placed at close[s] and marked out at close[s+horizon].
+
+    Levels run from anchor*lower_pct to anchor*upper_pct in `steps` equal gaps. Levels
+    on the wrong side of the market fill immediately at the anchor (taker); the
+    rest fill when the window's low (BUY) / high (SELL) reaches them.
+    """
+    steps, horizon = int(steps), int(horizon)
+    starts = _starts(len(klines.close), horizon, every or horizon)
+    anchor = klines.close[starts][:, None]
+    fractions = lower_pct + np.arange(steps) * (upper_pct - lower_pct) / max(steps - 1, 1)
+    levels = anchor * fractions[None, :]
+    exit_price = klines.close[starts + horizon][:, None]
+
+    if side.upper() == "BUY":
+        marketable = levels >= anchor
+        reached = _window_extreme(klines.low, starts, horizon, np.min)[:, None] <= levels
+        fill_price = np.where(marketable, anchor, levels)
+        filled = marketable | reached
+        gross = (exit_price - fill_price) * quantity
+    else:
+        marketable = levels <= anchor
+        reached = _window_extreme(klines.high, starts, horizon, np.max)[:, None] >= levels
+        fill_price = np.where(marketable, anchor, levels)
+        filled = marketable | reached
+        gross = (fill_price - exit_price) * quantity
+
+    notional = fill_price * quantity * filled
+    pnl = (gross * filled).sum(axis=1) - notional.sum(axis=1) * fee_bps / 10000
+    return {**_summary(pnl, notional.sum(axis=1)), "fill_ratio": float(filled.mean())}
+
+
+def backtest_twap(klines, side="BUY", chunks=10, interval=60.0, quantity=1.0, every=None, fee_bps=DEFAULT_FEE_BPS):
+    """TWAP slices (as twap_order sends them) filled at the open of the candle each slice falls in.
+
+    Slippage is signed so that positive is worse than the benchmark: arrival
+    price (close at the decision candle) and the volume-weighted price over
+    the execution window.
+    """
+    chunks = int(chunks)
+    offsets = np.floor(np.arange(chunks) * float(interval) / candle_seconds(klines)).astype(np.int64)
+    span = int(offsets[-1]) + 1
+    starts = _starts(len(klines.close), span, every or span)
+    fills = klines.open[starts[:, None] + 1 + offsets[None, :]]
+    avg_price = fills.mean(axis=1)
+    arrival = klines.close[starts]
+
+    typical = (klines.high + klines.low + klines.close) / 3
+    cum_pv = np.concatenate(([0.0], np.cumsum(typical * klines.volume)))
+    cum_v = np.concatenate(([0.0], np.cumsum(klines.volume)))
+    pv = cum_pv[starts + 1 + span] - cum_pv[starts + 1]
+    vol = cum_v[starts + 1 + span] - cum_v[starts + 1]
+    vwap = np.divide(pv, vol, out=avg_price.copy(), where=vol > 0)
+
+    sign = 1.0 if side.upper() == "BUY" else -1.0
+    slip_arrival = sign * (avg_price - arrival) / arrival * 10000 + fee_bps
+    slip_vwap = sign * (avg_price - vwap) / vwap * 10000 + fee_bps
+    return {
+        "runs": int(len(starts)),
+        "candles_per_run": span,
+        "mean_slippage_arrival_bps": float(slip_arrival.mean()),
+        "p95_slippage_arrival_bps": float(np.percentile(slip_arrival, 95)) if len(starts) else None,
+        "mean_slippage_vwap_bps": float(slip_vwap.mean()),
+        "mean_cost": float((slip_arrival / 10000 * arrival * quantity).mean()) if len(starts) else None,
+    }
+
+
+def backtest_oco(klines, side="SELL", tp_pct=0.01, stop_pct=0.01, quantity=1.0, horizon=1440, every=1,
+                 fee_bps=DEFAULT_FEE_BPS):
+    """OCO exit placed at close[s] with TP/stop offsets as fractions of price.
+
+    SELL protects a long (TP above, stop below), BUY covers a short. The first
+    candle touching a leg decides; when both legs are inside one candle the
+    stop is assumed first. Unresolved runs are closed at close[s+horizon].
+    """
+    horizon = int(horizon)
+    starts = _starts(len(klines.close), horizon, every)
+    high_view, low_view = sliding_window_view(klines.high, horizon), sliding_window_view(klines.low, horizon)
+    sell = side.upper() == "SELL"
+    outcomes, pnl = [], []
+
+    for chunk in _chunks(starts, horizon):
+        entry = klines.close[chunk]
+        highs, lows = high_view[chunk + 1], low_view[chunk + 1]
+        if sell:
+            tp, stop = entry * (1 + tp_pct), entry * (1 - stop_pct)
+            tp_idx = _first_hit(highs >= tp[:, None])
+            stop_idx = _first_hit(lows <= stop[:, None])
+        else:
+            tp, stop = entry * (1 - tp_pct), entry * (1 + stop_pct)
+            tp_idx = _first_hit(lows <= tp[:, None])
+            stop_idx = _first_hit(highs >= stop[:, None])
+
+        # 0 = take profit, 1 = stop, 2 = expired
+        outcome = np.where((stop_idx <= tp_idx) & (stop_idx < horizon), 1, np.where(tp_idx < horizon, 0, 2))
+        exit_price = np.choose(outcome, [tp, stop, klines.close[chunk + horizon]])
+        gross = (exit_price - entry) if sell else (entry - exit_price)
+        pnl.append(gross * quantity - (entry + exit_price) * quantity * fee_bps / 10000)
+        outcomes.append(outcome)
+
+    outcome = np.concatenate(outcomes) if outcomes else np.empty(0, dtype=np.int64)
+    pnl = np.concatenate(pnl) if pnl else np.empty(0)
+    result = _summary(pnl, klines.close[starts] * quantity)
+    if len(outcome):
+        result.update(tp_rate=float((outcome == 0).mean()), stop_rate=float((outcome == 1).mean()),
+                      expire_rate=float((outcome == 2).mean()))
+    return result
+
+
+STRATEGIES = {"grid": backtest_grid, "twap": backtest_twap, "oco": backtest_oco}
+
+
+# ----- parameter sweeps -----
+
+def param_grid(spec):
+    """{"steps": [5, 10], "lower_pct": [0.95, 0.98]} -> list of parameter dicts (cartesian product)"""
+    names = list(spec)
+    return [dict(zip(names, values)) for values in itertools.product(*(spec[n] for n in names))]
+
+
+_worker_klines = None
+
+
+def _init_worker(path):
+    global _worker_klines
+    _worker_klines = load_klines(path)
+
+
+def _run_one(job):
+    strategy, params = job
+    return {**params, **STRATEGIES[strategy](_worker_klines, **params)}
+
+
+def sweep(path, strategy, spec, fixed=None, processes=None, sort_by=None):
+    """Evaluate every parameter combination of `spec` in parallel; results sorted best first"""
+    load_klines(path)  # parse once up front so workers start from the .npz cache
+    combos = [{**(fixed or {}), **params} for params in param_grid(spec)]
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(combos) // (processes * 4))
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(path,)) as pool:
+        results = list(pool.map(_run_one, [(strategy, p) for p in combos], chunksize=chunksize))
+
+    # Lower slippage is better for TWAP, higher return for grid/OCO; missing values last
+    key = sort_by or ("mean_slippage_arrival_bps" if strategy == "twap" else "mean_return_bps")
+    sign = 1 if strategy == "twap" else -1
+    results.sort(key=lambda r: (r.get(key) is None, sign * (r.get(key) or 0)))
+    return results
+
+
+def _parse_value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+# CLI
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest grid / TWAP / OCO strategies over local klines")
+    parser.add_argument("strategy", choices=sorted(STRATEGIES))
+    parser.add_argument("path", help="kline CSV or Parquet file")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="parameter values to sweep (repeatable)")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--sort-by", default=None)
+    parser.add_argument("--out", default=None, help="write all results as JSON lines")
+    args = parser.parse_args()
+
+    spec = {}
+    for item in args.param:
+        name, _, values = item.partition("=")
+        spec[name.strip()] = [_parse_value(v) for v in values.split(",") if v]
+
+    klines = load_klines(args.path)
+    start = time.perf_counter()
+    results = sweep(args.path, args.strategy, spec, processes=args.processes, sort_by=args.sort_by)
+    elapsed = time.perf_counter() - start
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.writelines(json.dumps(r) + "\n" for r in results)
+    for row in results[:args.top]:
+        print(json.dumps(row))
+    print(f"{len(results)} parameter sets x {len(klines.close)} candles in {elapsed:.2f}s", file=sys.stderr)
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent order placement: fan a list of orders out over a thread pool
+# that shares the pooled REST client. Throttling happens in the client's
+# shared rate limiter, so workers simply block there when the budget is spent.
+
+DEFAULT_WORKERS = 16
+
+
+def _place_one(index, order, place_fn):
+    row = {"level": index, **order, "status": None, "order_id": None, "error": None}
+    start = time.perf_counter()
+    try:
+        response = place_fn(**order)
+        body = response.json()
+        row["http_status"] = response.status_code
+        if response.status_code == 200:
+            row["status"] = body.get("status", "NEW")
+            row["order_id"] = body.get("orderId")
+        else:
+            row["status"] = "REJECTED"
+            row["error"] = body.get("msg", str(body))
+    except ValueError as e:
+        # Failed local pre-validation (symbol filters); nothing was sent
+        row["status"] = "REJECTED_LOCAL"
+        row["error"] = str(e)
+    except Exception as e:
+        row["status"] = "ERROR"
+        row["error"] = str(e)
+    row["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return row
+
+
+def place_batch(orders, place_fn, max_workers=DEFAULT_WORKERS):
+    """Place every order concurrently and return one result row per order, in input order.
+
+    `orders` is a list of keyword-argument dicts for `place_fn`, which must
+    return the exchange `requests.Response`.
+    """
+    if not orders:
+        return []
+
+    workers = max(1, min(max_workers, len(orders)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_place_one, i, order, place_fn) for i, order in enumerate(orders)]
+        return [f.result() for f in futures]
+
+
+def format_table(rows, columns=("level", "price", "status", "latency_ms", "order_id")):
+    """Render result rows as a fixed-width text table for the CLI/log"""
+    widths = [max([len(str(c))] + [len(str(r.get(c))) for r in rows]) for c in columns]
+    lines = ["  ".join(str(c).ljust(w) for c, w in zip(columns, widths))]
+    for r in rows:
+        lines.append("  ".join(str(r.get(c)).ljust(w) for c, w in zip(columns, widths)))
+    return "\n".join(lines)
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import logging.handlers
+
+# Shared non-blocking logging. Order threads only enqueue records; a single
+# QueueListener thread formats them and does the file/console I/O. The
+# listener starts with the first log call, not at import.
+# bot.log gets one JSON object per line, with structured fields
+# (order_id, latency_ms, symbol, ...) alongside the message.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# bot.log and .cache/ live in the checkout (two levels above src/janvi_bot); an installed
+# package (pip install, `bot`) keeps them in BOT_HOME, default ~/.janvi-binance-bot
+INSTALLED = os.path.basename(os.path.dirname(BASE_DIR)) in ("site-packages", "dist-packages")
+DATA_DIR = os.getenv("BOT_HOME") or (os.path.expanduser("~/.janvi-binance-bot") if INSTALLED else
+                                     os.path.join(BASE_DIR, '..', '..'))
+LOG_PATH = os.getenv("BOT_LOG_PATH", os.path.join(DATA_DIR, 'bot.log'))
+LOG_LEVEL = os.getenv("BOT_LOG_LEVEL", "INFO").upper()
+# "size" -> RotatingFileHandler, "time" -> TimedRotatingFileHandler
+LOG_ROTATE = os.getenv("BOT_LOG_ROTATE", "size")
+LOG_MAX_BYTES = int(os.getenv("BOT_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("BOT_LOG_BACKUPS", "5"))
+LOG_WHEN = os.getenv("BOT_LOG_WHEN", "midnight")
+# Fraction of full exchange payloads written at INFO; the rest only at DEBUG
+PAYLOAD_SAMPLE = float(os.getenv("BOT_LOG_PAYLOAD_SAMPLE", "0.1"))
+CONSOLE = os.getenv("BOT_LOG_CONSOLE", "1") != "0"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None) or {}
+        entry.update((k, v) for k, v in fields.items() if v is not None)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        msg = record.getMessage()
+        fields = getattr(record, "fields", None)
+        if fields:
+            msg = " ".join([msg] + [f"{k}={v}" for k, v in fields.items() if v is not None])
+        return f"ERROR: {msg}" if record.levelno >= logging.ERROR else msg
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The queue never leaves the process, so skip QueueHandler's eager
+        # format/copy and let the listener thread do all the formatting
+        return record
+
+
+def _file_handler():
+    os.makedirs(os.path.dirname(os.path.abspath(LOG_PATH)), exist_ok=True)
+    if LOG_ROTATE == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(LOG_PATH, when=LOG_WHEN, backupCount=LOG_BACKUPS)
+    else:
+        handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+    handler.setFormatter(JsonLinesFormatter())
+    return handler
+
+
+logger = logging.getLogger("binance_bot")
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def setup_logging():
+    """Attach the queue handler and start the background writer (idempotent)"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+
+        handlers = [_file_handler()]
+        if CONSOLE:
+            console = logging.StreamHandler(sys.stdout)
+            console.setFormatter(ConsoleFormatter())
+            handlers.append(console)
+
+        log_queue = queue.SimpleQueue()
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+        logger.handlers = [_EnqueueHandler(log_queue)]
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.unregister(shutdown_logging)
+        atexit.register(shutdown_logging)
+        _listener = listener
+        return listener
+
+
+def shutdown_logging():
+    """Flush everything queued so far and stop the writer thread; the next log call starts a new one"""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def log_info(msg, **fields):
+    if _listener is None:
+        setup_logging()
+    logger.info(msg, extra={"fields": fields})
+
+
+def log_error(msg, **fields):
+    if _listener is None:
+        setup_logging()
+    logger.error(msg, extra={"fields": fields})
+
+
+def log_payload(msg, payload, **fields):
+    """Verbose exchange payloads: always at DEBUG, sampled at INFO"""
+    if _listener is None:
+        setup_logging()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, extra={"fields": {**fields, "payload": payload}})
+    elif random.random() < PAYLOAD_SAMPLE:
+        logger.info(msg, extra={"fields": {**fields, "payload": payload}})
+
+
+def elapsed_ms(start):
+    """Milliseconds since a time.perf_counter() start, for latency fields"""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _reset_after_fork():
+    # The writer thread does not survive a fork; a forked worker starts its own on its first log call
+    global _listener, _listener_lock
+    _listener = None
+    _listener_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
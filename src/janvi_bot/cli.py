@@ -0,0 +1,46 @@
+import sys
+import importlib
+
+# One entry point for the order commands:
+#   bot market|limit|oco|twap|vwap|pov|grid|grid-engine|risk ARGS...   (or python -m janvi_bot.cli ...)
+# Each command takes the same arguments as its script and shares the same
+# core (rest_client, exchange_backend, bot_logging, validation). Only the
+# chosen command's module is imported, and the websocket, simulator and
+# batcher machinery load only when an order actually needs them. A one-shot
+# order pays for what it uses before its first byte goes out.
+
+COMMANDS = {
+    "market": ("janvi_bot.market_order", "market order (simulated unless --backend is given)"),
+    "limit": ("janvi_bot.limit_order", "limit order(s); several prices batch on futures"),
+    "oco": ("janvi_bot.advanced.oco", "take-profit / stop-loss OCO pair"),
+    "twap": ("janvi_bot.advanced.twap", "TWAP in equal slices on the scheduler (--resume after a crash)"),
+    "vwap": ("janvi_bot.advanced.vwap", "slices sized by the intraday volume profile of a kline file"),
+    "pov": ("janvi_bot.advanced.pov", "trail a share of the live traded volume"),
+    "grid": ("janvi_bot.advanced.grid_order", "one-shot ladder of limit orders (--batch, --depth)"),
+    "grid-engine": ("janvi_bot.advanced.grid_engine", "self-refilling grid, re-centred on the price (--resume after a crash)"),
+    "risk": ("janvi_bot.risk_engine", "kill switch on/off (kill [REASON] | resume) and risk limits (status)"),
+}
+
+
+def usage():
+    lines = ["Usage: bot COMMAND ARGS... [--backend spot|futures]", "", "Commands:"]
+    lines += [f"  {name:<13}{help_text}" for name, (_, help_text) in COMMANDS.items()]
+    lines += ["", "Run a command without arguments for its usage."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    if len(argv) < 2 or argv[1] in ("-h", "--help", "help"):
+        print(usage())
+        sys.exit(0 if len(argv) >= 2 else 1)
+    name = argv[1]
+    if name not in COMMANDS:
+        print(f"Unknown command: {name}\n\n{usage()}")
+        sys.exit(1)
+    module = importlib.import_module(COMMANDS[name][0])
+    module.main([f"bot {name}"] + argv[2:])
+
+
+if __name__ == "__main__":
+    main()
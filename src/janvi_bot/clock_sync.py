@@ -0,0 +1,187 @@
+import os
+import time
+import threading
+from collections import deque
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.metrics import registry
+
+# Server-time sync for signed requests. Binance rejects a request with -1021
+# when its timestamp is ahead of the server clock by 1s or more, or behind it
+# by more than recvWindow; a drifting host clock (or a long pause between
+# stamping and sending) turns into a rejected order and a retry. ClockSync
+# samples GET /api/v3/time (or /fapi/v1/time) in the background and keeps an
+# NTP-style estimate of the server clock:
+#   offset = serverTime - midpoint of the request, error within +-RTT/2
+# Of the last CLOCK_SAMPLES samples the one with the smallest round trip is
+# trusted (queueing only ever adds delay, so the fastest sample is the least
+# skewed). The estimate is anchored to the monotonic clock, so a step in the
+# host's wall clock does not move it between syncs. A -1021 rejection
+# triggers an immediate resync.
+
+CLOCK_SYNC = os.getenv("BINANCE_CLOCK_SYNC", "1") != "0"
+CLOCK_SYNC_INTERVAL = float(os.getenv("BINANCE_CLOCK_SYNC_INTERVAL", "30"))
+CLOCK_SAMPLES = int(os.getenv("BINANCE_CLOCK_SAMPLES", "8"))
+# Samples taken back to back on start and on resync, before settling into the interval
+CLOCK_BURST = 4
+CLOCK_TIMEOUT = (3.05, 5)
+TIMESTAMP_REJECTED = -1021
+
+
+class ClockSync:
+    def __init__(self, base_url, path="/api/v3/time", limiter=None, interval=CLOCK_SYNC_INTERVAL, samples=CLOCK_SAMPLES):
+        self.url = f"{base_url.rstrip('/')}{path}"
+        self.path = path
+        self.limiter = limiter
+        self.interval = interval
+        self.samples = deque(maxlen=max(1, samples))
+        # server seconds = time.monotonic() + _mono_offset, once a sample has landed
+        self._mono_offset = None
+        self.rtt = None
+        self.syncs = 0
+        self.failures = 0
+        self.last_sync = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        from janvi_bot.requests_transport import new_session
+        self._session = new_session(1)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="clock-sync", daemon=True)
+                    self._thread.start()
+        return self
+
+    def now_ms(self):
+        """Estimated server time in ms; the local clock until the first sample lands"""
+        if self._thread is None:
+            self.start()
+        offset = self._mono_offset
+        if offset is None:
+            return int(time.time() * 1000)
+        return int((time.monotonic() + offset) * 1000)
+
+    @property
+    def offset(self):
+        """Server clock minus the local wall clock, seconds (0 before the first sample)"""
+        offset = self._mono_offset
+        return 0.0 if offset is None else time.monotonic() + offset - time.time()
+
+    def sample(self):
+        """One round trip to the time endpoint; returns its rtt in seconds, or None if it failed"""
+        if self.limiter is not None:
+            self.limiter.acquire("GET", self.path)
+        try:
+            sent = time.monotonic()
+            response = self._session.get(self.url, timeout=CLOCK_TIMEOUT)
+            received = time.monotonic()
+            if self.limiter is not None:
+                self.limiter.on_response(response.status_code, response.headers)
+            response.raise_for_status()
+            server = response.json()["serverTime"] / 1000
+        except (OSError, ValueError, KeyError) as e:
+            self.failures += 1
+            log_error(f"Clock sync failed: {e}", url=self.url)
+            return None
+        rtt = received - sent
+        with self._lock:
+            self.samples.append((rtt, server - (sent + rtt / 2)))
+            self.rtt, self._mono_offset = min(self.samples)
+            self.syncs += 1
+            self.last_sync = received
+        return rtt
+
+    def sync(self, count=CLOCK_BURST):
+        """Take `count` samples now (blocking); returns the current offset in seconds"""
+        self._burst(count)
+        return self.offset
+
+    def _burst(self, count):
+        # Samples that landed out of `count`; failed ones leave the previous estimate as it was
+        return sum(1 for _ in range(count) if self.sample() is not None)
+
+    def _resync(self):
+        landed = self._burst(CLOCK_BURST)
+        if landed:
+            log_info("Server time synced", url=self.url, samples=landed, **self.stats())
+        else:
+            keeping = "previous offset" if self._mono_offset is not None else "local clock"
+            log_error(f"Server time sync failed: all {CLOCK_BURST} samples failed; keeping the {keeping}",
+                      url=self.url, **self.stats())
+        return landed
+
+    def on_rejected(self, block=True):
+        """A request came back -1021: resample now, or wake the sync thread when the caller can't wait"""
+        log_info("Timestamp rejected (-1021); resyncing server time", url=self.url, offset_ms=self.offset_ms())
+        if block:
+            self.sample()
+        else:
+            self._wake.set()
+
+    def _run(self):
+        self._resync()
+        while True:
+            if self._wake.wait(self.interval):
+                self._wake.clear()
+                self._resync()
+            else:
+                self.sample()
+
+    def offset_ms(self):
+        return round(self.offset * 1000, 3)
+
+    def stats(self):
+        return {"offset_ms": self.offset_ms(), "rtt_ms": None if self.rtt is None else round(self.rtt * 1000, 3),
+                "syncs": self.syncs, "failures": self.failures}
+
+
+_clocks = {}
+_clocks_lock = threading.Lock()
+
+
+def get_clock(base_url, path="/api/v3/time", limiter=None):
+    """Process-wide clock per time endpoint, shared by every client signing against it"""
+    key = (base_url.rstrip("/"), path)
+    clock = _clocks.get(key)
+    if clock is None:
+        with _clocks_lock:
+            clock = _clocks.get(key)
+            if clock is None:
+                clock = _clocks[key] = ClockSync(base_url, path, limiter)
+    return clock
+
+
+def is_timestamp_rejection(body):
+    return isinstance(body, dict) and body.get("code") == TIMESTAMP_REJECTED
+
+
+def _reset_after_fork():
+    # The sync thread does not survive a fork; each worker samples for itself
+    global _clocks, _clocks_lock
+    _clocks = {}
+    _clocks_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _collect():
+    clocks = list(_clocks.values())
+    now = time.monotonic()
+    return [
+        ("bot_clock_offset_seconds", "gauge", "Exchange server clock minus local clock (best of recent samples)",
+         [({"url": c.url}, f"{c.offset:.6f}") for c in clocks]),
+        ("bot_clock_rtt_seconds", "gauge", "Round trip of the sample the offset was taken from",
+         [({"url": c.url}, f"{c.rtt:.6f}") for c in clocks if c.rtt is not None]),
+        ("bot_clock_sync_age_seconds", "gauge", "Seconds since the last successful server-time sample",
+         [({"url": c.url}, f"{now - c.last_sync:.3f}") for c in clocks if c.last_sync is not None]),
+        ("bot_clock_syncs_total", "counter", "Server-time samples by outcome",
+         [({"url": c.url, "outcome": "ok"}, c.syncs) for c in clocks] +
+         [({"url": c.url, "outcome": "failed"}, c.failures) for c in clocks]),
+    ]
+
+
+registry.add_collector(_collect)
@@ -0,0 +1,295 @@
+import os
+import json
+import threading
+from abc import ABC, abstractmethod
+from janvi_bot.rest_client import RestClient, get_client, FUTURES_BASE_URL, POOL_SIZE
+from janvi_bot.rate_limiter import RateLimiter
+from janvi_bot.symbol_filters import ExchangeInfoCache, get_exchange_info_cache, prepare_order, CACHE_PATH
+from janvi_bot.price_stream import get_price, WS_URL, FUTURES_WS_URL
+from janvi_bot.risk_engine import get_risk_engine, reject_body
+from janvi_bot.bot_logging import log_info
+from janvi_bot.order_journal import get_journal
+from janvi_bot.order_retry import send_order, NOT_FOUND
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id
+
+# Exchange backends: where an order goes and what it may be. The spot
+# testnet (/api/v3) and USDT-M futures (/fapi/v1) differ in paths, order
+# types, exchangeInfo and rate limits; each backend carries its own REST
+# client (connection pool), limiter and filter cache, and rejects order
+# types it cannot take before anything is sent. Orders also pass the
+# pre-trade risk checks (risk_engine) on their way out.
+#
+# BINANCE_BACKEND=spot|futures picks the default for every order path.
+
+DEFAULT_BACKEND = os.getenv("BINANCE_BACKEND", "spot").lower()
+FUTURES_WEIGHT_LIMIT_1M = int(os.getenv("BINANCE_FUTURES_WEIGHT_LIMIT_1M", "2400"))
+FUTURES_ORDER_LIMIT_10S = int(os.getenv("BINANCE_FUTURES_ORDER_LIMIT_10S", "300"))
+FUTURES_ORDER_LIMIT_1D = int(os.getenv("BINANCE_FUTURES_ORDER_LIMIT_1D", "1728000"))
+FUTURES_INFO_PATH = os.path.join(os.path.dirname(CACHE_PATH), "futures_exchange_info.json")
+
+
+class OrderResult:
+    """One order's outcome, shaped like requests.Response so callers of the sync client can use it unchanged"""
+
+    __slots__ = ("status_code", "body")
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class UnsupportedOrderError(ValueError):
+    """The backend cannot take this order type; raised before any request is sent"""
+
+
+class ExchangeBackend(ABC):
+    name = None
+    api = None
+    order_types = frozenset()
+    emulated_oco = False
+    supports_batch = False
+
+    def __init__(self, client, filters):
+        self.client = client
+        self.filters = filters
+        self.journal = get_journal()
+        # Start sampling server time now, so the first order is already stamped from the exchange's clock
+        if client.clock is not None:
+            client.clock.start()
+
+    @property
+    def order_path(self):
+        return f"{self.api}/order"
+
+    def check(self, type_):
+        if type_ not in self.order_types:
+            raise UnsupportedOrderError(f"{self.name} backend does not support {type_} orders "
+                                        f"(supported: {', '.join(sorted(self.order_types))})")
+
+    def prepare_order(self, symbol, quantity, price=None, **kwargs):
+        return prepare_order(symbol, quantity, price, cache=self.filters, **kwargs)
+
+    def get_filters(self, symbol):
+        return self.filters.get(symbol)
+
+    def price(self, symbol):
+        response = self.client.get(f"{self.api}/ticker/price", {"symbol": symbol.upper()})
+        response.raise_for_status()
+        return float(response.json()["price"])
+
+    def risk_check(self, params):
+        """Pre-trade checks for wire-ready params: None if the order may go, else why not"""
+        risk = get_risk_engine()
+        ref_price = None
+        if params.get("price") is None and risk.needs_price(params["symbol"], self.name):
+            # Only when notional limits need a price nothing has cached yet: one ticker call
+            try:
+                ref_price = self.price(params["symbol"])
+            except (OSError, ValueError, KeyError):
+                pass
+        return risk.check_params(params, self.name, ref_price)
+
+    def new_order(self, params, strategy=None):
+        """Place one order idempotently: retried under its clientOrderId, looked up before any resend"""
+        self.check(params["type"])
+        cid = params.setdefault("newClientOrderId", make_client_order_id(strategy or self.name))
+        rejected = self.risk_check(params)
+        if rejected is not None:
+            response = OrderResult(400, reject_body(rejected))
+        else:
+            response = send_order(lambda: self.client.post(self.order_path, params, signed=True, strategy=strategy),
+                                  lambda: self.get_order(params["symbol"], cid, strategy=strategy), cid)
+            get_risk_engine().on_ack(cid, response)
+        self.journal.ack(cid, response, params["symbol"])
+        get_order_tracker().on_ack(cid, response)
+        return response
+
+    def cancel_order(self, symbol, client_order_id, strategy=None):
+        return self.client.delete(self.order_path, {"symbol": symbol, "origClientOrderId": client_order_id},
+                                  signed=True, strategy=strategy)
+
+    def get_order(self, symbol, client_order_id, strategy=None):
+        return self.client.get(self.order_path, {"symbol": symbol, "origClientOrderId": client_order_id},
+                               signed=True, strategy=strategy)
+
+    @abstractmethod
+    def place_oco(self, params, strategy="oco"):
+        """Place spot-style OCO params (above/below legs) the way this market can"""
+
+    def lookup_orders(self, symbol, client_order_ids, strategy=None):
+        """Which of several orders exist: OrderResult(200, [order or {code: -2013}, ...]) if any does,
+        (400, -2013) if none does, or the failed lookup response"""
+        reports = []
+        for cid in client_order_ids:
+            response = self.get_order(symbol, cid, strategy=strategy)
+            if response.status_code == 200:
+                reports.append(response.json())
+            elif response.json().get("code") == NOT_FOUND:
+                reports.append({"clientOrderId": cid, "code": NOT_FOUND, "msg": "Order does not exist."})
+            else:
+                return response
+        if not any("orderId" in r for r in reports):
+            return OrderResult(400, {"code": NOT_FOUND, "msg": "Order does not exist."})
+        return OrderResult(200, reports)
+
+    def _journal_oco(self, params, response):
+        # One ack per leg, from its report (or the list-level error)
+        get_risk_engine().on_oco_ack(params, response)
+        if response.status_code == 200:
+            for report in response.json().get("orderReports", []):
+                self.journal.ack(report.get("clientOrderId"), OrderResult(200, report), params["symbol"])
+        else:
+            tracker = get_order_tracker()
+            for prefix in ("above", "below"):
+                self.journal.ack(params.get(f"{prefix}ClientOrderId"), response, params["symbol"])
+                tracker.on_ack(params.get(f"{prefix}ClientOrderId"), response)
+        return response
+
+    def stats(self):
+        return {"backend": self.name, **self.client.connection_stats(), **self.client.limiter.headroom()}
+
+
+class SpotBackend(ExchangeBackend):
+    name = "spot"
+    api = "/api/v3"
+    listen_key_path = "/api/v3/userDataStream"
+    depth_path = "/api/v3/depth"
+    stream_url = WS_URL
+    order_types = frozenset(("LIMIT", "MARKET", "LIMIT_MAKER", "STOP_LOSS", "STOP_LOSS_LIMIT", "TAKE_PROFIT",
+                             "TAKE_PROFIT_LIMIT", "OCO"))
+
+    def __init__(self, client=None, filters=None):
+        # The process-wide client and exchangeInfo cache the sync scripts already share
+        super().__init__(client or get_client(), filters or get_exchange_info_cache())
+
+    def price(self, symbol):
+        return get_price(symbol)
+
+    def place_oco(self, params, strategy="oco"):
+        self.check("OCO")
+        legs = [params.setdefault(f"{prefix}ClientOrderId", make_client_order_id(strategy)) for prefix in ("above", "below")]
+        rejected = get_risk_engine().check_oco(params, self.name)
+        if rejected is not None:
+            return self._journal_oco(params, OrderResult(400, reject_body(rejected)))
+        response = send_order(lambda: self.client.post("/api/v3/orderList/oco", params, signed=True, strategy=strategy),
+                              lambda: self._lookup_oco(params["symbol"], legs, strategy), legs[0])
+        return self._journal_oco(params, response)
+
+    def _lookup_oco(self, symbol, legs, strategy):
+        # Spot OCOs are atomic: if a leg exists the list does; answer in the new-OCO response's shape
+        response = self.lookup_orders(symbol, legs, strategy)
+        if response.status_code != 200:
+            return response
+        reports = [r for r in response.json() if "orderId" in r]
+        return OrderResult(200, {"orderListId": reports[0].get("orderListId", -1), "listOrderStatus": "EXECUTING",
+                                 "orderReports": reports})
+
+
+class FuturesBackend(ExchangeBackend):
+    name = "futures"
+    api = "/fapi/v1"
+    listen_key_path = "/fapi/v1/listenKey"
+    depth_path = "/fapi/v1/depth"
+    stream_url = FUTURES_WS_URL
+    # OCO has no futures endpoint; it is emulated with two reduce-only legs
+    order_types = frozenset(("LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET",
+                             "TRAILING_STOP_MARKET", "OCO"))
+    emulated_oco = True
+    supports_batch = True
+
+    def __init__(self, client=None, filters=None):
+        client = client or RestClient(base_url=FUTURES_BASE_URL, pool_size=POOL_SIZE, limiter=RateLimiter(
+            FUTURES_WEIGHT_LIMIT_1M, FUTURES_ORDER_LIMIT_10S, FUTURES_ORDER_LIMIT_1D), time_path="/fapi/v1/time")
+        filters = filters or ExchangeInfoCache(FUTURES_INFO_PATH, client=client, info_path="/fapi/v1/exchangeInfo")
+        super().__init__(client, filters)
+
+    def place_oco(self, params, strategy="oco"):
+        """Spot-style OCO params -> TAKE_PROFIT_MARKET + STOP_MARKET, both reduce-only, in one batch.
+
+        The exchange does not link the legs: the caller cancels the survivor
+        when one fills (oco._on_oco_fill does, from the user-data stream).
+        If only one leg is accepted it is cancelled again, so a half OCO never
+        stays on the book.
+        """
+        self.check("OCO")
+        legs = []
+        for prefix in ("above", "below"):
+            spot_type = params[f"{prefix}Type"]
+            stop_leg = spot_type.startswith("STOP")
+            legs.append({
+                "symbol": params["symbol"], "side": params["side"], "quantity": params["quantity"],
+                "type": "STOP_MARKET" if stop_leg else "TAKE_PROFIT_MARKET",
+                "stopPrice": params[f"{prefix}StopPrice"] if stop_leg else params[f"{prefix}Price"],
+                "reduceOnly": "true", "workingType": "CONTRACT_PRICE",
+                "newClientOrderId": params.get(f"{prefix}ClientOrderId") or make_client_order_id(strategy),
+            })
+        cids = [leg["newClientOrderId"] for leg in legs]
+        params.update(aboveClientOrderId=cids[0], belowClientOrderId=cids[1])
+        rejected = get_risk_engine().check_oco(params, self.name)
+        if rejected is not None:
+            return self._journal_oco(params, OrderResult(400, reject_body(rejected)))
+        batch = json.dumps([{k: str(v) for k, v in leg.items() if v is not None} for leg in legs], separators=(",", ":"))
+        # An unknown outcome looks both legs up: one leg alone counts as a rejected OCO below
+        response = send_order(lambda: self.client.post(f"{self.api}/batchOrders", {"batchOrders": batch}, signed=True,
+                                                       strategy=strategy),
+                              lambda: self.lookup_orders(params["symbol"], cids, strategy), cids[0])
+        if response.status_code != 200:
+            return self._journal_oco(params, response)
+
+        reports = response.json()
+        rejected = [r for r in reports if "orderId" not in r]
+        if rejected:
+            for report in reports:
+                if "orderId" in report:
+                    self.cancel_order(params["symbol"], report["clientOrderId"], strategy=strategy)
+            return self._journal_oco(params, OrderResult(400, {"code": rejected[0].get("code"),
+                                                               "msg": f"OCO leg rejected: {rejected[0].get('msg')}"}))
+        return self._journal_oco(params, OrderResult(200, {"orderListId": -1, "listOrderStatus": "EXECUTING",
+                                                           "orderReports": reports}))
+
+
+BACKENDS = {"spot": SpotBackend, "futures": FuturesBackend}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """Process-wide backend by name (default BINANCE_BACKEND); a backend instance passes straight through"""
+    if isinstance(name, ExchangeBackend):
+        return name
+    name = (name or DEFAULT_BACKEND).lower()
+    backend = _backends.get(name)
+    if backend is None:
+        if name not in BACKENDS:
+            raise UnsupportedOrderError(f"Unknown backend: {name} (choose from {', '.join(BACKENDS)})")
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = BACKENDS[name]()
+                log_info(f"Exchange backend ready: {name}", base_url=backend.client.base_url)
+    return backend
+
+
+def _reset_after_fork():
+    global _backends, _backends_lock
+    _backends = {}
+    _backends_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def backend_from_argv(argv):
+    """Pop `--backend NAME` from a CLI argv list; None when absent"""
+    if "--backend" not in argv:
+        return None
+    i = argv.index("--backend")
+    if i + 1 >= len(argv):
+        raise SystemExit("--backend needs a name (spot or futures)")
+    name = argv[i + 1]
+    del argv[i:i + 2]
+    return name
@@ -0,0 +1,151 @@
+import threading
+from collections import OrderedDict
+from janvi_bot.bot_logging import log_info
+from janvi_bot.metrics import registry
+from janvi_bot.price_stream import get_traded
+
+# Execution quality of the slicing algorithms (TWAP / VWAP / POV). Per slice:
+#   slippage      - fill price against the price when the slice was sent, in
+#                   bps, positive when it cost us (paid up on a buy, sold down)
+#   participation - our fill against the market volume the trade stream saw
+#                   since the previous slice (None without the trade stream)
+# and per job the same against the arrival price and the whole run's volume,
+# plus the market's own VWAP over the run. Exported on /metrics (bot_exec_*).
+
+# Finished jobs stay on /metrics until this many newer ones have started
+KEEP_JOBS = 100
+
+
+def fill_price(body):
+    """Average fill price of an order response (spot cummulativeQuoteQty, futures avgPrice), None if nothing filled"""
+    executed = float(body.get("executedQty") or 0)
+    if executed <= 0:
+        return None
+    avg = float(body.get("avgPrice") or 0)
+    if avg > 0:
+        return avg
+    quote = float(body.get("cummulativeQuoteQty") or body.get("cumQuote") or 0)
+    return quote / executed if quote > 0 else None
+
+
+def slippage_bps(side, reference, price):
+    sign = 1 if side == "BUY" else -1
+    return sign * (price - reference) / reference * 10000
+
+
+class ExecutionStats:
+    def __init__(self, name, algo, symbol, side, url=None):
+        self.name = name
+        self.algo = algo
+        self.symbol = symbol
+        self.side = side
+        # Trade stream of the market the job trades on (None: whichever is running)
+        self.url = url
+        self.arrival = None
+        self.slices = []
+        self.executed = 0.0
+        self.notional = 0.0
+        self._start_traded = None
+        self._last_traded = None
+        self._end_traded = None
+        self._lock = threading.Lock()
+        _register(self)
+
+    def begin(self, arrival_price):
+        """Arrival price and the market volume so far, taken when the run starts"""
+        self.arrival = arrival_price
+        self._traded()
+
+    def end(self):
+        """Freeze the market's volume at the end of the run, so the job's participation stops moving"""
+        self._end_traded = self._traded()
+
+    def _traded(self):
+        if self._end_traded is not None:
+            return self._end_traded
+        traded = get_traded(self.symbol, self.url)
+        if traded is not None and self._start_traded is None:
+            # The trade stream came up after the run started: count the market from here
+            self._start_traded = self._last_traded = traded
+        return traded
+
+    def market_volume(self):
+        """Volume the market traded since the run started (ours included), None without the trade stream"""
+        traded = self._traded()
+        return None if traded is None else traded[0] - self._start_traded[0]
+
+    def record(self, index, reference, body):
+        """Account one slice's order response; returns the slice's figures"""
+        price = fill_price(body)
+        qty = float(body.get("executedQty") or 0)
+        traded = self._traded()
+        interval_volume = None
+        if traded is not None and self._last_traded is not None:
+            interval_volume = traded[0] - self._last_traded[0]
+        entry = {
+            "slice": index, "qty": qty, "price": price, "reference": reference,
+            "slippage_bps": round(slippage_bps(self.side, reference, price), 3) if price and reference else None,
+            "market_volume": interval_volume,
+            "participation": round(qty / interval_volume, 4) if interval_volume else None,
+        }
+        with self._lock:
+            if traded is not None:
+                self._last_traded = traded
+            self.slices.append(entry)
+            if price:
+                self.executed += qty
+                self.notional += qty * price
+        log_info(f"Slice {index + 1} execution", job=self.name, qty=qty, price=price,
+                 slippage_bps=entry["slippage_bps"], participation=entry["participation"])
+        return entry
+
+    def summary(self):
+        with self._lock:
+            avg = self.notional / self.executed if self.executed else None
+            out = {"algo": self.algo, "slices": len(self.slices), "executed": round(self.executed, 8),
+                   "avg_price": round(avg, 8) if avg else None, "arrival": self.arrival,
+                   "slippage_bps": round(slippage_bps(self.side, self.arrival, avg), 3) if avg and self.arrival else None}
+        traded = self._traded()
+        if traded is not None:
+            volume, notional = traded[0] - self._start_traded[0], traded[1] - self._start_traded[1]
+            out["market_volume"] = round(volume, 8)
+            out["participation"] = round(self.executed / volume, 4) if volume else None
+            # Against the market's VWAP over the run (the benchmark a VWAP order is judged by)
+            market_vwap = notional / volume if volume else None
+            out["market_vwap"] = round(market_vwap, 8) if market_vwap else None
+            out["vs_vwap_bps"] = round(slippage_bps(self.side, market_vwap, avg), 3) if avg and market_vwap else None
+        return out
+
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def _register(stats):
+    with _jobs_lock:
+        _jobs[stats.name] = stats
+        while len(_jobs) > KEEP_JOBS:
+            _jobs.popitem(last=False)
+
+
+def execution_snapshot():
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return {s.name: s.summary() for s in jobs}
+
+
+def _collect():
+    rows = [({"job": name, "algo": s["algo"]}, s) for name, s in execution_snapshot().items()]
+    return [
+        ("bot_exec_executed_qty", "gauge", "Quantity executed per slicing job",
+         [(labels, s["executed"]) for labels, s in rows]),
+        ("bot_exec_slices_total", "counter", "Slices sent per slicing job",
+         [(labels, s["slices"]) for labels, s in rows]),
+        ("bot_exec_slippage_bps", "gauge", "Average fill vs arrival price, bps (positive = cost)",
+         [(labels, s["slippage_bps"]) for labels, s in rows if s["slippage_bps"] is not None]),
+        ("bot_exec_participation_ratio", "gauge", "Executed quantity / market volume over the run",
+         [(labels, s["participation"]) for labels, s in rows if s.get("participation") is not None]),
+    ]
+
+
+registry.add_collector(_collect)
@@ -0,0 +1,116 @@
+import sys
+import time
+from janvi_bot.bot_logging import log_info, log_error, log_payload, elapsed_ms
+from janvi_bot.validation import validate_symbol, validate_quantity, validate_price
+from janvi_bot.symbol_filters import FilterError
+from janvi_bot.metrics import span
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id
+from janvi_bot.exchange_backend import get_backend, backend_from_argv
+
+# Place Limit Order 
+def place_limit_order(symbol, side, quantity, price, backend=None):
+    side = side.upper()
+    symbol = symbol.upper()
+    backend = get_backend(backend)
+
+    log_info(f"Placing LIMIT order: {side} {quantity} {symbol} at {price} USDT", backend=backend.name)
+
+    tags = {"endpoint": backend.order_path, "symbol": symbol, "strategy": "limit"}
+
+    # Snap to LOT_SIZE / tick size and check filters before anything goes on the wire
+    try:
+        with span("validate", **tags):
+            backend.check("LIMIT")
+            quantity, price = backend.prepare_order(symbol, quantity, price)
+    except ValueError as e:
+        log_error(f"Order rejected locally: {e}", symbol=symbol)
+        return
+
+    params = {
+        "symbol": symbol,
+        "side": side,
+        "type": "LIMIT",
+        "quantity": quantity,
+        "price": price,
+        "timeInForce": "GTC",
+        "newClientOrderId": make_client_order_id("limit")
+    }
+    # Fills arrive on the user-data stream under this clientOrderId
+    get_order_tracker().track(params["newClientOrderId"], symbol, side, "LIMIT", price, quantity, strategy="limit")
+
+    try:
+        start = time.perf_counter()
+        response = backend.new_order(params, strategy="limit")
+        with span("parse", **tags):
+            body = response.json()
+        log_info(f"Response Status: {response.status_code}", symbol=symbol, order_id=body.get("orderId"),
+                 latency_ms=elapsed_ms(start), error=body.get("msg"))
+        log_payload("Limit order response", body, symbol=symbol)
+    except Exception as e:
+        log_error(f"Error placing order: {e}", symbol=symbol)
+
+# Place several limit orders at once: queued on the futures batcher, five per request
+def place_limit_orders(symbol, side, quantity, prices):
+    side = side.upper()
+    symbol = symbol.upper()
+    from janvi_bot.order_batcher import get_batcher  # only batched entry needs the batcher's thread pool
+    batcher = get_batcher()
+    backend = get_backend("futures")
+    tracker = get_order_tracker()
+    log_info(f"Placing {len(prices)} LIMIT orders: {side} {quantity} {symbol} at {', '.join(map(str, prices))}")
+
+    start = time.perf_counter()
+    submitted = []
+    for price in prices:
+        try:
+            qty, px = backend.prepare_order(symbol, quantity, price)
+        except FilterError as e:
+            log_error(f"Order rejected locally: {e}", symbol=symbol, price=price)
+            continue
+        params = {"symbol": symbol, "side": side, "type": "LIMIT", "quantity": qty, "price": px,
+                  "timeInForce": "GTC", "newClientOrderId": make_client_order_id("limit")}
+        tracker.track(params["newClientOrderId"], symbol, side, "LIMIT", px, qty, strategy="limit")
+        submitted.append((px, batcher.submit(params)))
+
+    results = []
+    for px, future in submitted:
+        try:
+            response = future.result()
+        except Exception as e:
+            log_error(f"Error placing order: {e}", symbol=symbol, price=px)
+            continue
+        body = response.json()
+        log_info(f"Response Status: {response.status_code}", symbol=symbol, price=px, order_id=body.get("orderId"),
+                 error=body.get("msg"))
+        results.append(response)
+    log_info(f"{len(results)}/{len(prices)} limit orders answered in {elapsed_ms(start)} ms", **batcher.stats())
+    return results
+
+#  CLI Interface
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    backend = backend_from_argv(argv)
+    if len(argv) < 5:
+        print("Usage: python -m janvi_bot.limit_order "
+              "SYMBOL BUY/SELL QUANTITY PRICE [PRICE ...] [--backend spot|futures]")
+        sys.exit(1)
+
+    symbol, side, quantity, prices = argv[1], argv[2], argv[3], argv[4:]
+
+    # Validate inputs
+    if not validate_symbol(symbol):
+        sys.exit(1)
+    if not validate_quantity(quantity):
+        sys.exit(1)
+    if not all(validate_price(price) for price in prices):
+        sys.exit(1)
+
+    # Place order(s); several prices go out as batches where the backend has a batch endpoint
+    if len(prices) > 1 and get_backend(backend).supports_batch:
+        place_limit_orders(symbol, side, quantity, prices)
+    else:
+        for price in prices:
+            place_limit_order(symbol, side, quantity, price, backend)
+
+if __name__ == "__main__":
+    main()
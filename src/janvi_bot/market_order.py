@@ -0,0 +1,91 @@
+import sys
+import time
+from janvi_bot.bot_logging import log_info, log_error, log_payload, elapsed_ms
+from janvi_bot.validation import validate_symbol, validate_quantity
+from janvi_bot.price_stream import get_cached_price
+from janvi_bot.metrics import span
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id
+from janvi_bot.exchange_backend import OrderResult, get_backend, backend_from_argv
+from janvi_bot.risk_engine import SIM_ACCOUNT, get_risk_engine
+
+# LIVE MARKET ORDER on a spot or futures backend
+def place_live_market_order(symbol, side, quantity, backend):
+    symbol, side = symbol.upper(), side.upper()
+    backend = get_backend(backend)
+    tags = {"endpoint": backend.order_path, "symbol": symbol, "strategy": "market"}
+    try:
+        with span("validate", **tags):
+            backend.check("MARKET")
+            quantity, _ = backend.prepare_order(symbol, quantity, market=True, ref_price=get_cached_price(symbol, backend.stream_url))
+    except ValueError as e:
+        log_error(f"Order rejected locally: {e}", symbol=symbol)
+        return None
+
+    params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": quantity,
+              "newClientOrderId": make_client_order_id("market")}
+    get_order_tracker().track(params["newClientOrderId"], symbol, side, "MARKET", None, quantity, strategy="market")
+    start = time.perf_counter()
+    response = backend.new_order(params, strategy="market")
+    with span("parse", **tags):
+        body = response.json()
+    log_info(f"Market order response: {response.status_code}", symbol=symbol, backend=backend.name,
+             order_id=body.get("orderId"), status=body.get("status"), latency_ms=elapsed_ms(start), error=body.get("msg"))
+    log_payload("Market order response", body, symbol=symbol)
+    return body if response.status_code == 200 else None
+
+# SIMULATED MARKET ORDER
+# Executed against the local matching engine (sim_exchange), centred on the
+# last streamed price when there is one, so fills walk a real book.
+# With a backend (spot/futures) the order goes to the exchange instead.
+def place_market_order(symbol, side, quantity, backend=None):
+    if backend is not None:
+        return place_live_market_order(symbol, side, quantity, backend)
+    from janvi_bot.sim_exchange import get_engine, SimError  # the local engine only loads for simulated orders
+    symbol, side = symbol.upper(), side.upper()
+    engine = get_engine()
+    engine.ensure_symbol(symbol, get_cached_price(symbol))
+
+    # The same pre-trade gate as a live order, sized at the local book's price
+    risk = get_risk_engine()
+    params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": quantity,
+              "newClientOrderId": make_client_order_id("market")}
+    rejected = risk.check_params(params, SIM_ACCOUNT, float(engine.ticker(symbol)["price"]))
+    if rejected is not None:
+        log_error(f"[SIMULATION] Market order rejected: {rejected}", symbol=symbol, side=side, quantity=quantity)
+        return None
+
+    start = time.perf_counter()
+    try:
+        with span("total", endpoint="/api/v3/order", symbol=symbol, strategy="market_sim"):
+            order = engine.new_order(symbol, side, "MARKET", quantity, client_order_id=params["newClientOrderId"])
+    except SimError as e:
+        risk.on_ack(params["newClientOrderId"], OrderResult(e.status, {"code": e.code, "msg": e.msg}))
+        log_error(f"[SIMULATION] Market order rejected: {e.code} {e.msg}", symbol=symbol, side=side, quantity=quantity)
+        return None
+    risk.on_ack(params["newClientOrderId"], OrderResult(200, order))
+    latency_ms = elapsed_ms(start)
+
+    executed = float(order["executedQty"])
+    avg_price = float(order["cummulativeQuoteQty"]) / executed if executed else None
+    log_info("[SIMULATION] Market order executed", symbol=symbol, side=side, quantity=quantity,
+             status=order["status"], order_id=order["orderId"], executed_qty=order["executedQty"],
+             avg_price=avg_price, fills=len(order["fills"]), latency_ms=latency_ms)
+    log_payload("[SIMULATION] Market order response", order, symbol=symbol)
+    return order
+
+#  CLI 
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    backend = backend_from_argv(argv)
+    if len(argv) != 4:
+        print("Usage: python -m janvi_bot.market_order "
+              "SYMBOL BUY/SELL QUANTITY [--backend spot|futures]  (simulated without --backend)")
+        sys.exit(1)
+
+    symbol, side, quantity = argv[1], argv[2], argv[3]
+
+    if validate_symbol(symbol) and validate_quantity(quantity):
+        place_market_order(symbol, side, quantity, backend)
+
+if __name__ == "__main__":
+    main()
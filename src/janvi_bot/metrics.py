@@ -0,0 +1,277 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# Order-lifecycle latency metrics. Each hot-path step (validate, sign,
+# connect, send, first_byte, parse, total) is recorded as a span into an
+# HDR-style log-linear histogram keyed by span/endpoint/symbol/strategy,
+# rendered in Prometheus text format for the Flask /metrics route. A
+# sampling profiler can be switched on and off at runtime.
+
+# Sub-buckets per power of two (HDR "significant bits"): 7 bits keeps every
+# recorded value within ~1.6% of its true value
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS // 2
+# Values are microseconds; anything from 191 * 2^30 us (~57h) up lands in the last bucket
+MAX_EXPONENT = 36 - SUB_BUCKET_BITS + 1
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+LABELS = ("span", "endpoint", "symbol", "strategy")
+PROFILE_INTERVAL = float(os.getenv("BOT_PROFILE_INTERVAL", "0.005"))
+
+
+def _bucket_index(value):
+    if value < SUB_BUCKETS:
+        return value
+    exponent = min(value.bit_length() - SUB_BUCKET_BITS, MAX_EXPONENT)
+    return min(exponent * HALF_BUCKETS + (value >> exponent), (MAX_EXPONENT + 1) * HALF_BUCKETS + SUB_BUCKETS - 1)
+
+
+def _bucket_upper(index):
+    if index < SUB_BUCKETS:
+        return index
+    exponent = index // HALF_BUCKETS - 1
+    return ((index - exponent * HALF_BUCKETS + 1) << exponent) - 1
+
+
+class Histogram:
+    """Log-linear latency histogram in microseconds (fixed memory, O(1) record)"""
+
+    __slots__ = ("counts", "count", "total", "min", "max", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * ((MAX_EXPONENT + 1) * HALF_BUCKETS + SUB_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        index = _bucket_index(max(0, int(seconds * 1e6)))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+
+    def quantile(self, q):
+        """Upper bound (seconds) of the bucket holding the q-th value"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank:
+                    # The last bucket is open-ended: its upper bound says nothing about what landed there
+                    if index == len(self.counts) - 1:
+                        return self.max
+                    return min(_bucket_upper(index) / 1e6, self.max)
+        return self.max
+
+    def snapshot(self):
+        result = {"count": self.count, "sum_s": round(self.total, 6),
+                  "min_ms": None if self.min is None else round(self.min * 1000, 3), "max_ms": round(self.max * 1000, 3)}
+        for q in QUANTILES:
+            value = self.quantile(q)
+            result[f"p{q * 100:g}_ms"] = None if value is None else round(value * 1000, 3)
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self.spans = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, key):
+        histogram = self.spans.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.spans.setdefault(key, Histogram())
+        return histogram
+
+    def add_collector(self, fn):
+        """fn() -> [(metric name, type, help, [(labels dict, value), ...]), ...], rendered on every scrape"""
+        self.collectors.append(fn)
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+
+    def snapshot(self):
+        return {"|".join(key): h.snapshot() for key, h in sorted(self.spans.items())}
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP bot_order_span_seconds Latency of each order-lifecycle step",
+            "# TYPE bot_order_span_seconds summary",
+        ]
+        for key, histogram in sorted(self.spans.items()):
+            labels = _format_labels(dict(zip(LABELS, key)))
+            for q in QUANTILES:
+                lines.append(f'bot_order_span_seconds{{{labels},quantile="{q}"}} {histogram.quantile(q) or 0:.6f}')
+            lines.append(f"bot_order_span_seconds_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"bot_order_span_seconds_count{{{labels}}} {histogram.count}")
+
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    suffix = f"{{{_format_labels(labels)}}}" if labels else ""
+                    lines.append(f"{name}{suffix} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{k}="{escape(v)}"' for k, v in labels.items())
+
+
+registry = Registry()
+_local = threading.local()
+
+
+# ----- spans -----
+
+def current_labels():
+    return getattr(_local, "labels", None) or {}
+
+
+def set_labels(labels):
+    """Attach endpoint/symbol/strategy to this thread's spans (e.g. connection hooks); returns the previous labels"""
+    previous = getattr(_local, "labels", None)
+    _local.labels = labels
+    return previous
+
+
+def observe(span_name, seconds, endpoint=None, symbol=None, strategy=None):
+    labels = current_labels()
+    key = (span_name,
+           endpoint if endpoint is not None else labels.get("endpoint", ""),
+           symbol if symbol is not None else labels.get("symbol", ""),
+           strategy if strategy is not None else labels.get("strategy", ""))
+    registry.histogram(key).record(seconds)
+
+
+def observe_since(span_name, start, **labels):
+    """Record a span that began at time.perf_counter() == start"""
+    observe(span_name, time.perf_counter() - start, **labels)
+
+
+class span:
+    """with span("validate", endpoint=..., symbol=..., strategy=...): ..."""
+
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def render_prometheus():
+    return registry.render_prometheus()
+
+
+# ----- runtime profiling -----
+
+class SamplingProfiler:
+    """Samples every thread's stack via sys._current_frames(); cheap enough to leave on briefly in production"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def report(self, top=25):
+        """Leaf-function (self time) ranking plus collapsed stacks for flamegraph.pl / speedscope"""
+        leaves = Counter()
+        for stack, n in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        total = sum(self.stacks.values()) or 1
+        return {
+            "samples": self.samples,
+            "interval_s": self.interval,
+            "duration_s": round(time.time() - self.started, 3) if self.started else 0,
+            "top": [{"function": fn, "samples": n, "pct": round(100 * n / total, 2)} for fn, n in leaves.most_common(top)],
+            "collapsed": [f"{stack} {n}" for stack, n in self.stacks.most_common()],
+        }
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def start_profiling(interval=PROFILE_INTERVAL):
+    """Start the sampling profiler; False if one is already running"""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is not None:
+            return False
+        _profiler = SamplingProfiler(interval).start()
+        return True
+
+
+def stop_profiling(top=25):
+    """Stop the sampling profiler and return its report (None if it was not running)"""
+    global _profiler
+    with _profiler_lock:
+        profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    profiler.stop()
+    return profiler.report(top)
+
+
+def profiling_active():
+    return _profiler is not None
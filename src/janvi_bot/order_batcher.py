@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from janvi_bot.exchange_backend import OrderResult, get_backend
+from janvi_bot.risk_engine import get_risk_engine, reject_body
+from janvi_bot.order_journal import get_journal
+from janvi_bot.order_retry import send_order, classify, backoff, ORDER_RETRIES, NOT_FOUND, TRANSIENT, UNKNOWN
+from janvi_bot.clock_sync import is_timestamp_rejection
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.metrics import observe_since
+
+# Batched order entry for USDT-M futures: limit orders are queued per symbol
+# and sent up to five at a time through /fapi/v1/batchOrders. A queue goes
+# out when it is full or when its linger window expires, whichever comes
+# first, so a burst of grid levels costs one request per five orders and a
+# lone order waits at most the linger time. Every caller gets a Future for
+# its own order; a batch where some orders are rejected settles each Future
+# with that order's own result. Batches are retried like single orders
+# (order_retry): when a batch's outcome is unknown its orders are looked up
+# and only the ones that never arrived are sent again. Entries of a batch
+# answer are classified the same way: a throttled or -1021 entry is resent
+# after a backoff, an unknown one is looked up first. An order the answer
+# says nothing about fails its Future (BatchError: outcome unknown), and
+# waiting on a Future is bounded by BATCH_RESULT_TIMEOUT_S.
+
+BATCH_PATH = "/fapi/v1/batchOrders"
+ORDER_PATH = "/fapi/v1/order"
+MAX_BATCH = 5  # exchange limit per batchOrders call
+BATCH_LINGER = float(os.getenv("BATCH_LINGER_MS", "5")) / 1000
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+RESULT_TIMEOUT = float(os.getenv("BATCH_RESULT_TIMEOUT_S", "30"))
+
+
+class BatchError(RuntimeError):
+    """The batch answer had no entry for this order: whether it was placed is unknown"""
+
+
+class BatchFuture(Future):
+    """A queued order's Future; result() waits at most RESULT_TIMEOUT by default"""
+
+    def result(self, timeout=RESULT_TIMEOUT):
+        try:
+            return super().result(timeout)
+        except FutureTimeoutError:
+            # Not the builtin TimeoutError before Python 3.11
+            raise FutureTimeoutError(f"no answer for the batched order within {timeout}s") from None
+
+
+class OrderBatcher:
+    def __init__(self, backend=None, linger=BATCH_LINGER, max_batch=MAX_BATCH, workers=BATCH_WORKERS, strategy=None):
+        self.backend = backend
+        self.linger = linger
+        self.max_batch = max(1, min(max_batch, MAX_BATCH))
+        self.strategy = strategy
+        self._pending = {}
+        self._deadlines = {}
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order-batch")
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="order-batcher", daemon=True)
+        self._thread.start()
+
+        self.orders = 0
+        self.requests = 0
+        self.rejected = 0
+
+    def _get_backend(self):
+        if self.backend is None:
+            self.backend = get_backend("futures")
+        return self.backend
+
+    def submit(self, params):
+        """Queue one order (wire-ready params incl. symbol); returns a BatchFuture resolving to an OrderResult"""
+        future = BatchFuture()
+        symbol = params["symbol"]
+        # Fixed before the first attempt, so retries of the batch resend the same order
+        params.setdefault("newClientOrderId", make_client_order_id(self.strategy or "batch"))
+        rejected = get_risk_engine().check_params(params, self._get_backend().name)
+        if rejected is not None:
+            # Refused before queueing: settled at once, like an order the exchange rejected
+            result = OrderResult(400, reject_body(rejected))
+            get_journal().ack(params["newClientOrderId"], result, symbol)
+            get_order_tracker().on_ack(params["newClientOrderId"], result)
+            future.set_result(result)
+            return future
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("order batcher is stopped")
+            queue = self._pending.setdefault(symbol, [])
+            if not queue:
+                self._deadlines[symbol] = time.monotonic() + self.linger
+            queue.append((params, future))
+            if len(queue) >= self.max_batch:
+                self._dispatch(symbol)
+            else:
+                self._cond.notify()
+        return future
+
+    def flush(self):
+        """Send everything queued now, without waiting out the linger window"""
+        with self._cond:
+            for symbol in list(self._pending):
+                self._dispatch(symbol)
+
+    def _dispatch(self, symbol):
+        # Called with the lock held
+        items = self._pending.pop(symbol, None)
+        self._deadlines.pop(symbol, None)
+        if items:
+            self._pool.submit(self._send, symbol, items)
+
+    def _run(self):
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                for symbol in [s for s, due in self._deadlines.items() if due <= now]:
+                    self._dispatch(symbol)
+                timeout = min(self._deadlines.values()) - now if self._deadlines else None
+                self._cond.wait(timeout)
+
+    def _send(self, symbol, items):
+        start = time.perf_counter()
+        self.orders += len(items)
+        try:
+            results = self._post(symbol, [params for params, _ in items])
+        except Exception as e:
+            log_error(f"Batch of {len(items)} orders failed: {e}", symbol=symbol)
+            for _, future in items:
+                future.set_exception(e)
+            return
+        observe_since("batch", start, endpoint=BATCH_PATH, symbol=symbol, strategy=self.strategy or "")
+        journal = get_journal()
+        risk = get_risk_engine()
+        tracker = get_order_tracker()
+        if len(results) != len(items):
+            log_error(f"Batch answer has {len(results)} results for {len(items)} orders", symbol=symbol)
+        for i, (params, future) in enumerate(items):
+            result = results[i] if i < len(results) else None
+            if result is None:
+                # No answer for this order: it may or may not rest on the book, so nothing is settled
+                future.set_exception(BatchError(f"no result for order {params.get('newClientOrderId')} in the batch answer"))
+                continue
+            if result.status_code != 200:
+                self.rejected += 1
+            journal.ack(params.get("newClientOrderId"), result, symbol)
+            risk.on_ack(params.get("newClientOrderId"), result)
+            tracker.on_ack(params.get("newClientOrderId"), result)
+            future.set_result(result)
+
+    def _post(self, symbol, orders, depth=0):
+        backend = self._get_backend()
+        client = backend.client
+        self.requests += 1
+        cids = [params["newClientOrderId"] for params in orders]
+        if len(orders) == 1:
+            response = send_order(lambda: client.post(ORDER_PATH, orders[0], signed=True, strategy=self.strategy),
+                                  lambda: backend.get_order(symbol, cids[0], strategy=self.strategy), cids[0])
+            return [OrderResult(response.status_code, response.json())]
+
+        batch = json.dumps([{k: str(v) for k, v in params.items() if v is not None} for params in orders],
+                           separators=(",", ":"))
+        response = send_order(lambda: client.post(BATCH_PATH, {"batchOrders": batch}, signed=True, strategy=self.strategy),
+                              lambda: backend.lookup_orders(symbol, cids, strategy=self.strategy), cids[0])
+        body = response.json()
+        if response.status_code != 200:
+            # The whole call was refused: every order in it gets that error
+            log_error(f"batchOrders rejected: {response.status_code} {body}", symbol=symbol, orders=len(orders))
+            return [OrderResult(response.status_code, body) for _ in orders]
+        # One entry per order, in request order: the order, or {"code", "msg"} when that order failed.
+        # Orders without an entry get None (outcome unknown)
+        entries = body[:len(orders)] if isinstance(body, list) else []
+        results = [OrderResult(400 if "code" in entry and "orderId" not in entry else 200, entry) for entry in entries]
+        results += [None] * (len(orders) - len(results))
+        if depth >= ORDER_RETRIES:
+            return results
+        # Entries are classified like single orders. After an unknown outcome the lookup reports
+        # orders that never arrived as -2013: those are sent again, as are throttled entries
+        kinds = [classify(result) if result.status_code != 200 else None for result in results[:len(entries)]]
+        resend = [i for i, entry in enumerate(entries) if entry.get("code") == NOT_FOUND or kinds[i] == TRANSIENT]
+        unknown = [i for i, kind in enumerate(kinds) if kind == UNKNOWN and entries[i].get("code") != NOT_FOUND]
+        if unknown:
+            resend += self._look_up(symbol, [cids[i] for i in unknown], unknown, results)
+        if resend:
+            if any(kinds[i] == TRANSIENT for i in resend):
+                if client.clock is not None and any(is_timestamp_rejection(entries[i]) for i in resend):
+                    client.clock.on_rejected()
+                time.sleep(backoff(depth + 1))
+            resend.sort()
+            for i, result in zip(resend, self._post(symbol, [orders[i] for i in resend], depth + 1)):
+                results[i] = result
+        return results
+
+    def _look_up(self, symbol, cids, positions, results):
+        # Entries whose outcome is unknown: ones that landed take their report, the positions of the
+        # ones that never arrived are returned for a resend, and a failed lookup leaves them unknown
+        response = self._get_backend().lookup_orders(symbol, cids, strategy=self.strategy)
+        body = response.json()
+        if response.status_code != 200:
+            return list(positions) if isinstance(body, dict) and body.get("code") == NOT_FOUND else []
+        missing = []
+        for i, report in zip(positions, body):
+            if "orderId" in report:
+                results[i] = OrderResult(200, report)
+            else:
+                missing.append(i)
+        return missing
+
+    def stats(self):
+        return {"orders": self.orders, "requests": self.requests, "rejected": self.rejected,
+                "orders_per_request": round(self.orders / self.requests, 2) if self.requests else 0.0}
+
+    def stop(self):
+        self.flush()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        log_info("Order batcher stopped", **self.stats())
+
+
+_batcher = None
+_lock = threading.Lock()
+
+
+def get_batcher():
+    """Process-wide batcher shared by every order path that opts into batching"""
+    global _batcher
+    if _batcher is None:
+        with _lock:
+            if _batcher is None:
+                _batcher = OrderBatcher()
+    return _batcher
+
+
+def _reset_after_fork():
+    global _batcher, _lock
+    _batcher = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
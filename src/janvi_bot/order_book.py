@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.metrics import registry
+from janvi_bot.price_stream import PriceStream
+from janvi_bot.exchange_backend import get_backend
+
+# Local L2 order book mirror, maintained the way Binance documents it: open
+# the diff-depth stream and buffer its updates, fetch a REST snapshot, drop
+# the buffered updates the snapshot already contains, then apply the rest
+# in sequence (U == previous u + 1; futures: pu == previous u). A sequence
+# gap or a dropped connection unsyncs the book until a fresh snapshot lands.
+# Strategies query it in microseconds instead of a REST depth call:
+#   book = get_order_book("BTCUSDT", wait=5)
+#   book.size_within("asks", 10)          # size offered within 10 bps of mid
+#   book.price_for_size("bids", 2.5)      # how deep a 2.5 sell would reach
+
+DEPTH_STREAM = os.getenv("BOOK_DEPTH_STREAM", "depth@100ms")
+SNAPSHOT_LIMIT = int(os.getenv("BOOK_SNAPSHOT_LIMIT", "500"))
+# How long strategies wait for a new book to sync before going without it
+SYNC_WAIT = float(os.getenv("BOOK_SYNC_WAIT", "5"))
+# Updates kept while waiting for a snapshot; older ones would predate any new snapshot anyway
+BUFFER_CAP = 1000
+RESYNC_CAP = 10.0
+
+
+class BookSide:
+    """Levels as parallel arrays sorted best-first (keys are sign * price, so bids sort descending).
+
+    bisect finds a level in O(log n); inserting or removing one shifts the
+    arrays with a single memmove, cheap at the few thousand levels a book holds.
+    """
+
+    def __init__(self, is_bid):
+        self.sign = -1.0 if is_bid else 1.0
+        self.keys = []
+        self.qtys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load(self, levels):
+        pairs = sorted((self.sign * float(p), float(q)) for p, q in levels if float(q) > 0)
+        self.keys = [k for k, _ in pairs]
+        self.qtys = [q for _, q in pairs]
+
+    def set(self, price, qty):
+        # qty 0 removes the level
+        key = self.sign * price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            if qty > 0:
+                self.qtys[i] = qty
+            else:
+                del self.keys[i]
+                del self.qtys[i]
+        elif qty > 0:
+            self.keys.insert(i, key)
+            self.qtys.insert(i, qty)
+
+    def best(self):
+        return self.sign * self.keys[0] if self.keys else None
+
+    def size_through(self, price):
+        """Total size from the touch up to and including `price`"""
+        return sum(self.qtys[:bisect_right(self.keys, self.sign * price)])
+
+    def price_for(self, qty):
+        """Price at which the cumulative size from the touch reaches qty (None if the side is thinner)"""
+        total = 0.0
+        for key, level_qty in zip(self.keys, self.qtys):
+            total += level_qty
+            if total >= qty:
+                return self.sign * key
+        return None
+
+    def levels(self, n):
+        return [(self.sign * k, q) for k, q in zip(self.keys[:n], self.qtys[:n])]
+
+
+class OrderBook:
+    """One symbol's mirrored book. Updates come from the stream thread; queries take the book lock"""
+
+    def __init__(self, symbol, fetch_snapshot):
+        self.symbol = symbol
+        self.bids = BookSide(True)
+        self.asks = BookSide(False)
+        self.last_update_id = 0
+        self.updated = None
+        self.updates = 0
+        self.gaps = 0
+        self.resyncs = 0
+        self._fetch = fetch_snapshot
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._buffer = []
+        self._bridging = False
+        self._resyncing = False
+        # Bumped by invalidate(), so a snapshot fetched before a reconnect is not used after it
+        self._epoch = 0
+
+    @property
+    def synced(self):
+        return self._synced.is_set()
+
+    def wait_synced(self, timeout):
+        return self._synced.wait(timeout)
+
+    # ----- maintenance (stream thread / resync thread) -----
+
+    def on_diff(self, event):
+        with self._lock:
+            if self._synced.is_set():
+                if self._apply(event):
+                    return
+                self.gaps += 1
+                self._synced.clear()
+                log_error(f"Order book sequence gap on {self.symbol}; resyncing", last_update_id=self.last_update_id,
+                          first_update_id=event["U"])
+            self._buffer.append(event)
+            if len(self._buffer) > BUFFER_CAP:
+                del self._buffer[:-BUFFER_CAP]
+        self.resync()
+
+    def resync(self):
+        """Fetch a snapshot on a background thread (one at a time) and replay the buffered updates onto it.
+
+        Safe to call before the stream delivers: updates missed between the
+        snapshot and the subscription show up as a gap on the first one.
+        """
+        with self._lock:
+            start = not self._resyncing
+            self._resyncing = True
+        if start:
+            threading.Thread(target=self._resync, name=f"book-{self.symbol}", daemon=True).start()
+
+    def invalidate(self):
+        """Updates may have been missed (connection dropped): unsync until the next resync"""
+        with self._lock:
+            self._synced.clear()
+            self._buffer = []
+            self._epoch += 1
+
+    def _apply(self, event):
+        # False on a sequence gap; updates the book already contains are skipped
+        if event["u"] <= self.last_update_id:
+            return True
+        if self._bridging:
+            # First update after the snapshot must straddle it
+            in_sequence = event["U"] <= self.last_update_id + 1
+        elif "pu" in event:
+            in_sequence = event["pu"] == self.last_update_id
+        else:
+            in_sequence = event["U"] == self.last_update_id + 1
+        if not in_sequence:
+            return False
+        self._bridging = False
+        for price, qty in event["b"]:
+            self.bids.set(float(price), float(qty))
+        for price, qty in event["a"]:
+            self.asks.set(float(price), float(qty))
+        self.last_update_id = event["u"]
+        self.updates += 1
+        self.updated = time.monotonic()
+        return True
+
+    def _load(self, snapshot):
+        last = snapshot["lastUpdateId"]
+        pending = [e for e in self._buffer if e["u"] > last]
+        if pending and pending[0]["U"] > last + 1:
+            return False  # the snapshot predates the buffered updates: fetch a newer one
+        self.bids.load(snapshot["bids"])
+        self.asks.load(snapshot["asks"])
+        self.last_update_id = last
+        self.updated = time.monotonic()
+        self._bridging = True
+        self._buffer = []
+        for event in pending:
+            if not self._apply(event):
+                return False
+        self._synced.set()
+        return True
+
+    def _resync(self):
+        delay = 0.1
+        while True:
+            epoch = self._epoch
+            try:
+                snapshot = self._fetch(self.symbol)
+            except (OSError, ValueError, KeyError) as e:
+                log_error(f"Order book snapshot failed for {self.symbol}: {e}")
+                snapshot = None
+            with self._lock:
+                if snapshot is not None and epoch == self._epoch and self._load(snapshot):
+                    self._resyncing = False
+                    self.resyncs += 1
+                    log_info(f"Order book synced: {self.symbol}", last_update_id=self.last_update_id,
+                             bids=len(self.bids), asks=len(self.asks))
+                    return
+            time.sleep(delay)
+            delay = min(delay * 2, RESYNC_CAP)
+
+    # ----- queries -----
+
+    def _side(self, side):
+        if side == "bids":
+            return self.bids
+        if side == "asks":
+            return self.asks
+        raise ValueError(f"Book side must be 'bids' or 'asks': {side}")
+
+    def _mid(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        return None if bid is None or ask is None else (bid + ask) / 2
+
+    def best(self):
+        """(best bid, best ask)"""
+        with self._lock:
+            return self.bids.best(), self.asks.best()
+
+    def mid(self):
+        with self._lock:
+            return self._mid()
+
+    def size_within(self, side, bps):
+        """Total size on `side` ("bids"/"asks") priced within `bps` basis points of mid"""
+        with self._lock:
+            mid = self._mid()
+            if mid is None:
+                return 0.0
+            book_side = self._side(side)
+            return book_side.size_through(mid * (1 + book_side.sign * bps / 10000))
+
+    def price_for_size(self, side, qty):
+        """Worst price a `qty` sweep of `side` from the touch would reach (None if the book is thinner)"""
+        with self._lock:
+            return self._side(side).price_for(qty)
+
+    def levels(self, side, n=10):
+        with self._lock:
+            return self._side(side).levels(n)
+
+    def stats(self):
+        with self._lock:
+            bid, ask = self.bids.best(), self.asks.best()
+            return {"symbol": self.symbol, "synced": self.synced, "last_update_id": self.last_update_id,
+                    "best_bid": bid, "best_ask": ask, "bids": len(self.bids), "asks": len(self.asks),
+                    "updates": self.updates, "gaps": self.gaps, "resyncs": self.resyncs}
+
+
+class DepthStream(PriceStream):
+    """Diff-depth websocket for one backend, feeding an OrderBook per subscribed symbol"""
+
+    label = "Depth stream"
+    thread_name = "depth-stream"
+
+    def __init__(self, backend, symbols=()):
+        self.backend = backend
+        self.books = {}
+        super().__init__(url=backend.stream_url)
+        for symbol in symbols:
+            self.subscribe(symbol)
+
+    @staticmethod
+    def _streams(symbol):
+        return [f"{symbol.lower()}@{DEPTH_STREAM}"]
+
+    def _fetch_snapshot(self, symbol):
+        response = self.backend.client.get(self.backend.depth_path, {"symbol": symbol, "limit": SNAPSHOT_LIMIT},
+                                           strategy="book")
+        response.raise_for_status()
+        return response.json()
+
+    def subscribe(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self.books:
+            self.books[symbol] = OrderBook(symbol, self._fetch_snapshot)
+            super().subscribe(symbol)
+            if self.connected:
+                self.books[symbol].resync()
+
+    def _handle(self, raw):
+        msg = json.loads(raw)
+        data = msg.get("data", msg)
+        if data.get("e") != "depthUpdate":
+            return  # subscription acks
+        book = self.books.get(data["s"])
+        if book is not None:
+            self.messages += 1
+            book.on_diff(data)
+
+    def _on_connect(self):
+        # Books start (or restart, after a drop) from a snapshot taken once the stream is live
+        for book in list(self.books.values()):
+            book.resync()
+
+    def _on_disconnect(self):
+        for book in list(self.books.values()):
+            book.invalidate()
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def start_order_book(symbols, backend=None):
+    """Start (or extend) mirroring `symbols` on a backend's diff-depth stream; returns the stream"""
+    backend = get_backend(backend)
+    with _streams_lock:
+        stream = _streams.get(backend.name)
+        if stream is None:
+            stream = _streams[backend.name] = DepthStream(backend, symbols).start()
+        else:
+            for symbol in symbols:
+                stream.subscribe(symbol)
+    return stream
+
+
+def get_order_book(symbol, backend=None, wait=0.0):
+    """The symbol's synced book, mirroring it from now on; None while it is (re)syncing after `wait` seconds"""
+    stream = start_order_book([symbol], backend)
+    book = stream.books[symbol.upper()]
+    if not book.synced and wait:
+        book.wait_synced(wait)
+    return book if book.synced and stream.connected else None
+
+
+def _reset_after_fork():
+    # Stream and resync threads do not survive a fork; the child mirrors on demand
+    global _streams, _streams_lock
+    _streams = {}
+    _streams_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _collect():
+    books = [(name, book) for name, stream in list(_streams.items()) for book in list(stream.books.values())]
+    return [
+        ("bot_book_synced", "gauge", "1 while the mirrored order book is in sequence with the exchange",
+         [({"backend": name, "symbol": b.symbol}, int(b.synced)) for name, b in books]),
+        ("bot_book_levels", "gauge", "Price levels held per book side",
+         [({"backend": name, "symbol": b.symbol, "side": "bids"}, len(b.bids)) for name, b in books] +
+         [({"backend": name, "symbol": b.symbol, "side": "asks"}, len(b.asks)) for name, b in books]),
+        ("bot_book_updates_total", "counter", "Diff-depth updates applied",
+         [({"backend": name, "symbol": b.symbol}, b.updates) for name, b in books]),
+        ("bot_book_gaps_total", "counter", "Sequence gaps detected in the diff-depth stream",
+         [({"backend": name, "symbol": b.symbol}, b.gaps) for name, b in books]),
+        ("bot_book_resyncs_total", "counter", "Snapshots loaded (initial sync and after gaps or reconnects)",
+         [({"backend": name, "symbol": b.symbol}, b.resyncs) for name, b in books]),
+    ]
+
+
+registry.add_collector(_collect)
@@ -0,0 +1,331 @@
+import os
+import sys
+import json
+import time
+import queue
+import sqlite3
+import threading
+from decimal import Decimal
+from janvi_bot.bot_logging import log_info, log_error, DATA_DIR
+from janvi_bot.order_retry import refused
+
+# Crash-safe order journal. Every strategy intent, order request (registered
+# on the order tracker before it is sent), exchange ack and later status
+# update is appended to a SQLite database in WAL mode, keyed by job and
+# clientOrderId, so a TWAP or grid that dies mid-run can be rebuilt and
+# reconciled against the exchange on the next start.
+#
+# The order path only puts a tuple on a queue (serialising, and parsing
+# responses for acks, happen on the writer); one writer thread drains
+# whatever has queued up and commits it as a single transaction (one fsync
+# per batch with synchronous=FULL), so a burst of orders shares a sync.
+# What is still queued when the process dies is lost: at most the last batch.
+#
+# BOT_JOURNAL=0 turns the journal off; BOT_JOURNAL_PATH moves it.
+
+JOURNAL_ENABLED = os.getenv("BOT_JOURNAL", "1") != "0"
+JOURNAL_PATH = os.getenv("BOT_JOURNAL_PATH", os.path.join(DATA_DIR, '.cache', 'order_journal.db'))
+JOURNAL_SYNC = os.getenv("BOT_JOURNAL_SYNC", "FULL").upper()
+FINAL_STATUSES = ("FILLED", "CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH", "NOT_FOUND")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    job TEXT,
+    cid TEXT,
+    status TEXT,
+    qty TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_job ON events(job, kind) WHERE job IS NOT NULL;
+-- Covers the ack/update lookups recovery makes per order
+CREATE INDEX IF NOT EXISTS events_cid ON events(cid, kind, status, qty) WHERE cid IS NOT NULL;
+CREATE TABLE IF NOT EXISTS jobs (
+    job TEXT PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_open ON jobs(status) WHERE status = 'RUNNING';
+"""
+
+
+def _ack_fields(data):
+    response = data.pop("response")
+    try:
+        body = response.json()
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    if response.status_code == 200:
+        data.update(orderId=body.get("orderId"), status=body.get("status", "NEW"), executedQty=body.get("executedQty"))
+    else:
+        # A 5xx or -1007 may have executed: not final, so recovery looks the order up
+        data.update(status="REJECTED" if refused(response) else "UNKNOWN", http=response.status_code,
+                    code=body.get("code"), msg=body.get("msg"))
+    return data
+
+
+class JobRecord:
+    """One unfinished strategy run rebuilt from the journal: its parameters, last progress and orders by clientOrderId"""
+
+    __slots__ = ("job", "strategy", "params", "started", "progress", "orders")
+
+    def __init__(self, job, strategy, params, started):
+        self.job = job
+        self.strategy = strategy
+        self.params = params
+        self.started = started
+        self.progress = {}
+        self.orders = {}
+
+    def open_orders(self):
+        return [o for o in self.orders.values() if o.get("status") not in FINAL_STATUSES]
+
+    def executed_qty(self):
+        return sum((Decimal(str(o.get("executedQty") or 0)) for o in self.orders.values()), Decimal(0))
+
+
+class OrderJournal:
+    def __init__(self, path=JOURNAL_PATH, enabled=JOURNAL_ENABLED, synchronous=JOURNAL_SYNC):
+        self.path = path
+        self.enabled = enabled and bool(path)
+        self.synchronous = synchronous
+        self.records = 0
+        self.batches = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._reader = None
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"PRAGMA synchronous={self.synchronous}")
+        # Checkpoints trim the WAL back to this, so a restart never replays a huge one
+        db.execute("PRAGMA journal_size_limit=4194304")
+        db.executescript(SCHEMA)
+        return db
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    db = self._connect()
+                    self._thread = threading.Thread(target=self._write_loop, args=(db,), name="order-journal", daemon=True)
+                    self._thread.start()
+
+    # ----- writing (order path: enqueue only) -----
+
+    def record(self, kind, job=None, cid=None, **data):
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        self._queue.put((time.time(), kind, job, cid, data))
+
+    def intent(self, strategy, params):
+        """Open a job for a strategy run; returns its id (carried as meta["job"] on the job's orders)"""
+        job = f"{strategy[:8]}-{os.urandom(6).hex()}"
+        if self.enabled:
+            self._ensure_writer()
+            self._queue.put(("job", job, strategy, json.dumps(params, default=str), time.time()))
+        return job
+
+    def request(self, state):
+        """An order registered on the tracker, before it goes on the wire"""
+        self.record("request", state.meta.get("job"), state.client_order_id, symbol=state.symbol, side=state.side,
+                    type=state.type, price=state.price, qty=state.orig_qty, strategy=state.strategy, meta=state.meta)
+
+    def ack(self, cid, response, symbol=None):
+        """The exchange's answer to an order request (a response or OrderResult; parsed on the writer)"""
+        self.record("ack", cid=cid, symbol=symbol, response=response)
+
+    def update(self, state, exec_type=None):
+        self.record("update", cid=state.client_order_id, status=state.status, executedQty=state.executed_qty,
+                    orderId=state.order_id)
+
+    def progress(self, job, **data):
+        """Where a job has got to; recovery hands back the last one"""
+        self.record("progress", job, **data)
+
+    def done(self, job, status="DONE"):
+        if self.enabled:
+            self._ensure_writer()
+            self._queue.put(("done", job, status, time.time()))
+
+    def flush(self, timeout=5.0):
+        """Block until everything recorded so far is committed"""
+        if not self.enabled or self._thread is None:
+            return True
+        marker = threading.Event()
+        self._queue.put(("flush", marker))
+        return marker.wait(timeout)
+
+    def _write_loop(self, db):
+        while True:
+            batch = [self._queue.get()]
+            # Group commit: everything that queued up while the last batch synced goes in this one
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            events, jobs, finished, markers = [], [], [], []
+            for item in batch:
+                tag = item[0]
+                if tag == "job":
+                    jobs.append((item[1], item[2], item[3], "RUNNING", item[4]))
+                    events.append((item[4], "intent", item[1], None, "RUNNING", None, item[2]))
+                elif tag == "done":
+                    finished.append((item[2], item[3], item[1]))
+                    events.append((item[3], "done", item[1], None, item[2], None, None))
+                elif tag == "flush":
+                    markers.append(item[1])
+                else:
+                    ts, kind, job, cid, data = item
+                    if kind == "ack":
+                        data = _ack_fields(data)
+                    # Status and executed quantity get their own columns so recovery never parses ack/update JSON
+                    status, qty = data.pop("status", None), data.pop("executedQty", None)
+                    events.append((ts, kind, job, cid, status, str(qty) if qty is not None else None,
+                                   json.dumps(data, separators=(",", ":"), default=str) if data else None))
+            try:
+                with db:
+                    db.executemany("INSERT OR IGNORE INTO jobs (job, strategy, params, status, started) VALUES (?, ?, ?, ?, ?)", jobs)
+                    db.executemany("INSERT INTO events (ts, kind, job, cid, status, qty, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   events)
+                    db.executemany("UPDATE jobs SET status = ?, finished = ? WHERE job = ?", finished)
+                self.records += len(events)
+                self.batches += 1
+            except Exception as e:
+                log_error(f"Order journal write failed ({len(events)} records lost): {e}", path=self.path)
+            for marker in markers:
+                marker.set()
+
+    # ----- recovery -----
+
+    def recover(self, strategy=None):
+        """Unfinished jobs (optionally one strategy's) with their orders' last journaled state, keyed by job id.
+
+        Three indexed queries however long the journal is: the open jobs,
+        their order requests and last progress record, then the acks and
+        updates of those orders (joined through the clientOrderId).
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        self.flush()
+        # Kept open: closing the last connection checkpoints the whole WAL, which a restart shouldn't wait for
+        if self._reader is None:
+            self._reader = sqlite3.connect(self.path, check_same_thread=False)
+        db = self._reader
+        where, args = ("j.status = 'RUNNING' AND j.strategy = ?", (strategy,)) if strategy else ("j.status = 'RUNNING'", ())
+        jobs = {job: JobRecord(job, strat, json.loads(params), started) for job, strat, params, started in
+                db.execute(f"SELECT job, strategy, params, started FROM jobs j WHERE {where}", args)}
+        if not jobs:
+            return jobs
+
+        orders, progress = {}, {}
+        for job, kind, cid, data in db.execute(
+                f"SELECT e.job, e.kind, e.cid, e.data FROM jobs j JOIN events e ON e.job = j.job "
+                f"WHERE {where} AND e.kind IN ('request', 'progress') ORDER BY e.seq", args):
+            if kind == "progress":
+                progress[job] = data
+            elif cid not in orders:
+                orders[cid] = jobs[job].orders[cid] = {"clientOrderId": cid, "status": "PENDING_NEW", **json.loads(data)}
+        for job, data in progress.items():
+            jobs[job].progress = json.loads(data) if data else {}
+
+        for cid, status, qty in db.execute(
+                f"SELECT e.cid, e.status, e.qty FROM events e WHERE e.kind IN ('ack', 'update') AND e.cid IN "
+                f"(SELECT r.cid FROM jobs j JOIN events r ON r.job = j.job WHERE {where} AND r.kind = 'request') "
+                f"ORDER BY e.seq", args):
+            order = orders[cid]
+            # A late ack must not undo a fill the stream already reported
+            if order["status"] in FINAL_STATUSES and status not in FINAL_STATUSES:
+                continue
+            if status is not None:
+                order["status"] = status
+            if qty is not None:
+                order["executedQty"] = qty
+        return jobs
+
+    def reconcile(self, record, backend, tracker):
+        """Put a recovered job's orders back on the tracker and settle the unfinished ones with one lookup each.
+
+        Fills that happened while the process was down reach the tracker's
+        fill handlers (grid refills) through apply_order; orders the exchange
+        never received are marked NOT_FOUND.
+        """
+        for order in record.orders.values():
+            state = tracker.track(order["clientOrderId"], order["symbol"], order.get("side"), order.get("type"),
+                                  order.get("price"), order.get("qty"), strategy=order.get("strategy"),
+                                  meta=order.get("meta"))
+            if order["status"] in FINAL_STATUSES:
+                continue
+            response = backend.get_order(state.symbol, state.client_order_id, strategy="recover")
+            body = response.json()
+            if response.status_code == 200:
+                tracker.apply_order(body)
+                order.update(status=body["status"], executedQty=body["executedQty"], orderId=body["orderId"])
+            elif body.get("code") == -2013:
+                order["status"] = "NOT_FOUND"
+                self.record("update", cid=state.client_order_id, status="NOT_FOUND")
+                tracker.apply_execution({"c": state.client_order_id, "s": state.symbol, "S": state.side,
+                                         "o": state.type, "z": "0", "X": "REJECTED", "x": "REJECTED",
+                                         "E": int(time.time() * 1000)})
+            else:
+                log_error(f"Recovery lookup failed for {state.client_order_id}: {response.status_code} {body}",
+                          job=record.job)
+        return record
+
+    def stats(self):
+        return {"path": self.path, "enabled": self.enabled, "records": self.records, "batches": self.batches,
+                "records_per_batch": round(self.records / self.batches, 2) if self.batches else 0.0}
+
+
+_journal = None
+_lock = threading.Lock()
+
+
+def get_journal():
+    """Process-wide journal; the first call also journals every order registered on the order tracker"""
+    global _journal
+    if _journal is None:
+        with _lock:
+            if _journal is None:
+                from janvi_bot.user_stream import get_order_tracker
+                journal = OrderJournal()
+                if journal.enabled:
+                    tracker = get_order_tracker()
+                    tracker.on_track(journal.request)
+                    tracker.on_update(journal.update)
+                _journal = journal
+    return _journal
+
+
+def _reset_after_fork():
+    # The writer thread and its connection stay with the parent
+    global _journal, _lock
+    _journal = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# CLI: list unfinished jobs
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else JOURNAL_PATH
+    start = time.perf_counter()
+    jobs = OrderJournal(path).recover()
+    log_info(f"Recovered {len(jobs)} unfinished jobs in {(time.perf_counter() - start) * 1000:.1f}ms", path=path)
+    for record in jobs.values():
+        print(f"{record.job}  {record.strategy}  orders={len(record.orders)} open={len(record.open_orders())} "
+              f"executed={record.executed_qty()}  progress={record.progress}  params={record.params}")
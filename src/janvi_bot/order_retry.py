@@ -0,0 +1,182 @@
+import os
+import time
+import random
+import threading
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.metrics import registry
+
+# Idempotent order submission. Every order carries a clientOrderId fixed
+# before the first attempt, so a resend is the same order, never a second
+# one. Failures are classified:
+#   transient - the exchange refused the request before executing anything
+#               (rate limits, overload, stale timestamp, connect timeout):
+#               resend after a short jittered backoff
+#   unknown   - the request may or may not have executed (read timeout,
+#               dropped connection, 5xx, -1007): look the order up by its
+#               clientOrderId first and resend only if it isn't there
+#   fatal     - a business rejection (filters, balance, bad params): return it
+# Backoff is exponential with jitter, starting in the tens of milliseconds,
+# so a blip is ridden out in a tight loop without anyone watching.
+
+ORDER_RETRIES = int(os.getenv("ORDER_RETRIES", "5"))
+RETRY_BASE = float(os.getenv("ORDER_RETRY_BASE_MS", "50")) / 1000
+RETRY_CAP = float(os.getenv("ORDER_RETRY_CAP_MS", "2000")) / 1000
+
+OK, TRANSIENT, UNKNOWN, FATAL = "ok", "transient", "unknown", "fatal"
+
+# -1003 too many requests, -1008 overloaded/throttled, -1015 too many new orders,
+# -1016 service shutting down, -1021 timestamp outside recvWindow
+TRANSIENT_CODES = frozenset((-1003, -1008, -1015, -1016, -1021))
+# -1000 unknown error, -1006 unexpected response, -1007 backend timeout: execution status unknown
+UNKNOWN_CODES = frozenset((-1000, -1006, -1007))
+# An earlier attempt already landed: futures -4116, spot -2010 "Duplicate order sent."
+DUPLICATE_CODES = frozenset((-4116,))
+NOT_FOUND = -2013
+
+_counts = {}
+_counts_lock = threading.Lock()
+
+
+def _count(event, kind):
+    with _counts_lock:
+        _counts[(event, kind)] = _counts.get((event, kind), 0) + 1
+
+
+def _body(response):
+    try:
+        body = response.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def classify(response=None, error=None):
+    """ok / transient / unknown / fatal for one attempt's response or exception"""
+    if error is not None:
+        # A connect timeout never reached the exchange; anything later may have executed
+        from requests.exceptions import ConnectTimeout
+        return TRANSIENT if isinstance(error, ConnectTimeout) else UNKNOWN
+    status = response.status_code
+    if status == 200:
+        return OK
+    body = _body(response)
+    code = body.get("code")
+    if code in TRANSIENT_CODES or status in (418, 429):
+        return TRANSIENT
+    if code in UNKNOWN_CODES or status >= 500:
+        return UNKNOWN
+    if code in DUPLICATE_CODES or (code == -2010 and "Duplicate" in str(body.get("msg"))):
+        return UNKNOWN
+    return FATAL
+
+
+def refused(response):
+    """True when the answer says the order is definitely not on the book (rejected, or throttled before execution)"""
+    return response.status_code != 200 and classify(response) in (TRANSIENT, FATAL)
+
+
+def backoff(attempt):
+    """Exponential backoff with jitter: half the step fixed, half random"""
+    step = min(RETRY_CAP, RETRY_BASE * 2 ** (attempt - 1))
+    return step / 2 + random.uniform(0, step / 2)
+
+
+class _Retry:
+    """One order's way through its attempts; send_order and send_order_async only do the I/O"""
+
+    __slots__ = ("client_order_id", "retries", "attempt", "looking")
+
+    def __init__(self, client_order_id, retries):
+        self.client_order_id = client_order_id
+        self.retries = retries
+        self.attempt = 0
+        self.looking = False
+
+    def after(self, response, error):
+        """(True, answer) when done, else (False, seconds to wait before the next attempt)"""
+        kind = classify(response, error)
+        if self.looking:
+            if kind == OK:
+                _count("lookup", "found")
+                log_info(f"Order {self.client_order_id} had landed; using the exchange's copy", attempt=self.attempt)
+                return True, response
+            if response is not None and _body(response).get("code") == NOT_FOUND:
+                _count("lookup", "missing")
+                self.looking = False
+                return False, 0  # not there: resend right away
+            _count("lookup", "failed")
+        elif kind in (OK, FATAL):
+            return True, response
+        elif kind == UNKNOWN:
+            self.looking = True
+
+        self.attempt += 1
+        if self.attempt > self.retries:
+            _count("give_up", kind)
+            log_error(f"Order {self.client_order_id} gave up after {self.retries} retries ({kind})",
+                      status=response.status_code if response is not None else None, error=str(error) if error else None)
+            if error is not None:
+                raise error
+            return True, response
+        _count("retry", kind)
+        delay = backoff(self.attempt)
+        log_info(f"Order {self.client_order_id} {kind}: {'lookup' if self.looking else 'resend'} {self.attempt}/{self.retries} "
+                 f"in {delay * 1000:.0f}ms",
+                 status=response.status_code if response is not None else None, error=str(error) if error else None)
+        return False, delay
+
+
+def send_order(send, lookup, client_order_id, retries=ORDER_RETRIES, sleep=time.sleep):
+    """Send an order idempotently and return the exchange's answer.
+
+    send() posts the order with its fixed clientOrderId; lookup() fetches it
+    by that id (status 200 if it exists, code -2013 if not). When an attempt's
+    outcome is unknown the order is looked up before anything is resent, and
+    if it did land the lookup response is returned in place of the ack.
+    Gives up after `retries` retries, returning the last response or raising
+    the last exception.
+    """
+    retry = _Retry(client_order_id, retries)
+    while True:
+        response, error = None, None
+        try:
+            response = lookup() if retry.looking else send()
+        except OSError as e:  # requests.RequestException is an IOError
+            error = e
+        done, value = retry.after(response, error)
+        if done:
+            return value
+        if value:
+            sleep(value)
+
+
+async def send_order_async(send, lookup, client_order_id, retries=ORDER_RETRIES):
+    """send_order for the asyncio router: send() and lookup() return coroutines, backoff is an asyncio.sleep"""
+    import asyncio
+    retry = _Retry(client_order_id, retries)
+    while True:
+        response, error = None, None
+        try:
+            response = await (lookup() if retry.looking else send())
+        except OSError as e:
+            error = e
+        done, value = retry.after(response, error)
+        if done:
+            return value
+        if value:
+            await asyncio.sleep(value)
+
+
+def retry_stats():
+    with _counts_lock:
+        return {f"{event}_{kind}": n for (event, kind), n in sorted(_counts.items())}
+
+
+def _collect():
+    with _counts_lock:
+        items = sorted(_counts.items())
+    return [("bot_order_retries_total", "counter", "Order resends, lookups and give-ups by failure class",
+             [({"event": event, "kind": kind}, n) for (event, kind), n in items])]
+
+
+registry.add_collector(_collect)
@@ -0,0 +1,523 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import aiohttp
+from janvi_bot.rest_client import BASE_URL, DEFAULT_TIMEOUT, GET_RETRIES, Signer, encode_query, recv_window_for
+from janvi_bot.clock_sync import CLOCK_SYNC, get_clock, is_timestamp_rejection
+from janvi_bot.rate_limiter import RateLimiter, get_rate_limiter
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.symbol_filters import get_filters, prepare_order
+from janvi_bot.price_stream import get_fresh_quote, update_price
+from janvi_bot.metrics import observe_since, set_labels
+from janvi_bot.user_stream import get_order_tracker, make_client_order_id
+from janvi_bot.risk_engine import get_risk_engine, reject_body, account_key
+from janvi_bot.order_journal import get_journal
+from janvi_bot.order_retry import send_order_async, refused, NOT_FOUND
+
+from janvi_bot.advanced.oco import build_oco_params, oco_legs
+from janvi_bot.advanced.grid_order import grid_levels, depth_grid_levels
+from janvi_bot.advanced.twap import TwapJob
+from janvi_bot.order_book import get_order_book, SYNC_WAIT
+from janvi_bot.scheduler import get_scheduler
+
+# Order router: one asyncio process takes order intents (market, limit, OCO,
+# TWAP, grid) for many symbols and sub-accounts and fans them out
+# concurrently. Each account has its own keys, keep-alive connection pool
+# and order-count budget; request weight is per IP on Binance, so every
+# account draws weight from the process-wide limiter. Waiting on a budget
+# is an asyncio.sleep, so one throttled account never stalls the others.
+#
+# Intent: {"id": ..., "account": "main", "type": "limit", "symbol": "BTCUSDT",
+#          "side": "BUY", "quantity": 0.001, "price": 60000}
+# plus tp_offset/stop_offset (oco), chunks/interval (twap), steps/lower_pct/upper_pct (grid);
+# "depth": true sizes twap slices / places grid levels from the mirrored order book.
+# Every order passes the pre-trade risk checks (risk_engine) under its account's name,
+# is sent idempotently (order_retry) and journaled, as on the exchange backends.
+
+# BINANCE_ACCOUNTS=main,hedge: "main" uses BINANCE_API_KEY/SECRET, the others
+# BINANCE_<NAME>_API_KEY / BINANCE_<NAME>_API_SECRET
+ACCOUNT_NAMES = [a.strip() for a in os.getenv("BINANCE_ACCOUNTS", "main").split(",") if a.strip()]
+# Keep-alive connections per account; requests beyond that queue for a free connection
+ROUTER_POOL_SIZE = int(os.getenv("ROUTER_POOL_SIZE", "20"))
+STRATEGY = "router"
+
+
+class RoutedResponse:
+    """Just enough of requests.Response for code written against the sync client"""
+
+    __slots__ = ("status_code", "body", "headers")
+
+    def __init__(self, status_code, body, headers):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+
+    def json(self):
+        return self.body
+
+
+class Account:
+    def __init__(self, name, api_key, api_secret, base_url=BASE_URL, pool_size=ROUTER_POOL_SIZE, limiter=None,
+                 ip_limiter=None):
+        self.name = name
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.signer = Signer(api_secret)
+        self.ip_limiter = ip_limiter or get_rate_limiter()
+        self.limiter = limiter or RateLimiter()
+        # One server clock for every account on this endpoint; it samples on its own thread
+        self.clock = get_clock(self.base_url, "/api/v3/time", self.ip_limiter) if CLOCK_SYNC else None
+        self.session = None
+        self.requests = 0
+        self.errors = 0
+
+    async def open(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(sock_connect=DEFAULT_TIMEOUT[0], sock_read=DEFAULT_TIMEOUT[1])
+        headers = {"X-MBX-APIKEY": self.api_key} if self.api_key else {}
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _acquire(self, method, path):
+        # Order count from this account's buckets, weight from the shared IP buckets
+        if self.limiter is self.ip_limiter:
+            await _take(self.limiter, method, path)
+        else:
+            await _take(self.limiter, method, path, weight=False)
+            await _take(self.ip_limiter, method, path, orders=False)
+
+    def _on_response(self, status, headers):
+        if self.limiter is self.ip_limiter:
+            self.limiter.on_response(status, headers)
+        else:
+            self.ip_limiter.on_response(status, headers, kinds=("used-weight",))
+            self.limiter.on_response(status, headers, kinds=("order-count",))
+
+    async def request(self, method, path, params=None, signed=False, strategy=None):
+        start = time.perf_counter()
+        labels = {"endpoint": path, "symbol": (params or {}).get("symbol", ""), "strategy": strategy or ""}
+        attempts = GET_RETRIES + 1 if method == "GET" else 1
+        for _ in range(attempts):
+            wait_start = time.perf_counter()
+            await self._acquire(method, path)
+            observe_since("rate_wait", wait_start, **labels)
+            previous = set_labels(labels)
+            try:
+                query = encode_query(params, signed, self.signer, self.clock, recv_window_for(method))
+            finally:
+                set_labels(previous)
+            url = f"{self.base_url}{path}?{query}" if query else f"{self.base_url}{path}"
+            self.requests += 1
+            async with self.session.request(method, url) as response:
+                self._on_response(response.status, response.headers)
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError:
+                    # e.g. an HTML 502 from a proxy: the request may have executed, so not a local rejection
+                    self.errors += 1
+                    raise ConnectionError(f"{method} {path}: undecodable {response.status} answer")
+            if signed and self.clock is not None and response.status == 400 and is_timestamp_rejection(body):
+                # Never block the event loop on a resample: wake the sync thread instead
+                self.clock.on_rejected(block=False)
+            if response.status != 429:
+                break
+        if response.status != 200:
+            self.errors += 1
+        observe_since("total", start, **labels)
+        return RoutedResponse(response.status, body, response.headers)
+
+    def stats(self):
+        return {"requests": self.requests, "errors": self.errors, **self.limiter.headroom()}
+
+
+async def _take(limiter, method, path, weight=True, orders=True):
+    while True:
+        wait = limiter.try_acquire(method, path, weight, orders)
+        if wait <= 0:
+            return
+        await asyncio.sleep(wait)
+
+
+def load_accounts(names=ACCOUNT_NAMES, base_url=BASE_URL):
+    """Accounts from the environment; the first one is the router's default"""
+    accounts = []
+    for name in names:
+        prefix = "BINANCE" if name == "main" else f"BINANCE_{name.upper()}"
+        key, secret = os.getenv(f"{prefix}_API_KEY"), os.getenv(f"{prefix}_API_SECRET")
+        if not secret:
+            log_error(f"No API secret for account {name} ({prefix}_API_SECRET); skipping it")
+            continue
+        # The main account shares the process-wide limiter with the sync order scripts
+        limiter = get_rate_limiter() if name == "main" else None
+        accounts.append(Account(name, key, secret, base_url, limiter=limiter))
+    return accounts
+
+
+# TWAP slices run on the shared scheduler; the router awaits the job's end
+class _RoutedTwap(TwapJob):
+    def __init__(self, *args, finished=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.finished = finished
+
+    def on_finish(self):
+        super().on_finish()
+        loop = self.finished.get_loop()
+        loop.call_soon_threadsafe(lambda: self.finished.done() or self.finished.set_result(self.status))
+
+
+class OrderRouter:
+    def __init__(self, accounts):
+        if not accounts:
+            raise ValueError("the router needs at least one account")
+        self.accounts = {a.name: a for a in accounts}
+        self.default_account = accounts[0].name
+        self.loop = None
+        self._symbols_ready = set()
+        self._thread = None
+        self.routed = {}
+        self.failed = {}
+        # Also journals every order registered on the tracker
+        self.journal = get_journal()
+
+    async def open(self):
+        self.loop = asyncio.get_running_loop()
+        for account in self.accounts.values():
+            await account.open()
+        log_info(f"Order router ready: {len(self.accounts)} accounts", accounts=list(self.accounts))
+        return self
+
+    async def close(self):
+        for account in self.accounts.values():
+            await account.close()
+
+    # ----- routing -----
+
+    async def route(self, intent):
+        """Execute one intent; always returns a result dict (status, order ids or error)"""
+        start = time.perf_counter()
+        kind = str(intent.get("type", "")).lower()
+        name = intent.get("account") or self.default_account
+        symbol = str(intent.get("symbol", "")).upper()
+        result = {"id": intent.get("id"), "type": kind, "account": name, "symbol": symbol}
+        try:
+            account = self.accounts.get(name)
+            if account is None:
+                raise ValueError(f"Unknown account: {name}")
+            handler = getattr(self, f"_route_{kind}", None)
+            if handler is None:
+                raise ValueError(f"Unknown intent type: {kind}")
+            await self._ensure_symbol(symbol)
+            result.update(await handler(account, symbol, intent))
+        except ValueError as e:
+            # Failed local validation (incl. symbol filters); nothing was sent
+            result.update(status="REJECTED_LOCAL", error=str(e))
+        except Exception as e:
+            result.update(status="ERROR", error=str(e))
+            log_error(f"Routing {kind} intent failed: {e}", account=name, symbol=symbol)
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        counts = self.routed if result.get("status") not in ("REJECTED_LOCAL", "REJECTED", "UNKNOWN", "ERROR") else self.failed
+        counts[kind] = counts.get(kind, 0) + 1
+        return result
+
+    async def route_many(self, intents):
+        """Route intents concurrently; results come back in input order"""
+        return await asyncio.gather(*(self.route(intent) for intent in intents))
+
+    async def _ensure_symbol(self, symbol):
+        # The first lookup may load exchangeInfo over the network: keep it off the loop
+        if symbol not in self._symbols_ready:
+            await asyncio.to_thread(get_filters, symbol)
+            self._symbols_ready.add(symbol)
+
+    async def price(self, account, symbol):
+        """Streamed price when fresh, else one ticker call on the account's pool"""
+        quote = get_fresh_quote(symbol)
+        if quote is not None:
+            return quote.price
+        response = await account.request("GET", "/api/v3/ticker/price", {"symbol": symbol}, strategy=STRATEGY)
+        if response.status_code != 200:
+            raise RuntimeError(f"price for {symbol}: {response.status_code} {response.json().get('msg')}")
+        price = float(response.json()["price"])
+        update_price(symbol, price)
+        return price
+
+    async def _order(self, account, symbol, side, type_, quantity, price=None, strategy=STRATEGY, meta=None):
+        risk = get_risk_engine()
+        ref_price = None
+        if type_ == "MARKET":
+            ref = get_fresh_quote(symbol)
+            ref_price = ref.price if ref else None
+            if ref_price is None and risk.needs_price(symbol, account_key(account.name)):
+                ref_price = await self.price(account, symbol)
+            quantity, _ = prepare_order(symbol, quantity, market=True, ref_price=ref_price)
+        else:
+            quantity, price = prepare_order(symbol, quantity, price)
+        params = {"symbol": symbol, "side": side, "type": type_, "quantity": quantity,
+                  "newClientOrderId": make_client_order_id(strategy)}
+        if type_ != "MARKET":
+            params.update(price=price, timeInForce="GTC")
+        cid = params["newClientOrderId"]
+        tracker = get_order_tracker()
+        tracker.track(cid, symbol, side, type_, price, quantity, strategy=strategy,
+                      meta={"account": account.name, **(meta or {})})
+        rejected = risk.check_params(params, account_key(account.name), ref_price)
+        if rejected is not None:
+            response = RoutedResponse(400, reject_body(rejected), {})
+        else:
+            response = await self._send(account, "/api/v3/order", params, strategy, cid,
+                                        lambda: self._get_order(account, symbol, cid, strategy))
+            risk.on_ack(cid, response)
+        self.journal.ack(cid, response, symbol)
+        tracker.on_ack(cid, response)
+        return cid, response
+
+    async def _send(self, account, path, params, strategy, client_order_id, lookup):
+        # Same retry policy as the backends' send_order: resent under the
+        # same clientOrderId, looked up before any resend
+        async def attempt(request):
+            try:
+                return await request()
+            except aiohttp.ClientError as e:
+                # Dropped connection or cut-off answer: it may have executed, like a requests exception
+                raise ConnectionError(str(e)) from e
+
+        try:
+            return await send_order_async(
+                lambda: attempt(lambda: account.request("POST", path, params, signed=True, strategy=strategy)),
+                lambda: attempt(lookup), client_order_id)
+        except OSError as e:
+            # Gave up without an answer: one last lookup decides whether the order exists, so the
+            # risk engine, journal and tracker still get an ack to settle it with
+            try:
+                response = await attempt(lookup)
+            except OSError:
+                response = None
+            if response is not None and (response.status_code == 200 or response.json().get("code") == NOT_FOUND):
+                return response
+            return RoutedResponse(503, {"code": -1007, "msg": f"Execution status unknown: {e}"}, {})
+
+    async def _get_order(self, account, symbol, client_order_id, strategy):
+        return await account.request("GET", "/api/v3/order", {"symbol": symbol, "origClientOrderId": client_order_id},
+                                     signed=True, strategy=strategy)
+
+    async def _lookup_oco(self, account, symbol, legs, strategy):
+        # Spot OCOs are atomic: if a leg exists the list does; answer in the new-OCO response's shape
+        reports = []
+        for cid in legs:
+            response = await self._get_order(account, symbol, cid, strategy)
+            if response.status_code == 200:
+                reports.append(response.json())
+            elif response.json().get("code") != NOT_FOUND:
+                return response
+        if not reports:
+            return RoutedResponse(400, {"code": NOT_FOUND, "msg": "Order does not exist."}, {})
+        return RoutedResponse(200, {"orderListId": reports[0].get("orderListId", -1), "listOrderStatus": "EXECUTING",
+                                    "orderReports": reports}, {})
+
+    @staticmethod
+    def _order_result(client_order_id, response):
+        body = response.json()
+        if response.status_code == 200:
+            return {"status": body.get("status", "NEW"), "order_id": body.get("orderId"), "client_order_id": client_order_id}
+        return {"status": "REJECTED" if refused(response) else "UNKNOWN", "http_status": response.status_code,
+                "error": body.get("msg", str(body)), "client_order_id": client_order_id}
+
+    async def _route_market(self, account, symbol, intent):
+        return self._order_result(*await self._order(account, symbol, _side(intent), "MARKET", _quantity(intent),
+                                                     strategy="r-market"))
+
+    async def _route_limit(self, account, symbol, intent):
+        if intent.get("price") is None:
+            raise ValueError("limit intent needs a price")
+        return self._order_result(*await self._order(account, symbol, _side(intent), "LIMIT", _quantity(intent),
+                                                     intent["price"], strategy="r-limit"))
+
+    async def _route_oco(self, account, symbol, intent):
+        side = _side(intent)
+        current_price = await self.price(account, symbol)
+        filters = get_filters(symbol)
+        snap = filters.round_price if filters else (lambda p: round(p, 2))
+        tp_offset = float(intent.get("tp_offset") or current_price * 0.01)
+        stop_offset = float(intent.get("stop_offset") or current_price * 0.01)
+        params, tp_price, stop_price = build_oco_params(symbol, side, _quantity(intent), current_price, tp_offset,
+                                                        stop_offset, snap)
+        params["quantity"], _ = prepare_order(symbol, _quantity(intent), tp_price)
+        prepare_order(symbol, _quantity(intent), stop_price)
+
+        tracker = get_order_tracker()
+        legs = []
+        for prefix, leg in oco_legs(side).items():
+            cid = params[f"{prefix}ClientOrderId"] = make_client_order_id("r-oco")
+            tracker.track(cid, symbol, side, params[f"{prefix}Type"], params[f"{prefix}Price"], params["quantity"],
+                          strategy="r-oco", meta={"leg": leg, "account": account.name})
+            legs.append(cid)
+        risk = get_risk_engine()
+        rejected = risk.check_oco(params, account_key(account.name))
+        if rejected is not None:
+            response = RoutedResponse(400, reject_body(rejected), {})
+        else:
+            response = await self._send(account, "/api/v3/orderList/oco", params, "r-oco", legs[0],
+                                        lambda: self._lookup_oco(account, symbol, legs, "r-oco"))
+            risk.on_oco_ack(params, response)
+        body = response.json()
+        # One ack per leg, from its report (or the list-level error)
+        reports = {r.get("clientOrderId"): r for r in body.get("orderReports", [])} if response.status_code == 200 else {}
+        for cid in legs:
+            leg_response = RoutedResponse(200, reports[cid], {}) if cid in reports else response
+            self.journal.ack(cid, leg_response, symbol)
+            tracker.on_ack(cid, leg_response)
+        if response.status_code != 200:
+            return {"status": "REJECTED" if refused(response) else "UNKNOWN", "http_status": response.status_code,
+                    "error": body.get("msg", str(body))}
+        return {"status": body.get("listOrderStatus", "EXECUTING"), "order_list_id": body.get("orderListId"),
+                "tp_price": str(tp_price), "stop_price": str(stop_price)}
+
+    async def _route_grid(self, account, symbol, intent):
+        side = _side(intent)
+        steps = int(intent.get("steps", 5))
+        current_price = await self.price(account, symbol)
+        filters = get_filters(symbol)
+        snap = filters.round_price if filters else (lambda p: round(p, 2))
+        lower_pct, upper_pct = float(intent.get("lower_pct", 0.98)), float(intent.get("upper_pct", 1.02))
+        levels = None
+        if intent.get("depth"):
+            book = await asyncio.to_thread(get_order_book, symbol, "spot", SYNC_WAIT)
+            levels = depth_grid_levels(book, side, current_price, steps, lower_pct, upper_pct, snap) if book else None
+        prices, gap = levels or grid_levels(current_price, steps, lower_pct, upper_pct, snap)
+        # Levels go out concurrently on the account's pool
+        placed = await asyncio.gather(*(
+            self._order(account, symbol, side, "LIMIT", _quantity(intent), price, strategy="r-grid",
+                        meta={"level": i, "gap": str(gap)})
+            for i, price in enumerate(prices)
+        ), return_exceptions=True)
+        levels = [{"status": "ERROR", "error": str(p)} if isinstance(p, Exception) else self._order_result(*p)
+                  for p in placed]
+        ok = sum(1 for level in levels if level.get("order_id") is not None)
+        return {"status": "PLACED" if ok == steps else ("PARTIAL" if ok else "REJECTED"), "placed": ok,
+                "order_ids": [level.get("order_id") for level in levels],
+                "errors": sorted({level["error"] for level in levels if level.get("error")})}
+
+    async def _route_twap(self, account, symbol, intent):
+        # Slices are timed by the shared scheduler and sent on this account's
+        # pool; the intent resolves when the last slice is done
+        def place(symbol, side, quantity):
+            future = asyncio.run_coroutine_threadsafe(self._order(account, symbol, side, "MARKET", quantity,
+                                                                  strategy="r-twap"), self.loop)
+            return future.result()[1]
+
+        finished = self.loop.create_future()
+        job = await asyncio.to_thread(_RoutedTwap, symbol, _side(intent), _quantity(intent), int(intent.get("chunks", 5)),
+                                      float(intent.get("interval", 1.0)), place_fn=place, finished=finished,
+                                      depth=bool(intent.get("depth")))
+        get_scheduler().submit(job)
+        status = await finished
+        return {"status": status, "sent": str(job.sent), "residual": str(job.residual)}
+
+    # ----- background mode -----
+
+    def start(self):
+        """Run the router on its own event loop thread for synchronous callers (see submit)"""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.open())
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="order-router", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def submit(self, intent):
+        """Thread-safe: route an intent on the router loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self.route(intent), self.loop)
+
+    def stop(self):
+        if self._thread is not None:
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {"routed": dict(self.routed), "failed": dict(self.failed),
+                "accounts": {name: a.stats() for name, a in self.accounts.items()}}
+
+
+def _side(intent):
+    side = str(intent.get("side", "")).upper()
+    if side not in ("BUY", "SELL"):
+        raise ValueError(f"Invalid side: {intent.get('side')}")
+    return side
+
+
+def _quantity(intent):
+    try:
+        quantity = float(intent["quantity"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid quantity: {intent.get('quantity')}")
+    if quantity <= 0:
+        raise ValueError(f"Invalid quantity: {intent.get('quantity')}")
+    return intent["quantity"]
+
+
+async def route_lines(router, stream, out):
+    """Route JSON-lines intents from `stream` as they arrive, writing each result as a JSON line when it completes"""
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    async def run(intent):
+        out.write(json.dumps(await router.route(intent)) + "\n")
+        out.flush()
+
+    while True:
+        line = await loop.run_in_executor(None, stream.readline)
+        if not line:
+            break
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            intent = json.loads(line)
+        except ValueError as e:
+            log_error(f"Skipping malformed intent: {e}", line=line[:200])
+            continue
+        task = asyncio.create_task(run(intent))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def main(path):
+    router = await OrderRouter(load_accounts()).open()
+    start = time.perf_counter()
+    try:
+        if path == "-":
+            await route_lines(router, sys.stdin, sys.stdout)
+        else:
+            with open(path) as f:
+                await route_lines(router, f, sys.stdout)
+    finally:
+        await router.close()
+    log_info(f"Router finished in {time.perf_counter() - start:.2f}s", **router.stats())
+
+
+# CLI
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m janvi_bot.order_router INTENTS.jsonl|-   (one JSON intent per line; results on stdout)")
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1]))
@@ -0,0 +1,165 @@
+import os
+import asyncio
+import threading
+from janvi_bot.price_stream import add_price_listener, remove_price_listener, get_cached_quote, start_price_stream
+
+# Price fan-out for dashboards: any number of SSE / websocket clients share
+# the one process-wide price stream. The stream thread only marks symbols
+# dirty; the hub wakes on the event loop, at most once per PUSH_INTERVAL,
+# and hands each subscriber the latest quote of the symbols it watches.
+# A subscriber holds one pending quote per symbol, so a slow client skips
+# to the newest price instead of queueing every tick (counted in `dropped`).
+
+PUSH_INTERVAL = float(os.getenv("PRICE_PUSH_INTERVAL", "0.1"))
+
+
+def quote_payload(quote):
+    return {"price": quote.price, "bid": quote.bid, "ask": quote.ask}
+
+
+class Subscriber:
+    def __init__(self, symbols):
+        self.symbols = set(symbols)
+        self.pending = {}
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, quotes):
+        for symbol, quote in quotes.items():
+            if symbol in self.symbols:
+                if symbol in self.pending:
+                    self.dropped += 1
+                self.pending[symbol] = quote
+        if self.pending:
+            self._ready.set()
+
+    async def next(self, timeout=None):
+        """{symbol: quote} changed since the last call; None once closed; TimeoutError after `timeout` idle seconds"""
+        if not self.pending and not self.closed:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        self._ready.clear()
+        if self.closed:
+            return None
+        batch, self.pending = self.pending, {}
+        return batch
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+
+class PriceHub:
+    def __init__(self, interval=PUSH_INTERVAL, upstream=start_price_stream):
+        # upstream(symbols) subscribes the shared stream; None when something else feeds the price cache
+        self.interval = interval
+        self.upstream = upstream
+        self.subscribers = set()
+        self.batches = 0
+        self._watched = {}  # symbol -> subscriber count
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+    def start(self):
+        """Call on the event loop that serves the subscribers"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        add_price_listener(self._on_price)
+        self._task = self._loop.create_task(self._run())
+        return self
+
+    async def stop(self):
+        remove_price_listener(self._on_price)
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def subscribe(self, symbols):
+        subscriber = Subscriber(symbols)
+        self.subscribers.add(subscriber)
+        self._watch(subscriber.symbols)
+        # Start from the current prices rather than waiting for the next tick
+        subscriber.offer(self._quotes(subscriber.symbols))
+        return subscriber
+
+    def add_symbols(self, subscriber, symbols):
+        new = set(symbols) - subscriber.symbols
+        subscriber.symbols |= new
+        self._watch(new)
+        subscriber.offer(self._quotes(new))
+
+    def remove_symbols(self, subscriber, symbols):
+        gone = subscriber.symbols & set(symbols)
+        subscriber.symbols -= gone
+        self._unwatch(gone)
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            self._unwatch(subscriber.symbols)
+        subscriber.close()
+
+    def watched(self):
+        with self._lock:
+            return list(self._watched)
+
+    def _watch(self, symbols):
+        with self._lock:
+            for symbol in symbols:
+                self._watched[symbol] = self._watched.get(symbol, 0) + 1
+        if symbols and self.upstream is not None:
+            self.upstream(sorted(symbols))
+
+    def _unwatch(self, symbols):
+        # The upstream stays subscribed: the order paths read the same cache
+        with self._lock:
+            for symbol in symbols:
+                count = self._watched.get(symbol, 0) - 1
+                if count > 0:
+                    self._watched[symbol] = count
+                else:
+                    self._watched.pop(symbol, None)
+
+    def _on_price(self, symbol):
+        # Stream thread: one wake-up per batch, not per tick
+        with self._lock:
+            if symbol not in self._watched or symbol in self._dirty:
+                return
+            wake = not self._dirty
+            self._dirty.add(symbol)
+        if wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    @staticmethod
+    def _quotes(symbols):
+        quotes = {}
+        for symbol in symbols:
+            quote = get_cached_quote(symbol)
+            if quote is not None and quote.price is not None:
+                quotes[symbol] = quote_payload(quote)
+        return quotes
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+            quotes = self._quotes(dirty)
+            if quotes:
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(quotes)
+                self.batches += 1
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {"subscribers": len(self.subscribers), "symbols": len(self._watched), "batches": self.batches,
+                "dropped": sum(s.dropped for s in self.subscribers)}
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import random
+import threading
+from collections import namedtuple
+from janvi_bot.rest_client import get_client
+from janvi_bot.bot_logging import log_info, log_error
+
+# Streaming market data: one background websocket per market subscribed to
+# the bookTicker and trade streams of the symbols we trade, feeding that
+# market's in-process last-price cache. Streams and caches are keyed by the
+# websocket URL (spot WS_URL, futures FUTURES_WS_URL), so a futures symbol is
+# never subscribed on the spot socket nor priced from spot trades; readers
+# pass the URL of their market (None is spot). Order paths read the cache and
+# only fall back to the REST ticker when the streamed data is stale.
+# asyncio and websockets are imported when a stream starts, so one-shot
+# order commands that never open one don't pay for them at startup.
+
+WS_URL = os.getenv("BINANCE_WS_URL", "wss://stream.testnet.binance.vision")
+FUTURES_WS_URL = os.getenv("BINANCE_FUTURES_WS_URL", "wss://fstream.binancefuture.com")
+STALE_AFTER = float(os.getenv("PRICE_STALE_AFTER", "2.0"))
+RECONNECT_CAP = 30.0
+
+# `updated` is time.monotonic() of the last write; price is the last trade
+# (or the book mid until the first trade arrives)
+Quote = namedtuple("Quote", "price bid ask updated")
+
+
+class PriceCache:
+    """Symbol -> Quote. Writers swap in a whole new immutable Quote, so readers never lock"""
+
+    def __init__(self):
+        self._quotes = {}
+        # symbol -> (volume, quote volume) traded since streaming began; POV and execution metrics read deltas
+        self._traded = {}
+        # Called with the symbol after every write, on the writer's thread (price_hub fans these out)
+        self._listeners = ()
+
+    def add_listener(self, fn):
+        self._listeners = self._listeners + (fn,)
+
+    def remove_listener(self, fn):
+        self._listeners = tuple(l for l in self._listeners if l is not fn)
+
+    def _notify(self, symbol):
+        for fn in self._listeners:
+            fn(symbol)
+
+    def get(self, symbol):
+        return self._quotes.get(symbol)
+
+    def fresh(self, symbol, max_age=STALE_AFTER):
+        quote = self._quotes.get(symbol)
+        if quote is not None and quote.price is not None and time.monotonic() - quote.updated <= max_age:
+            return quote
+        return None
+
+    def on_trade(self, symbol, price, qty=0.0):
+        old = self._quotes.get(symbol)
+        bid, ask = (old.bid, old.ask) if old else (None, None)
+        self._quotes[symbol] = Quote(price, bid, ask, time.monotonic())
+        if qty:
+            volume, notional = self._traded.get(symbol, (0.0, 0.0))
+            self._traded[symbol] = (volume + qty, notional + qty * price)
+        self._notify(symbol)
+
+    def traded(self, symbol):
+        return self._traded.get(symbol, (0.0, 0.0))
+
+    def on_book(self, symbol, bid, ask):
+        old = self._quotes.get(symbol)
+        price = old.price if old and old.price is not None else (bid + ask) / 2
+        self._quotes[symbol] = Quote(price, bid, ask, time.monotonic())
+        self._notify(symbol)
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            s: {"price": q.price, "bid": q.bid, "ask": q.ask, "age_s": round(now - q.updated, 3)}
+            for s, q in list(self._quotes.items())
+        }
+
+
+class PriceStream:
+    # Subclasses (order_book.DepthStream) swap the streams and the message handling
+    label = "Price stream"
+    thread_name = "price-stream"
+
+    def __init__(self, symbols=(), url=WS_URL, cache=None):
+        self.url = url.rstrip("/")
+        self.cache = cache or PriceCache()
+        self.symbols = {s.upper() for s in symbols}
+        self.messages = 0
+        self._loop = None
+        self._ws = None
+        self._thread = None
+        self._stopped = False
+        self._next_id = 0
+
+    @staticmethod
+    def _streams(symbol):
+        s = symbol.lower()
+        return [f"{s}@bookTicker", f"{s}@trade"]
+
+    def _handle(self, raw):
+        msg = json.loads(raw)
+        data = msg.get("data", msg)
+        symbol = data.get("s")
+        if symbol is None:
+            return  # subscription acks: {"result": null, "id": n}
+        self.messages += 1
+        if data.get("e") == "trade":
+            self.cache.on_trade(symbol, float(data["p"]), float(data["q"]))
+        elif "b" in data and "a" in data:
+            self.cache.on_book(symbol, float(data["b"]), float(data["a"]))
+
+    async def _main(self):
+        import asyncio
+        import websockets
+        delay = 1.0
+        while not self._stopped:
+            if not self.symbols:
+                await asyncio.sleep(0.5)
+                continue
+            streams = [st for s in sorted(self.symbols) for st in self._streams(s)]
+            try:
+                async with websockets.connect(f"{self.url}/stream?streams={'/'.join(streams)}") as ws:
+                    self._ws = ws
+                    delay = 1.0
+                    log_info(f"{self.label} connected", symbols=len(self.symbols))
+                    self._on_connect()
+                    async for raw in ws:
+                        self._handle(raw)
+            except Exception as e:
+                if not self._stopped:
+                    log_error(f"{self.label} error: {e}")
+            finally:
+                self._ws = None
+                self._on_disconnect()
+            if not self._stopped:
+                await asyncio.sleep(delay + random.uniform(0, 1))
+                delay = min(delay * 2, RECONNECT_CAP)
+
+    def _on_connect(self):
+        pass
+
+    def _on_disconnect(self):
+        pass
+
+    @property
+    def connected(self):
+        return self._ws is not None
+
+    def _run(self):
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+        return self
+
+    def subscribe(self, symbol):
+        """Add a symbol to the live connection (SUBSCRIBE) or to the next connect"""
+        symbol = symbol.upper()
+        if symbol in self.symbols:
+            return
+        self.symbols.add(symbol)
+        ws, loop = self._ws, self._loop
+        if ws is not None and loop is not None:
+            import asyncio
+            self._next_id += 1
+            msg = json.dumps({"method": "SUBSCRIBE", "params": self._streams(symbol), "id": self._next_id})
+            asyncio.run_coroutine_threadsafe(ws.send(msg), loop)
+
+    def stop(self):
+        self._stopped = True
+        ws, loop = self._ws, self._loop
+        if ws is not None and loop is not None:
+            import asyncio
+            asyncio.run_coroutine_threadsafe(ws.close(), loop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def _key(url):
+    return (WS_URL if url is None else url).rstrip("/")
+
+
+# The spot cache; other markets get theirs on first use
+_cache = PriceCache()
+_caches = {_key(WS_URL): _cache}
+_streams = {}
+_stream_lock = threading.Lock()
+
+
+def _cache_for(url):
+    cache = _caches.get(_key(url))
+    if cache is None:
+        with _stream_lock:
+            cache = _caches.setdefault(_key(url), PriceCache())
+    return cache
+
+
+def start_price_stream(symbols, url=WS_URL):
+    """Start (or extend) the process-wide price stream of `url`'s market for `symbols`"""
+    cache = _cache_for(url)
+    with _stream_lock:
+        stream = _streams.get(_key(url))
+        if stream is None:
+            stream = _streams[_key(url)] = PriceStream(symbols, url=url, cache=cache).start()
+        else:
+            for s in symbols:
+                stream.subscribe(s)
+    return stream
+
+
+def _reset_after_fork():
+    # The stream threads do not survive a fork; the child restarts them on demand
+    global _streams, _stream_lock
+    _streams = {}
+    _stream_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_price_stream(url=None):
+    return _streams.get(_key(url))
+
+
+def get_quote(symbol, max_age=STALE_AFTER):
+    """Last spot price/bid/ask for a symbol, from the stream when fresh, else one REST ticker call"""
+    symbol = symbol.upper()
+    quote = _cache.fresh(symbol, max_age)
+    if quote is not None:
+        return quote
+
+    response = get_client().get("/api/v3/ticker/price", {"symbol": symbol})
+    response.raise_for_status()
+    update_price(symbol, float(response.json()["price"]))
+    return _cache.get(symbol)
+
+
+def get_fresh_quote(symbol, max_age=STALE_AFTER, url=None):
+    """Cached quote of `url`'s market if it is fresh, else None; never touches the network"""
+    return _cache_for(url).fresh(symbol.upper(), max_age)
+
+
+def update_price(symbol, price, url=None):
+    """Record a price fetched outside the stream, and start streaming the symbol if that market streams"""
+    symbol = symbol.upper()
+    _cache_for(url).on_trade(symbol, price)
+    stream = _streams.get(_key(url))
+    if stream is not None:
+        stream.subscribe(symbol)
+
+
+def get_price(symbol, max_age=STALE_AFTER):
+    return get_quote(symbol, max_age).price
+
+
+def get_cached_price(symbol, url=None):
+    """Last known price in `url`'s market however old, without touching the network (None if never seen)"""
+    quote = _cache_for(url).get(symbol.upper())
+    return quote.price if quote is not None else None
+
+
+def get_cached_quote(symbol, url=None):
+    """Last Quote however old, without touching the network (None if never seen)"""
+    return _cache_for(url).get(symbol.upper())
+
+
+def add_price_listener(fn):
+    """fn(symbol) after every price/book update, on the stream's thread: keep it quick"""
+    _cache.add_listener(fn)
+
+
+def remove_price_listener(fn):
+    _cache.remove_listener(fn)
+
+
+def get_traded(symbol, url=None):
+    """(volume, quote volume) `url`'s trade stream has seen for a symbol, or None when it isn't streaming the symbol"""
+    symbol = symbol.upper()
+    stream = _streams.get(_key(url))
+    if stream is None or symbol not in stream.symbols or not stream.connected:
+        return None
+    return stream.cache.traded(symbol)
+
+
+def cache_snapshot():
+    return _cache.snapshot()
@@ -0,0 +1,193 @@
+import os
+import re
+import time
+import random
+import threading
+
+# Shared Binance rate limiter. Every REST call takes its request weight (and
+# order count, for order endpoints) from token buckets mirroring Binance's
+# limits; the buckets are re-synced from the X-MBX-USED-WEIGHT-* and
+# X-MBX-ORDER-COUNT-* headers on each response, and 429/418 responses put
+# the whole process into a jittered backoff.
+
+WEIGHT_LIMIT_1M = int(os.getenv("BINANCE_WEIGHT_LIMIT_1M", "6000"))
+ORDER_LIMIT_10S = int(os.getenv("BINANCE_ORDER_LIMIT_10S", "100"))
+ORDER_LIMIT_1D = int(os.getenv("BINANCE_ORDER_LIMIT_1D", "200000"))
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# (method, path) -> (request weight, orders)
+ENDPOINT_COSTS = {
+    ("GET", "/api/v3/ping"): (1, 0),
+    ("GET", "/api/v3/time"): (1, 0),
+    ("GET", "/api/v3/exchangeInfo"): (20, 0),
+    ("GET", "/api/v3/ticker/price"): (2, 0),
+    ("GET", "/api/v3/ticker/bookTicker"): (2, 0),
+    ("GET", "/api/v3/depth"): (25, 0),  # limit 101-500; order_book snapshots ask for 500
+    ("GET", "/api/v3/account"): (20, 0),
+    ("GET", "/api/v3/order"): (4, 0),
+    ("GET", "/api/v3/openOrders"): (6, 0),
+    ("POST", "/api/v3/order"): (1, 1),
+    ("DELETE", "/api/v3/order"): (1, 0),
+    ("POST", "/api/v3/orderList/oco"): (1, 2),
+    ("POST", "/api/v3/userDataStream"): (2, 0),
+    ("PUT", "/api/v3/userDataStream"): (2, 0),
+    ("DELETE", "/api/v3/userDataStream"): (2, 0),
+    ("GET", "/fapi/v1/time"): (1, 0),
+    ("GET", "/fapi/v1/exchangeInfo"): (1, 0),
+    ("GET", "/fapi/v1/ticker/price"): (1, 0),
+    ("GET", "/fapi/v1/depth"): (10, 0),
+    ("GET", "/fapi/v1/order"): (1, 0),
+    ("POST", "/fapi/v1/order"): (1, 1),
+    ("DELETE", "/fapi/v1/order"): (1, 0),
+    ("POST", "/fapi/v1/batchOrders"): (5, 5),
+    ("POST", "/fapi/v1/listenKey"): (1, 0),
+    ("PUT", "/fapi/v1/listenKey"): (1, 0),
+    ("DELETE", "/fapi/v1/listenKey"): (1, 0),
+    ("GET", "/fapi/v1/openOrders"): (1, 0),
+}
+DEFAULT_COST = (1, 0)
+
+INTERVAL_SECONDS = {"S": 1, "M": 60, "H": 3600, "D": 86400}
+HEADER_RE = re.compile(r"^x-mbx-(used-weight|order-count)-(\d+)([smhd])$")
+
+
+def endpoint_cost(method, path):
+    return ENDPOINT_COSTS.get((method.upper(), path), DEFAULT_COST)
+
+
+class TokenBucket:
+    """Token bucket of `capacity` tokens refilled over `interval` seconds (callers hold the limiter lock)"""
+
+    def __init__(self, capacity, interval):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / interval
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, n):
+        if self.tokens >= n:
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+    def sync(self, used, now):
+        """Trust the exchange's count of what has been used in the current window"""
+        self.tokens = max(0.0, self.capacity - used)
+        self.updated = now
+
+
+class RateLimiter:
+    def __init__(self, weight_limit=WEIGHT_LIMIT_1M, order_limit_10s=ORDER_LIMIT_10S, order_limit_1d=ORDER_LIMIT_1D):
+        self.lock = threading.Lock()
+        self.weight = {"1M": TokenBucket(weight_limit, 60)}
+        self.orders = {"10S": TokenBucket(order_limit_10s, 10), "1D": TokenBucket(order_limit_1d, 86400)}
+        self.blocked_until = 0.0
+        self.strikes = 0
+
+    def _buckets_for(self, weight, orders):
+        needs = [(b, weight) for b in self.weight.values()]
+        if orders:
+            needs += [(b, orders) for b in self.orders.values()]
+        return needs
+
+    def _wait_locked(self, needs, now):
+        for bucket, _ in needs:
+            bucket.refill(now)
+        backoff = self.blocked_until - now
+        return max([backoff] + [bucket.wait_time(n) for bucket, n in needs])
+
+    def time_until(self, method, path):
+        """Seconds until a request to this endpoint could be sent without waiting"""
+        needs = self._buckets_for(*endpoint_cost(method, path))
+        with self.lock:
+            return max(0.0, self._wait_locked(needs, time.monotonic()))
+
+    def try_acquire(self, method, path, weight=True, orders=True):
+        """Spend the endpoint's cost if it fits now and return 0; otherwise spend nothing and
+        return the seconds to wait. weight/orders=False leaves that half of the cost to another limiter."""
+        cost_weight, cost_orders = endpoint_cost(method, path)
+        needs = self._buckets_for(cost_weight if weight else 0, cost_orders if orders else 0)
+        with self.lock:
+            wait = self._wait_locked(needs, time.monotonic())
+            if wait > 0:
+                return wait
+            for bucket, n in needs:
+                bucket.tokens -= n
+            return 0.0
+
+    def acquire(self, method, path):
+        """Block until the endpoint's weight and order cost fit the budget, then spend it"""
+        while True:
+            wait = self.try_acquire(method, path)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def on_response(self, status_code, headers, kinds=("used-weight", "order-count")):
+        """Re-sync buckets from the response headers and back off on 429/418"""
+        now = time.monotonic()
+        with self.lock:
+            for name, value in headers.items():
+                m = HEADER_RE.match(name.lower())
+                if not m or m.group(1) not in kinds:
+                    continue
+                kind, count, unit = m.groups()
+                key = f"{count}{unit.upper()}"
+                buckets = self.weight if kind == "used-weight" else self.orders
+                if key not in buckets:
+                    limit = WEIGHT_LIMIT_1M if kind == "used-weight" else ORDER_LIMIT_10S
+                    buckets[key] = TokenBucket(limit, int(count) * INTERVAL_SECONDS[unit.upper()])
+                try:
+                    buckets[key].sync(int(value), now)
+                except ValueError:
+                    continue
+
+            if status_code in (429, 418):
+                self.strikes += 1
+                retry_after = float(headers.get("Retry-After") or 0)
+                delay = max(retry_after, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (self.strikes - 1)))
+                delay += random.uniform(0, BACKOFF_BASE)
+                self.blocked_until = max(self.blocked_until, now + delay)
+                return delay
+            self.strikes = 0
+            return 0.0
+
+    def headroom(self):
+        """Remaining budget per bucket, plus any active backoff, for callers to schedule against"""
+        now = time.monotonic()
+        with self.lock:
+            room = {}
+            for prefix, buckets in (("weight", self.weight), ("orders", self.orders)):
+                for key, bucket in buckets.items():
+                    bucket.refill(now)
+                    room[f"{prefix}_{key.lower()}"] = int(bucket.tokens)
+            room["backoff_s"] = round(max(0.0, self.blocked_until - now), 3)
+            return room
+
+    def reset(self):
+        with self.lock:
+            now = time.monotonic()
+            for bucket in list(self.weight.values()) + list(self.orders.values()):
+                bucket.tokens = bucket.capacity
+                bucket.updated = now
+            self.blocked_until = 0.0
+            self.strikes = 0
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter shared by every order path"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
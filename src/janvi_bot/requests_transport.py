@@ -0,0 +1,82 @@
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from janvi_bot.metrics import observe_since
+
+# HTTP transport for RestClient and the clock sync: a keep-alive requests
+# Session whose urllib3 connections time each connect / send / first_byte
+# step. Imported on first use, so requests loads only with the first client.
+
+
+class _TimedConnection:
+    # connect / send / first_byte spans, attributed to the endpoint in flight
+    # on this thread via metrics.set_labels()
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        observe_since("connect", start)
+
+    def request(self, *args, **kwargs):
+        if self.sock is None:
+            self.connect()
+        start = time.perf_counter()
+        super().request(*args, **kwargs)
+        observe_since("send", start)
+
+    def getresponse(self):
+        start = time.perf_counter()
+        response = super().getresponse()
+        observe_since("first_byte", start)
+        return response
+
+
+class _TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+
+class TimedSession(requests.Session):
+    def __init__(self, pool_size):
+        super().__init__()
+        adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def connection_stats(self):
+        """Requests sent vs. connections opened (each new connection is a TCP+TLS handshake)"""
+        requests_sent = 0
+        handshakes = 0
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_sent += pool.num_requests
+                handshakes += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "handshakes": handshakes,
+            "reused": max(requests_sent - handshakes, 0),
+        }
+
+
+def new_session(pool_size):
+    return TimedSession(pool_size)
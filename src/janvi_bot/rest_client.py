@@ -0,0 +1,166 @@
+import os
+import time
+import hmac
+import hashlib
+import threading
+from urllib.parse import urlencode
+from dotenv import load_dotenv
+from janvi_bot.rate_limiter import get_rate_limiter
+from janvi_bot.metrics import observe_since, set_labels
+from janvi_bot.clock_sync import CLOCK_SYNC, get_clock, is_timestamp_rejection
+
+# Shared Binance REST client: one keep-alive connection pool per process
+# instead of a fresh TCP+TLS handshake on every requests.get/post. requests
+# (requests_transport) is imported with the first client, not with this
+# module, so a command that never reaches the network never pays for it.
+
+load_dotenv()
+API_KEY = os.getenv("BINANCE_API_KEY")
+API_SECRET = os.getenv("BINANCE_API_SECRET")
+BASE_URL = os.getenv("BINANCE_BASE_URL", "https://testnet.binance.vision")
+FUTURES_BASE_URL = os.getenv("BINANCE_FUTURES_BASE_URL", "https://testnet.binancefuture.com")
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+POOL_SIZE = int(os.getenv("BINANCE_POOL_SIZE", "20"))
+RECV_WINDOW = int(os.getenv("BINANCE_RECV_WINDOW", "5000"))
+# Order entry can run a tighter window: a stale order is rejected instead of executing late.
+# Timestamps come from the synced server clock (clock_sync), so a few hundred ms is workable.
+ORDER_RECV_WINDOW = int(os.getenv("BINANCE_ORDER_RECV_WINDOW", str(RECV_WINDOW)))
+# Rate-limited GETs are idempotent and retried after the limiter's backoff
+GET_RETRIES = 3
+
+
+class Signer:
+    """HMAC SHA256 request signer, keyed once; every signature copies the keyed object instead of re-keying"""
+
+    def __init__(self, api_secret):
+        self._hmac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256) if api_secret else None
+
+    def sign(self, params):
+        """Return the urlencoded query with its HMAC SHA256 signature appended"""
+        if self._hmac is None:
+            raise RuntimeError("BINANCE_API_SECRET is not set")
+        query = urlencode(params)
+        mac = self._hmac.copy()
+        mac.update(query.encode())
+        return f"{query}&signature={mac.hexdigest()}"
+
+
+def recv_window_for(method):
+    # POST is order entry (new order, OCO, batch); everything else keeps the default window
+    return ORDER_RECV_WINDOW if method == "POST" else RECV_WINDOW
+
+
+def encode_query(params, signed=False, signer=None, clock=None, recv_window=RECV_WINDOW):
+    """Query string for a request; signed requests get timestamp/recvWindow and a signature"""
+    params = dict(params or {})
+    if not signed:
+        return urlencode(params)
+    params.setdefault("timestamp", clock.now_ms() if clock is not None else int(time.time() * 1000))
+    params.setdefault("recvWindow", recv_window)
+    start = time.perf_counter()
+    query = signer.sign(params)
+    observe_since("sign", start)
+    return query
+
+
+class RestClient:
+    def __init__(self, api_key=API_KEY, api_secret=API_SECRET, base_url=BASE_URL,
+                 timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE, limiter=None, time_path="/api/v3/time", clock=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limiter = limiter or get_rate_limiter()
+        # Signed requests are stamped from the exchange's clock; BINANCE_CLOCK_SYNC=0 uses the local one
+        self.clock = clock or (get_clock(self.base_url, time_path, self.limiter) if CLOCK_SYNC else None)
+
+        self.signer = Signer(api_secret)
+
+        from janvi_bot.requests_transport import new_session
+        self.session = new_session(pool_size)
+        if api_key:
+            self.session.headers["X-MBX-APIKEY"] = api_key
+
+    # Sign request
+    def sign(self, params):
+        return self.signer.sign(params)
+
+    def request(self, method, path, params=None, signed=False, timeout=None, strategy=None):
+        start = time.perf_counter()
+        previous = set_labels({"endpoint": path, "symbol": (params or {}).get("symbol", ""), "strategy": strategy or ""})
+        try:
+            attempts = GET_RETRIES + 1 if method == "GET" else 1
+            for _ in range(attempts):
+                wait_start = time.perf_counter()
+                self.limiter.acquire(method, path)
+                observe_since("rate_wait", wait_start)
+                response = self.session.request(method, self._url(path, params, signed, method), timeout=timeout or self.timeout)
+                self.limiter.on_response(response.status_code, response.headers)
+                if signed and self.clock is not None and response.status_code == 400 and \
+                        is_timestamp_rejection(_json_or_none(response)):
+                    # Resync before the caller (order_retry) resends with a fresh timestamp
+                    self.clock.on_rejected()
+                if response.status_code != 429:
+                    break
+            observe_since("total", start)
+            return response
+        finally:
+            set_labels(previous)
+
+    def _url(self, path, params, signed, method="GET"):
+        query = encode_query(params, signed, self.signer, self.clock, recv_window_for(method))
+        url = f"{self.base_url}{path}"
+        return f"{url}?{query}" if query else url
+
+    def get(self, path, params=None, signed=False, timeout=None, strategy=None):
+        return self.request("GET", path, params, signed, timeout, strategy)
+
+    def post(self, path, params=None, signed=False, timeout=None, strategy=None):
+        return self.request("POST", path, params, signed, timeout, strategy)
+
+    def put(self, path, params=None, signed=False, timeout=None, strategy=None):
+        return self.request("PUT", path, params, signed, timeout, strategy)
+
+    def delete(self, path, params=None, signed=False, timeout=None, strategy=None):
+        return self.request("DELETE", path, params, signed, timeout, strategy)
+
+    def connection_stats(self):
+        """Requests sent vs. connections opened (each new connection is a TCP+TLS handshake)"""
+        return self.session.connection_stats()
+
+    def close(self):
+        self.session.close()
+
+
+def _json_or_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared client, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RestClient()
+    return _client
+
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared across forked (gunicorn) workers;
+    # each worker builds its own client on first use
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
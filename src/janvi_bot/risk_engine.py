@@ -0,0 +1,461 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from janvi_bot.bot_logging import DATA_DIR, log_info, log_error
+from janvi_bot.metrics import registry
+from janvi_bot.price_stream import get_cached_price, FUTURES_WS_URL
+from janvi_bot.user_stream import FINAL_STATUSES, get_order_tracker
+from janvi_bot import order_retry
+
+# Pre-trade risk gate. Every order path asks it just before sending
+# (ExchangeBackend.new_order / place_oco, the futures batcher, the order
+# router); a refused order comes back as a local 400 rejection shaped like
+# the exchange's, so callers handle it as any other rejected order. Checks:
+#   kill switch  - RISK_KILL_SWITCH=1, kill(), or the kill file (python -m janvi_bot.risk_engine kill)
+#   price band   - a limit / stop price within RISK_PRICE_BAND of the cached last price
+#   open orders  - at most RISK_MAX_OPEN_ORDERS open per account
+#   notional     - worst-case exposure per symbol and per account after the order
+# The worst-case exposure of a symbol is max(|position + open buys|,
+# |position - open sells|) in quote notional; an order that lowers it always
+# passes. Exposure lives in an in-memory index, updated incrementally from
+# what this process sends, the acks and the user-data stream (whose reconnect
+# replays the account's open orders), so a check is a few dict lookups under
+# one lock and never a REST call.
+#
+# Accounts: the backend name ("spot", "futures") for the order scripts, the
+# router's sub-account name otherwise (its "main" account is "spot"). Prices
+# come from the account's market: "futures" from the futures stream, every
+# other account (the router's, simulated orders) from spot.
+
+# 0 turns a limit off; notional is in the quote asset (USDT)
+MAX_SYMBOL_NOTIONAL = float(os.getenv("RISK_MAX_SYMBOL_NOTIONAL", "0"))
+MAX_ACCOUNT_NOTIONAL = float(os.getenv("RISK_MAX_ACCOUNT_NOTIONAL", "0"))
+MAX_OPEN_ORDERS = int(os.getenv("RISK_MAX_OPEN_ORDERS", "1000"))
+PRICE_BAND = float(os.getenv("RISK_PRICE_BAND", "0.2"))
+KILL_SWITCH = os.getenv("RISK_KILL_SWITCH", "0") == "1"
+KILL_FILE = os.getenv("RISK_KILL_FILE", os.path.join(DATA_DIR, '.cache', 'KILL'))
+# The kill file is looked for at most this often (a stat per order would cost more than the checks)
+KILL_POLL = float(os.getenv("RISK_KILL_POLL", "0.2"))
+DEFAULT_ACCOUNT = os.getenv("BINANCE_BACKEND", "spot").lower()
+# Orders simulated on the local matching engine are checked too, on an account of their own
+SIM_ACCOUNT = "sim"
+# Local error code of a risk rejection (never sent by the exchange)
+REJECT_CODE = -9000
+# Finished orders remembered so a late ack or stream replay is not counted twice
+MAX_DONE = 10000
+
+
+def account_key(name):
+    return "spot" if name in (None, "main") else name
+
+
+def market_url(account):
+    """Price stream URL of an account's market (None: spot)"""
+    return FUTURES_WS_URL if account == "futures" else None
+
+
+def reject_body(reason):
+    return {"code": REJECT_CODE, "msg": f"Risk check failed: {reason}"}
+
+
+def is_risk_rejection(response):
+    try:
+        return response.status_code == 400 and response.json().get("code") == REJECT_CODE
+    except (ValueError, AttributeError):
+        return False
+
+
+class _Exposure:
+    __slots__ = ("position", "buys", "sells")
+
+    def __init__(self):
+        self.position = 0.0  # signed notional of our fills
+        self.buys = 0.0      # notional still open on each side
+        self.sells = 0.0
+
+    def worst_case(self, buys=0.0, sells=0.0):
+        return max(abs(self.position + self.buys + buys), abs(self.position - self.sells - sells))
+
+
+class _Account:
+    __slots__ = ("symbols", "total", "open_orders")
+
+    def __init__(self):
+        self.symbols = {}
+        self.total = 0.0
+        self.open_orders = 0
+
+
+class _Order:
+    __slots__ = ("account", "symbol", "sign", "price", "quantity", "executed", "quote", "approved")
+
+    def __init__(self, account, symbol, side, price, quantity, approved=False):
+        self.account = account
+        self.symbol = symbol
+        self.sign = 1 if side == "BUY" else -1
+        self.price = price
+        self.quantity = quantity
+        self.executed = 0.0
+        self.quote = 0.0
+        self.approved = approved  # let through by check(); False when learned from the exchange
+
+
+class RiskEngine:
+    def __init__(self, max_symbol_notional=MAX_SYMBOL_NOTIONAL, max_account_notional=MAX_ACCOUNT_NOTIONAL,
+                 max_open_orders=MAX_OPEN_ORDERS, price_band=PRICE_BAND, kill_file=KILL_FILE):
+        self.max_symbol_notional = max_symbol_notional
+        self.max_account_notional = max_account_notional
+        self.max_open_orders = max_open_orders
+        self.price_band = price_band
+        self.kill_file = kill_file
+        self.kill_reason = "RISK_KILL_SWITCH=1" if KILL_SWITCH else None
+        self._kill_file_reason = None
+        self._kill_polled = float("-inf")
+        self.accounts = {}
+        self.orders = {}          # clientOrderId -> _Order, open (or sent and not yet acked) only
+        self._done = OrderedDict()
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.rejected = {}
+
+    # ----- kill switch -----
+
+    def kill(self, reason="manual"):
+        self.kill_reason = reason
+        log_error(f"Kill switch on: {reason}")
+
+    def resume(self):
+        self.kill_reason = None
+        log_info("Kill switch off")
+
+    def killed(self):
+        """Why new orders are refused, or None"""
+        if self.kill_reason is not None:
+            return self.kill_reason
+        if not self.kill_file:
+            return None
+        now = time.monotonic()
+        if now - self._kill_polled >= KILL_POLL:
+            self._kill_polled = now
+            self._kill_file_reason = self._read_kill_file()
+        return self._kill_file_reason
+
+    def _read_kill_file(self):
+        try:
+            with open(self.kill_file) as f:
+                reason = f.read().strip()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            reason = ""
+        return f"kill file {self.kill_file}" + (f" ({reason})" if reason else "")
+
+    # ----- checks -----
+
+    def check(self, client_order_id, symbol, side, quantity, price=None, account=DEFAULT_ACCOUNT, ref_price=None,
+              exposure=True):
+        """None when the order may go (it is then counted as open), else why not. No network, no blocking.
+        exposure=False counts it as an open order only (an OCO leg whose sibling carries the exposure)."""
+        self.checks += 1
+        killed = self.killed()
+        if killed is not None:
+            return self._reject("kill_switch", f"kill switch on: {killed}", symbol)
+        last = get_cached_price(symbol, market_url(account))
+        price = float(price) if price else None
+        if price and last and self.price_band and abs(price / last - 1) > self.price_band:
+            return self._reject("price_band", f"{symbol} price {price} is {abs(price / last - 1):.1%} from last "
+                                              f"{last} (band {self.price_band:.0%})", symbol)
+        quantity = float(quantity)
+        at = price or last or ref_price
+        limited = self.max_symbol_notional or self.max_account_notional
+        if at is None and limited:
+            return self._reject("no_price", f"no price for {symbol} to size the order against", symbol)
+        if not exposure:
+            at = 0.0
+        notional = quantity * at if at else 0.0
+
+        refused = None
+        with self._lock:
+            existing = self.orders.get(client_order_id)
+            if existing is not None:
+                if existing.approved:
+                    return None  # a resend of an order this engine already let through
+                # Known from the exchange (a resumed job resending it): checked afresh, without counting it twice
+                self._unbook(existing)
+            book = self._book(account)
+            if self.max_open_orders and book.open_orders >= self.max_open_orders:
+                refused = "open_orders", f"{book.open_orders} orders open on {account} (max {self.max_open_orders})"
+            elif limited:
+                exposure = book.symbols.get(symbol) or _Exposure()
+                before = exposure.worst_case()
+                after = exposure.worst_case(notional, 0.0) if side == "BUY" else exposure.worst_case(0.0, notional)
+                total = book.total - before + after
+                if after <= before:
+                    pass  # lowers the exposure: allowed even over the limits
+                elif self.max_symbol_notional and after > self.max_symbol_notional:
+                    refused = "symbol_notional", f"{symbol} exposure would be {after:.2f} (max {self.max_symbol_notional:g})"
+                elif self.max_account_notional and total > self.max_account_notional:
+                    refused = "account_notional", f"{account} exposure would be {total:.2f} (max {self.max_account_notional:g})"
+            if existing is not None:
+                self._rebook(existing)
+                existing.approved = refused is None
+            elif refused is None:
+                self._open(client_order_id, account, symbol, side, at or 0.0, quantity, approved=True)
+        # Logged outside the lock: a refusal never holds up other checks
+        return self._reject(*refused, symbol) if refused is not None else None
+
+    def needs_price(self, symbol, account=DEFAULT_ACCOUNT):
+        """True when an order without a price can't be sized: notional limits are on and nothing is cached"""
+        return (bool(self.max_symbol_notional or self.max_account_notional)
+                and get_cached_price(symbol, market_url(account)) is None)
+
+    def check_params(self, params, account=DEFAULT_ACCOUNT, ref_price=None):
+        """check() for wire-ready order params (price, else stopPrice, is what the band is held to)"""
+        return self.check(params["newClientOrderId"], params["symbol"], params["side"], params["quantity"],
+                          params.get("price") or params.get("stopPrice"), account, ref_price)
+
+    def check_oco(self, params, account=DEFAULT_ACCOUNT):
+        """Both legs of spot-style OCO params; neither stays counted if one is refused.
+        At most one leg executes, so only the larger one counts as exposure; both count as open orders."""
+        price = lambda prefix: float(params.get(f"{prefix}Price") or params.get(f"{prefix}StopPrice") or 0.0)
+        legs = sorted(("above", "below"), key=price, reverse=True)
+        passed = []
+        for prefix in legs:
+            cid = params[f"{prefix}ClientOrderId"]
+            reason = self.check(cid, params["symbol"], params["side"], params["quantity"], price(prefix) or None,
+                                account, exposure=prefix == legs[0])
+            if reason is not None:
+                for done in passed:
+                    self.release(done)
+                return reason
+            passed.append(cid)
+        return None
+
+    def _reject(self, kind, reason, symbol):
+        self.rejected[kind] = self.rejected.get(kind, 0) + 1
+        log_error(f"Risk check failed: {reason}", symbol=symbol, check=kind)
+        return reason
+
+    # ----- exposure index -----
+
+    def _book(self, account):
+        book = self.accounts.get(account)
+        if book is None:
+            book = self.accounts[account] = _Account()
+        return book
+
+    def _move(self, book, symbol, position=0.0, buys=0.0, sells=0.0):
+        # Called with the lock held: one symbol changes, the account total follows incrementally
+        exposure = book.symbols.get(symbol)
+        if exposure is None:
+            exposure = book.symbols[symbol] = _Exposure()
+        before = exposure.worst_case()
+        exposure.position += position
+        exposure.buys += buys
+        exposure.sells += sells
+        book.total += exposure.worst_case() - before
+
+    def _open(self, client_order_id, account, symbol, side, price, quantity, approved=False):
+        self._book(account)
+        order = self.orders[client_order_id] = _Order(account, symbol, side, price, quantity, approved)
+        self._rebook(order)
+
+    def _rebook(self, order, direction=1.0):
+        # An order's open remainder joins (or, direction -1, leaves) its account's open side
+        book = self.accounts[order.account]
+        book.open_orders += 1 if direction > 0 else -1
+        left = direction * max(order.quantity - order.executed, 0.0) * order.price
+        self._move(book, order.symbol, buys=left if order.sign > 0 else 0.0, sells=left if order.sign < 0 else 0.0)
+
+    def _unbook(self, order):
+        self._rebook(order, -1.0)
+
+    def _close(self, client_order_id, order):
+        self._unbook(order)
+        del self.orders[client_order_id]
+        self._done[client_order_id] = None
+        while len(self._done) > MAX_DONE:
+            self._done.popitem(last=False)
+
+    def release(self, client_order_id):
+        """The order was not placed after all (refused by the exchange or by a later check)"""
+        with self._lock:
+            order = self.orders.get(client_order_id)
+            if order is not None:
+                self._close(client_order_id, order)
+
+    def update(self, client_order_id, executed, quote, status, symbol=None, side=None, price=None, quantity=None,
+               account=DEFAULT_ACCOUNT):
+        """Cumulative executed qty / quote and status of an order (from an ack or the user-data stream).
+        Absolute figures, so the same state applied twice changes nothing."""
+        final = status in FINAL_STATUSES
+        with self._lock:
+            order = self.orders.get(client_order_id)
+            if order is None:
+                if client_order_id in self._done or symbol is None:
+                    return
+                # Placed elsewhere (another process, the web UI): it counts against the account all the same
+                self._open(client_order_id, account, symbol, side, float(price or 0.0) or
+                           (get_cached_price(symbol, market_url(account)) or 0.0), float(quantity or executed))
+                order = self.orders[client_order_id]
+            executed, quote = float(executed), float(quote)
+            filled = executed - order.executed
+            if filled > 0:
+                book = self.accounts[order.account]
+                paid = quote - order.quote if quote > order.quote else filled * order.price
+                # Filled quantity leaves the open side at the price it was counted at and joins the position
+                open_change = -min(filled, max(order.quantity - order.executed, 0.0)) * order.price
+                self._move(book, order.symbol, position=order.sign * paid,
+                           buys=open_change if order.sign > 0 else 0.0, sells=open_change if order.sign < 0 else 0.0)
+                order.executed, order.quote = executed, max(quote, order.quote + paid)
+            if final:
+                self._close(client_order_id, order)
+
+    def on_ack(self, client_order_id, response):
+        """An order request's answer: a refusal frees what the check counted, an ack records its fills"""
+        if client_order_id is None or client_order_id not in self.orders:
+            return
+        if order_retry.refused(response):
+            self.release(client_order_id)
+            return
+        if response.status_code != 200:
+            return  # outcome unknown: keep counting it until the stream says otherwise
+        try:
+            self._apply_report(client_order_id, response.json())
+        except (ValueError, AttributeError):
+            pass
+
+    def on_oco_ack(self, params, response):
+        """on_ack for both legs of an OCO: one report per leg in `orderReports`"""
+        if order_retry.refused(response):
+            for prefix in ("above", "below"):
+                self.release(params.get(f"{prefix}ClientOrderId"))
+        elif response.status_code == 200:
+            for report in response.json().get("orderReports", []):
+                self._apply_report(report.get("clientOrderId"), report)
+
+    def _apply_report(self, client_order_id, body):
+        # Spot reports carry cummulativeQuoteQty, futures cumQuote / avgPrice
+        status = body.get("status")
+        if status is None or client_order_id not in self.orders:
+            return
+        executed = float(body.get("executedQty") or 0)
+        quote = float(body.get("cummulativeQuoteQty") or body.get("cumQuote") or 0)
+        if not quote and executed:
+            quote = executed * float(body.get("avgPrice") or 0)
+        self.update(client_order_id, executed, quote, status)
+
+    def attach(self, tracker):
+        """Follow an order tracker: its updates from now on, and the acknowledged orders it already holds.
+        Orders still PENDING_NEW are left out: they are on their way here through check()."""
+        tracker.on_update(self.on_order_update)
+        for state in tracker.open_orders():
+            if state.order_id is not None or state.status != "PENDING_NEW":
+                self.on_order_update(state)
+        return self
+
+    def on_order_update(self, state, exec_type=None):
+        # OrderTracker update handler: every executionReport of the account, ours or not
+        meta = state.meta or {}
+        self.update(state.client_order_id, state.executed_qty, state.cum_quote, state.status, state.symbol,
+                    state.side, state.price, state.orig_qty,
+                    account_key(meta.get("account")) if "account" in meta else meta.get("backend") or DEFAULT_ACCOUNT)
+
+    # ----- reporting -----
+
+    def snapshot(self):
+        with self._lock:
+            accounts = {
+                name: {"exposure": _round(book.total), "open_orders": book.open_orders,
+                       "symbols": {s: {"position": _round(e.position), "open_buys": _round(e.buys),
+                                       "open_sells": _round(e.sells), "exposure": _round(e.worst_case())}
+                                   for s, e in book.symbols.items()}}
+                for name, book in self.accounts.items()
+            }
+        return {"killed": self.killed(), "checks": self.checks, "rejected": dict(self.rejected),
+                "limits": {"max_symbol_notional": self.max_symbol_notional,
+                           "max_account_notional": self.max_account_notional,
+                           "max_open_orders": self.max_open_orders, "price_band": self.price_band},
+                "accounts": accounts}
+
+
+def _round(value):
+    # + 0.0: float residue of a closed side shows as 0.0, not -0.0
+    return round(value, 2) + 0.0
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_risk_engine():
+    """Process-wide risk engine, fed by the process-wide order tracker"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RiskEngine().attach(get_order_tracker())
+    return _engine
+
+
+def _reset_after_fork():
+    # The child's tracker is new as well; its engine registers with it on first use
+    global _engine, _engine_lock
+    _engine = None
+    _engine_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Created with the module rather than on the first check: every order path imports this module
+# before it tracks its first order, so the engine follows the tracker from the start
+get_risk_engine()
+
+
+def _collect():
+    engine = _engine
+    if engine is None:
+        return []
+    with engine._lock:
+        books = [(name, book.total, book.open_orders) for name, book in engine.accounts.items()]
+    return [
+        ("bot_risk_exposure_notional", "gauge", "Worst-case exposure per account (quote notional)",
+         [({"account": name}, total) for name, total, _ in books]),
+        ("bot_risk_open_orders", "gauge", "Open orders per account in the risk index",
+         [({"account": name}, count) for name, _, count in books]),
+        ("bot_risk_rejections_total", "counter", "Orders refused by the pre-trade checks",
+         [({"check": kind}, n) for kind, n in engine.rejected.items()]),
+        ("bot_risk_killed", "gauge", "1 while the kill switch is on", [({}, 1 if engine.killed() else 0)]),
+    ]
+
+
+registry.add_collector(_collect)
+
+
+# CLI: the kill file stops every bot process sharing BOT_HOME at its next order
+def main(argv=None):
+    argv = list(sys.argv if argv is None else argv)
+    action = argv[1] if len(argv) > 1 else "status"
+    if action == "kill":
+        os.makedirs(os.path.dirname(KILL_FILE), exist_ok=True)
+        with open(KILL_FILE, "w") as f:
+            f.write(" ".join(argv[2:]) or f"kill switch set {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Kill switch on: new orders are refused until `resume` ({KILL_FILE})")
+    elif action == "resume":
+        if os.path.exists(KILL_FILE):
+            os.remove(KILL_FILE)
+        print("Kill switch off")
+    elif action == "status":
+        engine = RiskEngine()
+        print(f"Kill switch: {engine.killed() or 'off'}")
+        print(f"Limits: {engine.snapshot()['limits']}")
+    else:
+        print("Usage: python -m janvi_bot.risk_engine [status | kill [REASON] | resume]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
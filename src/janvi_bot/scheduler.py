@@ -0,0 +1,250 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from janvi_bot.bot_logging import log_info, log_error
+
+# Event-driven job scheduler. One timer thread keeps a heap of due times and
+# hands due callbacks to a worker pool, so hundreds of TWAP / refresh jobs
+# share a process instead of each blocking in time.sleep(). Slices are due
+# at anchor + n * interval (no drift accumulation) and every slice records
+# how late it actually started, to measure timing jitter under load. A
+# slice that raises is logged and skipped; the job fails only after
+# SCHEDULER_MAX_SLICE_ERRORS slices in a row have raised.
+
+DEFAULT_WORKERS = 32
+JITTER_SAMPLES = 100000
+MAX_SLICE_ERRORS = int(os.getenv("SCHEDULER_MAX_SLICE_ERRORS", "3"))
+
+PENDING, RUNNING, PAUSED, CANCELLED, DONE, FAILED = "PENDING", "RUNNING", "PAUSED", "CANCELLED", "DONE", "FAILED"
+FINISHED = (CANCELLED, DONE, FAILED)
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    pick = lambda p: round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+    return {"count": len(ordered), "p50_ms": pick(50), "p99_ms": pick(99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+class Scheduler:
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduler")
+        self._thread = None
+        self._stopped = False
+        self.jobs = {}
+        self.lateness = deque(maxlen=JITTER_SAMPLES)
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scheduler-timer", daemon=True)
+                self._thread.start()
+        return self
+
+    def call_at(self, when, fn, *args):
+        """Run fn(*args) on the worker pool at time.monotonic() == when"""
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._seq), fn, args))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                # Drain everything already due in one pass
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap))
+            try:
+                for _, _, fn, args in due:
+                    self._pool.submit(fn, *args)
+            except RuntimeError:
+                return  # pool shut down (stop() or interpreter exit)
+
+    def submit(self, job):
+        self.start()
+        self.jobs[job.id] = job
+        job.start(self)
+        return job
+
+    def jitter(self):
+        """Slice start lateness across all jobs (ms)"""
+        return _percentiles(list(self.lateness))
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._pool.shutdown(wait=False)
+
+
+class Job(ABC):
+    """A run of `count` slices (None = until cancelled), one every `interval` seconds"""
+
+    _ids = itertools.count(1)
+    max_errors = MAX_SLICE_ERRORS
+
+    def __init__(self, interval, count=None, name=None, start_delay=0.0):
+        self.id = next(Job._ids)
+        self.name = name or f"{type(self).__name__}-{self.id}"
+        self.interval = float(interval)
+        self.count = count
+        self.start_delay = start_delay
+        self.status = PENDING
+        self.fired = 0
+        self.lateness = []
+        self.error = None
+        self.errors = 0
+        self.errors_in_a_row = 0
+        self.scheduler = None
+        self._anchor = None
+        self._generation = 0
+        self._in_flight = False  # a slice is running: it arms the next one itself
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @abstractmethod
+    def run_slice(self, index):
+        """Do slice `index` (0-based); call finish() to end the run early"""
+
+    def start(self, scheduler):
+        self.scheduler = scheduler
+        with self._lock:
+            self.status = RUNNING
+            # A job restored with slices already fired continues with the next one
+            self._anchor = time.monotonic() + self.start_delay - self.fired * self.interval
+            self._schedule_next()
+
+    def _schedule_next(self):
+        due = self._anchor + self.fired * self.interval
+        self.scheduler.call_at(due, self._fire, self._generation, due)
+
+    def _fire(self, generation, due):
+        with self._lock:
+            if generation != self._generation or self.status != RUNNING or self._in_flight:
+                return  # stale timer from before a pause/cancel
+            if self.count is not None and self.fired >= self.count:
+                return
+            self._in_flight = True
+        late = max(0.0, time.monotonic() - due)
+        self.lateness.append(late)
+        self.scheduler.lateness.append(late)
+        try:
+            self.run_slice(self.fired)
+            self.errors_in_a_row = 0
+        except Exception as e:
+            # One timeout or failed price fetch skips this slice; only a run of them ends the job
+            self.error = e
+            self.errors += 1
+            self.errors_in_a_row += 1
+            log_error(f"{self.name} slice {self.fired + 1} failed ({self.errors_in_a_row}/{self.max_errors} in a row): {e}")
+            if self.errors_in_a_row >= self.max_errors:
+                with self._lock:
+                    self._in_flight = False
+                self._finish(FAILED, e)
+                return
+
+        with self._lock:
+            self.fired += 1
+            self._in_flight = False
+            # Still running (possibly paused and resumed meanwhile: resume left the re-arming to this slice)
+            if self.status != RUNNING:
+                return
+            if self.count is not None and self.fired >= self.count:
+                finished = True
+            else:
+                finished = False
+                self._schedule_next()
+        if finished:
+            self._finish(DONE)
+
+    def _finish(self, status, error=None):
+        # Only the first of cancel / finish / the last slice / a failure ends the job and calls on_finish
+        with self._lock:
+            if self.status in FINISHED:
+                return
+            self.status = status
+            if error is not None:
+                self.error = error
+            self._generation += 1
+        if self.scheduler is not None:
+            self.scheduler.jobs.pop(self.id, None)
+        self.on_finish()
+        self._done.set()
+
+    def on_finish(self):
+        pass
+
+    def pause(self):
+        with self._lock:
+            if self.status == RUNNING:
+                self.status = PAUSED
+                self._generation += 1
+
+    def resume(self):
+        """Continue from the next slice now, keeping the original interval"""
+        with self._lock:
+            if self.status != PAUSED:
+                return
+            self.status = RUNNING
+            if self._in_flight:
+                # The slice that was running at the pause arms the next one when it ends
+                self._anchor = time.monotonic() - (self.fired + 1) * self.interval
+            elif self.count is None or self.fired < self.count:
+                self._anchor = time.monotonic() - self.fired * self.interval
+                self._schedule_next()
+
+    def cancel(self):
+        self._finish(CANCELLED)
+
+    def finish(self):
+        """End the run early as DONE, e.g. from run_slice once a job has nothing left to do"""
+        self._finish(DONE)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def stats(self):
+        return {"id": self.id, "name": self.name, "status": self.status, "fired": self.fired,
+                "count": self.count, "errors": self.errors, "jitter": _percentiles(self.lateness)}
+
+
+class PeriodicJob(Job):
+    """Call fn(*args) every `interval` seconds, e.g. a grid refresh"""
+
+    def __init__(self, fn, interval, *args, count=None, name=None, start_delay=0.0):
+        super().__init__(interval, count, name, start_delay)
+        self.fn = fn
+        self.args = args
+
+    def run_slice(self, index):
+        self.fn(*self.args)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler shared by all strategy jobs"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler().start()
+                log_info("Scheduler started", workers=DEFAULT_WORKERS)
+    return _scheduler
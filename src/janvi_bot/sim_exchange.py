@@ -0,0 +1,953 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import threading
+import secrets
+from bisect import bisect_left, insort
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import websockets
+
+# Local Binance stand-in: an in-process price-time-priority matching engine
+# plus an HTTP front end speaking the subset of the spot REST API the bot
+# uses (/api/v3/order, /api/v3/orderList/oco, /api/v3/ticker/price, ...)
+# plus futures order entry (/fapi/v1/order, /fapi/v1/batchOrders), with
+# configurable latency, error injection and rate limits.
+#
+#   python -m janvi_bot.sim_exchange --port 8900 --latency 0.005
+#   BINANCE_BASE_URL=http://127.0.0.1:8900 python -m janvi_bot.limit_order BTCUSDT BUY 0.01 49000
+#
+# A synthetic market maker quotes a ladder around each symbol's mid; moving
+# the mid (set_price / POST /sim/price) re-quotes through the book, so
+# resting bot orders fill the way they would on the exchange.
+
+ZERO = Decimal(0)
+# Spot types plus the USDT-M futures conditional market orders
+ORDER_TYPES = ("LIMIT", "MARKET", "LIMIT_MAKER", "STOP_LOSS_LIMIT", "STOP_MARKET", "TAKE_PROFIT_MARKET")
+STOP_TYPES = ("STOP_LOSS_LIMIT", "STOP_MARKET", "TAKE_PROFIT_MARKET")
+MARKET_TYPES = ("MARKET", "STOP_MARKET", "TAKE_PROFIT_MARKET")
+
+DEFAULT_SYMBOLS = {
+    # symbol: (mid, tickSize, stepSize, minQty, minNotional)
+    "BTCUSDT": ("50000.00", "0.01", "0.00001", "0.00001", "5.00"),
+    "ETHUSDT": ("3000.00", "0.01", "0.0001", "0.0001", "5.00"),
+    "BNBUSDT": ("500.00", "0.01", "0.001", "0.001", "5.00"),
+}
+MM_LEVELS = 20
+MM_LEVEL_NOTIONAL = Decimal("50000")
+MM_SPACING_BPS = Decimal("2")
+
+
+class SimError(Exception):
+    def __init__(self, code, msg, status=400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+class Order:
+    __slots__ = ("order_id", "client_order_id", "symbol", "side", "type", "time_in_force", "price", "stop_price",
+                 "orig_qty", "executed_qty", "cum_quote", "status", "time", "update_time", "order_list_id",
+                 "owner", "reduce_only")
+
+    def __init__(self, order_id, client_order_id, symbol, side, type_, price, qty, stop_price=None,
+                 time_in_force="GTC", owner="user", order_list_id=-1):
+        now = int(time.time() * 1000)
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = type_
+        self.time_in_force = time_in_force
+        self.price = price
+        self.stop_price = stop_price
+        self.orig_qty = qty
+        self.executed_qty = ZERO
+        self.cum_quote = ZERO
+        self.status = "NEW"
+        self.time = now
+        self.update_time = now
+        self.order_list_id = order_list_id
+        self.owner = owner
+        self.reduce_only = False
+
+    @property
+    def remaining(self):
+        return self.orig_qty - self.executed_qty
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "orderId": self.order_id,
+            "orderListId": self.order_list_id,
+            "clientOrderId": self.client_order_id,
+            "price": str(self.price or ZERO),
+            "origQty": str(self.orig_qty),
+            "executedQty": str(self.executed_qty),
+            "cummulativeQuoteQty": str(self.cum_quote),
+            "status": self.status,
+            "timeInForce": self.time_in_force,
+            "type": self.type,
+            "side": self.side,
+            "stopPrice": str(self.stop_price or ZERO),
+            "time": self.time,
+            "updateTime": self.update_time,
+            "isWorking": self.status in ("NEW", "PARTIALLY_FILLED") and self.type not in STOP_TYPES,
+        }
+
+
+class BookSide:
+    """Price levels kept in a sorted list (bisect) with a FIFO deque per level"""
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        self.prices = []
+        self.levels = {}
+        # Levels whose size changed since the last depth update went out
+        self.changed = set()
+
+    def best(self):
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.is_bid else self.prices[0]
+
+    def add(self, order):
+        level = self.levels.get(order.price)
+        if level is None:
+            insort(self.prices, order.price)
+            level = self.levels[order.price] = deque()
+        level.append(order)
+        self.changed.add(order.price)
+
+    def remove(self, order):
+        level = self.levels.get(order.price)
+        if level is None:
+            return
+        try:
+            level.remove(order)
+        except ValueError:
+            return
+        self.changed.add(order.price)
+        if not level:
+            self._drop_level(order.price)
+
+    def _drop_level(self, price):
+        del self.levels[price]
+        i = bisect_left(self.prices, price)
+        if i < len(self.prices) and self.prices[i] == price:
+            self.prices.pop(i)
+
+    def level_qty(self, price):
+        level = self.levels.get(price)
+        return sum(o.remaining for o in level) if level else ZERO
+
+    def depth(self, limit):
+        prices = reversed(self.prices) if self.is_bid else iter(self.prices)
+        out = []
+        for p in prices:
+            out.append([str(p), str(self.level_qty(p))])
+            if len(out) >= limit:
+                break
+        return out
+
+    def take_changes(self):
+        changes = [[str(p), str(self.level_qty(p))] for p in sorted(self.changed)]
+        self.changed.clear()
+        return changes
+
+
+class SymbolBook:
+    def __init__(self, symbol, mid, tick, step, min_qty, min_notional):
+        self.symbol = symbol
+        self.tick = Decimal(tick)
+        self.step = Decimal(step)
+        self.min_qty = Decimal(min_qty)
+        self.min_notional = Decimal(min_notional)
+        self.mid = Decimal(mid)
+        self.last = None
+        self.bids = BookSide(True)
+        self.asks = BookSide(False)
+        self.stops = []
+        self.mm_orders = []
+        # Diff-depth sequence: lastUpdateId of the book, advanced by every depth update
+        self.update_id = 0
+
+    def side(self, side):
+        return self.bids if side == "BUY" else self.asks
+
+    def opposite(self, side):
+        return self.asks if side == "BUY" else self.bids
+
+    def last_price(self):
+        if self.last is not None:
+            return self.last
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is not None and ask is not None:
+            return ((bid + ask) / 2).quantize(self.tick, ROUND_HALF_UP)
+        return self.mid
+
+    def exchange_info(self):
+        return {
+            "symbol": self.symbol,
+            "status": "TRADING",
+            "baseAsset": self.symbol[:-4],
+            "quoteAsset": self.symbol[-4:],
+            "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET", "STOP_LOSS_LIMIT"],
+            "ocoAllowed": True,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": str(self.tick), "maxPrice": "1000000.00", "tickSize": str(self.tick)},
+                {"filterType": "LOT_SIZE", "minQty": str(self.min_qty), "maxQty": "9000.00000000", "stepSize": str(self.step)},
+                {"filterType": "NOTIONAL", "minNotional": str(self.min_notional), "applyMinToMarket": True,
+                 "maxNotional": "9000000.00", "applyMaxToMarket": False, "avgPriceMins": 5},
+            ],
+        }
+
+
+class MatchingEngine:
+    """Thread-safe in-process exchange. All public methods take the engine lock"""
+
+    def __init__(self, symbols=None, seed_liquidity=True):
+        self.lock = threading.RLock()
+        self.books = {}
+        self.orders = {}
+        self.open_by_client_id = {}
+        self.order_lists = {}
+        self.ids = itertools.count(1)
+        self.trade_ids = itertools.count(1)
+        self.list_ids = itertools.count(1)
+        # Callbacks receiving executionReport-shaped dicts for user orders
+        self.listeners = []
+        # Callbacks receiving market-data dicts: depthUpdate (diff-depth stream) and trade
+        self.market_listeners = []
+        self.trades = 0
+        for symbol, spec in (symbols or DEFAULT_SYMBOLS).items():
+            self.add_symbol(symbol, *spec, seed_liquidity=seed_liquidity)
+
+    # ----- setup / market driver -----
+
+    def add_symbol(self, symbol, mid, tick, step, min_qty, min_notional, seed_liquidity=True):
+        with self.lock:
+            self.books[symbol] = SymbolBook(symbol, mid, tick, step, min_qty, min_notional)
+            if seed_liquidity:
+                self._requote(self.books[symbol])
+                self._publish_depth(self.books[symbol])
+
+    def ensure_symbol(self, symbol, price=None):
+        """Add a symbol on first use (BTCUSDT-like filters), or re-centre it on a known live price"""
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None:
+                self.add_symbol(symbol, str(price or 100), "0.01", "0.00001", "0.00001", "5.00")
+            elif price and Decimal(str(price)).quantize(book.tick, ROUND_HALF_UP) != book.mid:
+                self.set_price(symbol, price)
+
+    def _requote(self, book):
+        for order in book.mm_orders:
+            if order.status in ("NEW", "PARTIALLY_FILLED"):
+                book.side(order.side).remove(order)
+                order.status = "CANCELED"
+                self.orders.pop(order.order_id, None)
+        book.mm_orders = []
+        spacing = (book.mid * MM_SPACING_BPS / Decimal(10000)).quantize(book.tick) or book.tick
+        qty = max(book.min_qty, (MM_LEVEL_NOTIONAL / book.mid).quantize(book.step))
+        for i in range(1, MM_LEVELS + 1):
+            for side, price in (("BUY", book.mid - spacing * i), ("SELL", book.mid + spacing * i)):
+                if price <= 0:
+                    continue
+                order = Order(next(self.ids), f"mm-{next(self.ids)}", book.symbol, side, "LIMIT", price, qty, owner="mm")
+                self.orders[order.order_id] = order
+                book.mm_orders.append(order)
+                self._match(book, order)
+                if order.remaining > 0 and order.status not in ("FILLED", "CANCELED"):
+                    book.side(side).add(order)
+
+    def set_price(self, symbol, price):
+        """Move the market: the maker ladder re-quotes around `price`, trading through resting orders"""
+        with self.lock:
+            book = self._book(symbol)
+            book.mid = Decimal(str(price)).quantize(book.tick, ROUND_HALF_UP)
+            book.last = None
+            self._requote(book)
+            self._trigger_stops(book)
+            self._publish_depth(book)
+            return str(book.last_price())
+
+    def random_walk(self, symbol, vol_bps):
+        with self.lock:
+            book = self._book(symbol)
+            move = Decimal(str(random.gauss(0, vol_bps))) / Decimal(10000)
+            return self.set_price(symbol, book.mid * (1 + move))
+
+    def taker_flow(self, symbol, notional):
+        """Another participant's market order of about `notional` quote, random side (market volume for POV)"""
+        with self.lock:
+            book = self._book(symbol)
+            qty = max(book.min_qty, (Decimal(str(notional * random.uniform(0.5, 1.5))) / book.mid).quantize(book.step))
+            result = self.new_order(symbol, random.choice(("BUY", "SELL")), "MARKET", qty, owner="flow")
+            # Makers replenish what the flow took, around an unchanged mid
+            self.set_price(symbol, book.mid)
+            return result
+
+    # ----- queries -----
+
+    def _book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            raise SimError(-1121, "Invalid symbol.")
+        return book
+
+    def ticker(self, symbol):
+        with self.lock:
+            return {"symbol": symbol, "price": str(self._book(symbol).last_price())}
+
+    def book_ticker(self, symbol):
+        with self.lock:
+            book = self._book(symbol)
+            bid, ask = book.bids.best(), book.asks.best()
+            return {
+                "symbol": symbol,
+                "bidPrice": str(bid or ZERO),
+                "bidQty": str(sum(o.remaining for o in book.bids.levels[bid]) if bid else ZERO),
+                "askPrice": str(ask or ZERO),
+                "askQty": str(sum(o.remaining for o in book.asks.levels[ask]) if ask else ZERO),
+            }
+
+    def depth(self, symbol, limit=100):
+        with self.lock:
+            book = self._book(symbol)
+            return {"lastUpdateId": book.update_id, "bids": book.bids.depth(limit), "asks": book.asks.depth(limit)}
+
+    def exchange_info(self):
+        with self.lock:
+            return {"timezone": "UTC", "serverTime": int(time.time() * 1000),
+                    "symbols": [b.exchange_info() for b in self.books.values()]}
+
+    def get_order(self, symbol, order_id=None, client_order_id=None):
+        with self.lock:
+            order = self._find(symbol, order_id, client_order_id)
+            if order is None:
+                raise SimError(-2013, "Order does not exist.")
+            return order.to_dict()
+
+    def _find(self, symbol, order_id=None, client_order_id=None):
+        order = None
+        if order_id is not None:
+            order = self.orders.get(int(order_id))
+        elif client_order_id is not None:
+            oid = self.open_by_client_id.get(client_order_id)
+            order = self.orders.get(oid) if oid else None
+            if order is None:
+                order = next((o for o in self.orders.values() if o.client_order_id == client_order_id), None)
+        if order is not None and order.symbol != symbol:
+            return None
+        return order
+
+    def open_orders(self, symbol=None):
+        with self.lock:
+            return [o.to_dict() for o in self.orders.values()
+                    if o.owner == "user" and o.status in ("NEW", "PARTIALLY_FILLED")
+                    and (symbol is None or o.symbol == symbol)]
+
+    # ----- order entry -----
+
+    def _validate(self, book, side, type_, qty, price, stop=None):
+        if side not in ("BUY", "SELL"):
+            raise SimError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if qty is None or qty <= 0:
+            raise SimError(-1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+        if qty < book.min_qty or qty % book.step != 0:
+            raise SimError(-1013, "Filter failure: LOT_SIZE")
+        if type_ in STOP_TYPES and (stop is None or stop <= 0):
+            raise SimError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+        if type_ not in MARKET_TYPES:
+            if price is None or price <= 0:
+                raise SimError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+            if price % book.tick != 0:
+                raise SimError(-1013, "Filter failure: PRICE_FILTER")
+        ref = price if type_ not in MARKET_TYPES else (stop or book.last_price())
+        if qty * ref < book.min_notional:
+            raise SimError(-1013, "Filter failure: NOTIONAL")
+
+    def _client_id(self, client_order_id):
+        if client_order_id:
+            if client_order_id in self.open_by_client_id:
+                raise SimError(-2010, "Duplicate order sent.")
+            return client_order_id
+        return f"sim{next(self.ids)}"
+
+    def new_order(self, symbol, side, type_, quantity, price=None, stop_price=None, time_in_force="GTC",
+                  client_order_id=None, order_list_id=-1, owner="user"):
+        with self.lock:
+            book = self._book(symbol)
+            qty = Decimal(str(quantity)) if quantity is not None else None
+            px = Decimal(str(price)) if price is not None else None
+            stop = Decimal(str(stop_price)) if stop_price is not None else None
+            if type_ not in ORDER_TYPES:
+                raise SimError(-1116, "Invalid orderType.")
+            self._validate(book, side, type_, qty, px, stop)
+
+            order = Order(next(self.ids), self._client_id(client_order_id), symbol, side, type_, px, qty,
+                          stop_price=stop, time_in_force=time_in_force if type_ not in MARKET_TYPES else None,
+                          owner=owner, order_list_id=order_list_id)
+
+            if type_ == "LIMIT_MAKER":
+                best = book.opposite(side).best()
+                if best is not None and (px >= best if side == "BUY" else px <= best):
+                    raise SimError(-2010, "Order would immediately match and take.")
+
+            self.orders[order.order_id] = order
+            if order.client_order_id:
+                self.open_by_client_id[order.client_order_id] = order.order_id
+            self._emit(order, "NEW")
+
+            fills = []
+            if type_ in STOP_TYPES:
+                book.stops.append(order)
+            else:
+                fills = self._match(book, order)
+                self._rest_or_expire(book, order)
+                self._trigger_stops(book)
+                self._publish_depth(book)
+            result = order.to_dict()
+            result["transactTime"] = order.update_time
+            result["fills"] = fills
+            return result
+
+    def _rest_or_expire(self, book, order):
+        if order.remaining <= 0 or order.status == "CANCELED":
+            return
+        if order.type in MARKET_TYPES or order.time_in_force in ("IOC", "FOK"):
+            order.status = "EXPIRED"
+            self._close(order)
+            self._emit(order, "EXPIRED")
+        else:
+            book.side(order.side).add(order)
+
+    def _match(self, book, taker):
+        fills = []
+        opposite = book.opposite(taker.side)
+        while taker.remaining > 0:
+            best = opposite.best()
+            if best is None:
+                break
+            if taker.price is not None and (best > taker.price if taker.side == "BUY" else best < taker.price):
+                break
+            level = opposite.levels[best]
+            maker = level[0]
+            qty = min(taker.remaining, maker.remaining)
+            trade_id = next(self.trade_ids)
+            for order in (maker, taker):
+                order.executed_qty += qty
+                order.cum_quote += qty * best
+                order.status = "FILLED" if order.remaining <= 0 else "PARTIALLY_FILLED"
+                order.update_time = int(time.time() * 1000)
+            fills.append({"price": str(best), "qty": str(qty), "commission": "0", "commissionAsset": "USDT",
+                          "tradeId": trade_id})
+            book.last = best
+            self.trades += 1
+            opposite.changed.add(best)
+            self._publish_trade(book, trade_id, best, qty, taker.side)
+            if maker.remaining <= 0:
+                level.popleft()
+                if not level:
+                    opposite._drop_level(best)
+                self._close(maker)
+            self._emit(maker, "TRADE", best, qty, trade_id)
+            self._emit(taker, "TRADE", best, qty, trade_id)
+            self._on_leg_executed(maker)
+        if taker.remaining <= 0:
+            self._close(taker)
+        if fills:
+            self._on_leg_executed(taker)
+        return fills
+
+    def _trigger_stops(self, book):
+        while True:
+            last = book.last_price()
+            # Stops trigger on a move against the order's side, take-profits on a move with it
+            triggered = [o for o in book.stops
+                         if (last >= o.stop_price if (o.side == "BUY") != (o.type == "TAKE_PROFIT_MARKET")
+                             else last <= o.stop_price)]
+            if not triggered:
+                return
+            for order in triggered:
+                book.stops.remove(order)
+                if order.status != "NEW":
+                    continue
+                self._on_leg_executed(order)
+                self._match(book, order)
+                self._rest_or_expire(book, order)
+
+    def _on_leg_executed(self, order):
+        # OCO: once either leg fills or triggers, the other leg is cancelled
+        if order.order_list_id == -1:
+            return
+        for sibling_id in self.order_lists.get(order.order_list_id, ()):
+            sibling = self.orders.get(sibling_id)
+            if sibling is not None and sibling is not order and sibling.status == "NEW" and sibling.executed_qty == 0:
+                self._cancel(sibling)
+
+    def _close(self, order):
+        if self.open_by_client_id.get(order.client_order_id) == order.order_id:
+            del self.open_by_client_id[order.client_order_id]
+
+    def _cancel(self, order):
+        book = self.books[order.symbol]
+        if order in book.stops:
+            book.stops.remove(order)
+        else:
+            book.side(order.side).remove(order)
+        order.status = "CANCELED"
+        order.update_time = int(time.time() * 1000)
+        self._close(order)
+        self._emit(order, "CANCELED")
+
+    def cancel_order(self, symbol, order_id=None, client_order_id=None):
+        with self.lock:
+            order = self._find(symbol, order_id, client_order_id)
+            if order is None or order.status not in ("NEW", "PARTIALLY_FILLED"):
+                raise SimError(-2011, "Unknown order sent.")
+            self._cancel(order)
+            self._publish_depth(self.books[symbol])
+            return order.to_dict()
+
+    def new_oco(self, symbol, side, quantity, above, below, list_client_order_id=None):
+        """above/below: dicts with type, price, stopPrice, timeInForce, clientOrderId"""
+        with self.lock:
+            book = self._book(symbol)
+            last = book.last_price()
+            for leg in (above, below):
+                if leg["type"] not in ("LIMIT_MAKER", "STOP_LOSS_LIMIT"):
+                    raise SimError(-1116, "Invalid orderType.")
+            if Decimal(above["price"]) <= last or Decimal(below["price"]) >= last:
+                raise SimError(-2010, "The relationship of the prices for the orders is not correct.")
+
+            list_id = next(self.list_ids)
+            self.order_lists[list_id] = []
+            reports = []
+            for leg in (below, above):
+                report = self.new_order(symbol, side, leg["type"], quantity, leg["price"], leg.get("stopPrice"),
+                                        leg.get("timeInForce", "GTC"), leg.get("clientOrderId"), order_list_id=list_id)
+                self.order_lists[list_id].append(report["orderId"])
+                reports.append(report)
+            return {
+                "orderListId": list_id,
+                "contingencyType": "OCO",
+                "listStatusType": "EXEC_STARTED",
+                "listOrderStatus": "EXECUTING",
+                "listClientOrderId": list_client_order_id or f"simlist{list_id}",
+                "transactionTime": int(time.time() * 1000),
+                "symbol": symbol,
+                "orders": [{"symbol": symbol, "orderId": r["orderId"], "clientOrderId": r["clientOrderId"]} for r in reports],
+                "orderReports": reports,
+            }
+
+    def _publish_depth(self, book):
+        # One depthUpdate per engine call: U..u spans one update id per changed level, as on Binance
+        if not book.bids.changed and not book.asks.changed:
+            return
+        first = book.update_id + 1
+        book.update_id += len(book.bids.changed) + len(book.asks.changed)
+        if not self.market_listeners:
+            book.bids.changed.clear()
+            book.asks.changed.clear()
+            return
+        event = {"e": "depthUpdate", "E": int(time.time() * 1000), "s": book.symbol, "U": first, "u": book.update_id,
+                 "b": book.bids.take_changes(), "a": book.asks.take_changes()}
+        for listener in list(self.market_listeners):
+            listener(event)
+
+    def _publish_trade(self, book, trade_id, price, qty, taker_side):
+        if not self.market_listeners:
+            return
+        now = int(time.time() * 1000)
+        event = {"e": "trade", "E": now, "s": book.symbol, "t": trade_id, "p": str(price), "q": str(qty), "T": now,
+                 "m": taker_side == "SELL"}
+        for listener in list(self.market_listeners):
+            listener(event)
+
+    def _emit(self, order, exec_type, last_price=None, last_qty=None, trade_id=-1):
+        if order.owner != "user" or not self.listeners:
+            return
+        event = {
+            "e": "executionReport", "E": int(time.time() * 1000), "s": order.symbol, "c": order.client_order_id,
+            "S": order.side, "o": order.type, "f": order.time_in_force, "q": str(order.orig_qty),
+            "p": str(order.price or ZERO), "P": str(order.stop_price or ZERO), "g": order.order_list_id,
+            "x": exec_type, "X": order.status, "r": "NONE", "i": order.order_id,
+            "l": str(last_qty or ZERO), "z": str(order.executed_qty), "L": str(last_price or ZERO),
+            "n": "0", "N": None, "T": order.update_time, "t": trade_id, "Z": str(order.cum_quote),
+        }
+        for listener in list(self.listeners):
+            listener(event)
+
+
+# ----------------- HTTP front end -----------------
+
+class SimHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer headers+body into one segment; avoids Nagle/delayed-ACK stalls
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if method in ("POST", "PUT", "DELETE") and self.headers.get("Content-Length"):
+            body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+            params.update({k: v[0] for k, v in parse_qs(body).items()})
+
+        if server.latency:
+            time.sleep(max(0.0, random.gauss(server.latency, server.latency * server.latency_jitter)))
+
+        headers, limited = server.limits.charge(method, url.path)
+        if limited:
+            return self._reply(429, {"code": -1003, "msg": "Too many requests; current limit is exceeded."},
+                               {**headers, "Retry-After": limited})
+        # The sim's clock runs clock_skew seconds off the host's; signed requests are checked against it
+        now_ms = int((time.time() + server.clock_skew) * 1000)
+        if url.path in ("/api/v3/time", "/fapi/v1/time"):
+            return self._reply(200, {"serverTime": now_ms}, headers)
+        if "timestamp" in params:
+            timestamp = int(params["timestamp"])
+            if timestamp >= now_ms + 1000 or now_ms - timestamp > int(params.get("recvWindow", 5000)):
+                return self._reply(400, {"code": -1021, "msg": "Timestamp for this request is outside of the recvWindow."},
+                                   headers)
+        if server.reject_rate and url.path.startswith(("/api/v3/order", "/fapi/v1/")) and random.random() < server.reject_rate:
+            return self._reply(503, {"code": -1008, "msg": "Server is currently overloaded with other requests. Please try again in a few minutes."}, headers)
+
+        try:
+            status, body = route(server.engine, method, url.path, params)
+        except SimError as e:
+            status, body = e.status, {"code": e.code, "msg": e.msg}
+        except Exception as e:
+            status, body = 400, {"code": -1100, "msg": f"Illegal characters found in a parameter: {e}"}
+        # The order went through but the answer is lost: the client can't tell whether it exists
+        if (server.unknown_rate and method == "POST" and url.path.startswith(("/api/v3/order", "/fapi/v1/order", "/fapi/v1/batchOrders"))
+                and random.random() < server.unknown_rate):
+            status, body = 503, {"code": -1007, "msg": "Timeout waiting for response from backend server. Send status unknown; execution status unknown."}
+        self._reply(status, body, headers)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def batch_orders(engine, p):
+    # Futures batch entry: each order succeeds or fails on its own, results in request order
+    orders = json.loads(p["batchOrders"])
+    if not 1 <= len(orders) <= 5:
+        raise SimError(-1130, "Data sent for parameter 'batchOrders' is not valid.")
+    results = []
+    for o in orders:
+        try:
+            results.append(engine.new_order(o["symbol"], o.get("side"), o.get("type"), o.get("quantity"), o.get("price"),
+                                            o.get("stopPrice"), o.get("timeInForce", "GTC"), o.get("newClientOrderId")))
+        except SimError as e:
+            results.append({"code": e.code, "msg": e.msg})
+    return results
+
+
+def route(engine, method, path, p):
+    # USDT-M futures endpoints share the spot matching engine
+    if path == "/fapi/v1/listenKey":
+        path = "/api/v3/userDataStream"
+    elif path.startswith("/fapi/v1/") and path != "/fapi/v1/batchOrders":
+        path = "/api/v3/" + path[len("/fapi/v1/"):]
+    if method == "GET":
+        if path in ("/api/v3/ping",):
+            return 200, {}
+        if path == "/api/v3/time":
+            return 200, {"serverTime": int(time.time() * 1000)}
+        if path == "/api/v3/exchangeInfo":
+            return 200, engine.exchange_info()
+        if path == "/api/v3/ticker/price":
+            if "symbol" in p:
+                return 200, engine.ticker(p["symbol"])
+            return 200, [engine.ticker(s) for s in engine.books]
+        if path == "/api/v3/ticker/bookTicker":
+            return 200, engine.book_ticker(p["symbol"])
+        if path == "/api/v3/depth":
+            return 200, engine.depth(p["symbol"], int(p.get("limit", 100)))
+        if path == "/api/v3/order":
+            return 200, engine.get_order(p["symbol"], p.get("orderId"), p.get("origClientOrderId"))
+        if path == "/api/v3/openOrders":
+            return 200, engine.open_orders(p.get("symbol"))
+        if path == "/api/v3/account":
+            return 200, {"canTrade": True, "accountType": "SPOT", "balances": [
+                {"asset": "USDT", "free": "1000000.00000000", "locked": "0.00000000"},
+                {"asset": "BTC", "free": "100.00000000", "locked": "0.00000000"},
+                {"asset": "ETH", "free": "1000.00000000", "locked": "0.00000000"},
+            ]}
+    elif method == "POST":
+        if path == "/api/v3/order":
+            return 200, engine.new_order(p["symbol"], p.get("side"), p.get("type"), p.get("quantity"), p.get("price"),
+                                         p.get("stopPrice"), p.get("timeInForce", "GTC"), p.get("newClientOrderId"))
+        if path == "/api/v3/orderList/oco":
+            leg = lambda prefix: {
+                "type": p.get(f"{prefix}Type"), "price": p.get(f"{prefix}Price"),
+                "stopPrice": p.get(f"{prefix}StopPrice"), "timeInForce": p.get(f"{prefix}TimeInForce", "GTC"),
+                "clientOrderId": p.get(f"{prefix}ClientOrderId"),
+            }
+            return 200, engine.new_oco(p["symbol"], p.get("side"), p.get("quantity"), leg("above"), leg("below"),
+                                       p.get("listClientOrderId"))
+        if path == "/fapi/v1/batchOrders":
+            return 200, batch_orders(engine, p)
+        if path == "/api/v3/userDataStream":
+            return 200, {"listenKey": secrets.token_hex(32)}
+        if path == "/sim/price":
+            return 200, {"symbol": p["symbol"], "price": engine.set_price(p["symbol"], p["price"])}
+    elif method == "PUT":
+        if path == "/api/v3/userDataStream":
+            return 200, {}
+    elif method == "DELETE":
+        if path == "/api/v3/order":
+            return 200, engine.cancel_order(p["symbol"], p.get("orderId"), p.get("origClientOrderId"))
+        if path == "/api/v3/userDataStream":
+            return 200, {}
+    return 404, {"code": -1, "msg": f"Unknown path {path}"}
+
+
+class RateLimits:
+    """Fixed-window weight/order counters reported in X-MBX-* headers; 429 past the limit"""
+
+    WEIGHTS = {"/api/v3/exchangeInfo": 20, "/api/v3/account": 20, "/api/v3/ticker/price": 2,
+               "/api/v3/openOrders": 6, "/api/v3/order": 1, "/api/v3/depth": 25, "/fapi/v1/batchOrders": 5}
+    # Orders counted per request
+    ORDERS = {"/api/v3/order": 1, "/fapi/v1/order": 1, "/api/v3/orderList/oco": 2, "/fapi/v1/batchOrders": 5}
+
+    def __init__(self, weight_1m=6000, orders_10s=100):
+        self.weight_limit = weight_1m
+        self.order_limit = orders_10s
+        self.lock = threading.Lock()
+        self.weight_window = self.order_window = 0
+        self.weight_used = self.orders_used = 0
+
+    def charge(self, method, path):
+        now = time.time()
+        with self.lock:
+            if int(now // 60) != self.weight_window:
+                self.weight_window, self.weight_used = int(now // 60), 0
+            if int(now // 10) != self.order_window:
+                self.order_window, self.orders_used = int(now // 10), 0
+            self.weight_used += self.WEIGHTS.get(path, 1)
+            is_order = method == "POST" and path in self.ORDERS
+            if is_order:
+                self.orders_used += self.ORDERS[path]
+            headers = {"X-MBX-USED-WEIGHT-1M": self.weight_used}
+            if is_order:
+                headers["X-MBX-ORDER-COUNT-10S"] = self.orders_used
+            if self.weight_limit and self.weight_used > self.weight_limit:
+                return headers, 60 - int(now % 60)
+            if is_order and self.order_limit and self.orders_used > self.order_limit:
+                return headers, 10 - int(now % 10)
+            return headers, 0
+
+
+class UserStreamServer:
+    """Websocket side of the simulator.
+
+    /ws/<listenKey> connections get the engine's executionReports; market
+    connections (/stream?streams=btcusdt@depth@100ms/btcusdt@trade or
+    /ws/btcusdt@trade, SUBSCRIBE/UNSUBSCRIBE on the fly) get diff-depth
+    updates and trades. depth_drop_rate drops that share of depth updates,
+    to exercise gap detection.
+    """
+
+    def __init__(self, engine, depth_drop_rate=0.0):
+        self.engine = engine
+        self.clients = set()
+        # ws -> (subscribed stream names, combined-stream framing)
+        self.market = {}
+        self.depth_drop_rate = depth_drop_rate
+        self.loop = None
+        self.server = None
+        engine.listeners.append(self._publish)
+        engine.market_listeners.append(self._publish_market)
+
+    def _publish(self, event):
+        # Called under the engine lock; only hands the event to the loop thread
+        if self.clients and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._broadcast, json.dumps(event))
+
+    def _publish_market(self, event):
+        if self.market and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._broadcast_market, event)
+
+    def _broadcast(self, raw):
+        for ws in list(self.clients):
+            asyncio.ensure_future(ws.send(raw))
+
+    def _broadcast_market(self, event):
+        if event["e"] == "depthUpdate" and self.depth_drop_rate and random.random() < self.depth_drop_rate:
+            return
+        prefix = f"{event['s'].lower()}@{'depth' if event['e'] == 'depthUpdate' else event['e']}"
+        for ws, (streams, combined) in list(self.market.items()):
+            stream = next((s for s in streams if s.startswith(prefix)), None)
+            if stream is not None:
+                asyncio.ensure_future(ws.send(json.dumps({"stream": stream, "data": event} if combined else event)))
+
+    async def _handler(self, ws):
+        url = urlsplit(ws.request.path)
+        if url.path == "/stream" or "@" in url.path:
+            return await self._market_handler(ws, url)
+        self.clients.add(ws)
+        try:
+            await ws.wait_closed()
+        finally:
+            self.clients.discard(ws)
+
+    async def _market_handler(self, ws, url):
+        combined = url.path == "/stream"
+        names = parse_qs(url.query).get("streams", [""])[0].split("/") if combined else [url.path.rsplit("/", 1)[-1]]
+        streams = {name for name in names if name}
+        self.market[ws] = (streams, combined)
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("method") == "SUBSCRIBE":
+                    streams.update(msg.get("params", ()))
+                elif msg.get("method") == "UNSUBSCRIBE":
+                    streams.difference_update(msg.get("params", ()))
+                await ws.send(json.dumps({"result": None, "id": msg.get("id")}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.market.pop(ws, None)
+
+    def drop_connections(self):
+        """Close every client connection (reconnect / reconciliation testing)"""
+        for ws in list(self.clients) + list(self.market):
+            asyncio.run_coroutine_threadsafe(ws.close(), self.loop)
+
+    def start(self, port=0):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+
+            async def main():
+                self.server = await websockets.serve(self._handler, "127.0.0.1", port)
+                ready.set()
+                await self.server.wait_closed()
+
+            self.loop.run_until_complete(main())
+
+        threading.Thread(target=run, name="sim-user-stream", daemon=True).start()
+        ready.wait(5)
+        return f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+
+class SimServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # One-shot clients exit with keep-alive connections still open; a reset is not an error
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_sim_server(engine=None, port=0, latency=0.0, latency_jitter=0.2, reject_rate=0.0,
+                     weight_limit=6000, order_limit=100, user_stream=False, unknown_rate=0.0, clock_skew=0.0,
+                     depth_drop_rate=0.0):
+    """Serve a MatchingEngine on a background thread; returns (server, base_url). Limits of 0 disable them.
+
+    With user_stream=True the websocket side is served too (server.ws_url, server.user_stream):
+    user-data stream plus diff-depth market streams.
+    """
+    server = SimServer(("127.0.0.1", port), SimHandler)
+    server.engine = engine or MatchingEngine()
+    server.latency = latency
+    server.latency_jitter = latency_jitter
+    server.reject_rate = reject_rate
+    server.unknown_rate = unknown_rate
+    server.clock_skew = clock_skew
+    server.limits = RateLimits(weight_limit, order_limit)
+    server.user_stream = UserStreamServer(server.engine, depth_drop_rate) if user_stream else None
+    server.ws_url = server.user_stream.start() if user_stream else None
+    threading.Thread(target=server.serve_forever, name="sim-exchange", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-local engine for paths that simulate without a server (market_order)"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = MatchingEngine()
+    return _engine
+
+
+# CLI
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Binance spot simulator")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SIM_PORT", "8900")))
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency per request (s)")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of order calls failing with -1008")
+    parser.add_argument("--unknown-rate", type=float, default=0.0,
+                        help="fraction of executed order calls answered with -1007 (status unknown)")
+    parser.add_argument("--clock-skew", type=float, default=0.0, help="server clock minus host clock (s)")
+    parser.add_argument("--weight-limit", type=int, default=6000, help="request weight per minute (0 = unlimited)")
+    parser.add_argument("--order-limit", type=int, default=100, help="orders per 10s (0 = unlimited)")
+    parser.add_argument("--walk-bps", type=float, default=0.0, help="random-walk each symbol by this many bps per second")
+    parser.add_argument("--flow", type=float, default=0.0,
+                        help="other participants' market orders per symbol per second, quote notional each")
+    parser.add_argument("--ws-port", type=int, default=int(os.getenv("SIM_WS_PORT", "8901")),
+                        help="websocket port (user-data and diff-depth streams)")
+    parser.add_argument("--depth-drop-rate", type=float, default=0.0,
+                        help="fraction of diff-depth updates dropped (sequence gaps)")
+    args = parser.parse_args()
+
+    server, url = start_sim_server(port=args.port, latency=args.latency, reject_rate=args.reject_rate,
+                                   weight_limit=args.weight_limit, order_limit=args.order_limit,
+                                   unknown_rate=args.unknown_rate, clock_skew=args.clock_skew)
+    server.user_stream = UserStreamServer(server.engine, args.depth_drop_rate)
+    server.ws_url = server.user_stream.start(args.ws_port)
+    print(f"Simulator listening on {url}, streams on {server.ws_url} (symbols: {', '.join(server.engine.books)})")
+    try:
+        while True:
+            time.sleep(1)
+            if args.walk_bps:
+                for symbol in server.engine.books:
+                    server.engine.random_walk(symbol, args.walk_bps)
+            if args.flow:
+                for symbol in server.engine.books:
+                    server.engine.taker_flow(symbol, args.flow)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
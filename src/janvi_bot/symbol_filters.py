@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import threading
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from janvi_bot.rest_client import BASE_URL, get_client
+from janvi_bot.bot_logging import log_info, log_error, DATA_DIR
+
+# exchangeInfo cache: loaded once (from disk when available), refreshed in
+# the background, and indexed per symbol so orders are validated and
+# rounded to PRICE_FILTER / LOT_SIZE / MIN_NOTIONAL locally instead of
+# being rejected by the exchange after a round trip. The file records the
+# endpoint it was fetched from; one saved from another base URL (testnet vs
+# live, the simulator) is ignored and fetched again.
+
+CACHE_PATH = os.getenv("EXCHANGE_INFO_PATH", os.path.join(DATA_DIR, '.cache', 'exchange_info.json'))
+REFRESH_INTERVAL = float(os.getenv("EXCHANGE_INFO_REFRESH", "3600"))
+RETRY_AFTER = 60.0
+
+
+class FilterError(ValueError):
+    """Order would be rejected by the exchange's symbol filters"""
+
+
+def _dec(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def format_decimal(value):
+    """Plain (non-exponent) string for the wire, without trailing zeros"""
+    s = format(_dec(value), "f")
+    return s.rstrip("0").rstrip(".") if "." in s else s
+
+
+def round_to_step(value, step, rounding):
+    if step == 0:
+        return value
+    return ((value / step).to_integral_value(rounding=rounding) * step).quantize(step)
+
+
+class SymbolFilters:
+    __slots__ = ("symbol", "status", "tick_size", "min_price", "max_price", "step_size",
+                 "min_qty", "max_qty", "market_step_size", "min_notional", "notional_applies_to_market")
+
+    def __init__(self, info):
+        self.symbol = info["symbol"]
+        self.status = info.get("status", "TRADING")
+        self.tick_size = self.min_price = self.max_price = Decimal(0)
+        self.step_size = self.min_qty = self.max_qty = Decimal(0)
+        self.market_step_size = None
+        self.min_notional = Decimal(0)
+        self.notional_applies_to_market = True
+
+        for f in info.get("filters", []):
+            kind = f.get("filterType")
+            if kind == "PRICE_FILTER":
+                self.tick_size, self.min_price, self.max_price = _dec(f["tickSize"]), _dec(f["minPrice"]), _dec(f["maxPrice"])
+            elif kind == "LOT_SIZE":
+                self.step_size, self.min_qty, self.max_qty = _dec(f["stepSize"]), _dec(f["minQty"]), _dec(f["maxQty"])
+            elif kind == "MARKET_LOT_SIZE":
+                self.market_step_size = _dec(f["stepSize"])
+            elif kind in ("MIN_NOTIONAL", "NOTIONAL"):
+                # spot: minNotional, USDT-M futures: notional
+                self.min_notional = _dec(f.get("minNotional", f.get("notional", 0)))
+                self.notional_applies_to_market = f.get("applyMinToMarket", f.get("applyToMarket", True))
+
+    def round_price(self, price, rounding=ROUND_HALF_UP):
+        return round_to_step(_dec(price), self.tick_size, rounding)
+
+    def round_qty(self, qty, market=False):
+        step = self.market_step_size if market and self.market_step_size else self.step_size
+        return round_to_step(_dec(qty), step, ROUND_DOWN)
+
+    def check(self, qty, price=None, market=False):
+        """Return the reason the exchange would reject this order, or None"""
+        if self.status != "TRADING":
+            return f"{self.symbol} is not trading (status {self.status})"
+        if qty < self.min_qty or (self.max_qty and qty > self.max_qty):
+            return f"quantity {qty} outside LOT_SIZE [{self.min_qty}, {self.max_qty}]"
+        if price is not None:
+            if not market and (self.min_price and price < self.min_price or self.max_price and price > self.max_price):
+                return f"price {price} outside PRICE_FILTER [{self.min_price}, {self.max_price}]"
+            if (not market or self.notional_applies_to_market) and qty * price < self.min_notional:
+                return f"notional {qty * price} below MIN_NOTIONAL {self.min_notional}"
+        return None
+
+
+class ExchangeInfoCache:
+    def __init__(self, path=CACHE_PATH, refresh_interval=REFRESH_INTERVAL, client=None, info_path="/api/v3/exchangeInfo"):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.client = client
+        self.info_path = info_path
+        self.symbols = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+        self._next_attempt = 0.0
+        self._refresher = None
+
+    def _index(self, info):
+        self.symbols = {s["symbol"]: SymbolFilters(s) for s in info.get("symbols", [])}
+
+    def _source(self):
+        base_url = self.client.base_url if self.client is not None else BASE_URL.rstrip("/")
+        return f"{base_url}{self.info_path}"
+
+    def _load_disk(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get("source") != self._source():
+            log_info("Ignoring exchangeInfo cached from another endpoint", path=self.path,
+                     cached=saved.get("source"), source=self._source())
+            return False
+        self._index(saved["exchangeInfo"])
+        self.loaded_at = saved.get("savedAt")
+        return True
+
+    def _save_disk(self, info):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"savedAt": time.time(), "source": self._source(), "exchangeInfo": info}, f)
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        """Fetch exchangeInfo from the exchange, re-index it and persist it"""
+        response = (self.client or get_client()).get(self.info_path)
+        response.raise_for_status()
+        info = response.json()
+        self._index(info)
+        self.loaded_at = time.time()
+        try:
+            self._save_disk(info)
+        except OSError as e:
+            log_error(f"Could not persist exchangeInfo: {e}")
+        log_info("exchangeInfo refreshed", symbols=len(self.symbols))
+
+    def _safe_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            log_error(f"exchangeInfo refresh failed: {e}")
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self._safe_refresh()
+
+    def ensure_loaded(self):
+        if self.loaded_at is not None and self._refresher is not None:
+            return True
+        with self._lock:
+            if self.loaded_at is None and time.monotonic() >= self._next_attempt:
+                if not self._load_disk():
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        self._next_attempt = time.monotonic() + RETRY_AFTER
+                        log_error(f"exchangeInfo unavailable, skipping local filter checks: {e}")
+            if self.loaded_at is not None and self._refresher is None:
+                if time.time() - self.loaded_at > self.refresh_interval:
+                    threading.Thread(target=self._safe_refresh, daemon=True).start()
+                self._refresher = threading.Thread(target=self._refresh_loop, name="exchange-info", daemon=True)
+                self._refresher.start()
+        return self.loaded_at is not None
+
+    def get(self, symbol):
+        """Filters for a symbol; None when exchangeInfo could not be loaded at all"""
+        if not self.ensure_loaded():
+            return None
+        filters = self.symbols.get(symbol.upper())
+        if filters is None:
+            raise FilterError(f"Unknown symbol: {symbol}")
+        return filters
+
+
+_cache = ExchangeInfoCache()
+
+
+def get_exchange_info_cache():
+    """The spot exchangeInfo cache used by default"""
+    return _cache
+
+
+def get_filters(symbol, cache=None):
+    return (cache or _cache).get(symbol)
+
+
+def prepare_order(symbol, quantity, price=None, market=False, ref_price=None, price_rounding=ROUND_HALF_UP, cache=None):
+    """Round quantity (and price) to the symbol's filters and validate them.
+
+    Returns wire-ready (quantity, price) strings; raises FilterError if the
+    exchange would reject the order. For market orders `ref_price` (e.g. the
+    last streamed price) is used for the notional check. Without exchangeInfo
+    the values pass through unrounded. `cache` selects another market's
+    exchangeInfo (e.g. futures); the spot cache is the default.
+    """
+    filters = get_filters(symbol, cache)
+    if filters is None:
+        return format_decimal(quantity), None if price is None else format_decimal(price)
+
+    qty = filters.round_qty(quantity, market=market)
+    px = None if price is None else filters.round_price(price, price_rounding)
+    reason = filters.check(qty, px if px is not None else (None if ref_price is None else _dec(ref_price)), market=market)
+    if reason:
+        raise FilterError(f"{symbol.upper()}: {reason}")
+    return format_decimal(qty), None if px is None else format_decimal(px)
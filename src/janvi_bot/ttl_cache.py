@@ -0,0 +1,144 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+# Size-bounded TTL cache with LRU eviction and request coalescing:
+# concurrent misses for the same key wait on a single upstream load
+# (threads in get_or_load, coroutines on one event loop in get_or_load_async).
+
+
+class _Pending:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=1.0, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._pending = {}
+        self._pending_async = {}  # key -> asyncio.Future of the load in flight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        with self._lock:
+            return self._get_locked(key, time.monotonic())
+
+    def _get_locked(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._data[key]
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key, value):
+        with self._lock:
+            self._set_locked(key, value)
+
+    def _set_locked(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Cached value for key, else loader() — called once however many threads miss together"""
+        with self._lock:
+            entry = self._get_locked(key, time.monotonic())
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _Pending()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = loader()
+            with self._lock:
+                self._set_locked(key, pending.value)
+            return pending.value
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.done.set()
+
+    async def get_or_load_async(self, key, loader):
+        """get_or_load for a coroutine loader: concurrent misses await a single `await loader()`"""
+        with self._lock:
+            entry = self._get_locked(key, time.monotonic())
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            future = self._pending_async.get(key)
+            leader = future is None
+            if leader:
+                future = self._pending_async[key] = asyncio.get_running_loop().create_future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Shielded: a waiter going away must not cancel the load the others wait on
+            return await asyncio.shield(future)
+
+        try:
+            value = await loader()
+            with self._lock:
+                self._set_locked(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: no "never retrieved" warning when nobody else waited
+            raise
+        finally:
+            with self._lock:
+                self._pending_async.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,441 @@
+import os
+import re
+import json
+import time
+import hashlib
+import queue
+import random
+import threading
+from decimal import Decimal
+from janvi_bot.rest_client import get_client
+from janvi_bot.bot_logging import log_info, log_error
+from janvi_bot.price_stream import WS_URL
+from janvi_bot.order_retry import refused
+
+# User-data stream: a listenKey-authenticated websocket delivering
+# executionReport events for our own orders. They feed an in-memory order
+# book indexed by clientOrderId and symbol, plus per-symbol positions, so
+# strategies react to fills instead of polling /api/v3/order per order.
+# On every (re)connect the book is reconciled against one openOrders snapshot.
+# asyncio and websockets load with the stream thread, not at import.
+
+# Binance expires a listenKey after 60 minutes without a keepalive
+KEEPALIVE_INTERVAL = float(os.getenv("USER_STREAM_KEEPALIVE", "1800"))
+RECONNECT_CAP = 30.0
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED", "PENDING_NEW")
+FINAL_STATUSES = ("FILLED", "CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH")
+# Keep this many finished orders for lookups; older ones are dropped
+MAX_CLOSED = 10000
+CLIENT_ID_CHARS = re.compile(r"[.A-Z:/a-z0-9_-]{1,36}")
+
+
+def make_client_order_id(prefix, *parts):
+    """newClientOrderId (<= 36 chars) tagged with the placing strategy.
+
+    Without parts it is random. With parts (job id, slice, level, ...) it is
+    deterministic, so a resend or a resumed job produces the same id and the
+    exchange sees one order; ids too long for the exchange are hashed.
+    """
+    if not parts:
+        return f"{prefix[:12]}-{os.urandom(10).hex()}"
+    cid = "-".join((prefix, *map(str, parts)))
+    if len(cid) <= 36 and CLIENT_ID_CHARS.fullmatch(cid):
+        return cid
+    return f"{prefix[:12]}-{hashlib.sha1(cid.encode()).hexdigest()[:20]}"
+
+
+class OrderState:
+    __slots__ = ("client_order_id", "order_id", "symbol", "side", "type", "price", "orig_qty", "executed_qty",
+                 "cum_quote", "status", "list_id", "strategy", "meta", "updated")
+
+    def __init__(self, client_order_id, symbol, side=None, type_=None, price=None, orig_qty=None,
+                 strategy=None, meta=None):
+        self.client_order_id = client_order_id
+        self.order_id = None
+        self.symbol = symbol
+        self.side = side
+        self.type = type_
+        self.price = Decimal(str(price)) if price is not None else None
+        self.orig_qty = Decimal(str(orig_qty)) if orig_qty is not None else None
+        self.executed_qty = Decimal(0)
+        self.cum_quote = Decimal(0)
+        self.status = "PENDING_NEW"
+        self.list_id = -1
+        self.strategy = strategy
+        self.meta = meta or {}
+        self.updated = 0
+
+    @property
+    def is_open(self):
+        return self.status in OPEN_STATUSES
+
+    @property
+    def avg_price(self):
+        return self.cum_quote / self.executed_qty if self.executed_qty else None
+
+    def to_dict(self):
+        return {
+            "clientOrderId": self.client_order_id, "orderId": self.order_id, "symbol": self.symbol,
+            "side": self.side, "type": self.type, "price": str(self.price) if self.price is not None else None,
+            "origQty": str(self.orig_qty) if self.orig_qty is not None else None,
+            "executedQty": str(self.executed_qty), "status": self.status, "orderListId": self.list_id,
+            "strategy": self.strategy, "meta": self.meta,
+        }
+
+
+class Fill:
+    __slots__ = ("order", "price", "qty", "trade_id", "time")
+
+    def __init__(self, order, price, qty, trade_id, time_ms):
+        self.order = order
+        self.price = price
+        self.qty = qty
+        self.trade_id = trade_id
+        self.time = time_ms
+
+
+class OrderTracker:
+    """Order and position book fed by executionReports (and REST snapshots when reconciling)"""
+
+    def __init__(self):
+        self.orders = {}       # clientOrderId -> OrderState
+        self.by_symbol = {}    # symbol -> {clientOrderId}, open orders only
+        self.positions = {}    # symbol -> net base quantity from our fills
+        self.balances = {}     # asset -> (free, locked) from outboundAccountPosition
+        self._closed = []
+        self._lock = threading.RLock()
+        self._track_handlers = []
+        self._fill_handlers = []
+        self._update_handlers = []
+        # Handlers run in event order on one thread, never on the websocket loop
+        self._dispatch = queue.SimpleQueue()
+        threading.Thread(target=self._dispatch_loop, name="order-events", daemon=True).start()
+
+    # ----- registration -----
+
+    def track(self, client_order_id, symbol, side=None, type_=None, price=None, quantity=None, strategy=None, meta=None):
+        """Register an order before it is sent so its events carry the strategy's metadata"""
+        with self._lock:
+            state = self.orders.get(client_order_id)
+            if state is not None:
+                return state
+            state = self.orders[client_order_id] = OrderState(client_order_id, symbol.upper(), side, type_,
+                                                              price, quantity, strategy, meta)
+            self.by_symbol.setdefault(state.symbol, set()).add(client_order_id)
+        for handler in self._track_handlers:
+            self._call(handler, state)
+        return state
+
+    def on_track(self, handler):
+        """handler(state) synchronously on the caller's thread for every newly registered order; keep it cheap"""
+        self._track_handlers.append(handler)
+        return handler
+
+    def on_fill(self, handler):
+        """handler(fill) for every trade on an order we track (fill.order is the OrderState)"""
+        self._fill_handlers.append(handler)
+        return handler
+
+    def on_update(self, handler):
+        """handler(state, exec_type) for every status change (NEW, CANCELED, EXPIRED, TRADE, ...)"""
+        self._update_handlers.append(handler)
+        return handler
+
+    # ----- queries -----
+
+    def get(self, client_order_id):
+        return self.orders.get(client_order_id)
+
+    def open_orders(self, symbol=None):
+        with self._lock:
+            if symbol is not None:
+                ids = self.by_symbol.get(symbol.upper(), ())
+            else:
+                ids = [cid for ids in self.by_symbol.values() for cid in ids]
+            return [self.orders[cid] for cid in ids]
+
+    def position(self, symbol):
+        return self.positions.get(symbol.upper(), Decimal(0))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open": {s: len(ids) for s, ids in self.by_symbol.items() if ids},
+                "tracked": len(self.orders),
+                "positions": {s: str(q) for s, q in self.positions.items()},
+            }
+
+    # ----- event application -----
+
+    def apply_execution(self, e):
+        """Apply one executionReport; stale or duplicate events (by cumulative qty / time) are ignored"""
+        with self._lock:
+            cid = e["c"]
+            # Cancels report the original id in "C"
+            if e.get("x") == "CANCELED" and e.get("C"):
+                cid = e["C"]
+            state = self.orders.get(cid) or self.track(cid, e["s"], e["S"], e["o"], e.get("p"), e.get("q"))
+            executed = Decimal(e["z"])
+            if executed < state.executed_qty or (state.status in FINAL_STATUSES and e["X"] not in FINAL_STATUSES):
+                return
+            if executed == state.executed_qty and e["X"] == state.status and e.get("E", 0) <= state.updated:
+                return
+
+            state.order_id = e.get("i", state.order_id)
+            state.side, state.type = e.get("S", state.side), e.get("o", state.type)
+            if state.orig_qty is None and e.get("q"):
+                state.orig_qty = Decimal(e["q"])
+            state.list_id = e.get("g", state.list_id)
+            state.status = e["X"]
+            state.updated = e.get("E", state.updated)
+
+            fill = None
+            last_qty = Decimal(e.get("l", "0"))
+            if e.get("x") == "TRADE" and last_qty > 0:
+                state.executed_qty = executed
+                state.cum_quote = Decimal(e.get("Z", state.cum_quote))
+                signed = last_qty if state.side == "BUY" else -last_qty
+                self.positions[state.symbol] = self.positions.get(state.symbol, Decimal(0)) + signed
+                fill = Fill(state, Decimal(e["L"]), last_qty, e.get("t"), e.get("T"))
+            self._settle(state)
+
+        self._dispatch.put((state, e.get("x"), fill))
+
+    def apply_order(self, order):
+        """Apply a REST order payload (openOrders / GET order) as an executionReport-equivalent"""
+        cid = order["clientOrderId"]
+        with self._lock:
+            state = self.orders.get(cid)
+            previous = state.executed_qty if state is not None else Decimal(0)
+            previous_quote = state.cum_quote if state is not None else Decimal(0)
+        executed = Decimal(order["executedQty"])
+        quote = Decimal(order.get("cummulativeQuoteQty", "0"))
+        missed = executed - previous
+        avg = (quote - previous_quote) / missed if missed > 0 else Decimal(0)
+        self.apply_execution({
+            "c": cid, "s": order["symbol"], "S": order["side"], "o": order["type"], "p": order.get("price"),
+            "q": order["origQty"], "z": order["executedQty"], "Z": order.get("cummulativeQuoteQty", "0"),
+            "X": order["status"], "x": "TRADE" if missed > 0 else order["status"], "i": order["orderId"],
+            "g": order.get("orderListId", -1), "l": str(missed), "L": str(avg),
+            "E": order.get("updateTime", int(time.time() * 1000)), "T": order.get("updateTime"), "t": None,
+        })
+
+    def on_ack(self, client_order_id, response):
+        """An order request's answer: a refusal settles the order as REJECTED instead of leaving it PENDING_NEW"""
+        if client_order_id is None or not refused(response):
+            return
+        with self._lock:
+            state = self.orders.get(client_order_id)
+            if state is None or state.status != "PENDING_NEW":
+                return
+        self.apply_execution({"c": client_order_id, "s": state.symbol, "S": state.side, "o": state.type, "z": "0",
+                              "X": "REJECTED", "x": "REJECTED", "E": int(time.time() * 1000)})
+
+    def apply_account(self, e):
+        with self._lock:
+            for b in e.get("B", []):
+                self.balances[b["a"]] = (Decimal(b["f"]), Decimal(b["l"]))
+
+    def _settle(self, state):
+        ids = self.by_symbol.setdefault(state.symbol, set())
+        if state.is_open:
+            ids.add(state.client_order_id)
+        elif state.client_order_id in ids:
+            ids.discard(state.client_order_id)
+            self._closed.append(state.client_order_id)
+            if len(self._closed) > MAX_CLOSED:
+                for cid in self._closed[:len(self._closed) - MAX_CLOSED]:
+                    self.orders.pop(cid, None)
+                del self._closed[:len(self._closed) - MAX_CLOSED]
+
+    def _dispatch_loop(self):
+        while True:
+            state, exec_type, fill = self._dispatch.get()
+            for handler in list(self._update_handlers):
+                self._call(handler, state, exec_type)
+            if fill is not None:
+                for handler in list(self._fill_handlers):
+                    self._call(handler, fill)
+
+    @staticmethod
+    def _call(handler, *args):
+        try:
+            handler(*args)
+        except Exception as e:
+            log_error(f"Order event handler {getattr(handler, '__name__', handler)} failed: {e}")
+
+    # ----- reconciliation -----
+
+    def reconcile(self, client=None, api="/api/v3"):
+        """Sync with one openOrders snapshot; orders we think are open but the exchange doesn't get one lookup each"""
+        client = client or get_client()
+        response = client.get(f"{api}/openOrders", signed=True)
+        response.raise_for_status()
+        snapshot = response.json()
+        seen = set()
+        for order in snapshot:
+            seen.add(order["clientOrderId"])
+            self.apply_order(order)
+
+        missing = [s for s in self.open_orders() if s.client_order_id not in seen and s.status != "PENDING_NEW"]
+        for state in missing:
+            r = client.get(f"{api}/order", {"symbol": state.symbol, "origClientOrderId": state.client_order_id}, signed=True)
+            if r.status_code == 200:
+                self.apply_order(r.json())
+            else:
+                log_error(f"Reconcile lookup failed for {state.client_order_id}: {r.status_code} {r.text}")
+        log_info("Order book reconciled", open=len(snapshot), closed_while_away=len(missing))
+        return len(snapshot), len(missing)
+
+
+class UserDataStream:
+    # api / listen_key_path: spot defaults; a futures backend passes /fapi/v1 and /fapi/v1/listenKey
+    def __init__(self, tracker, url=WS_URL, client=None, api="/api/v3", listen_key_path="/api/v3/userDataStream"):
+        self.tracker = tracker
+        self.url = url.rstrip("/")
+        self.client = client
+        self.api = api
+        self.listen_key_path = listen_key_path
+        self.listen_key = None
+        self.events = 0
+        self.connected = threading.Event()
+        self._loop = None
+        self._ws = None
+        self._thread = None
+        self._stopped = False
+
+    def _client(self):
+        return self.client or get_client()
+
+    def _new_listen_key(self):
+        response = self._client().post(self.listen_key_path)
+        response.raise_for_status()
+        return response.json()["listenKey"]
+
+    def keepalive(self):
+        response = self._client().put(self.listen_key_path, {"listenKey": self.listen_key})
+        if response.status_code != 200:
+            raise RuntimeError(f"listenKey keepalive failed: {response.status_code} {response.text}")
+
+    def _handle(self, raw):
+        e = json.loads(raw)
+        e = e.get("data", e)
+        kind = e.get("e")
+        self.events += 1
+        if kind == "executionReport":
+            self.tracker.apply_execution(e)
+        elif kind == "ORDER_TRADE_UPDATE":
+            # Futures: the order fields sit under "o" with executionReport's keys
+            self.tracker.apply_execution({**e["o"], "E": e.get("E", 0)})
+        elif kind == "outboundAccountPosition":
+            self.tracker.apply_account(e)
+        elif kind == "listenKeyExpired":
+            raise ConnectionError("listenKey expired")
+
+    async def _keepalive_loop(self):
+        import asyncio
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            await asyncio.to_thread(self.keepalive)
+
+    async def _main(self):
+        import asyncio
+        import websockets
+        delay = 1.0
+        while not self._stopped:
+            keepalive = None
+            try:
+                # A fresh key per connection: expired keys can't be revived
+                self.listen_key = await asyncio.to_thread(self._new_listen_key)
+                async with websockets.connect(f"{self.url}/ws/{self.listen_key}") as ws:
+                    self._ws = ws
+                    keepalive = asyncio.ensure_future(self._keepalive_loop())
+                    # Subscribed first, then snapshot, so nothing falls between the two
+                    await asyncio.to_thread(self.tracker.reconcile, self.client, self.api)
+                    self.connected.set()
+                    delay = 1.0
+                    log_info("User data stream connected")
+                    async for raw in ws:
+                        self._handle(raw)
+            except Exception as e:
+                if not self._stopped:
+                    log_error(f"User data stream error: {e}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+                if keepalive is not None:
+                    keepalive.cancel()
+            if not self._stopped:
+                await asyncio.sleep(delay + random.uniform(0, 1))
+                delay = min(delay * 2, RECONNECT_CAP)
+
+    def _run(self):
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="user-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        ws, loop = self._ws, self._loop
+        if ws is not None and loop is not None:
+            import asyncio
+            asyncio.run_coroutine_threadsafe(ws.close(), loop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.listen_key:
+            try:
+                self._client().delete(self.listen_key_path, {"listenKey": self.listen_key})
+            except Exception as e:
+                log_error(f"Could not close listenKey: {e}")
+
+
+_tracker = OrderTracker()
+_streams = {}
+_stream_lock = threading.Lock()
+
+
+def get_order_tracker():
+    return _tracker
+
+
+def start_user_stream(url=WS_URL, wait=None, backend=None):
+    """Start the process-wide user-data stream for a backend (spot by default; idempotent), all feeding one tracker.
+    Optionally wait until it is connected."""
+    name = backend.name if backend is not None else "spot"
+    with _stream_lock:
+        stream = _streams.get(name)
+        if stream is None:
+            if backend is not None and name != "spot":
+                stream = UserDataStream(_tracker, url=backend.stream_url, client=backend.client, api=backend.api,
+                                        listen_key_path=backend.listen_key_path)
+            else:
+                stream = UserDataStream(_tracker, url=url)
+            stream = _streams[name] = stream.start()
+    if wait:
+        stream.connected.wait(wait)
+    return stream
+
+
+def get_user_stream(name="spot"):
+    return _streams.get(name)
+
+
+def _reset_after_fork():
+    # Neither the websocket thread nor the dispatcher survive a fork
+    global _tracker, _streams, _stream_lock
+    _tracker = OrderTracker()
+    _streams = {}
+    _stream_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,55 @@
+from janvi_bot.bot_logging import log_error
+
+# Argument checks shared by the order commands (market, limit, oco, twap,
+# grid): each logs what is wrong and returns a falsy value instead of raising.
+
+
+def _positive(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def validate_symbol(symbol):
+    if symbol.isalnum() and symbol.upper().endswith("USDT"):
+        return True
+    log_error(f"Invalid symbol format: {symbol}")
+    return False
+
+
+def validate_side(side):
+    if side.upper() in ("BUY", "SELL"):
+        return True
+    log_error(f"Invalid side: {side}")
+    return False
+
+
+def validate_quantity(quantity):
+    if _positive(quantity) is not None:
+        return True
+    log_error(f"Invalid quantity: {quantity}")
+    return False
+
+
+def validate_price(price):
+    if _positive(price) is not None:
+        return True
+    log_error(f"Invalid price: {price}")
+    return False
+
+
+def validate_offset(offset, name):
+    if _positive(offset) is not None:
+        return True
+    log_error(f"Invalid {name} offset: {offset}")
+    return False
+
+
+def validate_positive_number(name, value):
+    """The value as a float, or None (logged) when it isn't a positive number"""
+    number = _positive(value)
+    if number is None:
+        log_error(f"{name} must be a positive number: {value}")
+    return number
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+import pytest
+
+from janvi_bot.sim_exchange import start_sim_server
+
+# The bot reads its endpoints and file paths from the environment when its
+# modules are imported, so one local simulator and a scratch directory are
+# set up here, before any test imports them. Every test talks to this
+# simulator; nothing reaches the network.
+
+SCRATCH = tempfile.mkdtemp(prefix="janvi-bot-tests-")
+SIM, SIM_URL = start_sim_server(weight_limit=0, order_limit=0, user_stream=True)
+
+os.environ.update(
+    BINANCE_API_KEY="test", BINANCE_API_SECRET="test",
+    BINANCE_BASE_URL=SIM_URL, BINANCE_FUTURES_BASE_URL=SIM_URL,
+    BINANCE_WS_URL=SIM.ws_url, BINANCE_FUTURES_WS_URL=SIM.ws_url,
+    BINANCE_CLOCK_SYNC="0", BINANCE_ORDER_LIMIT_10S="100000",
+    BOT_HOME=SCRATCH, BOT_LOG_CONSOLE="0", BOT_JOURNAL_PATH=os.path.join(SCRATCH, "journal.db"),
+    EXCHANGE_INFO_PATH=os.path.join(SCRATCH, "exchange_info.json"),
+    RISK_KILL_FILE=os.path.join(SCRATCH, "KILL"),
+)
+
+
+@pytest.fixture
+def sim():
+    """The session's simulated exchange (server.engine is the matching engine)"""
+    return SIM
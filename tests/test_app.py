@@ -0,0 +1,26 @@
+import pytest
+
+from janvi_bot import metrics
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize("query", ["interval=x", "interval=0", "interval=-1", "interval=nan", "interval="])
+def test_profile_start_rejects_a_bad_interval(client, query):
+    response = client.get(f"/debug/profile/start?{query}")
+    assert response.status_code == 400 and "interval" in response.get_json()["error"]
+    assert not metrics.profiling_active()
+
+
+def test_profile_stop_rejects_a_bad_top(client):
+    assert client.get("/debug/profile/start?interval=0.01").get_json() == {"started": True}
+    try:
+        assert client.get("/debug/profile/stop?top=x").status_code == 400
+        assert metrics.profiling_active()
+    finally:
+        report = client.get("/debug/profile/stop?top=3").get_json()
+    assert len(report["top"]) <= 3 and not metrics.profiling_active()
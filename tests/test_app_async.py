@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from janvi_bot import metrics
+from janvi_bot.price_stream import update_price
+from app_async import STREAM_MAX_SYMBOLS, create_app
+
+
+def _with_client(test):
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            return await test(client)
+    return asyncio.run(run())
+
+
+async def _next_event(response):
+    # Skips keep-alive comments and blank separators
+    while True:
+        line = await asyncio.wait_for(response.content.readline(), 5)
+        assert line, "stream ended"
+        if line.startswith(b"data: "):
+            return json.loads(line[len(b"data: "):])
+
+
+async def _until(receive, predicate):
+    """Next batch matching predicate; batches for earlier ticks can arrive first"""
+    while True:
+        batch = await receive()
+        if predicate(batch):
+            return batch
+
+
+def test_sse_streams_the_current_price_then_each_update():
+    async def test(client):
+        update_price("SSEAUSDT", 10.0)
+        response = await client.get("/stream/prices?symbols=sseausdt,SSEBUSDT")
+        assert response.status == 200 and response.headers["Content-Type"] == "text/event-stream"
+        assert await _next_event(response) == {"SSEAUSDT": {"price": 10.0, "bid": None, "ask": None}}
+
+        update_price("SSEBUSDT", 20.0)
+        update_price("SSEOTHERUSDT", 30.0)
+        batch = await _until(lambda: _next_event(response), lambda b: "SSEBUSDT" in b)
+        assert batch["SSEBUSDT"]["price"] == 20.0 and "SSEOTHERUSDT" not in batch
+        response.close()
+
+    _with_client(test)
+
+
+def test_stream_symbols_are_validated_and_limited():
+    async def test(client):
+        too_many = ",".join(f"LIM{i}USDT" for i in range(STREAM_MAX_SYMBOLS + 1))
+        for path in (f"/stream/prices?symbols={too_many}", f"/ws/prices?symbols={too_many}"):
+            response = await client.get(path)
+            assert response.status == 400
+            assert (await response.json()) == {"error": f"at most {STREAM_MAX_SYMBOLS} symbols per stream"}
+        response = await client.get("/stream/prices?symbols=BTCUSDT,BTC-EUR")
+        assert response.status == 400 and (await response.json()) == {"error": "invalid symbol(s): BTC-EUR"}
+
+    _with_client(test)
+
+
+def test_websocket_subscribe_and_unsubscribe():
+    async def test(client):
+        ws = await client.ws_connect("/ws/prices?symbols=WSAUSDT")
+        receive = lambda: ws.receive_json(timeout=5)
+        update_price("WSAUSDT", 1.0)
+        assert (await _until(receive, lambda b: "WSAUSDT" in b))["WSAUSDT"]["price"] == 1.0
+
+        await ws.send_json({"subscribe": ["wsbusdt"]})
+        update_price("WSBUSDT", 2.0)
+        assert (await _until(receive, lambda b: "WSBUSDT" in b))["WSBUSDT"]["price"] == 2.0
+
+        await ws.send_json({"unsubscribe": ["WSAUSDT"]})
+        await ws.send_json({"subscribe": ["bad symbol"]})
+        assert await _until(receive, lambda b: "error" in b) == {"error": "invalid symbol(s): BAD SYMBOL"}
+        # The unsubscribe went through before the error came back
+        update_price("WSAUSDT", 1.5)
+        update_price("WSBUSDT", 2.5)
+        assert await _until(receive, lambda b: b.get("WSBUSDT", {}).get("price") == 2.5) == {
+            "WSBUSDT": {"price": 2.5, "bid": None, "ask": None}}
+
+        await ws.send_json({"subscribe": [f"WSX{i}USDT" for i in range(STREAM_MAX_SYMBOLS)]})
+        assert await _until(receive, lambda b: "error" in b) == {"error": f"at most {STREAM_MAX_SYMBOLS} symbols per stream"}
+        assert (await (await client.get("/metrics/stream")).json())["subscribers"] == 1
+        await ws.close()
+
+    _with_client(test)
+
+
+def test_profile_routes_reject_bad_query_parameters():
+    async def test(client):
+        for query in ("interval=x", "interval=0", "interval=inf"):
+            response = await client.get(f"/debug/profile/start?{query}")
+            assert response.status == 400 and "interval" in (await response.json())["error"]
+        assert not metrics.profiling_active()
+
+        assert await (await client.get("/debug/profile/start?interval=0.01")).json() == {"started": True}
+        assert (await client.get("/debug/profile/stop?top=1.5")).status == 400
+        report = await (await client.get("/debug/profile/stop?top=2")).json()
+        assert len(report["top"]) <= 2 and not metrics.profiling_active()
+
+    _with_client(test)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from janvi_bot.backtest import Klines, backtest_grid, backtest_twap, backtest_oco
+
+
+def _klines(candles, volumes=None):
+    """(open, high, low, close) rows as one-minute klines"""
+    o, h, l, c = (np.array(column, dtype=np.float64) for column in zip(*candles))
+    volume = np.array(volumes or [1.0] * len(candles), dtype=np.float64)
+    return Klines(np.arange(len(candles), dtype=np.int64) * 60000, o, h, l, c, volume)
+
+
+# Two back-to-back runs with horizon=2: decide at close[0] / close[2], mark out at close[2] / close[4]
+SERIES = _klines([
+    (100.0, 100.0, 100.0, 100.0),
+    (100.0, 101.0, 98.5, 99.0),
+    (99.0, 100.0, 97.5, 99.0),
+    (99.0, 99.5, 97.0, 98.0),
+    (98.0, 102.0, 98.0, 101.0),
+], volumes=[1, 3, 1, 1, 1])
+
+
+def test_buy_grid_fills_marketable_levels_at_the_anchor_and_the_rest_on_the_low():
+    # Run 0: levels 98/100/102 around 100, low 97.5 reaches 98; out at 99
+    # Run 1: levels 97.02/99/100.98 around 99, low 97 reaches 97.02; out at 101
+    result = backtest_grid(SERIES, "BUY", steps=3, horizon=2, fee_bps=10)
+    fees = np.array([100 + 100 + 98, 99 + 99 + 97.02]) * 10 / 10000
+    pnl = np.array([(99 - 100) * 2 + (99 - 98), (101 - 99) * 2 + (101 - 97.02)]) - fees
+    assert result["runs"] == 2 and result["fill_ratio"] == 1.0
+    assert result["total_pnl"] == pytest.approx(pnl.sum())
+    assert result["win_rate"] == 0.5
+
+
+def test_sell_grid_leaves_levels_above_the_high_unfilled():
+    # Run 0: 102 is never reached (high 101); run 1: high 102 reaches 100.98
+    result = backtest_grid(SERIES, "SELL", steps=3, horizon=2, fee_bps=0)
+    assert result["fill_ratio"] == pytest.approx(5 / 6)
+    assert result["total_pnl"] == pytest.approx((100 - 99) * 2 + (99 - 101) * 2 + (100.98 - 101))
+
+
+def test_twap_fills_each_slice_at_its_candle_open():
+    # Two slices a minute apart: run 0 buys at 100 and 99 (arrival 100), run 1 at 99 and 98 (arrival 99)
+    result = backtest_twap(SERIES, "BUY", chunks=2, interval=60, fee_bps=0)
+    arrival = [(99.5 - 100) / 100 * 10000, (98.5 - 99) / 99 * 10000]
+    typical = [(101 + 98.5 + 99) / 3, (100 + 97.5 + 99) / 3, (99.5 + 97 + 98) / 3, (102 + 98 + 101) / 3]
+    vwap = [(typical[0] * 3 + typical[1]) / 4, (typical[2] + typical[3]) / 2]
+    assert result["runs"] == 2 and result["candles_per_run"] == 2
+    assert result["mean_slippage_arrival_bps"] == pytest.approx(np.mean(arrival))
+    assert result["mean_slippage_vwap_bps"] == pytest.approx(np.mean([(99.5 - vwap[0]) / vwap[0] * 10000,
+                                                                      (98.5 - vwap[1]) / vwap[1] * 10000]))
+    assert result["mean_cost"] == pytest.approx(-0.5)
+
+    # Selling into the same falling prices is the costly side; fees count against either
+    sold = backtest_twap(SERIES, "SELL", chunks=2, interval=60, fee_bps=10)
+    assert sold["mean_slippage_arrival_bps"] == pytest.approx(-np.mean(arrival) + 10)
+
+
+def test_oco_exits_on_the_first_leg_touched():
+    klines = _klines([
+        (100.0, 100.0, 100.0, 100.0),
+        (100.0, 100.5, 99.5, 100.2),
+        (100.2, 101.5, 100.0, 101.0),   # run 0 takes profit at 101, run 1 at 101.202
+        (101.0, 101.2, 99.8, 100.0),    # run 2 (entry 101) stops out at 99.99
+        (100.0, 100.3, 99.2, 99.5),
+        (99.5, 99.6, 99.1, 99.3),       # run 3 (entry 100) touches neither leg: out at 99.3
+    ])
+    result = backtest_oco(klines, "SELL", tp_pct=0.01, stop_pct=0.01, horizon=2, fee_bps=0)
+    assert result["runs"] == 4
+    assert (result["tp_rate"], result["stop_rate"], result["expire_rate"]) == (0.5, 0.25, 0.25)
+    assert result["total_pnl"] == pytest.approx(1.0 + 1.002 - 1.01 - 0.7)
+    assert result["win_rate"] == 0.5
+
+
+def test_oco_assumes_the_stop_when_one_candle_spans_both_legs():
+    klines = _klines([(100.0, 100.0, 100.0, 100.0), (100.0, 102.0, 98.0, 100.0)])
+    result = backtest_oco(klines, "SELL", tp_pct=0.01, stop_pct=0.01, horizon=1, fee_bps=10)
+    assert result["stop_rate"] == 1.0
+    assert result["total_pnl"] == pytest.approx(-1.0 - (100 + 99) * 10 / 10000)
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from janvi_bot.batch_placer import place_batch, format_table
+
+
+class Answer:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class Exchange:
+    """place_fn recording how many orders are in flight at once"""
+
+    def __init__(self, hold=0.03):
+        self.hold = hold
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+
+    def __call__(self, price, qty=1):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.hold)
+            if price == "local":
+                raise ValueError("Price 1.005 is not a multiple of tick size 0.01")
+            if price == "down":
+                raise ConnectionError("connection reset by peer")
+            if price == "rejected":
+                return Answer(400, {"code": -2010, "msg": "Account has insufficient balance"})
+            return Answer(200, {"orderId": int(price), "status": "NEW"})
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_no_more_orders_in_flight_than_workers():
+    exchange = Exchange()
+    rows = place_batch([{"price": str(i)} for i in range(10)], exchange, max_workers=3)
+    assert exchange.peak == 3
+    assert [(r["level"], r["order_id"], r["status"]) for r in rows] == [(i, i, "NEW") for i in range(10)]
+
+
+def test_each_failed_level_is_reported_on_its_own_row():
+    exchange = Exchange(hold=0)
+    rows = place_batch([{"price": "1"}, {"price": "local"}, {"price": "rejected"}, {"price": "down"}, {"price": "5"}],
+                       exchange)
+    assert [r["status"] for r in rows] == ["NEW", "REJECTED_LOCAL", "REJECTED", "ERROR", "NEW"]
+    assert [r["error"] for r in rows] == [None, "Price 1.005 is not a multiple of tick size 0.01",
+                                          "Account has insufficient balance", "connection reset by peer", None]
+    assert rows[2]["http_status"] == 400 and "http_status" not in rows[1]
+    assert all(r["latency_ms"] >= 0 for r in rows)
+    assert format_table(rows).splitlines()[3].split()[:3] == ["2", "rejected", "REJECTED"]
+
+
+def test_empty_batch():
+    assert place_batch([], Exchange()) == []
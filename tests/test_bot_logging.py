@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+from janvi_bot import bot_logging
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_queued_before_shutdown_reach_the_file(monkeypatch, tmp_path):
+    bot_logging.shutdown_logging()
+    monkeypatch.setattr(bot_logging, "LOG_PATH", str(tmp_path / "bot.log"))
+    try:
+        for i in range(500):
+            bot_logging.log_info("Order placed", order_id=i, symbol="BTCUSDT", error=None)
+        bot_logging.log_error("Order failed", order_id=500)
+    finally:
+        bot_logging.shutdown_logging()
+    lines = _lines(tmp_path / "bot.log")
+    assert [line["order_id"] for line in lines] == list(range(501))
+    assert lines[0]["msg"] == "Order placed" and "error" not in lines[0] and lines[-1]["level"] == "ERROR"
+
+
+def test_writer_starts_on_first_log_call_and_flushes_at_exit(tmp_path):
+    # A fresh interpreter: importing starts nothing; records still queued at exit are written
+    script = (
+        "import threading\n"
+        "from janvi_bot import bot_logging\n"
+        "assert bot_logging._listener is None\n"
+        "assert not any(t is not threading.main_thread() for t in threading.enumerate())\n"
+        "for i in range(200):\n"
+        "    bot_logging.log_info('tick', n=i)\n"
+        "assert bot_logging._listener is not None\n"
+    )
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ, BOT_LOG_PATH=str(tmp_path / "bot.log"), BOT_LOG_CONSOLE="0",
+               PYTHONPATH=os.pathsep.join(filter(None, (src, os.environ.get("PYTHONPATH")))))
+    subprocess.run([sys.executable, "-c", script], env=env, check=True, timeout=60)
+    assert [line["n"] for line in _lines(tmp_path / "bot.log")] == list(range(200))
@@ -0,0 +1,25 @@
+import logging
+import os
+
+from janvi_bot.clock_sync import CLOCK_BURST, ClockSync
+
+
+def test_sync_estimates_the_server_clock(sim):
+    clock = ClockSync(os.environ["BINANCE_BASE_URL"])
+    assert clock._resync() == CLOCK_BURST
+    assert clock.syncs == CLOCK_BURST and clock.failures == 0
+    assert abs(clock.offset) < 0.5
+
+
+def test_failed_sync_keeps_the_previous_offset_and_says_so(sim, caplog):
+    clock = ClockSync(os.environ["BINANCE_BASE_URL"])
+    clock.sync(1)
+    offset = clock._mono_offset
+    clock.url = "http://127.0.0.1:1/api/v3/time"
+    with caplog.at_level(logging.INFO):
+        assert clock._resync() == 0
+    assert clock._mono_offset == offset
+    assert clock.failures == CLOCK_BURST
+    messages = [(r.levelno, r.getMessage()) for r in caplog.records]
+    assert (logging.ERROR, f"Server time sync failed: all {CLOCK_BURST} samples failed; keeping the previous offset") in messages
+    assert not any(message.startswith("Server time synced") for _, message in messages)
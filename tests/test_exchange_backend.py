@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from janvi_bot.advanced.oco import build_oco_params
+from janvi_bot.exchange_backend import ExchangeBackend, FuturesBackend, OrderResult, SpotBackend, UnsupportedOrderError
+from janvi_bot.user_stream import make_client_order_id
+
+
+@pytest.fixture
+def futures(monkeypatch):
+    backend = FuturesBackend()
+    posts = []
+    post = backend.client.post
+
+    def recording_post(path, params=None, **kwargs):
+        posts.append((path, params))
+        return post(path, params, **kwargs)
+
+    monkeypatch.setattr(backend.client, "post", recording_post)
+    backend.posts = posts
+    return backend
+
+
+def test_order_types_the_market_lacks_are_refused_before_sending(futures):
+    with pytest.raises(UnsupportedOrderError, match="futures backend does not support LIMIT_MAKER"):
+        futures.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT_MAKER", "quantity": "0.001",
+                           "price": "44000"})
+    assert futures.posts == []
+    with pytest.raises(UnsupportedOrderError):
+        SpotBackend().check("TRAILING_STOP_MARKET")
+    futures.check("STOP_MARKET")
+
+
+def test_a_backend_must_place_ocos():
+    class NoOco(ExchangeBackend):
+        name = "none"
+
+    with pytest.raises(TypeError, match="place_oco"):
+        NoOco(None, None)
+
+
+def test_oco_goes_out_as_two_reduce_only_legs_in_one_batch(sim, futures):
+    price = float(sim.engine.set_price("BTCUSDT", 50000.0))
+    params, tp, stop = build_oco_params("BTCUSDT", "SELL", "0.001", price, 500, 500, lambda p: round(p, 2))
+    response = futures.place_oco(params, strategy="test")
+    assert response.status_code == 200 and len(response.json()["orderReports"]) == 2
+
+    [(path, sent)] = futures.posts
+    assert path == "/fapi/v1/batchOrders"
+    legs = {leg["type"]: leg for leg in json.loads(sent["batchOrders"])}
+    assert set(legs) == {"TAKE_PROFIT_MARKET", "STOP_MARKET"}
+    assert float(legs["TAKE_PROFIT_MARKET"]["stopPrice"]) == tp and float(legs["STOP_MARKET"]["stopPrice"]) == stop
+    assert all(leg["reduceOnly"] == "true" and leg["side"] == "SELL" and leg["quantity"] == "0.001"
+               for leg in legs.values())
+    assert {leg["newClientOrderId"] for leg in legs.values()} == {params["aboveClientOrderId"], params["belowClientOrderId"]}
+
+
+def test_half_accepted_oco_cancels_the_accepted_leg(futures, monkeypatch):
+    cancelled = []
+    monkeypatch.setattr(futures.client, "post", lambda path, params=None, **kwargs: OrderResult(200, [
+        {"clientOrderId": json.loads(params["batchOrders"])[0]["newClientOrderId"], "orderId": 5, "status": "NEW"},
+        {"code": -2021, "msg": "Order would immediately trigger."}]))
+    monkeypatch.setattr(futures, "cancel_order", lambda symbol, cid, strategy=None: cancelled.append(cid))
+    params, _, _ = build_oco_params("BTCUSDT", "SELL", "0.001", 50000.0, 500, 500, lambda p: round(p, 2))
+    params["aboveClientOrderId"] = make_client_order_id("test")
+    response = futures.place_oco(params, strategy="test")
+    assert response.status_code == 400 and "OCO leg rejected" in response.json()["msg"]
+    assert cancelled == [params["aboveClientOrderId"]]
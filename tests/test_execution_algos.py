@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+import pytest
+
+from janvi_bot.advanced import vwap
+from janvi_bot.advanced.pov import PovJob
+from janvi_bot.advanced.twap import TwapJob
+from janvi_bot.advanced.vwap import VwapJob
+from janvi_bot.backtest import DAY_SECONDS
+from janvi_bot.exchange_backend import OrderResult
+from janvi_bot.user_stream import get_order_tracker
+
+HOUR = 3600
+PROFILE = [0.5, 0.25, 0.25, 0.0]  # shares of the day's volume per 6h bucket
+DAY = 20000 * DAY_SECONDS  # a UTC midnight
+
+
+def _vwap(monkeypatch, start, chunks, interval, profile=PROFILE):
+    monkeypatch.setattr(vwap.time, "time", lambda: DAY + start)
+    return VwapJob("BTCUSDT", "BUY", 10, chunks, interval, profile, place_fn=lambda *args: None)
+
+
+@pytest.mark.parametrize("start, chunks, interval, fractions", [
+    (0, 4, 6 * HOUR, ["0.5", "0.75", "1", "1"]),
+    (3 * HOUR, 2, 6 * HOUR, ["0.6", "1"]),  # part buckets: 0.25 of 0.5, then 0.375 of 0.625
+    (18 * HOUR, 2, 6 * HOUR, ["0", "1"]),  # a quiet bucket, then across midnight into the busiest
+])
+def test_vwap_fractions_follow_the_profile(monkeypatch, start, chunks, interval, fractions):
+    job = _vwap(monkeypatch, start, chunks, interval)
+    assert [round(f, 6) for f in job.fractions] == [Decimal(f) for f in fractions]
+
+
+def test_vwap_slices_evenly_without_historical_volume(monkeypatch):
+    job = _vwap(monkeypatch, 0, 4, HOUR, profile=[0.0] * 4)
+    assert job.fractions == [Decimal(1) / 4, Decimal(2) / 4, Decimal(3) / 4, Decimal(1)]
+
+
+def test_vwap_slice_quantities_are_cumulative(monkeypatch):
+    job = _vwap(monkeypatch, 0, 4, 6 * HOUR)
+    assert job.slice_quantity(0) == Decimal("5")
+    job.sent = Decimal("4")  # the first slice fell short: the second makes it up
+    assert job.slice_quantity(1) == Decimal("3.5")
+    assert job.slice_quantity(3) == Decimal("6")
+
+
+class Placer:
+    def __init__(self, *bodies):
+        self.bodies = list(bodies)
+        self.quantities = []
+
+    def __call__(self, symbol, side, quantity):
+        self.quantities.append(quantity)
+        return OrderResult(200, self.bodies.pop(0))
+
+
+def test_twap_counts_what_a_slice_executed():
+    placer = Placer({"status": "EXPIRED", "executedQty": "0.4", "cummulativeQuoteQty": "20000"},
+                    {"status": "FILLED", "executedQty": "1.6", "cummulativeQuoteQty": "80000"})
+    job = TwapJob("BTCUSDT", "BUY", 2, 2, 1, place_fn=placer)
+    job.run_slice(0)
+    assert job.sent == Decimal("0.4")
+    job.run_slice(1)  # the expired remainder carries over
+    assert placer.quantities == [Decimal("1"), Decimal("1.6")]
+    assert job.sent == Decimal("2")
+
+
+def test_twap_counts_an_unsettled_slice_until_it_is_final():
+    job = TwapJob("BTCUSDT", "BUY", 2, 2, 1, place_fn=Placer())
+    tracker = get_order_tracker()
+    state = tracker.track("twap-unsettled-0", "BTCUSDT", "BUY", "MARKET", None, "1", strategy="twap")
+    job.sent, job.unsettled = Decimal("1"), {state.client_order_id: Decimal("1")}
+    job.settle()
+    assert job.sent == Decimal("1")  # still open: counted in full
+    report = {"c": state.client_order_id, "s": "BTCUSDT", "S": "BUY", "o": "MARKET", "q": "1", "z": "0.7",
+              "Z": "35000", "X": "PARTIALLY_FILLED", "x": "TRADE", "l": "0.7", "L": "50000", "i": 1, "E": 1}
+    tracker.apply_execution(report)
+    job.settle()
+    assert job.sent == Decimal("1")
+    tracker.apply_execution({**report, "X": "EXPIRED", "x": "EXPIRED", "l": "0", "E": 2})
+    job.settle()
+    assert job.sent == Decimal("0.7") and job.unsettled == {}
+
+
+def test_pov_trails_the_market_net_of_its_own_fills(monkeypatch):
+    job = PovJob("BTCUSDT", "BUY", 10, "0.2", 1, 10, place_fn=Placer())
+    monkeypatch.setattr(job.execution, "market_volume", lambda: 5.0)
+    monkeypatch.setattr(job, "min_notional", Decimal(0))
+    # 5 traded, 1 of it ours: the other 4 allow 1 in total at 20%
+    job.sent = Decimal("1")
+    assert job.slice_quantity(1) == Decimal(0)
+    # Counted in full but only 0.5 filled: others traded 4.5, which allows 1.125
+    tracker = get_order_tracker()
+    state = tracker.track("pov-unsettled-0", "BTCUSDT", "BUY", "MARKET", None, "1", strategy="pov")
+    tracker.apply_execution({"c": state.client_order_id, "s": "BTCUSDT", "S": "BUY", "o": "MARKET", "q": "1",
+                             "z": "0.5", "Z": "25000", "X": "PARTIALLY_FILLED", "x": "TRADE", "l": "0.5", "L": "50000",
+                             "i": 2, "E": 1})
+    job.unsettled = {state.client_order_id: Decimal("1")}
+    assert job.executed() == Decimal("0.5")
+    assert job.slice_quantity(1) == Decimal("0.125")
@@ -0,0 +1,186 @@
+import time
+
+import pytest
+
+from janvi_bot.advanced import grid_engine
+from janvi_bot.advanced.grid_engine import BUY, EMPTY, SELL, GridEngine
+from janvi_bot.order_journal import get_journal
+from janvi_bot.price_stream import get_cached_price, start_price_stream
+from janvi_bot.user_stream import OrderTracker, get_order_tracker
+
+SYMBOL = "BNBUSDT"  # the live grids' symbol: no other test trades it
+
+
+class Exchange:
+    """Order entry for an engine under test: records what it places and cancels"""
+
+    def __init__(self):
+        self.placed = []
+        self.cancelled = []
+        self.fail = False
+
+    def place(self, symbol, side, quantity, price, client_order_id, meta=None):
+        if self.fail:
+            raise RuntimeError("rejected")
+        self.placed.append((side, price, meta["level"]))
+
+    def cancel(self, symbol, client_order_id):
+        self.cancelled.append(client_order_id)
+
+
+@pytest.fixture
+def exchange():
+    return Exchange()
+
+
+def _grid(exchange, mid=100.0):
+    # Levels 98, 99, 100, 101, 102: BUYs below the mid, SELLs above, none at it
+    return GridEngine("TESTUSDT", 1.0, 5, 0.04, place_fn=exchange.place, cancel_fn=exchange.cancel).start(mid)
+
+
+def test_start_lays_both_sides_around_the_mid(exchange):
+    engine = _grid(exchange)
+    assert list(engine.prices) == [98.0, 99.0, 100.0, 101.0, 102.0]
+    assert list(engine.sides) == [BUY, BUY, EMPTY, SELL, SELL]
+    assert sorted(exchange.placed) == [("BUY", 98.0, 0), ("BUY", 99.0, 1), ("SELL", 101.0, 3), ("SELL", 102.0, 4)]
+
+
+def test_fill_refills_one_level_away(exchange):
+    engine = _grid(exchange)
+    exchange.placed.clear()
+    assert engine.on_fill(engine.order_ids[1])
+    assert engine.sides[1] == EMPTY and engine.sides[2] == SELL
+    assert exchange.placed == [("SELL", 100.0, 2)]
+
+    assert engine.on_fill(engine.order_ids[2])  # the round trip closes one spacing higher
+    assert engine.sides[1] == BUY and engine.sides[2] == EMPTY
+    assert (engine.fills, engine.round_trips, engine.realized) == (2, 1, 1.0)
+
+
+def test_fill_next_to_an_occupied_or_missing_level_places_nothing(exchange):
+    engine = _grid(exchange)
+    exchange.placed.clear()
+    engine.on_fill(engine.order_ids[0])  # level 1 still holds its BUY
+    engine.on_fill(engine.order_ids[4])  # level 3 still holds its SELL
+    assert exchange.placed == []
+    assert not engine.on_fill("someone-else")
+
+
+def test_failed_placement_frees_the_level(exchange):
+    engine = _grid(exchange)
+    exchange.fail = True
+    engine.on_fill(engine.order_ids[1])
+    assert engine.sides[2] == EMPTY and engine.order_ids[2] is None
+    assert engine.errors == 1
+
+
+def test_leaving_the_band_recenters(exchange):
+    engine = _grid(exchange)
+    old = [cid for cid in engine.order_ids if cid is not None]
+    assert not engine.check_band(101.5)
+    assert engine.check_band(105.0)
+    assert sorted(exchange.cancelled) == sorted(old)
+    assert engine.recenters == 1
+    assert list(engine.prices) == [102.9, 103.95, 105.0, 106.05, 107.1]
+    assert list(engine.sides) == [BUY, BUY, EMPTY, SELL, SELL]
+    assert not engine.on_fill(old[0])  # fills of the cancelled grid are not ours any more
+
+
+def test_release_frees_only_the_current_order_of_a_level(exchange):
+    engine = _grid(exchange)
+    cid = engine.order_ids[3]
+    assert engine.release(cid)
+    assert engine.sides[3] == EMPTY
+    engine.on_fill(engine.order_ids[1])
+    engine.on_fill(engine.order_ids[2])  # level 1 gets a new BUY
+    stale = "stale-order"
+    engine.level_of[stale] = 1
+    engine.release(stale)
+    assert engine.sides[1] == BUY
+
+
+def test_resume_rebuilds_levels_from_journaled_orders(exchange):
+    orders = [{"clientOrderId": "a", "side": "BUY", "meta": {"level": 0}},
+              {"clientOrderId": "b", "side": "SELL", "meta": {"level": 4}},
+              {"clientOrderId": "c", "side": "SELL", "meta": {}}]
+    engine = GridEngine("TESTUSDT", 1.0, 5, 0.04, place_fn=exchange.place, cancel_fn=exchange.cancel)
+    engine.resume(100.0, orders)
+    assert list(engine.sides) == [BUY, EMPTY, EMPTY, EMPTY, SELL]
+    assert engine.level_of == {"a": 0, "b": 4}
+    assert exchange.placed == []
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def _move(sim, price):
+    # Set the market, and trade there until the streamed price follows (the stream may still be connecting)
+    start_price_stream([SYMBOL], sim.ws_url)
+    sim.engine.set_price(SYMBOL, price)
+
+    def traded():
+        sim.engine.taker_flow(SYMBOL, 50)
+        time.sleep(0.05)
+        return abs((get_cached_price(SYMBOL) or 0) - price) < price * 0.002
+    assert _wait_for(traded)
+
+
+def _grid_orders(sim):
+    return {o.client_order_id: o for o in sim.engine.orders.values()
+            if o.symbol == SYMBOL and o.owner == "user" and o.status in ("NEW", "PARTIALLY_FILLED")}
+
+
+def test_live_grid_recenters_on_the_streamed_price(sim):
+    _move(sim, 500.0)
+    manager = grid_engine.run_grid(SYMBOL, 0.02, 5, 0.02)
+    try:
+        engine = manager.engines[SYMBOL]
+        assert _wait_for(lambda: len(_grid_orders(sim)) == 4)
+        top = engine.prices[-1]
+        _move(sim, 520.0)
+        manager.check_bands()
+        assert engine.recenters == 1
+        assert engine.prices[0] > top
+        assert _wait_for(lambda: all(o.price > top for o in _grid_orders(sim).values()))
+    finally:
+        manager.stop()
+
+
+def test_resumed_grid_refills_levels_filled_while_down(sim, monkeypatch):
+    _move(sim, 500.0)
+    manager = grid_engine.run_grid(SYMBOL, 0.02, 5, 0.02)
+    engine = manager.engines[SYMBOL]
+    job, buy, prices = engine.job, engine.order_ids[1], list(engine.prices)
+    assert _wait_for(lambda: len(_grid_orders(sim)) == 4)
+
+    # The process dies: nothing follows the grid, and the fill below never reaches the journal
+    journal = get_journal()
+    journal.flush()
+    manager._band_job.cancel()
+    manager.engines.clear()
+    record = journal.record
+    monkeypatch.setattr(journal, "record", lambda kind, *args, **kwargs: None)
+    sim.engine.set_price(SYMBOL, prices[1] - 1)  # trades through the level 1 BUY
+    assert _wait_for(lambda: get_order_tracker().get(buy).status == "FILLED")
+    monkeypatch.setattr(journal, "record", record)
+
+    # A new process: its tracker only knows what the journal says
+    tracker = OrderTracker()
+    monkeypatch.setattr(grid_engine, "get_order_tracker", lambda: tracker)
+    resumed = grid_engine.resume_grids()
+    try:
+        engine = resumed.engines[SYMBOL]
+        assert engine.job == job and list(engine.prices) == prices
+        # The level 1 BUY is looked up, found filled, and answered with a SELL at level 2
+        assert _wait_for(lambda: engine.sides[2] == SELL)
+        assert list(engine.sides) == [BUY, EMPTY, SELL, SELL, SELL]
+        assert engine.fills == 1
+    finally:
+        resumed.stop()
+    assert job not in journal.recover("grid")
@@ -0,0 +1,67 @@
+import pytest
+
+from janvi_bot.metrics import Histogram, Registry, SUB_BUCKETS, _bucket_index, _bucket_upper
+
+
+def test_buckets_are_exact_below_the_sub_bucket_count_then_log_linear():
+    assert [_bucket_index(v) for v in (0, 1, SUB_BUCKETS - 1)] == [0, 1, SUB_BUCKETS - 1]
+    # 128..255 share buckets two microseconds wide, 256..511 four wide
+    assert _bucket_index(128) == _bucket_index(129) != _bucket_index(130)
+    assert (_bucket_upper(_bucket_index(128)), _bucket_upper(_bucket_index(255))) == (129, 255)
+    assert _bucket_index(256) == _bucket_index(259) != _bucket_index(260)
+
+    previous_upper = -1
+    for index in range(_bucket_index(10 ** 7) + 1):
+        upper = _bucket_upper(index)
+        # Buckets tile the value range without gaps, each within 1/64 of its lower edge
+        assert _bucket_index(previous_upper + 1) == index and _bucket_index(upper) == index
+        assert upper - previous_upper - 1 <= (previous_upper + 1) / 64
+        previous_upper = upper
+
+
+def test_values_past_the_range_land_in_the_last_bucket():
+    histogram = Histogram()
+    histogram.record(10 ** 6)
+    assert histogram.counts[-1] == 1 and histogram.quantile(1.0) == 10 ** 6
+
+
+def test_quantiles_of_a_uniform_distribution():
+    histogram = Histogram()
+    for ms in range(1000, 0, -1):
+        histogram.record(ms / 1000)
+    assert histogram.count == 1000 and histogram.min == 0.001 and histogram.max == 1.0
+    for q, exact in ((0.5, 0.5), (0.99, 0.99), (0.999, 0.999)):
+        assert exact <= histogram.quantile(q) <= exact * (1 + 1 / 64)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1000 and snapshot["max_ms"] == 1000.0
+    assert 990 <= snapshot["p99_ms"] <= 990 * (1 + 1 / 64)
+    assert Histogram().quantile(0.99) is None
+
+
+def test_prometheus_text_format():
+    registry = Registry()
+    registry.histogram(("send", "/api/v3/order", "BTCUSDT", "grid")).record(0.002)
+    registry.add_collector(lambda: [("bot_cache_hits_total", "counter", "Response cache hits",
+                                     [({"cache": 'pri"ce'}, 3)]),
+                                    ("bot_up", "gauge", "Up", [({}, 1)])])
+
+    def broken():
+        raise RuntimeError("no client")
+    registry.add_collector(broken)
+
+    labels = 'span="send",endpoint="/api/v3/order",symbol="BTCUSDT",strategy="grid"'
+    assert registry.render_prometheus().splitlines() == [
+        "# HELP bot_order_span_seconds Latency of each order-lifecycle step",
+        "# TYPE bot_order_span_seconds summary",
+        *(f'bot_order_span_seconds{{{labels},quantile="{q}"}} 0.002000' for q in (0.5, 0.9, 0.99, 0.999)),
+        f"bot_order_span_seconds_sum{{{labels}}} 0.002000",
+        f"bot_order_span_seconds_count{{{labels}}} 1",
+        "# HELP bot_cache_hits_total Response cache hits",
+        "# TYPE bot_cache_hits_total counter",
+        'bot_cache_hits_total{cache="pri\\"ce"} 3',
+        "# HELP bot_up Up",
+        "# TYPE bot_up gauge",
+        "bot_up 1",
+        "# collector broken failed: no client",
+    ]
+    assert registry.render_prometheus().endswith("\n")
@@ -0,0 +1,32 @@
+import threading
+
+from janvi_bot.advanced import oco
+from janvi_bot.risk_engine import get_risk_engine
+
+
+def _run_main(argv, timeout=10):
+    thread = threading.Thread(target=oco.main, args=(argv,), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def test_placed_oco_reports_it(sim):
+    price = float(sim.engine.set_price("BTCUSDT", 50000.0))
+    assert oco.place_oco_order("BTCUSDT", "SELL", 0.01, price * 0.01, price * 0.01) is True
+
+
+def test_follow_returns_when_the_oco_is_refused(sim):
+    # Nothing was placed, so no leg will ever fill: --follow must not wait for one
+    sim.engine.set_price("BTCUSDT", 50000.0)
+    engine = get_risk_engine()
+    engine.kill("test")
+    try:
+        assert oco.place_oco_order("BTCUSDT", "SELL", 0.01, 500, 500) is False
+        assert _run_main(["oco", "BTCUSDT", "SELL", "0.01", "500", "500", "--follow"])
+    finally:
+        engine.resume()
+
+
+def test_follow_returns_when_the_price_is_unknown():
+    assert _run_main(["oco", "NOSUCHUSDT", "SELL", "0.01", "500", "500", "--follow"])
@@ -0,0 +1,108 @@
+import json
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from janvi_bot import order_batcher
+from janvi_bot.exchange_backend import OrderResult
+from janvi_bot.order_batcher import BatchError, BatchFuture, OrderBatcher
+from janvi_bot.user_stream import make_client_order_id
+
+
+@pytest.fixture
+def batcher():
+    batcher = OrderBatcher(linger=60, strategy="test")
+    yield batcher
+    batcher.stop()
+
+
+def _params(price, quantity="0.01"):
+    return {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": quantity, "price": f"{price:.2f}",
+            "timeInForce": "GTC", "newClientOrderId": make_client_order_id("test")}
+
+
+def test_batch_settles_every_order_with_its_own_result(sim, batcher):
+    price = float(sim.engine.set_price("BTCUSDT", 50000.0))
+    futures = [batcher.submit(_params(price * 0.9)), batcher.submit(_params(price * 0.9, quantity="0")),
+               batcher.submit(_params(price * 0.91))]
+    batcher.flush()
+    results = [future.result() for future in futures]
+    assert [r.status_code for r in results] == [200, 400, 200]
+    assert batcher.stats()["requests"] == 1
+
+
+def test_orders_missing_from_the_answer_fail(batcher, monkeypatch):
+    monkeypatch.setattr(batcher, "_post", lambda symbol, orders: [OrderResult(200, {"orderId": 1, "status": "NEW"})])
+    futures = [batcher.submit(_params(45000.0)) for _ in range(3)]
+    batcher.flush()
+    assert futures[0].result().status_code == 200
+    for future in futures[1:]:
+        with pytest.raises(BatchError):
+            future.result()
+
+
+def test_waiting_on_a_result_is_bounded():
+    with pytest.raises(FutureTimeoutError, match="within 0.01s"):
+        BatchFuture().result(timeout=0.01)
+
+
+class ScriptedFutures:
+    """A futures backend whose batchOrders answers are scripted: each answer maps the batch's orders to entries"""
+
+    name = "futures"
+
+    def __init__(self, *answers, resting=()):
+        self.answers = list(answers)
+        self.resting = set(resting)
+        self.batches = []
+        self.lookups = []
+        self.client = self
+        self.clock = None
+
+    def post(self, path, params, signed=False, strategy=None):
+        orders = json.loads(params["batchOrders"])
+        self.batches.append([o["newClientOrderId"] for o in orders])
+        return OrderResult(200, self.answers.pop(0)(orders))
+
+    def lookup_orders(self, symbol, cids, strategy=None):
+        self.lookups.append(list(cids))
+        reports = [{"clientOrderId": cid, "orderId": 9, "status": "NEW"} if cid in self.resting
+                   else {"clientOrderId": cid, "code": -2013} for cid in cids]
+        if not any("orderId" in r for r in reports):
+            return OrderResult(400, {"code": -2013, "msg": "Order does not exist."})
+        return OrderResult(200, reports)
+
+
+def _placed(order):
+    return {"clientOrderId": order["newClientOrderId"], "orderId": 1, "status": "NEW"}
+
+
+def test_throttled_and_lost_entries_are_resent(monkeypatch):
+    monkeypatch.setattr(order_batcher, "backoff", lambda attempt: 0.0)
+    backend = ScriptedFutures(
+        lambda orders: [_placed(orders[0]), {"code": -1003, "msg": "Too many requests"},
+                        {"code": -1007, "msg": "Timeout waiting for response from backend server."}],
+        lambda orders: [_placed(o) for o in orders])
+    batcher = OrderBatcher(backend, linger=60, strategy="test")
+    try:
+        futures = [batcher.submit(_params(45000.0 + i)) for i in range(3)]
+        batcher.flush()
+        assert [f.result().status_code for f in futures] == [200, 200, 200]
+    finally:
+        batcher.stop()
+    cids = backend.batches[0]
+    assert backend.lookups == [[cids[2]]] and backend.batches[1] == cids[1:]
+
+
+def test_unknown_entry_that_landed_is_not_sent_again():
+    backend = ScriptedFutures(lambda orders: [_placed(orders[0]), {"code": -1000, "msg": "Unknown error"}])
+    batcher = OrderBatcher(backend, linger=60, strategy="test")
+    try:
+        futures = [batcher.submit(_params(45000.0)), batcher.submit(_params(45001.0))]
+        backend.resting.add(batcher._pending["BTCUSDT"][1][0]["newClientOrderId"])
+        batcher.flush()
+        results = [f.result() for f in futures]
+    finally:
+        batcher.stop()
+    assert [r.status_code for r in results] == [200, 200] and results[1].json()["orderId"] == 9
+    assert len(backend.batches) == 1
@@ -0,0 +1,75 @@
+import threading
+
+from janvi_bot.order_book import OrderBook
+
+
+class Snapshots:
+    """fetch_snapshot for an OrderBook: hands out queued snapshots, each once the test releases it"""
+
+    def __init__(self, *snapshots):
+        self.queue = list(snapshots)
+        self.released = threading.Semaphore(0)
+        self.fetched = 0
+
+    def __call__(self, symbol):
+        self.released.acquire()
+        self.fetched += 1
+        return self.queue.pop(0)
+
+
+def _snapshot(last_update_id, bid=99.0, ask=101.0):
+    return {"lastUpdateId": last_update_id, "bids": [[str(bid), "1"]], "asks": [[str(ask), "1"]]}
+
+
+def _diff(first, last, bids=(), asks=(), **extra):
+    return {"U": first, "u": last, "b": [[str(p), str(q)] for p, q in bids], "a": [[str(p), str(q)] for p, q in asks],
+            **extra}
+
+
+def test_buffered_updates_bridge_onto_the_snapshot():
+    snapshots = Snapshots(_snapshot(3))
+    book = OrderBook("BTCUSDT", snapshots)
+    book.on_diff(_diff(1, 2, bids=[(98.0, 5)]))          # already in the snapshot: dropped
+    book.on_diff(_diff(3, 6, asks=[(101.0, 0)]))         # straddles it
+    book.on_diff(_diff(7, 8, asks=[(102.0, 2)]))
+    snapshots.released.release()
+    assert book.wait_synced(2)
+    assert book.last_update_id == 8 and book.best() == (99.0, 102.0)
+    assert book.levels("bids") == [(99.0, 1.0)]
+
+
+def test_gap_resyncs_from_a_fresh_snapshot():
+    snapshots = Snapshots(_snapshot(3), _snapshot(11, bid=97.0))
+    book = OrderBook("BTCUSDT", snapshots)
+    book.on_diff(_diff(4, 5))
+    snapshots.released.release()
+    assert book.wait_synced(2)
+
+    book.on_diff(_diff(10, 12, bids=[(98.0, 3)]))        # 6..9 never arrived
+    assert not book.synced and book.gaps == 1
+    snapshots.released.release()
+    assert book.wait_synced(2)
+    assert book.last_update_id == 12 and book.best() == (98.0, 101.0)
+    assert book.resyncs == 2 and snapshots.fetched == 2
+
+
+def test_snapshot_older_than_the_buffer_is_fetched_again():
+    snapshots = Snapshots(_snapshot(1), _snapshot(6))
+    book = OrderBook("BTCUSDT", snapshots)
+    book.on_diff(_diff(5, 7, bids=[(99.5, 1)]))
+    snapshots.released.release()
+    snapshots.released.release()
+    assert book.wait_synced(3)
+    assert snapshots.fetched == 2 and book.last_update_id == 7 and book.best() == (99.5, 101.0)
+
+
+def test_futures_updates_chain_on_previous_final_id():
+    snapshots = Snapshots(_snapshot(10))
+    book = OrderBook("BTCUSDT", snapshots)
+    book.on_diff(_diff(9, 12, pu=8))
+    snapshots.released.release()
+    assert book.wait_synced(2)
+    book.on_diff(_diff(14, 15, pu=12))                   # U skips, but pu links it: in sequence
+    assert book.synced and book.last_update_id == 15
+    book.on_diff(_diff(17, 18, pu=16))
+    assert not book.synced and book.gaps == 1
@@ -0,0 +1,77 @@
+from janvi_bot.exchange_backend import OrderResult, SpotBackend
+from janvi_bot.order_journal import OrderJournal
+from janvi_bot.user_stream import OrderTracker, make_client_order_id
+
+
+def _request(journal, job, cid, price="44000"):
+    journal.record("request", job, cid, symbol="BTCUSDT", side="BUY", type="LIMIT", price=price, qty="0.001",
+                   strategy="test", meta={"job": job})
+
+
+def test_recover_returns_unfinished_jobs_with_their_last_state(tmp_path):
+    path = str(tmp_path / "journal.db")
+    journal = OrderJournal(path)
+    running, finished = journal.intent("twap", {"symbol": "BTCUSDT"}), journal.intent("twap", {"symbol": "BTCUSDT"})
+    _request(journal, running, "a")
+    _request(journal, running, "b")
+    _request(journal, finished, "c")
+    journal.ack("a", OrderResult(200, {"orderId": 1, "status": "NEW", "executedQty": "0"}), "BTCUSDT")
+    journal.record("update", cid="a", status="FILLED", executedQty="0.001")
+    # An ack that arrives after the stream reported the fill
+    journal.ack("a", OrderResult(200, {"orderId": 1, "status": "NEW", "executedQty": "0"}), "BTCUSDT")
+    journal.ack("b", OrderResult(400, {"code": -2010, "msg": "insufficient balance"}), "BTCUSDT")
+    journal.progress(running, chunk=2)
+    journal.progress(running, chunk=3)
+    journal.done(finished)
+    journal.flush()
+
+    # A new process reads the same file
+    jobs = OrderJournal(path).recover("twap")
+    assert list(jobs) == [running]
+    record = jobs[running]
+    assert record.params == {"symbol": "BTCUSDT"} and record.progress == {"chunk": 3}
+    assert record.orders["a"]["status"] == "FILLED" and record.orders["b"]["status"] == "REJECTED"
+    assert record.open_orders() == [] and str(record.executed_qty()) == "0.001"
+
+
+def test_reconcile_settles_orders_left_pending_by_a_crash(sim, tmp_path):
+    journal = OrderJournal(str(tmp_path / "journal.db"))
+    backend = SpotBackend()
+    job = journal.intent("twap", {"symbol": "BTCUSDT"})
+    landed, lost = make_client_order_id("test"), make_client_order_id("test")
+    for cid in (landed, lost):
+        _request(journal, job, cid)
+    # The first order reached the exchange; the process died before either ack was journaled
+    assert backend.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.001",
+                              "price": "44000", "timeInForce": "GTC", "newClientOrderId": landed}).status_code == 200
+
+    tracker = OrderTracker()
+    record = journal.reconcile(journal.recover("twap")[job], backend, tracker)
+    assert record.orders[landed]["status"] == "NEW" and record.orders[lost]["status"] == "NOT_FOUND"
+    assert tracker.orders[landed].status == "NEW" and tracker.orders[lost].status == "REJECTED"
+    assert [o["clientOrderId"] for o in record.open_orders()] == [landed]
+
+    journal.flush()
+    assert journal.recover("twap")[job].orders[lost]["status"] == "NOT_FOUND"
+
+
+def test_unknown_ack_is_looked_up_after_a_crash(sim, tmp_path):
+    journal = OrderJournal(str(tmp_path / "journal.db"))
+    backend = SpotBackend()
+    job = journal.intent("twap", {"symbol": "BTCUSDT"})
+    landed, lost, refused = (make_client_order_id("test") for _ in range(3))
+    for cid in (landed, lost, refused):
+        _request(journal, job, cid)
+    assert backend.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.001",
+                              "price": "44000", "timeInForce": "GTC", "newClientOrderId": landed}).status_code == 200
+    # The answers the process saw before it died: two unknown outcomes and one refusal
+    timeout = OrderResult(503, {"code": -1007, "msg": "Timeout waiting for response from backend server."})
+    journal.ack(landed, timeout, "BTCUSDT")
+    journal.ack(lost, OrderResult(502, {}), "BTCUSDT")
+    journal.ack(refused, OrderResult(400, {"code": -1013, "msg": "Filter failure: LOT_SIZE"}), "BTCUSDT")
+    journal.flush()
+
+    record = OrderJournal(journal.path).recover("twap")[job]
+    assert [record.orders[cid]["status"] for cid in (landed, lost, refused)] == ["UNKNOWN", "UNKNOWN", "REJECTED"]
+    journal.reconcile(record, backend, OrderTracker())
+    assert [record.orders[cid]["status"] for cid in (landed, lost, refused)] == ["NEW", "NOT_FOUND", "REJECTED"]
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from requests.exceptions import ConnectTimeout, ReadTimeout
+
+from janvi_bot.exchange_backend import OrderResult, SpotBackend
+from janvi_bot.order_retry import FATAL, OK, TRANSIENT, UNKNOWN, classify, send_order, send_order_async
+from janvi_bot.user_stream import make_client_order_id
+
+ACK = OrderResult(200, {"orderId": 7, "status": "NEW"})
+MISSING = OrderResult(400, {"code": -2013, "msg": "Order does not exist."})
+
+
+def _error(status, code, msg="x"):
+    return OrderResult(status, {"code": code, "msg": msg})
+
+
+@pytest.mark.parametrize("response, error, kind", [
+    (ACK, None, OK),
+    (_error(429, -1003), None, TRANSIENT),
+    (_error(400, -1021), None, TRANSIENT),
+    (None, ConnectTimeout(), TRANSIENT),
+    (None, ReadTimeout(), UNKNOWN),
+    (_error(503, -1007), None, UNKNOWN),
+    (_error(502, 0), None, UNKNOWN),
+    (_error(400, -2010, "Duplicate order sent."), None, UNKNOWN),
+    (_error(400, -2010, "Account has insufficient balance"), None, FATAL),
+    (_error(400, -1013), None, FATAL),
+])
+def test_classify(response, error, kind):
+    assert classify(response, error) == kind
+
+
+def _script(*answers):
+    calls = []
+
+    def call(name):
+        def run():
+            calls.append(name)
+            answer = answers[len(calls) - 1]
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+        return run
+    return calls, call("send"), call("lookup")
+
+
+def test_unknown_outcome_is_looked_up_before_any_resend():
+    calls, send, lookup = _script(ReadTimeout(), ACK)
+    assert send_order(send, lookup, "c1", sleep=lambda s: None) is ACK
+    assert calls == ["send", "lookup"]
+
+
+def test_order_that_never_arrived_is_resent_at_once():
+    sleeps = []
+    calls, send, lookup = _script(_error(503, -1007), MISSING, ACK)
+    assert send_order(send, lookup, "c2", sleep=sleeps.append) is ACK
+    assert calls == ["send", "lookup", "send"]
+    assert len(sleeps) == 1
+
+
+def test_transient_failures_back_off_and_fatal_ones_return():
+    sleeps = []
+    refusal = _error(400, -2010, "Account has insufficient balance")
+    calls, send, lookup = _script(_error(429, -1003), _error(400, -1015), refusal)
+    assert send_order(send, lookup, "c3", sleep=sleeps.append) is refusal
+    assert calls == ["send", "send", "send"]
+    assert len(sleeps) == 2 and all(s > 0 for s in sleeps)
+
+
+def test_gives_up_with_the_last_error():
+    calls, send, lookup = _script(ReadTimeout(), ReadTimeout(), ReadTimeout())
+    with pytest.raises(ReadTimeout):
+        send_order(send, lookup, "c4", retries=2, sleep=lambda s: None)
+    assert calls == ["send", "lookup", "lookup"]
+
+
+def test_async_sender_follows_the_same_policy():
+    calls = []
+
+    async def send():
+        calls.append("send")
+        return _error(503, -1007) if len(calls) == 1 else ACK
+
+    async def lookup():
+        calls.append("lookup")
+        return MISSING
+
+    assert asyncio.run(send_order_async(send, lookup, "c5")) is ACK
+    assert calls == ["send", "lookup", "send"]
+
+
+def test_lost_acks_never_duplicate_an_order(sim, monkeypatch):
+    # Every POST executes but answers -1007
+    monkeypatch.setattr(sim, "unknown_rate", 1.0)
+    backend = SpotBackend()
+    cid = make_client_order_id("test")
+    response = backend.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.001",
+                                  "price": "44000", "timeInForce": "GTC", "newClientOrderId": cid})
+    assert response.status_code == 200 and response.json()["clientOrderId"] == cid
+    assert [o.client_order_id for o in sim.engine.orders.values()].count(cid) == 1
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sqlite3
+
+from janvi_bot import order_retry
+from janvi_bot.order_journal import get_journal
+from janvi_bot.order_router import Account, OrderRouter
+from janvi_bot.risk_engine import get_risk_engine
+from janvi_bot.sim_exchange import SimHandler
+
+
+def _route(intent):
+    async def run():
+        router = await OrderRouter([Account("router", "test", "test", os.environ["BINANCE_BASE_URL"])]).open()
+        try:
+            return await router.route(intent)
+        finally:
+            await router.close()
+    return asyncio.run(run())
+
+
+def _resting(sim, client_order_id):
+    return [o for o in sim.engine.orders.values() if o.client_order_id == client_order_id]
+
+
+def _acks(client_order_id):
+    journal = get_journal()
+    journal.flush()
+    with sqlite3.connect(journal.path) as db:
+        return db.execute("SELECT status FROM events WHERE kind = 'ack' AND cid = ?", (client_order_id,)).fetchall()
+
+
+def test_lost_answer_is_looked_up_not_sent_twice(sim, monkeypatch):
+    # Every POST executes but answers -1007: the router must find the order instead of resending it
+    monkeypatch.setattr(sim, "unknown_rate", 1.0)
+    result = _route({"id": 1, "type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.001, "price": 45000})
+    assert result["status"] == "NEW" and result["order_id"] is not None
+    assert len(_resting(sim, result["client_order_id"])) == 1
+    assert _acks(result["client_order_id"]) == [("NEW",)]
+
+
+def test_oco_legs_are_journaled(sim):
+    result = _route({"id": 2, "type": "oco", "symbol": "BTCUSDT", "side": "SELL", "quantity": 0.001})
+    assert result["status"] == "EXECUTING"
+    legs = [o.client_order_id for o in sim.engine.orders.values() if o.client_order_id.startswith("r-oco")]
+    assert len(legs) == 2
+    for cid in legs:
+        assert _acks(cid) == [("NEW",)]
+
+
+def _proxy_errors(monkeypatch, methods):
+    # An HTML 502 in place of the exchange's answer, after the request was handled
+    reply = SimHandler._reply
+
+    def html_reply(handler, status, body, headers=None):
+        if handler.command not in methods or not handler.path.startswith("/api/v3/order"):
+            return reply(handler, status, body, headers)
+        payload = b"<html><body>502 Bad Gateway</body></html>"
+        handler.send_response(502)
+        handler.send_header("Content-Type", "text/html")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    monkeypatch.setattr(SimHandler, "_reply", html_reply)
+
+
+def test_undecodable_answer_is_looked_up(sim, monkeypatch):
+    _proxy_errors(monkeypatch, ("POST",))
+    result = _route({"id": 3, "type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.001, "price": 45000})
+    assert result["status"] == "NEW"
+    assert len(_resting(sim, result["client_order_id"])) == 1
+    assert _acks(result["client_order_id"]) == [("NEW",)]
+
+
+def test_order_whose_outcome_stays_unknown_is_settled_as_unknown(sim, monkeypatch):
+    _proxy_errors(monkeypatch, ("POST", "GET"))
+    monkeypatch.setattr(order_retry, "RETRY_BASE", 0.001)
+    result = _route({"id": 4, "type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.001, "price": 45000})
+    cid = result["client_order_id"]
+    assert result["status"] == "UNKNOWN"
+    assert _acks(cid) == [("UNKNOWN",)]
+    # It may rest on the book: the risk engine keeps counting it until the stream or a lookup says otherwise
+    assert cid in get_risk_engine().orders
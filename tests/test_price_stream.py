@@ -0,0 +1,31 @@
+from janvi_bot import risk_engine
+from janvi_bot.price_stream import get_cached_price, get_fresh_quote, get_price_stream, start_price_stream, update_price
+from janvi_bot.risk_engine import RiskEngine
+
+FUTURES = "ws://futures.test"
+
+
+def test_each_market_has_its_own_prices():
+    update_price("MKTUSDT", 100.0)
+    update_price("MKTUSDT", 200.0, url=FUTURES)
+    assert get_cached_price("MKTUSDT") == 100.0
+    assert get_cached_price("MKTUSDT", FUTURES) == get_fresh_quote("MKTUSDT", url=FUTURES + "/").price == 200.0
+    assert get_cached_price("ONLYSPOTUSDT", FUTURES) is None
+
+
+def test_streams_are_per_market(sim):
+    stream = start_price_stream(["BTCUSDT"], sim.ws_url)
+    assert get_price_stream(sim.ws_url) is stream
+    assert start_price_stream(["ETHUSDT"], sim.ws_url + "/") is stream and "ETHUSDT" in stream.symbols
+    assert get_price_stream(FUTURES) is None
+
+
+def test_futures_orders_are_banded_against_futures_prices(monkeypatch):
+    monkeypatch.setattr(risk_engine, "FUTURES_WS_URL", FUTURES)
+    update_price("BANDUSDT", 100.0)
+    update_price("BANDUSDT", 200.0, url=FUTURES)
+    risk = RiskEngine(kill_file=None)
+    assert risk.check("band-f", "BANDUSDT", "BUY", 1, 195.0, account="futures") is None
+    # The same price is 95% off the spot market
+    assert "band" in risk.check("band-s", "BANDUSDT", "BUY", 1, 195.0, account="spot")
+    assert risk.rejected == {"price_band": 1}
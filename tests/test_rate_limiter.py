@@ -0,0 +1,45 @@
+import os
+
+from janvi_bot.rate_limiter import BACKOFF_BASE, RateLimiter
+from janvi_bot.rest_client import RestClient
+
+
+def test_buckets_follow_the_exchanges_count():
+    limiter = RateLimiter(weight_limit=1000, order_limit_10s=50)
+    limiter.on_response(200, {"X-MBX-USED-WEIGHT-1M": "400", "x-mbx-order-count-10s": "45"})
+    room = limiter.headroom()
+    assert 600 <= room["weight_1m"] <= 601 and room["orders_10s"] == 5
+
+
+def test_new_intervals_get_their_own_bucket_and_other_kinds_are_left_alone():
+    limiter = RateLimiter(weight_limit=1000, order_limit_10s=50)
+    limiter.on_response(200, {"X-MBX-ORDER-COUNT-1M": "3", "X-MBX-USED-WEIGHT-1M": "900", "Content-Type": "x"},
+                        kinds=("order-count",))
+    room = limiter.headroom()
+    assert room["weight_1m"] == 1000 and "orders_1m" in room
+
+
+def test_an_order_that_does_not_fit_spends_nothing():
+    limiter = RateLimiter(weight_limit=1000, order_limit_10s=50)
+    limiter.on_response(200, {"X-MBX-ORDER-COUNT-10S": "50"})
+    assert limiter.try_acquire("POST", "/api/v3/order") > 0
+    assert limiter.headroom()["weight_1m"] == 1000
+    # A GET costs weight only and still goes
+    assert limiter.try_acquire("GET", "/api/v3/ticker/price") == 0
+
+
+def test_429_backs_off_for_retry_after_and_a_success_clears_the_strikes():
+    limiter = RateLimiter()
+    delay = limiter.on_response(429, {"Retry-After": "5"})
+    assert 5 <= delay <= 5 + BACKOFF_BASE
+    assert limiter.time_until("GET", "/api/v3/time") > 4
+    assert limiter.strikes == 1
+    limiter.on_response(200, {})
+    assert limiter.strikes == 0
+
+
+def test_client_syncs_from_the_simulators_headers(sim):
+    limiter = RateLimiter(weight_limit=6000)
+    client = RestClient(base_url=os.environ["BINANCE_BASE_URL"], limiter=limiter)
+    assert client.get("/api/v3/ticker/price", {"symbol": "BTCUSDT"}).status_code == 200
+    assert limiter.headroom()["weight_1m"] == 6000 - sim.limits.weight_used
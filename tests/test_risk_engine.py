@@ -0,0 +1,180 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from janvi_bot import risk_engine
+from janvi_bot.exchange_backend import OrderResult, get_backend
+from janvi_bot.price_stream import update_price
+from janvi_bot.risk_engine import RiskEngine, get_risk_engine, is_risk_rejection
+from janvi_bot.user_stream import OrderTracker, get_order_tracker, make_client_order_id
+
+SYMBOL = "RISKUSDT"  # only priced through update_price: nothing else in the session trades it
+
+
+@pytest.fixture
+def engine(tmp_path):
+    update_price(SYMBOL, 100.0)
+    return RiskEngine(max_symbol_notional=1000, max_account_notional=1500, max_open_orders=3, price_band=0.1,
+                      kill_file=str(tmp_path / "KILL"))
+
+
+def _exposure(engine, symbol=SYMBOL, account="spot"):
+    return engine.snapshot()["accounts"][account]["symbols"][symbol]["exposure"]
+
+
+def test_symbol_notional_limit(engine):
+    assert engine.check("a", SYMBOL, "BUY", 6, 100) is None
+    assert engine.check("b", SYMBOL, "BUY", 5, 100) is not None  # 1100 > 1000
+    assert engine.rejected == {"symbol_notional": 1}
+    assert _exposure(engine) == 600
+
+
+def test_order_lowering_exposure_passes_over_the_limit(engine):
+    engine.update("fill", 12, 1200, "FILLED", SYMBOL, "BUY", 100, 12)  # a long of 1200, over the limit
+    assert engine.check("more", SYMBOL, "BUY", 1, 100) is not None
+    assert engine.check("less", SYMBOL, "SELL", 5, 100) is None
+
+
+def test_account_notional_limit(engine):
+    update_price("OTHERUSDT", 10.0)
+    assert engine.check("a", SYMBOL, "BUY", 9, 100) is None
+    assert engine.check("b", "OTHERUSDT", "SELL", 50, 10) is None
+    assert engine.check("c", "OTHERUSDT", "SELL", 20, 10) is not None  # 900 + 700 > 1500
+    assert engine.rejected == {"account_notional": 1}
+
+
+def test_open_order_limit_and_release(engine):
+    for cid in ("a", "b", "c"):
+        assert engine.check(cid, SYMBOL, "BUY", 1, 100) is None
+    assert engine.check("d", SYMBOL, "BUY", 1, 100) is not None
+    engine.on_ack("a", OrderResult(400, {"code": -2010, "msg": "Account has insufficient balance."}))
+    assert engine.check("d", SYMBOL, "BUY", 1, 100) is None
+
+
+def test_unknown_outcome_keeps_the_reservation(engine):
+    assert engine.check("a", SYMBOL, "BUY", 5, 100) is None
+    engine.on_ack("a", OrderResult(408, {"code": -1007, "msg": "Timeout waiting for response."}))
+    assert _exposure(engine) == 500
+
+
+def test_price_band(engine):
+    assert engine.check("a", SYMBOL, "BUY", 1, 111) is not None
+    assert engine.check("b", SYMBOL, "BUY", 1, 109) is None
+
+
+def test_fills_move_open_exposure_into_the_position(engine):
+    assert engine.check("a", SYMBOL, "BUY", 4, 100) is None
+    engine.update("a", 1, 100, "PARTIALLY_FILLED")
+    engine.update("a", 1, 100, "PARTIALLY_FILLED")  # the same state twice changes nothing
+    symbols = engine.snapshot()["accounts"]["spot"]["symbols"][SYMBOL]
+    assert (symbols["position"], symbols["open_buys"]) == (100, 300)
+    engine.update("a", 1, 100, "CANCELED")
+    assert engine.snapshot()["accounts"]["spot"] == {"exposure": 100, "open_orders": 0, "symbols": {
+        SYMBOL: {"position": 100, "open_buys": 0, "open_sells": 0, "exposure": 100}}}
+
+
+def test_kill_switch(engine, tmp_path, monkeypatch):
+    engine.kill("test")
+    assert "kill switch" in engine.check("a", SYMBOL, "BUY", 1, 100)
+    engine.resume()
+    assert engine.check("a", SYMBOL, "BUY", 1, 100) is None
+
+    monkeypatch.setattr(risk_engine, "KILL_POLL", 0.0)
+    (tmp_path / "KILL").write_text("desk halt")
+    assert "desk halt" in engine.check("b", SYMBOL, "BUY", 1, 100)
+    (tmp_path / "KILL").unlink()
+    assert engine.check("b", SYMBOL, "BUY", 1, 100) is None
+    assert engine.rejected == {"kill_switch": 2}
+
+
+def test_replay_counts_acknowledged_orders_only(engine):
+    tracker = OrderTracker()
+    tracker.track("acked", SYMBOL, "BUY", "LIMIT", 100, 3)
+    tracker.apply_execution({"c": "acked", "s": SYMBOL, "S": "BUY", "o": "LIMIT", "p": "100", "q": "3", "z": "0",
+                             "X": "NEW", "x": "NEW", "i": 1, "E": 1})
+    tracker.track("in-flight", SYMBOL, "BUY", "LIMIT", 100, 5)  # tracked, not yet sent
+    engine.attach(tracker)
+    assert _exposure(engine) == 300
+    # The in-flight order still goes through every check when it is sent
+    assert engine.check("in-flight", SYMBOL, "BUY", 8, 100) is not None  # 300 + 800 > 1000
+    assert engine.check("in-flight", SYMBOL, "BUY", 5, 100) is None
+    assert _exposure(engine) == 800
+
+
+def test_resend_shortcut_only_for_orders_this_engine_approved(engine):
+    assert engine.check("mine", SYMBOL, "BUY", 5, 100) is None
+    engine.kill("test")
+    assert engine.check("mine", SYMBOL, "BUY", 5, 100) is not None  # the kill switch still applies
+    engine.resume()
+    assert engine.check("mine", SYMBOL, "BUY", 5, 100) is None  # a resend: not counted twice
+    assert _exposure(engine) == 500
+
+    # Learned from the exchange (a resumed job resending it): checked, and counted once
+    engine.update("theirs", 0, 0, "NEW", SYMBOL, "BUY", 100, 4)
+    assert engine.check("theirs", SYMBOL, "BUY", 4, 100) is None
+    assert _exposure(engine) == 900
+    assert engine.snapshot()["accounts"]["spot"]["open_orders"] == 2
+
+
+def test_oco_legs_are_refused_together(engine):
+    params = {"symbol": SYMBOL, "side": "SELL", "quantity": 3, "aboveType": "LIMIT_MAKER", "abovePrice": 105,
+              "belowType": "STOP_LOSS_LIMIT", "belowPrice": 80, "belowStopPrice": 80,
+              "aboveClientOrderId": "tp", "belowClientOrderId": "sl"}
+    assert engine.check_oco(params) is not None  # the stop is outside the price band
+    assert engine.snapshot()["accounts"]["spot"]["open_orders"] == 0
+
+
+def test_oco_counts_its_larger_leg_only(engine):
+    params = {"symbol": SYMBOL, "side": "SELL", "quantity": 8, "aboveType": "LIMIT_MAKER", "abovePrice": 105,
+              "belowType": "STOP_LOSS_LIMIT", "belowPrice": 95, "belowStopPrice": 95,
+              "aboveClientOrderId": "tp", "belowClientOrderId": "sl"}
+    assert engine.check_oco(params) is None  # 840 + 760 would be over the limit; one leg at most executes
+    account = engine.snapshot()["accounts"]["spot"]
+    assert (account["exposure"], account["open_orders"]) == (840, 2)
+    # The stop fills, the take-profit expires: the position is what was sold
+    engine.update("sl", 8, 760, "FILLED")
+    engine.update("tp", 0, 0, "EXPIRED")
+    assert engine.snapshot()["accounts"]["spot"] == {"exposure": 760, "open_orders": 0, "symbols": {
+        SYMBOL: {"position": -760, "open_buys": 0, "open_sells": 0, "exposure": 760}}}
+
+
+def test_simulated_market_order_is_checked(sim):
+    from janvi_bot.market_order import place_market_order
+    engine = get_risk_engine()
+    engine.kill("test")
+    try:
+        assert place_market_order("ETHUSDT", "BUY", "0.01") is None
+    finally:
+        engine.resume()
+    order = place_market_order("ETHUSDT", "BUY", "0.01")
+    assert order["status"] == "FILLED"
+    assert engine.snapshot()["accounts"]["sim"]["symbols"]["ETHUSDT"]["position"] > 0
+
+
+def test_tracked_order_is_checked_on_the_backend(sim, monkeypatch):
+    # Every order path tracks its order before new_order: the tracked order must still be checked
+    # (on ETHUSDT, where no other test leaves orders resting)
+    price = float(sim.engine.set_price("ETHUSDT", 3000.0))
+    monkeypatch.setattr(get_risk_engine(), "max_symbol_notional", 10.0)
+    backend = get_backend("spot")
+    cid = make_client_order_id("test")
+    params = {"symbol": "ETHUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.01", "price": f"{price * 0.99:.2f}",
+              "timeInForce": "GTC", "newClientOrderId": cid}
+    get_order_tracker().track(cid, "ETHUSDT", "BUY", "LIMIT", params["price"], "0.01", strategy="test")
+    response = backend.new_order(params, strategy="test")
+    assert is_risk_rejection(response)
+    assert get_order_tracker().get(cid).status == "REJECTED"
+
+
+def test_first_order_of_a_process_is_checked(sim):
+    # A fresh process: its first order used to be let through by the engine's replay of the tracker
+    price = float(sim.engine.set_price("ETHUSDT", 3000.0))
+    resting = len(sim.engine.orders)
+    src = os.path.dirname(os.path.dirname(risk_engine.__file__))
+    env = dict(os.environ, RISK_MAX_SYMBOL_NOTIONAL="10", PYTHONPATH=src)
+    out = subprocess.run([sys.executable, "-m", "janvi_bot.limit_order", "ETHUSDT", "BUY", "0.01",
+                          f"{price * 0.99:.2f}"], env=env, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert len(sim.engine.orders) == resting
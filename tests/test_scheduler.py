@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from janvi_bot.scheduler import CANCELLED, DONE, FAILED, PAUSED, Job, Scheduler
+
+
+class Recorder(Job):
+    """Records the slice indices it runs; slices can be held until released"""
+
+    def __init__(self, interval=0.01, count=None, hold=False):
+        super().__init__(interval, count)
+        self.indices = []
+        self.finished = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def run_slice(self, index):
+        self.indices.append(index)
+        self.entered.set()
+        self.release.wait(5)
+
+    def on_finish(self):
+        self.finished += 1
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler(max_workers=4).start()
+    yield scheduler
+    scheduler.stop()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_runs_every_slice_once_then_finishes(scheduler):
+    job = scheduler.submit(Recorder(count=5))
+    assert job.wait(5)
+    assert job.indices == [0, 1, 2, 3, 4]
+    assert (job.status, job.finished) == (DONE, 1)
+    assert job.id not in scheduler.jobs
+
+
+def test_pause_holds_slices_and_resume_continues(scheduler):
+    job = scheduler.submit(Recorder(interval=0.05, count=4))
+    assert _wait_for(lambda: len(job.indices) == 2)
+    job.pause()
+    fired = len(job.indices)
+    time.sleep(0.2)
+    assert len(job.indices) == fired and job.status == PAUSED
+    job.resume()
+    assert job.wait(5)
+    assert job.indices == [0, 1, 2, 3]
+
+
+def test_resume_during_a_running_slice_does_not_repeat_it(scheduler):
+    job = scheduler.submit(Recorder(interval=0.01, count=3, hold=True))
+    assert job.entered.wait(5)
+    job.pause()
+    job.resume()
+    job.resume()
+    time.sleep(0.05)
+    assert job.indices == [0]  # nothing re-armed while slice 0 still runs
+    job.release.set()
+    assert job.wait(5)
+    assert job.indices == [0, 1, 2]
+    assert job.finished == 1
+
+
+def test_cancel_while_paused(scheduler):
+    job = scheduler.submit(Recorder(interval=0.05))
+    assert job.entered.wait(5)
+    job.pause()
+    job.cancel()
+    job.resume()
+    time.sleep(0.1)
+    assert job.status == CANCELLED
+    assert job.indices == [0]
+
+
+def test_concurrent_cancel_and_finish_end_the_job_once(scheduler):
+    job = scheduler.submit(Recorder(interval=0.01, hold=True))
+    assert job.entered.wait(5)
+    threads = [threading.Thread(target=job.cancel) for _ in range(4)] + [threading.Thread(target=job.finish)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    job.release.set()
+    assert job.wait(5)
+    assert job.finished == 1
+    time.sleep(0.05)
+    assert job.indices == [0]  # the slice that was running was the last
+
+
+class Flaky(Recorder):
+    """Raises on the slices listed in `failing`"""
+
+    def __init__(self, failing, **kwargs):
+        super().__init__(**kwargs)
+        self.failing = set(failing)
+
+    def run_slice(self, index):
+        super().run_slice(index)
+        if index in self.failing:
+            raise OSError(f"slice {index} timed out")
+
+
+def test_a_failed_slice_is_skipped(scheduler):
+    job = scheduler.submit(Flaky({1, 2}, count=5))
+    assert job.wait(5)
+    assert job.indices == [0, 1, 2, 3, 4]
+    assert (job.status, job.errors, job.finished) == (DONE, 2, 1)
+
+
+def test_a_run_of_failed_slices_fails_the_job(scheduler):
+    job = scheduler.submit(Flaky(range(100), count=10))
+    assert job.wait(5)
+    assert job.status == FAILED and job.indices == list(range(Job.max_errors))
+    assert isinstance(job.error, OSError) and job.finished == 1
@@ -0,0 +1,123 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from janvi_bot.sim_exchange import MatchingEngine, SimError, batch_orders
+
+
+def _engine():
+    # No maker ladder: the book holds only what the test puts there
+    return MatchingEngine({"TESTUSDT": ("100.00", "0.01", "0.001", "0.001", "5.00")}, seed_liquidity=False)
+
+
+def _rest(engine, side, price, qty, cid=None):
+    return engine.new_order("TESTUSDT", side, "LIMIT", qty, price, client_order_id=cid, owner="flow")
+
+
+def _status(engine, order_id):
+    order = engine.orders[order_id]
+    return order.status, order.executed_qty
+
+
+def test_better_price_fills_first_then_time_priority_within_a_level():
+    engine = _engine()
+    first = _rest(engine, "SELL", "101.00", "1")
+    second = _rest(engine, "SELL", "101.00", "1")
+    better = _rest(engine, "SELL", "100.50", "1")
+
+    taker = engine.new_order("TESTUSDT", "BUY", "LIMIT", "2.5", "101.00")
+    assert [(Decimal(f["price"]), Decimal(f["qty"])) for f in taker["fills"]] == [
+        (Decimal("100.50"), 1), (Decimal("101.00"), 1), (Decimal("101.00"), Decimal("0.5"))]
+    assert taker["status"] == "FILLED" and Decimal(taker["cummulativeQuoteQty"]) == Decimal("252.00")
+    assert _status(engine, better["orderId"]) == ("FILLED", 1)
+    assert _status(engine, first["orderId"]) == ("FILLED", 1)
+    assert _status(engine, second["orderId"]) == ("PARTIALLY_FILLED", Decimal("0.5"))
+    assert engine.book_ticker("TESTUSDT")["askQty"] == "0.5"
+
+
+def test_unfilled_remainder_rests_or_expires():
+    engine = _engine()
+    _rest(engine, "SELL", "100.00", "1")
+    taker = engine.new_order("TESTUSDT", "BUY", "LIMIT", "3", "100.00")
+    assert taker["status"] == "PARTIALLY_FILLED" and Decimal(taker["executedQty"]) == 1
+    assert engine.depth("TESTUSDT")["bids"] == [["100.00", "2"]] and engine.depth("TESTUSDT")["asks"] == []
+
+    ioc = engine.new_order("TESTUSDT", "SELL", "LIMIT", "5", "100.00", time_in_force="IOC")
+    assert ioc["status"] == "EXPIRED" and Decimal(ioc["executedQty"]) == 2
+    assert engine.depth("TESTUSDT")["bids"] == [] and engine.depth("TESTUSDT")["asks"] == []
+
+    # A market order with nothing left to trade against expires unfilled
+    assert engine.new_order("TESTUSDT", "BUY", "MARKET", "1")["status"] == "EXPIRED"
+
+
+def _oco(engine):
+    result = engine.new_oco("TESTUSDT", "SELL", "1",
+                            {"type": "LIMIT_MAKER", "price": "105.00"},
+                            {"type": "STOP_LOSS_LIMIT", "price": "94.00", "stopPrice": "95.00", "timeInForce": "GTC"})
+    stop, take_profit = (r["orderId"] for r in result["orderReports"])
+    return take_profit, stop
+
+
+def test_oco_take_profit_fill_cancels_the_stop():
+    engine = _engine()
+    take_profit, stop = _oco(engine)
+    assert {o["orderId"] for o in engine.open_orders("TESTUSDT")} == {take_profit, stop}
+
+    engine.new_order("TESTUSDT", "BUY", "LIMIT", "0.4", "105.00", owner="flow")
+    assert _status(engine, take_profit) == ("PARTIALLY_FILLED", Decimal("0.4"))
+    assert _status(engine, stop)[0] == "CANCELED"
+    assert engine.orders[stop] not in engine.books["TESTUSDT"].stops
+
+
+def test_oco_stop_trigger_cancels_the_take_profit():
+    engine = _engine()
+    take_profit, stop = _oco(engine)
+    _rest(engine, "BUY", "95.00", "1")
+    _rest(engine, "BUY", "94.00", "1")
+
+    # A trade at 95 triggers the stop leg, which sells into the 94 bid
+    engine.new_order("TESTUSDT", "SELL", "MARKET", "1", owner="flow")
+    assert _status(engine, stop) == ("FILLED", 1)
+    assert engine.orders[stop].cum_quote == Decimal("94.00")
+    assert _status(engine, take_profit)[0] == "CANCELED"
+    assert engine.depth("TESTUSDT")["asks"] == [] and engine.open_orders("TESTUSDT") == []
+
+
+def _code(call, *args, **kwargs):
+    with pytest.raises(SimError) as raised:
+        call(*args, **kwargs)
+    return raised.value.code, raised.value.msg
+
+
+def test_error_codes():
+    engine = _engine()
+    new = engine.new_order
+    _rest(engine, "SELL", "101.00", "1", cid="resting")
+
+    assert _code(new, "NOPEUSDT", "BUY", "LIMIT", "1", "100.00")[0] == -1121
+    assert _code(new, "TESTUSDT", "BUY", "ICEBERG", "1", "100.00")[0] == -1116
+    assert _code(new, "TESTUSDT", "HOLD", "LIMIT", "1", "100.00")[0] == -1102
+    assert _code(new, "TESTUSDT", "BUY", "LIMIT", "1")[0] == -1102
+    assert _code(new, "TESTUSDT", "SELL", "STOP_MARKET", "1")[0] == -1102
+    assert _code(new, "TESTUSDT", "BUY", "LIMIT", "0.0015", "100.00") == (-1013, "Filter failure: LOT_SIZE")
+    assert _code(new, "TESTUSDT", "BUY", "LIMIT", "1", "100.005") == (-1013, "Filter failure: PRICE_FILTER")
+    assert _code(new, "TESTUSDT", "BUY", "LIMIT", "0.01", "100.00") == (-1013, "Filter failure: NOTIONAL")
+    assert _code(new, "TESTUSDT", "BUY", "LIMIT_MAKER", "1", "101.00")[0] == -2010
+    assert _code(new, "TESTUSDT", "SELL", "LIMIT", "1", "102.00", client_order_id="resting") == (-2010, "Duplicate order sent.")
+    assert _code(engine.new_oco, "TESTUSDT", "SELL", "1", {"type": "LIMIT_MAKER", "price": "99.00"},
+                 {"type": "STOP_LOSS_LIMIT", "price": "94.00", "stopPrice": "95.00"})[0] == -2010
+    assert _code(engine.get_order, "TESTUSDT", client_order_id="never-sent")[0] == -2013
+    # A cancelled order can be looked up but not cancelled again
+    engine.cancel_order("TESTUSDT", client_order_id="resting")
+    assert engine.get_order("TESTUSDT", client_order_id="resting")["status"] == "CANCELED"
+    assert _code(engine.cancel_order, "TESTUSDT", client_order_id="resting")[0] == -2011
+
+
+def test_batch_entries_fail_on_their_own():
+    engine = _engine()
+    order = {"symbol": "TESTUSDT", "side": "BUY", "type": "LIMIT", "quantity": "1", "price": "99.00"}
+    results = batch_orders(engine, {"batchOrders": json.dumps([order, {**order, "price": "99.001"}, order])})
+    assert [r.get("status") for r in results] == ["NEW", None, "NEW"]
+    assert results[1]["code"] == -1013
+    assert _code(batch_orders, engine, {"batchOrders": json.dumps([order] * 6)})[0] == -1130
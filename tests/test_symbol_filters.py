@@ -0,0 +1,38 @@
+import json
+
+from janvi_bot.rest_client import RestClient
+from janvi_bot.symbol_filters import ExchangeInfoCache
+
+
+def _saved(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_cache_file_is_reused_for_the_same_endpoint(sim, tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    ExchangeInfoCache(path).refresh()
+    cache = ExchangeInfoCache(path)
+    assert cache._load_disk()
+    assert "BTCUSDT" in cache.symbols
+
+
+def test_cache_file_from_another_base_url_is_refetched(sim, tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    ExchangeInfoCache(path).refresh()
+    saved = _saved(path)
+    source = saved["source"]
+
+    other = ExchangeInfoCache(path, client=RestClient(base_url="http://127.0.0.1:1"))
+    assert not other._load_disk()
+    assert other.symbols == {}
+
+    # Written before the source was recorded: trust nothing, fetch again
+    del saved["source"]
+    with open(path, "w") as f:
+        json.dump(saved, f)
+    cache = ExchangeInfoCache(path)
+    assert not cache._load_disk()
+    cache.refresh()
+    assert _saved(path)["source"] == source
+    assert cache._load_disk()
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+import pytest
+
+from janvi_bot import ttl_cache
+from janvi_bot.ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ttl_cache, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl=1.0)
+    cache.set("BTCUSDT", 50000)
+    clock.now += 0.999
+    assert cache.get("BTCUSDT")[1] == 50000
+    clock.now += 0.001
+    assert cache.get("BTCUSDT") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["size"] == 0
+
+    loads = []
+    assert cache.get_or_load("ETHUSDT", lambda: loads.append(1) or 3000) == 3000
+    clock.now += 0.5
+    assert cache.get_or_load("ETHUSDT", lambda: loads.append(1) or 3001) == 3000
+    clock.now += 0.5
+    assert cache.get_or_load("ETHUSDT", lambda: loads.append(1) or 3002) == 3002
+    assert len(loads) == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # b is now the oldest use
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a")[1] == 1 and cache.get("c")[1] == 3
+    cache.set("a", 10)      # rewriting refreshes too
+    cache.set("d", 4)
+    assert cache.get("c") is None and cache.get("a")[1] == 10
+    assert cache.stats()["evictions"] == 2 and cache.stats()["size"] == 2
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while cache.stats()["coalesced"] < 7:
+        release.wait(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == [42] * 8 and len(calls) == 1
+    assert cache.stats()["misses"] == 8 and cache.get_or_load("k", loader) == 42 and cache.hits == 1
+
+
+def test_concurrent_async_misses_share_one_load():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load_async("k", loader) for _ in range(8)))
+
+    assert asyncio.run(run()) == [42] * 8 and len(calls) == 1
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_a_failed_load_is_not_cached():
+    cache = TTLCache()
+
+    def broken():
+        raise ConnectionError("ticker timed out")
+    with pytest.raises(ConnectionError):
+        cache.get_or_load("k", broken)
+    assert cache.get("k") is None and cache.get_or_load("k", lambda: 7) == 7
+
+    async def broken_async():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("ticker timed out")
+
+    async def fixed():
+        return 8
+
+    async def run():
+        # Every waiter on the failed load sees its error; the next miss loads again
+        results = await asyncio.gather(*(cache.get_or_load_async("j", broken_async) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert cache.get("j") is None
+        return await cache.get_or_load_async("j", fixed)
+
+    assert asyncio.run(run()) == 8
@@ -0,0 +1,53 @@
+from janvi_bot.exchange_backend import OrderResult, get_backend
+from janvi_bot.user_stream import OrderTracker, get_order_tracker, make_client_order_id
+
+
+def _tracked(tracker, cid="t-1"):
+    return tracker.track(cid, "BTCUSDT", "BUY", "LIMIT", "50000", "0.01", strategy="test")
+
+
+def test_refused_ack_settles_a_pending_order():
+    tracker = OrderTracker()
+    _tracked(tracker)
+    tracker.on_ack("t-1", OrderResult(400, {"code": -2010, "msg": "Account has insufficient balance."}))
+    assert tracker.get("t-1").status == "REJECTED"
+    assert tracker.open_orders() == []
+
+
+def test_throttled_ack_settles_too():
+    # Rate-limited before execution: nothing reached the book
+    tracker = OrderTracker()
+    _tracked(tracker)
+    tracker.on_ack("t-1", OrderResult(429, {"code": -1003, "msg": "Too many requests."}))
+    assert tracker.get("t-1").status == "REJECTED"
+
+
+def test_unknown_outcome_stays_pending():
+    tracker = OrderTracker()
+    _tracked(tracker)
+    tracker.on_ack("t-1", OrderResult(503, {"code": -1007, "msg": "Timeout waiting for response."}))
+    tracker.on_ack("t-1", OrderResult(408, {"code": -1007, "msg": "Timeout waiting for response."}))
+    assert tracker.get("t-1").status == "PENDING_NEW"
+    assert [s.client_order_id for s in tracker.open_orders()] == ["t-1"]
+
+
+def test_ack_does_not_undo_a_stream_update():
+    tracker = OrderTracker()
+    _tracked(tracker)
+    tracker.apply_execution({"c": "t-1", "s": "BTCUSDT", "S": "BUY", "o": "LIMIT", "p": "50000", "q": "0.01",
+                             "z": "0", "X": "NEW", "x": "NEW", "i": 7, "E": 1})
+    tracker.on_ack("t-1", OrderResult(400, {"code": -2010, "msg": "Account has insufficient balance."}))
+    assert tracker.get("t-1").status == "NEW"
+
+
+def test_exchange_rejection_through_the_backend():
+    backend = get_backend("spot")
+    ask = backend.price("BTCUSDT") * 1.01
+    cid = make_client_order_id("test")
+    get_order_tracker().track(cid, "BTCUSDT", "BUY", "LIMIT_MAKER", ask, "0.001", strategy="test")
+    # A maker-only order that would take is rejected by the exchange
+    response = backend.new_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT_MAKER", "quantity": "0.001",
+                                  "price": f"{ask:.2f}", "newClientOrderId": cid}, strategy="test")
+    assert response.status_code == 400
+    assert get_order_tracker().get(cid).status == "REJECTED"
+    assert cid not in {s.client_order_id for s in get_order_tracker().open_orders()}